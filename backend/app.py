@@ -2,6 +2,7 @@ from flask import Flask
 from flask_cors import CORS
 from config.config import DevelopmentConfig
 from extensions import db
+from utils.database import init_database_profile
 from models import *
 
 def create_app(config_class=DevelopmentConfig):
@@ -9,9 +10,66 @@ def create_app(config_class=DevelopmentConfig):
     app.config.from_object(config_class)
     
     # Initialize Extensions
-    db.init_app(app)
+    init_database_profile(app, db)
     CORS(app)
     
+    # Cache / pub-sub shared by all workers (in-process unless SHARED_CACHE_URL is set)
+    from services.shared_cache import shared_cache
+    shared_cache.init_app(app)
+    
+    # Batched inserts for high-frequency tables
+    from services.write_behind import write_behind
+    from services.news_ingestion import news_ingestion, UPSERT_COLUMNS
+    from services.regime_service import REGIME_COLUMNS
+    write_behind.init_app(app)
+    write_behind.register(NewsEvent, conflict_keys=('tenant_id', 'external_id'), update_columns=UPSERT_COLUMNS)
+    write_behind.register(PriceData, conflict_keys=('symbol', 'timeframe', 'timestamp'),
+                          update_columns=('open', 'high', 'low', 'close', 'volume', 'source'),
+                          index_where=PriceData.tenant_id.is_(None))
+    write_behind.register(RegimeSnapshot, conflict_keys=('symbol', 'timeframe'), update_columns=REGIME_COLUMNS)
+    
+    # Keep derived news views in step with ingestion
+    from services.calendar_service import calendar_service
+    from services.news_features import news_features
+    news_ingestion.init_app(app)
+    news_ingestion.subscribe(calendar_service.on_ingest)
+    news_ingestion.subscribe(news_features.on_ingest)
+    
+    # Prometheus /metrics, request latency histograms and optional spans
+    from utils.metrics import metrics
+    metrics.init_app(app)
+    
+    # Cache-Control / ETag / 304 and gzip (or brotli) for read endpoints
+    from utils.http_cache import http_cache
+    http_cache.init_app(app)
+    
+    # Opt-in per-request profiling (X-Profile header or sampling), off by default
+    from utils.profiler import profiler
+    profiler.init_app(app)
+    
+    # Deadline / circuit breaker settings for upstream market data
+    from services.provider_resilience import market_data
+    market_data.init_app(app)
+    
+    # One elected worker polls each QUOTE_POLL_SYMBOLS quote, the rest subscribe
+    from services.quote_poller import quote_poller
+    quote_poller.init_app(app)
+    
+    # Live 1m bars from the polled quotes: stored, merged into charts, regimes reclassified on bar close
+    from services.regime_service import regime_service
+    from services.tick_aggregator import tick_aggregator
+    regime_service.init_app(app)
+    tick_aggregator.subscribe(regime_service.on_bars)
+    tick_aggregator.init_app(app)
+    
+    # Resolve /api/v1/<tenant>/... to g.tenant (cached per subdomain)
+    from services.tenant_service import tenant_resolver
+    app.before_request(tenant_resolver.load_request_tenant)
+    
+    # Per-tenant / per-user token buckets and priority shedding (429 + Retry-After)
+    from utils.admission import admission
+    admission.init_app(app)
+    
     # Register Blueprints
     from routes.auth_routes import auth_bp
     from routes.challenge_routes import challenge_bp
@@ -0,0 +1,18 @@
+"""
+ASGI entry point (async serving mode)
+Market data and AI analysis run as native coroutines on the event loop
+(routes/async_routes.py) with async upstream clients (httpx, AsyncOpenAI);
+every other route is the regular Flask app behind asgiref's WsgiToAsgi.
+A single worker keeps thousands of slow upstream requests in flight, where
+`gunicorn -w 4` is saturated by four.
+
+Usage:
+    uvicorn asgi:app --host 0.0.0.0 --port 5000 --workers 1
+"""
+from asgiref.wsgi import WsgiToAsgi
+
+from app import create_app
+from routes.async_routes import AsyncDispatcher
+
+flask_app = create_app()
+app = AsyncDispatcher(flask_app, WsgiToAsgi(flask_app))
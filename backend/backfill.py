@@ -0,0 +1,45 @@
+import argparse
+import json
+import os
+from datetime import datetime
+from app import create_app
+from services.backfill import backfill, naive_utc
+from services.market_data_service import (MarketDataFactory, MockProvider, PolygonProvider, YFinanceProvider,
+                                          TIMEFRAME_SECONDS)
+from services.symbol_registry import symbol_registry
+
+def utc_time(value):
+    """ISO date/time; naive values are taken as UTC, others converted to it"""
+    return naive_utc(datetime.fromisoformat(value))
+
+def make_provider(name):
+    if name == 'polygon':
+        return PolygonProvider(os.environ['POLYGON_API_KEY'])
+    if name == 'yfinance':
+        return YFinanceProvider()
+    if name == 'mock':
+        return MockProvider()
+    return MarketDataFactory.get_upstream_providers()[0] # Polygon with a key, else Yahoo Finance
+
+def main():
+    parser = argparse.ArgumentParser(description="Download OHLCV history into price_data, resuming from the last stored bar")
+    parser.add_argument('--symbols', nargs='*', help='default: every listed symbol')
+    parser.add_argument('--asset-class', help='limit the default universe, e.g. FOREX or US_EQUITY')
+    parser.add_argument('--timeframe', choices=list(TIMEFRAME_SECONDS), default='1d')
+    parser.add_argument('--start', type=utc_time, help='UTC unless it carries an offset; default: 10 years back, or as far as the provider serves')
+    parser.add_argument('--end', type=utc_time, help='default: now (UTC)')
+    parser.add_argument('--provider', choices=['auto', 'polygon', 'yfinance', 'mock'], default='auto')
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--rate', type=float, help="requests per second (default: the provider's quota)")
+    parser.add_argument('--full', action='store_true', help='ignore stored bars and download the whole range')
+    args = parser.parse_args()
+    
+    symbols = args.symbols or [info.symbol for info in symbol_registry.symbols(args.asset_class)]
+    app = create_app()
+    with app.app_context():
+        summary = backfill.run(make_provider(args.provider), symbols, args.timeframe, args.start, args.end,
+                               full=args.full, max_workers=args.workers, rate=args.rate)
+    print(json.dumps(summary, indent=2))
+
+if __name__ == '__main__':
+    main()
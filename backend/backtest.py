@@ -0,0 +1,25 @@
+import argparse
+import json
+from datetime import datetime
+from app import create_app
+from services.backtester import Backtester, SIGNALS
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest AI signals over price_data history")
+    parser.add_argument('--signal', choices=list(SIGNALS), default='trade_idea')
+    parser.add_argument('--symbols', nargs='*', help='default: every symbol in price_data')
+    parser.add_argument('--start', type=datetime.fromisoformat)
+    parser.add_argument('--end', type=datetime.fromisoformat)
+    parser.add_argument('--horizon', type=int, default=20, help='max bars a trade is held')
+    parser.add_argument('--cost-bps', type=float, default=0.0, help='cost per side in basis points')
+    parser.add_argument('--workers', type=int)
+    args = parser.parse_args()
+    
+    app = create_app()
+    with app.app_context():
+        backtester = Backtester(args.signal, args.horizon, args.cost_bps, args.workers)
+        report = backtester.run_stored(args.symbols, args.start, args.end)
+    print(json.dumps(report, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""
+A noisy FREE tenant looping /ai-analysis/analyze next to a PRO tenant's
+market data reads, with admission control off and on.
+
+The worker is modelled as --threads request threads (gunicorn gthread): a
+request waits for a free thread before it runs. The LLM is FakeLLMClient
+with --llm-ms latency. The noisy tenant runs --noisy clients looping the
+analysis; the PRO tenant runs --good clients reading /market-data/last.
+The run reports the PRO tenant's latency, the noisy tenant's 429s, and how
+many LLM calls (budget) went out.
+
+Usage:
+    python benchmarks/bench_admission.py --seconds 5 --threads 8 --noisy 16 --good 4
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.pop('OPENAI_API_KEY', None)
+
+from benchmarks.stubs import FakeLLMClient, NoCacheCalendar
+from config.config import Config
+from app import create_app
+from extensions import db
+from models import Tenant
+from routes.ai_analysis_routes import analysis_service
+from services.market_data_service import MockProvider, QuoteCache
+from services.provider_resilience import market_data
+from services.write_behind import write_behind
+
+
+def build(db_path, admission):
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{db_path}'
+        DATABASE_PROFILE = 'production'
+        ADMISSION_ENABLED = admission
+        ADMISSION_TRUSTED_PROXIES = 1  # Clients are told apart by the address a proxy appended
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.add_all([Tenant(name='Noisy', subdomain='noisy', plan='FREE'),
+                            Tenant(name='Good', subdomain='good', plan='PRO')])
+        db.session.commit()
+    return app
+
+
+def run(admission, args):
+    app = build(os.path.join(tempfile.gettempdir(), 'tradesense_bench_admission.db'), admission)
+    llm = FakeLLMClient(latency=args.llm_ms / 1000)
+    analysis_service.mode, analysis_service.client, analysis_service.cache_ttl = "REAL", llm, 0
+
+    slots = threading.Semaphore(args.threads)
+    stop_at = time.monotonic() + args.seconds
+    good_latency, statuses, lock = [], {'noisy': {}, 'good': {}}, threading.Lock()
+
+    def client(tenant, n):
+        http = app.test_client()
+        headers = {'X-Forwarded-For': f'10.0.{int(tenant == "good")}.{n}'}  # One address per client
+        local = []
+        while time.monotonic() < stop_at:
+            started = time.perf_counter()
+            with slots:
+                if tenant == 'noisy':
+                    status = http.post('/api/v1/noisy/ai-analysis/analyze', json={'symbol': 'EURUSD'},
+                                       headers=headers).status_code
+                else:
+                    status = http.get('/api/v1/good/market-data/last?symbol=EURUSD', headers=headers).status_code
+            if tenant == 'good':
+                local.append(time.perf_counter() - started)
+                time.sleep(0.1)  # A chart polling its quote
+            with lock:
+                statuses[tenant][status] = statuses[tenant].get(status, 0) + 1
+        with lock:
+            good_latency.extend(local)
+
+    threads = [threading.Thread(target=client, args=('noisy', i)) for i in range(args.noisy)]
+    threads += [threading.Thread(target=client, args=('good', i)) for i in range(args.good)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    ms = np.asarray(good_latency) * 1000
+    p50, p99 = np.percentile(ms, [50, 99])
+    noisy = statuses['noisy']
+    print(f"{'on' if admission else 'off':<11}{p50:>10.1f}{p99:>10.1f}{statuses['good'].get(429, 0):>10}"
+          f"{sum(noisy.values()):>10}{noisy.get(429, 0):>8}{llm.calls:>11}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--threads', type=int, default=8, help='request threads of the modelled worker')
+    parser.add_argument('--noisy', type=int, default=16, help='clients looping AI analysis')
+    parser.add_argument('--good', type=int, default=4, help='clients polling market data')
+    parser.add_argument('--llm-ms', type=float, default=200)
+    args = parser.parse_args()
+
+    market_data._providers = [MockProvider()]
+    market_data._upstreams = None
+    market_data.cache = QuoteCache(calendar=NoCacheCalendar())
+
+    print(f"{'':<11}{'PRO read latency':>20}{'':>10}{'noisy analyze':>18}")
+    print(f"{'admission':<11}{'p50 ms':>10}{'p99 ms':>10}{'429s':>10}{'requests':>10}{'429s':>8}{'LLM calls':>11}")
+    for admission in (False, True):
+        run(admission, args)
+    write_behind.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,165 @@
+"""
+Sync (gunicorn -w 4) vs async (one ASGI worker) serving under slow upstreams.
+
+Both models serve the same app with the same stubs: market data comes from
+a FaultyProvider answering after --upstream-ms, the LLM from a fake client
+answering after --llm-ms, and the quote cache is disabled so every request
+waits on the upstream.
+
+- sync: the Flask app called from --sync-workers threads, one request per
+  thread at a time, the way `gunicorn -w 4` (sync workers) serves
+- async: asgi.py's dispatcher called on one event loop with --concurrency
+  requests in flight, the way `uvicorn asgi:app --workers 1` serves
+
+Both run in process (no sockets), so the numbers isolate the serving model.
+For an over-the-wire check, start each server and point any HTTP load tool
+at it.
+
+Usage:
+    python benchmarks/bench_asgi.py --requests 400 --concurrency 400
+    python benchmarks/bench_asgi.py --endpoint analyze --llm-ms 800
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from asgiref.wsgi import WsgiToAsgi
+
+from benchmarks.load import run_load
+from benchmarks.stubs import FaultyProvider, FakeLLMClient, FakeAsyncLLMClient
+from benchmarks.suite import TENANT, build_app
+from routes.ai_analysis_routes import analysis_service
+from routes.async_routes import AsyncDispatcher
+from services.provider_resilience import market_data
+from services.write_behind import write_behind
+
+ENDPOINTS = {
+    'last': ('GET', '/market-data/last', 'symbol=EURUSD', None),
+    'ohlcv': ('GET', '/market-data/ohlcv', 'symbol=EURUSD&limit=100', None),
+    'analyze': ('POST', '/ai-analysis/analyze', '', {'symbol': 'EURUSD'}),
+}
+
+
+def summarize(latencies, errors, elapsed, concurrency):
+    samples = np.asarray(latencies) * 1000 if latencies else np.zeros(1)
+    p50, p99 = np.percentile(samples, [50, 99])
+    return {
+        "requests": len(latencies), "errors": errors, "concurrency": concurrency,
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(float(p50), 1), "p99_ms": round(float(p99), 1),
+    }
+
+
+def run_sync(ctx, endpoint, requests, workers):
+    method, path, query, body = ENDPOINTS[endpoint]
+    url = f'/api/v1/{TENANT}{path}' + (f'?{query}' if query else '')
+
+    def op(i):
+        response = ctx.client.open(url, method=method, json=body)
+        if response.status_code >= 400:
+            raise RuntimeError(f"{url}: {response.status_code}")
+    result = run_load(op, requests=requests, concurrency=workers)
+    return {key: result[key] for key in ("requests", "errors", "concurrency", "throughput_rps", "p50_ms", "p99_ms")}
+
+
+async def _call(app, method, path, query, body):
+    payload = json.dumps(body).encode() if body is not None else b''
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'scheme': 'http',
+        'method': method, 'path': path, 'raw_path': path.encode(), 'query_string': query.encode(),
+        'root_path': '', 'headers': [(b'host', b'localhost'), (b'content-type', b'application/json'),
+                                     (b'content-length', str(len(payload)).encode())],
+        'client': ('127.0.0.1', 0), 'server': ('localhost', 80),
+    }
+    sent = False
+    status = []
+
+    async def receive():
+        nonlocal sent
+        if sent:
+            await asyncio.sleep(3600)  # Client never disconnects
+        sent = True
+        return {'type': 'http.request', 'body': payload, 'more_body': False}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            status.append(message['status'])
+
+    await app(scope, receive, send)
+    return status[0]
+
+
+def run_async(app, endpoint, requests, concurrency):
+    method, path, query, body = ENDPOINTS[endpoint]
+    path = f'/api/v1/{TENANT}{path}'
+    latencies, errors = [], 0
+
+    async def main():
+        nonlocal errors
+        gate = asyncio.Semaphore(concurrency)
+
+        async def one():
+            nonlocal errors
+            async with gate:
+                started = time.perf_counter()
+                try:
+                    if await _call(app, method, path, query, body) >= 400:
+                        errors += 1
+                except Exception:
+                    errors += 1
+                latencies.append(time.perf_counter() - started)
+
+        await one()  # Warm the tenant cache
+        latencies.clear()
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        return time.perf_counter() - started
+
+    elapsed = asyncio.run(main())
+    return summarize(latencies, errors, elapsed, concurrency)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--endpoint', choices=sorted(ENDPOINTS), action='append',
+                        help='endpoint(s) to run (default: all)')
+    parser.add_argument('--requests', type=int, default=400, help='requests per model and endpoint')
+    parser.add_argument('--sync-workers', type=int, default=4, help='gunicorn sync workers to model')
+    parser.add_argument('--concurrency', type=int, default=400, help='in-flight requests for the async worker')
+    parser.add_argument('--upstream-ms', type=float, default=200, help='market data provider latency')
+    parser.add_argument('--llm-ms', type=float, default=500, help='LLM completion latency')
+    args = parser.parse_args()
+
+    ctx = build_app(os.path.join(tempfile.gettempdir(), 'tradesense_bench_asgi.db'))
+    upstream = args.upstream_ms / 1000
+    market_data._providers = [FaultyProvider('upstream', latency=upstream, jitter=upstream * 0.1)]
+    market_data._upstreams = None
+    market_data.deadline = max(market_data.deadline, upstream * 5)
+    analysis_service.mode = "REAL"
+    analysis_service.client = FakeLLMClient(latency=args.llm_ms / 1000)
+    analysis_service.async_client = FakeAsyncLLMClient(latency=args.llm_ms / 1000)
+    analysis_service.cache_ttl = 0
+    app = AsyncDispatcher(ctx.app, WsgiToAsgi(ctx.app))
+
+    print(f"upstream {args.upstream_ms:.0f} ms, LLM {args.llm_ms:.0f} ms, {args.requests} requests per run")
+    print(f"{'endpoint':<10}{'model':<8}{'in flight':>10}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for endpoint in args.endpoint or ['last', 'ohlcv', 'analyze']:
+        for model, result in (
+            ('sync', run_sync(ctx, endpoint, args.requests, args.sync_workers)),
+            ('async', run_async(app, endpoint, args.requests, args.concurrency)),
+        ):
+            print(f"{endpoint:<10}{model:<8}{result['concurrency']:>10}{result['throughput_rps']:>10.1f}"
+                  f"{result['p50_ms']:>10.1f}{result['p99_ms']:>10.1f}{result['errors']:>8}")
+    write_behind.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""
+Historical backfill of a symbol universe from HistoryStubProvider.
+
+Each request takes --latency-ms and serves at most --span-days of bars, so
+--years of daily history is several chunks per symbol. Runs:
+- serial: one worker, chunks one after another
+- parallel: --workers concurrent chunk downloads
+- quota: parallel against an upstream that rejects requests above
+  --quota requests per second, with the rate limiter off and on; rejected
+  requests are retried with backoff
+- outage + resume: the upstream fails after half the requests; the run
+  stores a gap-free prefix per symbol, then a second run against a healthy
+  upstream resumes from the last stored bar (the outage run does not retry)
+
+After each run the stored bars are checked against the full expected series
+(count per symbol, no gaps, no duplicates).
+
+Usage:
+    python benchmarks/bench_backfill.py --symbols 20 --years 10 --workers 8
+"""
+import argparse
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stubs import HistoryStubProvider
+from config.config import Config
+from app import create_app
+from extensions import db
+from models import PriceData
+from services.backfill import BackfillService
+from services.symbol_registry import symbol_registry
+from services.write_behind import write_behind
+
+END = datetime(2026, 1, 1)
+
+
+class BenchConfig(Config):
+    SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(tempfile.gettempdir(), 'tradesense_bench_backfill.db')}"
+    DATABASE_PROFILE = 'production'
+
+
+def verify(symbols, start):
+    """Stored daily bars vs the expected series: (bars, symbols complete)"""
+    expected = (END - start).days
+    complete = 0
+    for symbol in symbols:
+        stamps = [row[0] for row in db.session.query(PriceData.timestamp).filter(
+            PriceData.symbol == symbol, PriceData.timeframe == '1d').order_by(PriceData.timestamp)]
+        gap_free = all(b - a == timedelta(days=1) for a, b in zip(stamps, stamps[1:]))
+        if len(stamps) == expected and gap_free and stamps[0] == start:
+            complete += 1
+    return db.session.query(PriceData).count(), complete
+
+
+def report(mode, workers, summary, provider, symbols, start):
+    bars, complete = verify(symbols, start)
+    print(f"{mode:<17}{workers:>8}{summary['requests']:>10}{summary['retries']:>9}{provider.rejected:>10}"
+          f"{summary['bars']:>10}{summary['seconds']:>10.2f}{bars:>10}{complete:>6}/{len(symbols)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--symbols', type=int, default=20)
+    parser.add_argument('--years', type=int, default=10)
+    parser.add_argument('--span-days', type=int, default=365, help='longest range per upstream request')
+    parser.add_argument('--latency-ms', type=float, default=100)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--quota', type=float, default=20, help='upstream requests per second in the quota run')
+    args = parser.parse_args()
+
+    symbols = [info.symbol for info in symbol_registry.symbols()][:args.symbols]
+    start = END - timedelta(days=365 * args.years)
+    app = create_app(BenchConfig)
+    ctx = app.app_context()
+    ctx.push()
+    service = BackfillService(backoff=0.2)
+
+    def fresh_run(mode, workers, provider, **kwargs):
+        db.drop_all()
+        db.create_all()
+        summary = service.run(provider, symbols, '1d', start, END, max_workers=workers, **kwargs)
+        report(mode, workers, summary, provider, symbols, start)
+
+    print(f"{len(symbols)} symbols x {args.years} years of daily bars, {args.span_days}-day chunks, "
+          f"{args.latency_ms:.0f} ms per request")
+    print(f"{'run':<17}{'workers':>8}{'requests':>10}{'retries':>9}{'rejected':>10}{'bars':>10}{'seconds':>10}"
+          f"{'stored':>10}{'complete':>9}")
+    stub = dict(latency=args.latency_ms / 1000, span_days=args.span_days)
+    fresh_run('serial', 1, HistoryStubProvider(**stub))
+    fresh_run('parallel', args.workers, HistoryStubProvider(**stub))
+    fresh_run('quota, no limit', args.workers, HistoryStubProvider(requests_per_second=args.quota, **stub), rate=0)
+    fresh_run('quota, limited', args.workers, HistoryStubProvider(requests_per_second=args.quota, **stub))
+
+    chunks = len(service.plan(HistoryStubProvider(**stub), symbols, '1d', start, END, full=True))
+    service.retries = 0
+    fresh_run('outage', args.workers, HistoryStubProvider(fail_after=chunks // 2, **stub))
+    provider = HistoryStubProvider(**stub)
+    summary = service.run(provider, symbols, '1d', start, END, max_workers=args.workers)
+    report('resume', args.workers, summary, provider, symbols, start)
+
+    ctx.pop()
+    write_behind.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""
+Backtester throughput: 10 years of daily bars for 500 symbols.
+
+Generates random-walk OHLC series in memory (regime-switching drift and
+volatility), then times both built-in signals through Backtester.run with
+a single process and with the process pool. --from-db seeds price_data
+first and includes the history load in the timing.
+
+Usage:
+    python benchmarks/bench_backtester.py --symbols 500 --years 10
+    python benchmarks/bench_backtester.py --symbols 500 --years 10 --workers 8 --from-db
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.backtester import Backtester, SIGNALS
+
+TRADING_DAYS = 252
+
+
+def generate(symbols: int, bars: int, seed: int = 11):
+    rng = np.random.default_rng(seed)
+    history = {}
+    for i in range(symbols):
+        regime = np.repeat(rng.integers(0, 3, bars // 60 + 1), 60)[:bars]
+        drift = np.choose(regime, [0.0, 0.0015, -0.0015])
+        sigma = np.choose(regime, [0.008, 0.012, 0.02])
+        close = 100 * np.exp(np.cumsum(drift + sigma * rng.standard_normal(bars)))
+        open_ = np.r_[close[0], close[:-1]] * (1 + 0.002 * rng.standard_normal(bars))
+        wick = np.abs(rng.standard_normal((2, bars))) * sigma * close
+        history[f'SYM{i:04d}'] = {
+            'open': open_, 'close': close,
+            'high': np.maximum(open_, close) + wick[0],
+            'low': np.minimum(open_, close) - wick[1],
+        }
+    return history
+
+
+def seed_db(history):
+    from config.config import Config
+    from app import create_app
+    from extensions import db
+    from models import PriceData
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(tempfile.gettempdir(), 'tradesense_backtest.db')}"
+
+    app = create_app(BenchConfig)
+    ctx = app.app_context()
+    ctx.push()
+    db.drop_all()
+    db.create_all()
+    start = datetime(2014, 1, 1)
+    for symbol, bars in history.items():
+        db.session.execute(PriceData.__table__.insert(), [
+            {'symbol': symbol, 'timestamp': start + timedelta(days=t), 'open': bars['open'][t], 'high': bars['high'][t],
+             'low': bars['low'][t], 'close': bars['close'][t], 'volume': 0.0, 'source': 'BENCH'}
+            for t in range(len(bars['close']))
+        ])
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--symbols', type=int, default=500)
+    parser.add_argument('--years', type=int, default=10)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--from-db', action='store_true')
+    args = parser.parse_args()
+
+    bars = args.years * TRADING_DAYS
+    history = generate(args.symbols, bars)
+    if args.from_db:
+        seed_db(history)
+    print(f"{args.symbols} symbols x {bars} daily bars ({args.symbols * bars:,} bars), workers={args.workers}")
+    print(f"{'signal':<20}{'workers':>8}{'seconds':>10}{'trades':>10}{'win %':>8}{'avg sym ret %':>15}{'worst dd %':>12}")
+
+    for signal in SIGNALS:
+        for workers in sorted({1, args.workers}):
+            backtester = Backtester(signal=signal, workers=workers)
+            started = time.perf_counter()
+            report = backtester.run_stored() if args.from_db else backtester.run(history)
+            elapsed = time.perf_counter() - started
+            s = report['summary']
+            print(f"{signal:<20}{workers:>8}{elapsed:>10.2f}{s['trades']:>10}{s['win_rate']:>8}"
+                  f"{s['avg_symbol_return']:>15}{s['worst_drawdown']:>12}")
+
+
+if __name__ == '__main__':
+    main()
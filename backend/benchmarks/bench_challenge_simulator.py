@@ -0,0 +1,60 @@
+"""
+Challenge rule tuning at scale: many rule variants over millions of trades.
+
+Builds a synthetic trader population (per-challenge skill around a 48% win
+rate, several trades a day), replays it through a daily loss x max
+drawdown x profit target grid and prints the timing plus the variants with
+the highest and lowest pass rates.
+
+Usage:
+    python benchmarks/bench_challenge_simulator.py --challenges 50000 --trades 100 --steps 10
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.challenge_simulator import ChallengeSimulator, rule_grid
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--challenges', type=int, default=50000)
+    parser.add_argument('--trades', type=int, default=100, help='mean trades per challenge')
+    parser.add_argument('--steps', type=int, default=10, help='values per rule dimension')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    simulator = ChallengeSimulator(workers=args.workers)
+    started = time.perf_counter()
+    streams = simulator.synthetic_streams(args.challenges, args.trades)
+    generated = time.perf_counter() - started
+    grid = rule_grid(
+        daily_loss_pcts=[None, *np.round(np.linspace(0.02, 0.06, args.steps - 1), 4)],
+        max_drawdown_pcts=np.round(np.linspace(0.05, 0.15, args.steps), 4),
+        profit_target_pcts=np.round(np.linspace(0.05, 0.15, args.steps), 4),
+    )
+    print(f"{len(streams):,} challenges, {int(streams.counts.sum()):,} trades (generated in {generated:.1f}s), "
+          f"{len(grid):,} rule variants, workers={args.workers}")
+
+    started = time.perf_counter()
+    results = simulator.run(streams, grid)
+    elapsed = time.perf_counter() - started
+    evaluations = len(grid) * int(streams.counts.sum())
+    print(f"replayed in {elapsed:.1f}s ({evaluations / elapsed / 1e6:,.0f}M variant-trades/s)")
+
+    header = f"{'daily':>8}{'max dd':>8}{'target':>8}{'pass %':>8}{'fail daily':>12}{'fail dd':>9}{'active':>8}{'trades':>8}"
+    for label, rows in (("highest pass rate", results[:5]), ("lowest pass rate", results[-5:])):
+        print(f"\n{label}\n{header}")
+        for r in rows:
+            daily = '-' if r['daily_loss_pct'] is None else r['daily_loss_pct']
+            print(f"{daily:>8}{r['max_drawdown_pct']:>8}{r['profit_target_pct']:>8}{r['pass_rate']:>8}"
+                  f"{r['failed_daily']:>12}{r['failed_drawdown']:>9}{r['active']:>8}{str(r['avg_trades_to_pass']):>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""
+Concurrent writer benchmark: default SQLite engine vs the production profile.
+
+Spawns one process per simulated gunicorn worker. Each worker inserts trades
+with one commit per row (like place_trade) while reader threads run the
+open-trades query. Reports committed rows/s, lock errors and pool checkout
+wait for both engine configurations.
+
+Usage:
+    python benchmarks/bench_concurrent_writers.py --workers 4 --seconds 10
+    python benchmarks/bench_concurrent_writers.py --url postgresql://localhost/tradesense_bench
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from extensions import db
+from models import *  # noqa: F401,F403 - registers every table on db.metadata
+from utils.database import engine_options, apply_sqlite_tuning, pool_stats
+
+PROFILE_CONFIG = {'DB_POOL_SIZE': 5, 'DB_MAX_OVERFLOW': 10, 'DB_POOL_TIMEOUT': 30, 'DB_POOL_RECYCLE': 1800}
+
+
+def make_engine(url: str, profile: str):
+    if profile == 'production':
+        engine = create_engine(url, **engine_options(url, PROFILE_CONFIG))
+        apply_sqlite_tuning(engine)
+        return engine
+    return create_engine(url)
+
+
+def worker(url, profile, seconds, readers, result_queue):
+    engine = make_engine(url, profile)
+    stop_at = time.monotonic() + seconds
+    counts = {'rows': 0, 'errors': 0, 'reads': 0}
+    insert = text(
+        "INSERT INTO trades (tenant_id, challenge_id, symbol, side, volume, entry_price, pnl, opened_at) "
+        "VALUES (1, :challenge_id, 'EURUSD', 'BUY', 1.0, 1.095, 0.0, :opened_at)"
+    )
+
+    def read_loop():
+        while time.monotonic() < stop_at:
+            try:
+                with engine.connect() as conn:
+                    conn.execute(text(
+                        "SELECT COUNT(*) FROM trades WHERE tenant_id = 1 AND challenge_id = 1 AND closed_at IS NULL"
+                    )).scalar()
+                counts['reads'] += 1
+            except OperationalError:
+                counts['errors'] += 1
+
+    threads = [threading.Thread(target=read_loop) for _ in range(readers)]
+    for t in threads:
+        t.start()
+
+    pid = os.getpid()
+    while time.monotonic() < stop_at:
+        try:
+            with engine.begin() as conn:
+                conn.execute(insert, {'challenge_id': pid % 100 + 1, 'opened_at': datetime.utcnow()})
+            counts['rows'] += 1
+        except OperationalError:
+            counts['errors'] += 1
+
+    for t in threads:
+        t.join()
+    counts.update(pool_stats(engine))
+    result_queue.put(counts)
+
+
+def run(url, profile, workers, seconds, readers):
+    setup = make_engine(url, profile)
+    db.metadata.drop_all(setup)
+    db.metadata.create_all(setup)
+    setup.dispose()
+
+    queue = multiprocessing.Queue()
+    procs = [multiprocessing.Process(target=worker, args=(url, profile, seconds, readers, queue)) for _ in range(workers)]
+    for p in procs:
+        p.start()
+    results = [queue.get() for _ in procs]
+    for p in procs:
+        p.join()
+
+    rows = sum(r['rows'] for r in results)
+    print(f"{profile:<12}{rows / seconds:>12.0f}{sum(r['reads'] for r in results) / seconds:>12.0f}"
+          f"{sum(r['errors'] for r in results):>10}"
+          f"{max(r['avg_wait_ms'] for r in results):>14.3f}{max(r['max_wait_ms'] for r in results):>14.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default=f"sqlite:///{os.path.join(tempfile.gettempdir(), 'tradesense_writers.db')}")
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--readers', type=int, default=2, help='reader threads per worker')
+    parser.add_argument('--seconds', type=float, default=10)
+    args = parser.parse_args()
+
+    print(f"{args.workers} workers x (1 writer + {args.readers} readers), {args.seconds:.0f}s each on {args.url.split('://')[0]}")
+    print(f"{'profile':<12}{'writes/s':>12}{'reads/s':>12}{'errors':>10}{'avg wait ms':>14}{'max wait ms':>14}")
+    for profile in ('default', 'production'):
+        if args.url.startswith('sqlite'):
+            path = make_engine(args.url, profile).url.database
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+        run(args.url, profile, args.workers, args.seconds, args.readers)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Bytes on the wire and latency of chart / news reloads with HTTP caching.
+
+For each endpoint a client fetches the page, then reloads it --requests
+times in four ways:
+- identity: no Accept-Encoding, no validator (the old behaviour)
+- gzip / br: compressed body (br only if the brotli package is installed)
+- revalidate: If-None-Match with the ETag from the first response, so the
+  answer is 304 Not Modified with no body
+
+The app runs in process on the benchmark suite's offline setup, except that
+the quote cache is on (a reload within the quote TTL sees the same bars).
+
+Usage:
+    python benchmarks/bench_http_cache.py --requests 200
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stubs import OpenMarketCalendar
+from benchmarks.suite import TENANT, build_app
+from services.market_data_service import QuoteCache
+from services.provider_resilience import market_data
+from services.write_behind import write_behind
+from utils.http_cache import brotli
+
+PATHS = {
+    'ohlcv_1000': '/market-data/ohlcv?symbol=EURUSD&limit=1000',
+    'ohlcv_100': '/market-data/ohlcv?symbol=EURUSD&limit=100',
+    'news_100': '/news/?limit=100',
+    'news_sources': '/news/sources',
+}
+
+
+def reload(client, url, requests, headers):
+    sizes, latencies = [], []
+    for _ in range(requests):
+        started = time.perf_counter()
+        response = client.get(url, headers=headers)
+        body = response.get_data()
+        latencies.append(time.perf_counter() - started)
+        sizes.append(len(body))
+    return int(np.mean(sizes)), float(np.percentile(np.asarray(latencies) * 1000, 50))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=200)
+    args = parser.parse_args()
+
+    ctx = build_app(os.path.join(tempfile.gettempdir(), 'tradesense_bench_http.db'))
+    market_data.cache = QuoteCache(calendar=OpenMarketCalendar())
+    client = ctx.app.test_client()
+    modes = [('identity', {}), ('gzip', {'Accept-Encoding': 'gzip'})]
+    if brotli is not None:
+        modes.append(('br', {'Accept-Encoding': 'br, gzip'}))
+
+    print(f"{'endpoint':<14}{'mode':<12}{'bytes':>10}{'p50 ms':>10}{'vs identity':>13}")
+    for name, path in PATHS.items():
+        url = f'/api/v1/{TENANT}{path}'
+        first = client.get(url, headers={'Accept-Encoding': 'gzip'})
+        runs = modes + [('revalidate', {'Accept-Encoding': 'gzip', 'If-None-Match': first.headers['ETag']})]
+        base = None
+        for mode, headers in runs:
+            size, p50 = reload(client, url, args.requests, headers)
+            base = base or size
+            print(f"{name:<14}{mode:<12}{size:>10}{p50:>10.3f}{size / base:>12.1%}")
+    write_behind.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+Upstream price requests over one simulated week, fixed TTL vs market hours.
+
+Polls get_last_price for each symbol every --interval seconds from Monday
+00:00 UTC for 7 days against a counting provider stand-in, once through a
+QuoteCache with a fixed TTL and once with the market-calendar TTL, and
+prints upstream calls per symbol.
+
+Usage:
+    python benchmarks/bench_market_hours.py --interval 15 --start 2026-03-02
+"""
+import argparse
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.market_calendar import MarketCalendar
+from services.market_data_service import CachedProvider, IMarketDataProvider, QuoteCache
+
+SYMBOLS = ['TSLA', 'AAPL', 'IAM.MA', 'ATW.MA', 'EURUSD', 'GOLD', 'BTCUSD']
+
+
+class CountingProvider(IMarketDataProvider):
+    def __init__(self):
+        self.calls = {}
+
+    def get_last_price(self, symbol):
+        self.calls[symbol] = self.calls.get(symbol, 0) + 1
+        return 100.0
+
+    def get_ohlcv(self, symbol, timeframe, limit):
+        return []
+
+
+class FixedTTL:
+    def ttl(self, symbol, open_ttl, now=None):
+        return open_ttl
+
+
+class Clock:
+    def __init__(self, start: float):
+        self.now = start
+
+    def __call__(self):
+        return self.now
+
+
+def replay(calendar, start: datetime, interval: int, days: int):
+    clock = Clock(start.timestamp())
+    provider = CountingProvider()
+    cached = CachedProvider(provider, QuoteCache(calendar=calendar, clock=clock))
+    end = clock.now + days * 86400
+    polls = 0
+    while clock.now < end:
+        for symbol in SYMBOLS:
+            cached.get_last_price(symbol)
+        polls += 1
+        clock.now += interval
+    return provider.calls, polls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--interval', type=int, default=15, help='seconds between polls (= open-market TTL)')
+    parser.add_argument('--start', default='2026-03-02', help='a Monday (UTC)')
+    parser.add_argument('--days', type=int, default=7)
+    args = parser.parse_args()
+
+    start = datetime.fromisoformat(args.start).replace(tzinfo=None)
+    QuoteCache.LAST_PRICE_TTL = args.interval
+    fixed, polls = replay(FixedTTL(), start, args.interval, args.days)
+    hours, _ = replay(MarketCalendar(), start, args.interval, args.days)
+
+    print(f"{polls:,} polls per symbol over {args.days} days from {start:%a %Y-%m-%d} UTC, TTL {args.interval}s while open")
+    print(f"{'symbol':<10}{'fixed TTL':>12}{'market hours':>14}{'saved':>9}")
+    for symbol in SYMBOLS:
+        saved = 1 - hours[symbol] / fixed[symbol]
+        print(f"{symbol:<10}{fixed[symbol]:>12,}{hours[symbol]:>14,}{saved:>9.1%}")
+    equities = [s for s in SYMBOLS if s in ('TSLA', 'AAPL') or s.endswith('.MA')]
+    total_fixed, total_hours = sum(fixed[s] for s in equities), sum(hours[s] for s in equities)
+    print(f"{'equities':<10}{total_fixed:>12,}{total_hours:>14,}{1 - total_hours / total_fixed:>9.1%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+News ingestion against a local feed stand-in.
+
+Creates N tenants sharing a couple of feeds, then polls three times:
+initial load, unchanged feeds (304s, no writes) and a feed update (upsert of
+changed rows, no duplicates). Prints upstream request counts and row totals.
+
+Usage:
+    python benchmarks/bench_news_ingestion.py --tenants 50 --feeds 2 --events 500
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.config import Config
+from app import create_app
+from extensions import db
+from models import Tenant, TenantSettings, NewsEvent
+from services.news_ingestion import news_ingestion
+from benchmarks.stubs import FeedStubServer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tenants', type=int, default=50)
+    parser.add_argument('--feeds', type=int, default=2)
+    parser.add_argument('--events', type=int, default=500)
+    parser.add_argument('--url', default=f"sqlite:///{os.path.join(tempfile.gettempdir(), 'tradesense_news.db')}")
+    args = parser.parse_args()
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = args.url
+        DATABASE_PROFILE = 'production'
+
+    stubs = [FeedStubServer(events_per_feed=args.events).start() for _ in range(args.feeds)]
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        for t in range(1, args.tenants + 1):
+            tenant = Tenant(id=t, name=f'Tenant {t}', subdomain=f'tenant{t}')
+            db.session.add(tenant)
+            db.session.add(TenantSettings(tenant_id=t, news_api_base_url=stubs[t % args.feeds].url, news_api_key='demo'))
+        db.session.commit()
+
+        def poll(label):
+            before = sum(s.requests for s in stubs)
+            started = time.perf_counter()
+            result = news_ingestion.poll_once()
+            elapsed = time.perf_counter() - started
+            rows = NewsEvent.query.count()
+            print(f"{label:<22}{sum(s.requests for s in stubs) - before:>10}{result['rows_upserted']:>12}"
+                  f"{rows:>12}{elapsed:>10.2f}")
+
+        print(f"{args.tenants} tenants on {args.feeds} shared feeds, {args.events} events per feed endpoint")
+        print(f"{'poll':<22}{'upstream':>10}{'upserted':>12}{'rows':>12}{'seconds':>10}")
+        poll('initial')
+        poll('unchanged (304)')
+        for stub in stubs:
+            stub.publish(new_events=10)
+        poll('feed updated')
+        print(f"304 responses: {sum(s.not_modified for s in stubs)}; stats: {news_ingestion.stats}")
+
+    for stub in stubs:
+        stub.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""
+Request latency through a primary provider outage, direct vs resilience layer.
+
+Runs --clients concurrent pollers of the last price through a scripted
+sequence of primary faults (healthy, hang, error, slow, recovered) against
+fault-injecting stub providers (primary + secondary). "direct" is the old
+route behaviour (call the primary, fall back to the mock on an exception);
+"resilient" goes through ResilientMarketData with circuit breakers,
+deadlines and hedging. The quote cache is disabled so every request
+exercises the upstream path. Prints latency percentiles and the share of
+stale / simulated answers per phase.
+
+Usage:
+    python benchmarks/bench_provider_resilience.py --phase-seconds 4 --clients 8 --deadline-ms 500
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stubs import FaultyProvider, NoCacheCalendar
+from services.market_data_service import MockProvider, QuoteCache
+from services.provider_resilience import ResilientMarketData
+
+PHASES = ['healthy', 'hang', 'error', 'slow', 'healthy']
+SYMBOLS = ['EURUSD', 'GBPUSD', 'BTCUSD', 'GOLD', 'TSLA']
+
+
+def direct(primary, fallback):
+    def fetch(symbol):
+        try:
+            return primary.get_last_price(symbol), 'primary'
+        except Exception:
+            return fallback.get_last_price(symbol), 'mock'
+    return fetch
+
+
+def resilient(layer):
+    def fetch(symbol):
+        result = layer.last_price(symbol)
+        if result.source == 'MockProvider':
+            return result.value, 'mock'
+        return result.value, 'stale' if result.stale else result.source
+    return fetch
+
+
+def run(name, fetch, primary, phase_seconds, clients):
+    print(f"\n{name}")
+    print(f"{'phase':<10}{'requests':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}{'stale%':>9}{'mock%':>8}")
+    for phase in PHASES:
+        primary.set_mode(phase)
+        samples, outcomes, lock = [], [], threading.Lock()
+        stop_at = time.monotonic() + phase_seconds
+
+        def client(i):
+            n = i
+            while time.monotonic() < stop_at:
+                started = time.perf_counter()
+                _, outcome = fetch(SYMBOLS[n % len(SYMBOLS)])
+                with lock:
+                    samples.append((time.perf_counter() - started) * 1000)
+                    outcomes.append(outcome)
+                n += 1
+
+        threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        latencies = np.array(samples)
+        stale = sum(o == 'stale' for o in outcomes) / len(outcomes) * 100
+        mock = sum(o == 'mock' for o in outcomes) / len(outcomes) * 100
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        print(f"{phase:<10}{len(samples):>10}{p50:>10.1f}{p95:>10.1f}{p99:>10.1f}{latencies.max():>10.1f}{stale:>9.1f}{mock:>8.1f}")
+    primary.set_mode('healthy')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--phase-seconds', type=float, default=4.0)
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--deadline-ms', type=int, default=500)
+    parser.add_argument('--upstream-timeout', type=float, default=3.0, help='seconds a hung call takes to fail')
+    args = parser.parse_args()
+
+    def providers():
+        primary = FaultyProvider('primary', latency=0.03, jitter=0.02, slow_latency=0.8,
+                                 hang_timeout=args.upstream_timeout, price=100.0)
+        secondary = FaultyProvider('secondary', latency=0.06, jitter=0.04, price=100.5, seed=1)
+        return primary, secondary
+
+    primary, _ = providers()
+    run("direct (primary, mock on error)", direct(primary, MockProvider()), primary, args.phase_seconds, args.clients)
+
+    primary, secondary = providers()
+    layer = ResilientMarketData(providers=[primary, secondary], fallback=MockProvider(),
+                                cache=QuoteCache(calendar=NoCacheCalendar()), deadline=args.deadline_ms / 1000,
+                                reset_timeout=1.0)
+    run(f"resilient (deadline {args.deadline_ms}ms, hedged)", resilient(layer), primary, args.phase_seconds, args.clients)
+    status = layer.status()
+    print("\nbreakers:", {p["name"]: p["opened"] for p in status["providers"]},
+          {k: status[k] for k in ("hedged", "secondary_wins", "timeouts", "errors", "stale", "fallback")})
+
+
+if __name__ == '__main__':
+    main()
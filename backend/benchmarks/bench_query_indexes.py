@@ -0,0 +1,211 @@
+"""
+Query benchmark for the secondary indexes declared in models/trading.py.
+
+Seeds large trades / news_events / leaderboard_snapshots tables, times the
+hot queries without the managed indexes, then builds them through the
+schema migration helpers and times the same queries again. SQLite cannot
+drop inline unique constraints, so the unique-key lookups (news external_id,
+leaderboard period) are indexed in both SQLite runs.
+
+Usage:
+    python benchmarks/bench_query_indexes.py --rows 2000000
+    python benchmarks/bench_query_indexes.py --rows 2000000 --postgres-url postgresql://localhost/tradesense_bench
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, text
+from extensions import db
+from models import *  # noqa: F401,F403 - registers every table on db.metadata
+from utils.schema import INDEXED_TABLES, create_missing_indexes, drop_secondary_indexes
+
+TENANTS = 20
+USERS_PER_TENANT = 500
+CHALLENGES_PER_USER = 4
+CURRENCIES = ['USD', 'EUR', 'GBP', 'JPY', 'CHF', 'AUD', 'CAD', 'NZD', 'MAD', 'CNY']
+SYMBOLS = ['EURUSD', 'GBPUSD', 'USDJPY', 'BTCUSD', 'TSLA', 'AAPL', 'GOLD', 'IAM.MA', 'ATW.MA', 'BCP.MA']
+BATCH = 20000
+EPOCH = datetime(2024, 1, 1)
+
+QUERIES = {
+    'open_trades_per_challenge': (
+        "SELECT id, symbol, side, volume, entry_price FROM trades "
+        "WHERE tenant_id = :tenant_id AND challenge_id = :challenge_id AND closed_at IS NULL"
+    ),
+    'trade_history_per_challenge': (
+        "SELECT id, pnl, opened_at FROM trades WHERE tenant_id = :tenant_id AND challenge_id = :challenge_id "
+        "ORDER BY opened_at DESC LIMIT 50"
+    ),
+    'news_by_currency_and_time': (
+        "SELECT event_name, impact, event_time FROM news_events "
+        "WHERE tenant_id = :tenant_id AND currency = :currency AND event_time BETWEEN :start AND :end "
+        "ORDER BY event_time"
+    ),
+    'news_by_external_id': (
+        "SELECT id FROM news_events WHERE tenant_id = :tenant_id AND external_id = :external_id"
+    ),
+    'leaderboard_by_tenant_period': (
+        "SELECT user_id, profit_percent, rank FROM leaderboard_snapshots "
+        "WHERE tenant_id = :tenant_id AND period = :period ORDER BY rank LIMIT 50"
+    ),
+    'active_challenges_per_tenant': (
+        "SELECT COUNT(*) FROM user_challenges WHERE tenant_id = :tenant_id AND status = 'ACTIVE'"
+    ),
+}
+
+
+def _insert_batches(conn, table_name, rows_iter):
+    table = db.metadata.tables[table_name]
+    batch = []
+    for row in rows_iter:
+        batch.append(row)
+        if len(batch) >= BATCH:
+            conn.execute(table.insert(), batch)
+            batch = []
+    if batch:
+        conn.execute(table.insert(), batch)
+
+
+def seed(engine, rows: int):
+    rng = random.Random(42)
+    users = TENANTS * USERS_PER_TENANT
+    challenges = users * CHALLENGES_PER_USER
+    print(f"Seeding {TENANTS} tenants, {users} users, {challenges} challenges, {rows} trades, {rows} news events...")
+    started = time.perf_counter()
+
+    with engine.begin() as conn:
+        _insert_batches(conn, 'tenants', (
+            {'id': t, 'name': f'Tenant {t}', 'subdomain': f'tenant{t}', 'plan': 'PRO', 'created_at': EPOCH}
+            for t in range(1, TENANTS + 1)
+        ))
+        _insert_batches(conn, 'users', (
+            {'id': u, 'tenant_id': (u - 1) // USERS_PER_TENANT + 1, 'email': f'user{u}@example.com',
+             'password_hash': 'x', 'role': 'TRADER', 'created_at': EPOCH}
+            for u in range(1, users + 1)
+        ))
+        _insert_batches(conn, 'user_challenges', (
+            {'id': c, 'tenant_id': ((c - 1) // CHALLENGES_PER_USER) // USERS_PER_TENANT + 1,
+             'user_id': (c - 1) // CHALLENGES_PER_USER + 1, 'challenge_type': 'PRO',
+             'initial_balance': 50000.0, 'current_equity': 50000.0, 'daily_max_loss': 2500.0,
+             'max_drawdown': 5000.0, 'profit_target': 5000.0,
+             'status': rng.choice(['ACTIVE', 'ACTIVE', 'FAILED', 'PASSED']),
+             'created_at': EPOCH, 'updated_at': EPOCH}
+            for c in range(1, challenges + 1)
+        ))
+
+    def trades():
+        for i in range(1, rows + 1):
+            challenge_id = rng.randint(1, challenges)
+            opened = EPOCH + timedelta(minutes=i)
+            is_open = rng.random() < 0.05
+            yield {
+                'id': i, 'tenant_id': ((challenge_id - 1) // CHALLENGES_PER_USER) // USERS_PER_TENANT + 1,
+                'challenge_id': challenge_id, 'symbol': rng.choice(SYMBOLS), 'side': rng.choice(['BUY', 'SELL']),
+                'volume': 1.0, 'entry_price': 100.0, 'exit_price': None if is_open else 101.0,
+                'pnl': 0.0 if is_open else rng.uniform(-50, 50), 'opened_at': opened,
+                'closed_at': None if is_open else opened + timedelta(minutes=30),
+                'stop_loss': None, 'take_profit': None,
+            }
+
+    def news():
+        for i in range(1, rows + 1):
+            yield {
+                'id': i, 'tenant_id': rng.randint(1, TENANTS), 'external_id': f'evt_{i}', 'source': 'CALENDAR_API',
+                'currency': rng.choice(CURRENCIES), 'event_name': 'CPI m/m', 'category': 'Macro',
+                'event_time': EPOCH + timedelta(seconds=i * 30), 'impact': rng.choice(['HIGH', 'MEDIUM', 'LOW']),
+                'actual': None, 'forecast': None, 'previous': None,
+            }
+
+    def snapshots():
+        # One snapshot per (user, month): the key is unique
+        for i in range(1, rows // 10 + 1):
+            user_id = (i - 1) % users + 1
+            month = (i - 1) // users
+            yield {
+                'id': i, 'tenant_id': (user_id - 1) // USERS_PER_TENANT + 1, 'period': f'{2020 + month // 12}-{month % 12 + 1:02d}',
+                'user_id': user_id, 'profit_percent': rng.uniform(-10, 20), 'rank': rng.randint(1, USERS_PER_TENANT),
+            }
+
+    with engine.begin() as conn:
+        _insert_batches(conn, 'trades', trades())
+    with engine.begin() as conn:
+        _insert_batches(conn, 'news_events', news())
+    with engine.begin() as conn:
+        _insert_batches(conn, 'leaderboard_snapshots', snapshots())
+    print(f"Seeded in {time.perf_counter() - started:.1f}s")
+    return challenges
+
+
+def run_queries(engine, challenges: int, rows: int, repeat: int) -> dict:
+    rng = random.Random(7)
+    results = {}
+    with engine.connect() as conn:
+        for name, sql in QUERIES.items():
+            timings = []
+            for _ in range(repeat):
+                start = EPOCH + timedelta(seconds=rng.randint(0, rows * 30))
+                params = {
+                    'tenant_id': rng.randint(1, TENANTS), 'challenge_id': rng.randint(1, challenges),
+                    'currency': rng.choice(CURRENCIES), 'start': start, 'end': start + timedelta(hours=24),
+                    'external_id': f'evt_{rng.randint(1, rows)}', 'period': f'{2020 + rng.randint(0, 1)}-{rng.randint(1, 12):02d}',
+                }
+                t0 = time.perf_counter()
+                conn.execute(text(sql), params).fetchall()
+                timings.append((time.perf_counter() - t0) * 1000)
+            results[name] = statistics.median(timings)
+    return results
+
+
+def bench(url: str, rows: int, repeat: int):
+    print(f"\n=== {url.split('://')[0]} ({rows} rows) ===")
+    engine = create_engine(url)
+    db.metadata.drop_all(engine)
+    db.metadata.create_all(engine)
+    with engine.begin() as conn:
+        for table_name in INDEXED_TABLES:
+            drop_secondary_indexes(conn, table_name)
+
+    challenges = seed(engine, rows)
+    if engine.dialect.name == 'postgresql':
+        with engine.begin() as conn:
+            conn.execute(text("ANALYZE"))
+    before = run_queries(engine, challenges, rows, repeat)
+
+    t0 = time.perf_counter()
+    with engine.begin() as conn:
+        for table_name in INDEXED_TABLES:
+            create_missing_indexes(conn, table_name)
+        conn.execute(text("ANALYZE"))
+    print(f"Index build: {time.perf_counter() - t0:.1f}s")
+    after = run_queries(engine, challenges, rows, repeat)
+
+    print(f"{'query':<32}{'no index (ms)':>16}{'indexed (ms)':>16}{'speedup':>10}")
+    for name in QUERIES:
+        speedup = before[name] / after[name] if after[name] else float('inf')
+        print(f"{name:<32}{before[name]:>16.3f}{after[name]:>16.3f}{speedup:>9.0f}x")
+    engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=2_000_000)
+    parser.add_argument('--repeat', type=int, default=25)
+    parser.add_argument('--sqlite-path', default=os.path.join(tempfile.gettempdir(), 'tradesense_bench.db'))
+    parser.add_argument('--postgres-url', default=os.environ.get('BENCH_POSTGRES_URL'))
+    args = parser.parse_args()
+
+    bench(f"sqlite:///{args.sqlite_path}", args.rows, args.repeat)
+    if args.postgres_url:
+        bench(args.postgres_url, args.rows, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+Regime detection: batch cost per bar close and per-request lookup cost.
+
+Seeds price_data with random-walk bars for N symbols (a mix of trending,
+volatile and ranging series), times regime_service.refresh() and then
+AIAnalyst.detect_regime() lookups.
+
+Usage:
+    python benchmarks/bench_regime.py --symbols 500 --bars 200
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.config import Config
+from app import create_app
+from extensions import db
+from models import PriceData
+from services.ai_analyst import AIAnalyst
+from services.regime_service import regime_service
+
+
+def seed(symbols: int, bars: int):
+    rng = np.random.default_rng(7)
+    start = datetime(2024, 1, 1)
+    rows = []
+    for i in range(symbols):
+        kind = i % 3
+        drift = 0.002 if kind == 0 else 0.0
+        sigma = 0.01 if kind != 1 else 0.002
+        if kind == 1:
+            sigma = np.r_[np.full(bars - 20, 0.002), np.full(20, 0.02)]  # volatility spike
+        closes = 100 * np.exp(np.cumsum(drift + sigma * rng.standard_normal(bars)))
+        spread = np.abs(rng.standard_normal(bars)) * closes * 0.003
+        for t in range(bars):
+            rows.append({'symbol': f'SYM{i:04d}', 'timestamp': start + timedelta(hours=t), 'open': closes[t],
+                         'high': closes[t] + spread[t], 'low': closes[t] - spread[t], 'close': closes[t],
+                         'volume': 1000.0, 'source': 'BENCH'})
+    db.session.execute(PriceData.__table__.insert(), rows)
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--symbols', type=int, default=500)
+    parser.add_argument('--bars', type=int, default=200)
+    parser.add_argument('--lookups', type=int, default=100000)
+    parser.add_argument('--url', default=f"sqlite:///{os.path.join(tempfile.gettempdir(), 'tradesense_regime.db')}")
+    args = parser.parse_args()
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = args.url
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        seed(args.symbols, args.bars)
+
+        started = time.perf_counter()
+        bars = regime_service.load_bars()
+        load_ms = (time.perf_counter() - started) * 1000
+        started = time.perf_counter()
+        classified = regime_service.refresh()
+        total_ms = (time.perf_counter() - started) * 1000
+        print(f"{classified} symbols x {regime_service.lookback} bars: load {load_ms:.1f} ms, "
+              f"load + classify {total_ms:.1f} ms ({len(bars)} series)")
+
+        counts = {}
+        for snapshot in regime_service._regimes.values():
+            counts[snapshot['regime']] = counts.get(snapshot['regime'], 0) + 1
+        print(f"regimes: {counts}")
+
+        analyst = AIAnalyst(tenant_id=1)
+        started = time.perf_counter()
+        for i in range(args.lookups):
+            analyst.detect_regime(f'SYM{i % args.symbols:04d}')
+        per_call_us = (time.perf_counter() - started) / args.lookups * 1e6
+        print(f"detect_regime: {per_call_us:.2f} us per call")
+
+
+if __name__ == '__main__':
+    main()
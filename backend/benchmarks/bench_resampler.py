@@ -0,0 +1,132 @@
+"""
+Chart requests across timeframes, per-request OHLCV fetches vs the resampler.
+
+A dashboard polls the 1m, 5m, 15m, 1h and 1d charts (--limit bars each) of
+--symbols symbols once per simulated minute for --minutes minutes against
+a history stand-in answering after --latency-ms. With the resampler off
+every (symbol, timeframe, limit) is its own cached upstream fetch; with it
+on each symbol's intraday base series is fetched once, topped up from its
+last bar, and the other intraday timeframes are aggregated from it (the 1d
+chart is the provider's daily bars, topped up on its own). Prints upstream calls,
+bars downloaded and request latency.
+
+Then times a live 1m bar update of a --base-bars series with its 5m, 15m
+and 1h charts: incremental re-aggregation (add_bars) vs aggregating
+every timeframe from scratch.
+
+Usage:
+    python benchmarks/bench_resampler.py --symbols 20 --minutes 30 --limit 200
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stubs import HistoryStubProvider, OpenMarketCalendar
+from services.market_data_service import TIMEFRAME_SECONDS, QuoteCache, history_lookback
+from services.provider_resilience import ResilientMarketData
+from services.resampler import BarSeries, Resampler, aggregate
+
+START = datetime(2026, 3, 4, 9, 30)
+TIMEFRAMES = ['1m', '5m', '15m', '1h', '1d']
+DERIVED = ['5m', '15m', '1h']  # Aggregated from the 1m base
+
+
+class ChartStubProvider(HistoryStubProvider):
+    """HistoryStubProvider with get_ohlcv the way the live providers build it: the last `limit` bars of a range"""
+
+    def __init__(self, clock, **kwargs):
+        super().__init__(**kwargs)
+        self.clock = clock
+        self.bars_served = 0
+
+    def get_history(self, symbol, timeframe, start, end):
+        bars = super().get_history(symbol, timeframe, start, end)
+        self.bars_served += len(bars)
+        return bars
+
+    def get_ohlcv(self, symbol, timeframe, limit):
+        end = datetime.utcfromtimestamp(self.clock())
+        return self.get_history(symbol, timeframe, end - history_lookback(timeframe, limit), end)[-limit:]
+
+
+def dashboard(resample, args):
+    now = [START.timestamp()]
+    clock = lambda: now[0]
+    provider = ChartStubProvider(clock, latency=args.latency_ms / 1000, span_days=3650)
+    md = ResilientMarketData(providers=[provider], cache=QuoteCache(calendar=OpenMarketCalendar(), clock=clock,
+                                                                    shared=None), clock=clock, hedge=False)
+    md.resample = resample
+    symbols = [f'SYM{i}' for i in range(args.symbols)]
+    latency = []
+    for _ in range(args.minutes):
+        for symbol in symbols:
+            for timeframe in TIMEFRAMES:
+                started = time.perf_counter()
+                md.ohlcv(symbol, timeframe, args.limit)
+                latency.append(time.perf_counter() - started)
+        now[0] += 60
+    ms = np.asarray(latency) * 1000
+    p50, p99 = np.percentile(ms, [50, 99])
+    print(f"{'on' if resample else 'off':<11}{len(latency):>10}{provider.calls:>10}{provider.bars_served:>12}"
+          f"{p50:>10.2f}{p99:>10.2f}{ms.sum() / 1000:>10.2f}")
+
+
+def live_update(args):
+    """Seconds per live bar update: (incremental, from scratch)"""
+    now = START.timestamp()
+    resampler = Resampler(clock=lambda: now, ttl=lambda symbol, seconds: seconds, max_base_bars=args.base_bars)
+    start = START - timedelta(minutes=args.base_bars)
+    bars = ChartStubProvider(lambda: now, latency=0).bars('SYM', '1m', start, START)
+    resampler.add_bars('SYM', '1m', bars)
+    series = resampler._get_series('SYM', '1m')
+    for timeframe in DERIVED:
+        resampler._derived(series, timeframe)
+    live = dict(bars[-1])
+
+    started = time.perf_counter()
+    for i in range(args.updates):
+        live['close'] = live['high'] = bars[-1]['close'] + i * 1e-4
+        resampler.add_bars('SYM', '1m', [live])
+    incremental = (time.perf_counter() - started) / args.updates
+
+    started = time.perf_counter()
+    for i in range(args.updates):
+        live['close'] = live['high'] = bars[-1]['close'] + i * 1e-4
+        base = series.bars.merge(BarSeries.from_bars([live]))
+        for timeframe in DERIVED:
+            aggregate(base, TIMEFRAME_SECONDS[timeframe])
+    full = (time.perf_counter() - started) / args.updates
+    return incremental, full
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--symbols', type=int, default=20)
+    parser.add_argument('--minutes', type=int, default=30, help='simulated minutes of polling')
+    parser.add_argument('--limit', type=int, default=200, help='bars per chart')
+    parser.add_argument('--latency-ms', type=float, default=20)
+    parser.add_argument('--base-bars', type=int, default=10000, help='1m bars held for the live update timing')
+    parser.add_argument('--updates', type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{args.symbols} symbols x {len(TIMEFRAMES)} timeframes x {args.limit} bars, polled every minute for "
+          f"{args.minutes} minutes, {args.latency_ms:.0f} ms per upstream request")
+    print(f"{'resampler':<11}{'requests':>10}{'upstream':>10}{'bars in':>12}{'p50 ms':>10}{'p99 ms':>10}"
+          f"{'seconds':>10}")
+    for resample in (False, True):
+        dashboard(resample, args)
+
+    incremental, full = live_update(args)
+    print(f"\nLive 1m bar update, {args.base_bars} base bars, {len(DERIVED)} derived timeframes")
+    print(f"{'incremental':<14}{incremental * 1e6:>10.1f} us")
+    print(f"{'from scratch':<14}{full * 1e6:>10.1f} us")
+
+
+if __name__ == '__main__':
+    main()
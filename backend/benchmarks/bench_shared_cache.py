@@ -0,0 +1,113 @@
+"""
+Upstream calls with per-worker caches vs a shared cache, and with leader polling.
+
+Simulates --nodes x --workers app processes in one process. Each worker has
+its own QuoteCache and resilience layer. All of them call one stub upstream,
+which counts the calls it receives. --clients threads then request last
+prices for --symbols symbols from random workers for --seconds seconds.
+
+- local: in-process caches only, so every worker fetches every symbol
+- shared: every worker's cache is backed by one Redis-compatible server
+  (fakeredis), so a quote fetched by one worker is served to all
+- poller: shared, plus each worker runs a QuotePoller; one leased worker
+  polls each symbol and the other workers receive its quotes over pub/sub
+
+Usage:
+    python benchmarks/bench_shared_cache.py --nodes 2 --workers 4 --seconds 5
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fakeredis
+
+from benchmarks.stubs import FaultyProvider, OpenMarketCalendar
+from services.market_data_service import MockProvider, QuoteCache
+from services.provider_resilience import ResilientMarketData
+from services.quote_poller import QuotePoller
+from services.shared_cache import InProcessBackend, RedisBackend, SharedCache
+
+SYMBOLS = ['EURUSD', 'GBPUSD', 'USDJPY', 'BTCUSD', 'ETHUSD', 'GOLD', 'TSLA', 'AAPL', 'IAM.MA', 'ATW.MA']
+
+
+def build_workers(mode, count, upstream, poll_interval):
+    server = fakeredis.FakeServer()
+    workers, pollers = [], []
+    for _ in range(count):
+        if mode == 'local':
+            shared = SharedCache(InProcessBackend())
+        else:
+            shared = SharedCache(RedisBackend(fakeredis.FakeRedis(server=server, decode_responses=True)))
+        cache = QuoteCache(calendar=OpenMarketCalendar(), shared=shared)
+        market = ResilientMarketData(providers=[upstream], fallback=MockProvider(), cache=cache, hedge=False)
+        workers.append(market)
+        if mode == 'poller':
+            poller = QuotePoller(cache=shared, market=market)
+            poller.symbols, poller.interval = list(SYMBOLS), poll_interval
+            pollers.append(poller)
+    return workers, pollers
+
+
+def run(mode, args):
+    upstream = FaultyProvider('upstream', latency=args.upstream_ms / 1000, jitter=0.0)
+    workers, pollers = build_workers(mode, args.nodes * args.workers, upstream, args.poll_interval)
+    for poller in pollers:
+        poller.start()
+    time.sleep(0.2)  # Pollers elect and publish once before traffic starts
+
+    samples, stale, lock = [], [0], threading.Lock()
+    stop_at = time.monotonic() + args.seconds
+
+    def client(seed):
+        rng = random.Random(seed)
+        local = []
+        while time.monotonic() < stop_at:
+            worker = rng.choice(workers)
+            started = time.perf_counter()
+            result = worker.last_price(rng.choice(SYMBOLS[:args.symbols]))
+            local.append(time.perf_counter() - started)
+            if result.stale:
+                stale[0] += 1
+        with lock:
+            samples.extend(local)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(args.clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    for poller in pollers:
+        poller.stop()
+
+    ms = np.asarray(samples) * 1000
+    p50, p99 = np.percentile(ms, [50, 99])
+    print(f"{mode:<8}{len(samples):>10}{upstream.calls:>16}{p50:>10.3f}{p99:>10.3f}{stale[0]:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--nodes', type=int, default=2)
+    parser.add_argument('--workers', type=int, default=4, help='workers per node')
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--symbols', type=int, default=len(SYMBOLS))
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--upstream-ms', type=float, default=50)
+    parser.add_argument('--poll-interval', type=float, default=5.0)
+    args = parser.parse_args()
+
+    print(f"{args.nodes * args.workers} workers, {args.symbols} symbols, {args.seconds:.0f}s, "
+          f"quote TTL {QuoteCache.LAST_PRICE_TTL}s")
+    print(f"{'mode':<8}{'requests':>10}{'upstream calls':>16}{'p50 ms':>10}{'p99 ms':>10}{'stale':>8}")
+    for mode in ('local', 'shared', 'poller'):
+        run(mode, args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+Insert throughput: per-row commit vs the write-behind queue.
+
+Each mode inserts the same number of Trade rows from several request
+threads: 'per-row' is the old place_trade path (session.add + commit),
+'wb-sync' waits for the group commit and gets the trade id back,
+'wb-async' only enqueues and the total includes the final flush.
+
+Usage:
+    python benchmarks/bench_write_behind.py --rows 20000 --threads 8
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.config import Config
+from app import create_app
+from extensions import db
+from models import Trade
+from services.write_behind import write_behind
+
+
+def trade_row(i):
+    return dict(tenant_id=1, challenge_id=i % 100 + 1, symbol='EURUSD', side='BUY',
+                volume=1.0, entry_price=1.095, pnl=0.0)
+
+
+def per_row(app, i):
+    with app.app_context():
+        db.session.add(Trade(**trade_row(i)))
+        db.session.commit()
+
+
+def wb_sync(app, i):
+    write_behind.submit(Trade, trade_row(i), durable=True)
+
+
+def wb_async(app, i):
+    write_behind.submit(Trade, trade_row(i), durable=False)
+
+
+def run(app, mode, fn, rows, threads):
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+
+    per_thread = rows // threads
+
+    def loop(offset):
+        for i in range(offset, offset + per_thread):
+            fn(app, i)
+
+    workers = [threading.Thread(target=loop, args=(t * per_thread,)) for t in range(threads)]
+    started = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    write_behind.flush(timeout=60)
+    elapsed = time.perf_counter() - started
+
+    with app.app_context():
+        stored = Trade.query.count()
+    print(f"{mode:<10}{stored:>10}{elapsed:>10.2f}{stored / elapsed:>12.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--url', default=f"sqlite:///{os.path.join(tempfile.gettempdir(), 'tradesense_wb.db')}")
+    parser.add_argument('--profile', default='production', choices=['default', 'production'])
+    args = parser.parse_args()
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = args.url
+        DATABASE_PROFILE = args.profile
+
+    app = create_app(BenchConfig)
+    print(f"{args.rows} trades from {args.threads} threads on {args.url.split('://')[0]} ({args.profile} profile)")
+    print(f"{'mode':<10}{'rows':>10}{'seconds':>10}{'rows/s':>12}")
+    run(app, 'per-row', per_row, args.rows, args.threads)
+    run(app, 'wb-sync', wb_sync, args.rows, args.threads)
+    run(app, 'wb-async', wb_async, args.rows, args.threads)
+    write_behind.shutdown()
+
+
+if __name__ == '__main__':
+    main()
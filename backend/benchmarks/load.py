@@ -0,0 +1,74 @@
+"""
+Load-test driver: calls an operation from N threads for a fixed number of
+requests (or seconds) and reports throughput and latency percentiles.
+
+    from benchmarks.load import run_load
+    result = run_load(lambda i: client.get('/...'), requests=2000, concurrency=8)
+
+The operation gets the request number; an exception counts as an error
+and its latency is still recorded.
+"""
+import threading
+import time
+from typing import Callable, Optional
+
+import numpy as np
+
+
+def run_load(op: Callable[[int], object], requests: Optional[int] = None, duration: Optional[float] = None,
+             concurrency: int = 1, warmup: int = 0) -> dict:
+    if requests is None and duration is None:
+        raise ValueError("Give requests or duration")
+    for i in range(warmup):
+        op(i)
+
+    counter = iter(range(requests)) if requests is not None else None
+    counter_lock = threading.Lock()
+    latencies = [[] for _ in range(concurrency)]
+    errors = [0] * concurrency
+    stop_at = None
+
+    def next_request():
+        if counter is None:
+            return None if time.perf_counter() >= stop_at else 0
+        with counter_lock:
+            return next(counter, None)
+
+    def worker(slot: int):
+        samples = latencies[slot]
+        while True:
+            n = next_request()
+            if n is None:
+                return
+            started = time.perf_counter()
+            try:
+                op(n)
+            except Exception:
+                errors[slot] += 1
+            samples.append(time.perf_counter() - started)
+
+    threads = [threading.Thread(target=worker, args=(slot,)) for slot in range(concurrency)]
+    started = time.perf_counter()
+    stop_at = started + duration if duration is not None else None
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    samples = np.concatenate([np.asarray(s) for s in latencies]) * 1000
+    if not len(samples):
+        samples = np.zeros(1)
+    p50, p90, p99 = np.percentile(samples, [50, 90, 99])
+    return {
+        "requests": int(sum(len(s) for s in latencies)),
+        "errors": int(sum(errors)),
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(sum(len(s) for s in latencies) / elapsed, 1) if elapsed else 0.0,
+        "mean_ms": round(float(samples.mean()), 3),
+        "p50_ms": round(float(p50), 3),
+        "p90_ms": round(float(p90), 3),
+        "p99_ms": round(float(p99), 3),
+        "max_ms": round(float(samples.max()), 3),
+    }
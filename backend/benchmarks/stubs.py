@@ -0,0 +1,300 @@
+"""
+Local stand-ins for upstream services, used by the benchmark and
+verification scripts so nothing depends on the network.
+"""
+import asyncio
+import json
+import math
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FeedStubServer:
+    """
+    News / calendar feed stand-in serving /calendar and /news with ETag and
+    Last-Modified validators. Call publish() to change the payload.
+    """
+
+    def __init__(self, events_per_feed=200, port=0):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.not_modified = 0
+        self.version = 0
+        self.feeds = {}
+        self.events_per_feed = events_per_feed
+        self.publish()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = self.path.split('?')[0]
+                with stub.lock:
+                    stub.requests += 1
+                    body, etag, modified = stub.feeds.get(path, (None, None, None))
+                if body is None:
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                if self.headers.get('If-None-Match') == etag:
+                    with stub.lock:
+                        stub.not_modified += 1
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('ETag', etag)
+                self.send_header('Last-Modified', modified)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def publish(self, new_events=0):
+        """(Re)build feed payloads; new_events appends that many fresh items"""
+        with self.lock:
+            self.version += 1
+            self.events_per_feed += new_events
+            base = datetime(2026, 1, 5, 8, 0)
+            currencies = ['USD', 'EUR', 'GBP', 'JPY', 'CHF', 'AUD', 'CAD', 'MAD']
+            calendar = [{
+                'id': f'cal_{i}', 'currency': currencies[i % len(currencies)], 'name': f'Indicator {i}',
+                'impact': ['HIGH', 'MEDIUM', 'LOW'][i % 3], 'actual': None, 'forecast': f'{i % 5}.0%',
+                'previous': f'{i % 4}.0%', 'time': (base + timedelta(minutes=30 * i)).isoformat(),
+            } for i in range(self.events_per_feed)]
+            news = [{
+                'id': f'news_{i}', 'currency': currencies[i % len(currencies)], 'headline': f'Headline {i}',
+                'category': 'Forex', 'impact': ['HIGH', 'MEDIUM', 'LOW'][i % 3],
+                'timestamp': (base + timedelta(minutes=7 * i)).isoformat(),
+            } for i in range(self.events_per_feed)]
+            modified = formatdate(usegmt=True)
+            self.feeds = {
+                '/calendar': (json.dumps({'events': calendar}).encode(), f'"cal-{self.version}"', modified),
+                '/news': (json.dumps(news).encode(), f'"news-{self.version}"', modified),
+            }
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class FaultyProvider:
+    """
+    Market data provider stand-in with injectable faults. Modes:
+    - healthy: answers after `latency` seconds (plus up to `jitter`)
+    - slow: answers after `slow_latency` seconds
+    - error: raises after `latency` seconds
+    - hang: blocks until the mode changes or `hang_timeout` (an upstream timeout) expires
+    """
+
+    def __init__(self, name, latency=0.02, jitter=0.01, slow_latency=1.0, hang_timeout=10.0, price=100.0, seed=0):
+        self.name = name
+        self.latency = latency
+        self.jitter = jitter
+        self.slow_latency = slow_latency
+        self.hang_timeout = hang_timeout
+        self.price = price
+        self.mode = 'healthy'
+        self.calls = 0
+        self.lock = threading.Lock()
+        self.recovered = threading.Event()
+        self.random = random.Random(seed)
+
+    def set_mode(self, mode):
+        self.mode = mode
+        if mode == 'hang':
+            self.recovered.clear()
+        else:
+            self.recovered.set()
+
+    def _respond(self):
+        with self.lock:
+            self.calls += 1
+            delay = self.latency + self.random.random() * self.jitter
+        mode = self.mode
+        if mode == 'hang':
+            if not self.recovered.wait(self.hang_timeout):
+                raise TimeoutError(f"{self.name} timed out")
+            return
+        if mode == 'slow':
+            delay = self.slow_latency
+        time.sleep(delay)
+        if mode == 'error':
+            raise ConnectionError(f"{self.name} unavailable")
+
+    async def _arespond(self):
+        """_respond for the async client path: sleeps on the event loop instead of a thread"""
+        with self.lock:
+            self.calls += 1
+            delay = self.latency + self.random.random() * self.jitter
+        mode = self.mode
+        if mode == 'hang':
+            deadline = time.monotonic() + self.hang_timeout
+            while not self.recovered.is_set():
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(f"{self.name} timed out")
+                await asyncio.sleep(0.01)
+            return
+        if mode == 'slow':
+            delay = self.slow_latency
+        await asyncio.sleep(delay)
+        if mode == 'error':
+            raise ConnectionError(f"{self.name} unavailable")
+
+    def get_last_price(self, symbol):
+        self._respond()
+        return self.price
+
+    def get_ohlcv(self, symbol, timeframe, limit):
+        self._respond()
+        return self._bars(limit)
+
+    async def aget_last_price(self, symbol):
+        await self._arespond()
+        return self.price
+
+    async def aget_ohlcv(self, symbol, timeframe, limit):
+        await self._arespond()
+        return self._bars(limit)
+
+    def _bars(self, limit):
+        return [{'time': f'2026-01-{i % 28 + 1:02d}', 'open': self.price, 'high': self.price,
+                 'low': self.price, 'close': self.price, 'volume': 0} for i in range(limit)]
+
+
+class HistoryStubProvider:
+    """
+    Ranged-history stand-in for backfill runs. Bars are a deterministic
+    function of (symbol, open time), so a resumed download stores the same
+    bars an uninterrupted one would. Like a real upstream it enforces its
+    quota: a range longer than HISTORY_SPAN raises ValueError, and a request
+    beyond `requests_per_second` (burst 2) raises ConnectionError.
+    fail_after=N makes every request after the N-th fail (an outage).
+    """
+    SOURCE = 'STUB'
+    SUPPORTS_HISTORY = True
+    TIMEFRAME_SECONDS = {'1m': 60, '5m': 300, '15m': 900, '1h': 3600, '1d': 86400}
+
+    def __init__(self, latency=0.05, span_days=365, requests_per_second=None, fail_after=None):
+        self.latency = latency
+        self.HISTORY_SPAN = {tf: timedelta(days=span_days) for tf in self.TIMEFRAME_SECONDS}
+        self.HISTORY_DEPTH = {}
+        self.REQUESTS_PER_SECOND = requests_per_second
+        self.fail_after = fail_after
+        self.calls = 0
+        self.rejected = 0
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+        self._tokens = 2.0
+        self._updated = time.monotonic()
+
+    def get_history(self, symbol, timeframe, start, end):
+        with self.lock:
+            self.calls += 1
+            if self.fail_after is not None and self.calls > self.fail_after:
+                raise ConnectionError("upstream unavailable")
+            if self.REQUESTS_PER_SECOND:
+                now = time.monotonic()
+                self._tokens = min(2.0, self._tokens + (now - self._updated) * self.REQUESTS_PER_SECOND)
+                self._updated = now
+                if self._tokens < 1:
+                    self.rejected += 1
+                    raise ConnectionError("429 rate limited")
+                self._tokens -= 1
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            if end - start > self.HISTORY_SPAN[timeframe]:
+                raise ValueError(f"range {start} - {end} exceeds {self.HISTORY_SPAN[timeframe]}")
+            time.sleep(self.latency)
+            return self.bars(symbol, timeframe, start, end)
+        finally:
+            with self.lock:
+                self.active -= 1
+
+    def bars(self, symbol, timeframe, start, end):
+        step = self.TIMEFRAME_SECONDS[timeframe]
+        epoch = datetime(1970, 1, 1)
+        base = 50.0 + sum(ord(c) for c in symbol) % 200
+        first = -(-int((start - epoch).total_seconds()) // step)
+        last = int((end - epoch).total_seconds())
+        data = []
+        for k in range(first, -(-last // step)):
+            close = round(base * (1 + 0.1 * math.sin(k / 40.0)), 4)
+            data.append({'time': epoch + timedelta(seconds=k * step), 'open': close, 'high': close * 1.001,
+                         'low': close * 0.999, 'close': close, 'volume': 1000.0})
+        return data
+
+
+class OpenMarketCalendar:
+    """Market calendar stand-in for a market that never closes: TTL is always the open TTL"""
+
+    def ttl(self, symbol, open_ttl, now=None):
+        return open_ttl
+
+
+class NoCacheCalendar:
+    """Market calendar stand-in giving a zero TTL, so a QuoteCache never serves hits"""
+
+    def ttl(self, symbol, open_ttl, now=None):
+        return 0
+
+
+class FakeLLMClient:
+    """
+    OpenAI client stand-in for AIAnalysisService's REAL mode:
+    client.chat.completions.create(...) sleeps `latency` seconds and returns
+    a canned JSON analysis in the shape the prompt asks for.
+    """
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = 0
+        self.chat = self
+        self.completions = self
+
+    def create(self, model, messages, **kwargs):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return self._completion(model)
+
+    def _completion(self, model):
+        content = json.dumps({"analysis": {
+            "market_structure": {"trend": "Bullish", "trend_strength": "Moderate", "support_level": 99.0,
+                                 "resistance_level": 103.0},
+            "technical": {"rsi": {"value": 58, "signal": "Neutral"}, "macd": {"signal": "Bullish"},
+                          "ema": {"alignment": "Bullish"}, "volume": {"trend": "Rising"}},
+            "decision": {"recommendation": "BUY", "confidence": 64, "reasoning": "Trend continuation"},
+            "risk_management": {"entry_zone": "100.0 - 100.2", "stop_loss": 99.0, "take_profit": 103.0,
+                                "risk_reward_ratio": 3.0, "position_size": "2%", "risk_level": "Medium"},
+        }})
+        message = type('Message', (), {'content': content})
+        choice = type('Choice', (), {'message': message})
+        return type('Completion', (), {'choices': [choice], 'model': model})
+
+
+class FakeAsyncLLMClient(FakeLLMClient):
+    """AsyncOpenAI stand-in: `await client.chat.completions.create(...)` sleeps on the event loop"""
+
+    async def create(self, model, messages, **kwargs):
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._completion(model)
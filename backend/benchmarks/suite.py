@@ -0,0 +1,259 @@
+"""
+Backend hot-path benchmark suite, fully offline.
+
+Market data is served by MockProvider through the resilience layer (quote
+cache disabled so every request reaches the provider). AIAnalysisService's
+REAL mode uses FakeLLMClient. The database is a temporary SQLite file with
+the production profile. Every case goes through the load driver
+(benchmarks/load.py) and reports throughput plus p50 / p99 latency.
+
+--save writes the results as a JSON baseline. --compare checks a run
+against one and exits with status 1 when a case's p50 or throughput is
+worse than the baseline by more than --tolerance. Baselines are machine
+specific: benchmarks/baselines/reference.json is only a sample, so record
+a baseline on the machine that does the comparing.
+
+Usage:
+    python benchmarks/suite.py
+    python benchmarks/suite.py --quick --only market_ --save benchmarks/baselines/local.json
+    python benchmarks/suite.py --compare benchmarks/baselines/local.json --tolerance 0.25
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import threading
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.pop('OPENAI_API_KEY', None)  # DEMO mode unless a case swaps in the fake LLM
+
+from benchmarks.load import run_load
+from benchmarks.stubs import FakeLLMClient, NoCacheCalendar
+from config.config import Config
+from app import create_app
+from extensions import db
+from models import Tenant, User, UserChallenge
+from services.ai_analysis_service import AIAnalysisService
+from services.challenge_service import ChallengeService
+from services.market_data_service import MockProvider, QuoteCache
+from services.news_store import generate_realistic_news
+from services.provider_resilience import market_data
+from services.write_behind import write_behind
+from utils.technical_analysis import TechnicalAnalysisUtils
+
+SYMBOLS = ['EURUSD', 'GBPUSD', 'BTCUSD', 'GOLD', 'TSLA', 'IAM.MA']
+TENANT = 'bench'
+
+CASES = {}
+
+
+def case(name, requests, concurrency=1):
+    """Register a case: fn(ctx) returns the per-request operation"""
+    def register(fn):
+        CASES[name] = (fn, requests, concurrency)
+        return fn
+    return register
+
+
+class BenchContext:
+    def __init__(self, app, challenge_id):
+        self.app = app
+        self.challenge_id = challenge_id
+        self._local = threading.local()
+
+    @property
+    def client(self):
+        """Flask test client per load thread"""
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        return client
+
+    def get(self, path):
+        response = self.client.get(f'/api/v1/{TENANT}{path}')
+        if response.status_code >= 400:
+            raise RuntimeError(f"{path}: {response.status_code}")
+        return response
+
+
+def price_frame(bars, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({'close': 100 * np.exp(np.cumsum(rng.normal(0, 0.01, bars)))})
+
+
+# --- Cases ---
+
+@case('market_last', requests=2000, concurrency=4)
+def market_last(ctx):
+    return lambda i: ctx.get(f'/market-data/last?symbol={SYMBOLS[i % len(SYMBOLS)]}')
+
+
+for _limit in (100, 1000, 5000):
+    @case(f'market_ohlcv_{_limit}', requests=max(50, 100000 // _limit), concurrency=4)
+    def market_ohlcv(ctx, limit=_limit):
+        return lambda i: ctx.get(f'/market-data/ohlcv?symbol={SYMBOLS[i % len(SYMBOLS)]}&limit={limit}')
+
+
+@case('indicators_1k', requests=300)
+def indicators_1k(ctx):
+    frame = price_frame(1000)
+    return lambda i: TechnicalAnalysisUtils.calculate_indicators(frame.copy())
+
+
+@case('indicators_100k', requests=20)
+def indicators_100k(ctx):
+    frame = price_frame(100000)
+    return lambda i: TechnicalAnalysisUtils.calculate_indicators(frame.copy())
+
+
+@case('analyze_symbol_demo', requests=2000)
+def analyze_symbol_demo(ctx):
+    service = AIAnalysisService()
+    return lambda i: service.analyze_symbol(SYMBOLS[i % len(SYMBOLS)])
+
+
+@case('analyze_symbol_fake_llm', requests=500, concurrency=4)
+def analyze_symbol_fake_llm(ctx):
+    service = AIAnalysisService()
+    service.mode, service.client = "REAL", FakeLLMClient(latency=0.02)
+    service.cache_ttl = 0  # Measure the LLM path, not shared-cache hits
+    return lambda i: service.analyze_symbol(SYMBOLS[i % len(SYMBOLS)])
+
+
+@case('generate_realistic_news', requests=2000)
+def news(ctx):
+    return lambda i: generate_realistic_news(count=20, start_id=i * 20)
+
+
+@case('trade_placement', requests=1000, concurrency=8)
+def trade_placement(ctx):
+    def place(i):
+        response = ctx.client.post(f'/api/v1/{TENANT}/trades/', json={
+            'challenge_id': ctx.challenge_id, 'symbol': SYMBOLS[i % len(SYMBOLS)],
+            'side': 'BUY' if i % 2 else 'SELL', 'volume': 1.0,
+        })
+        if response.status_code >= 400:
+            raise RuntimeError(f"trade: {response.status_code}")
+    return place
+
+
+@case('challenge_evaluate', requests=20000)
+def challenge_evaluate(ctx):
+    challenge = UserChallenge(initial_balance=10000.0, current_equity=10000.0, daily_max_loss=500.0,
+                              max_drawdown=1000.0, profit_target=1000.0, status='ACTIVE')
+
+    def evaluate(i):
+        challenge.current_equity = 10000.0 + (i % 200) - 100
+        ChallengeService.evaluate_rules(challenge)
+    return evaluate
+
+
+@case('challenge_process_trade', requests=500)
+def challenge_process_trade(ctx):
+    def process(i):
+        with ctx.app.app_context():
+            ChallengeService.process_trade_result(ctx.challenge_id, 1.0 if i % 2 else -1.0)
+    return process
+
+
+# --- Runner ---
+
+def build_app(db_path):
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{db_path}'
+        DATABASE_PROFILE = 'production'
+        TRACING_ENABLED = False
+        ADMISSION_ENABLED = False  # One client drives every case; rate limits would cap it
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        tenant = Tenant(name='Bench', subdomain=TENANT, plan='PRO')
+        db.session.add(tenant)
+        db.session.commit()
+        user = User(tenant_id=tenant.id, email='bench@example.com', password_hash='x')
+        db.session.add(user)
+        db.session.commit()
+        challenge = ChallengeService.create_challenge(user, 'PRO', None)
+        challenge_id = challenge.id
+
+    # Offline market data: MockProvider behind the resilience layer, no caching
+    market_data._providers = [MockProvider()]
+    market_data._upstreams = None
+    market_data.cache = QuoteCache(calendar=NoCacheCalendar())
+    return BenchContext(app, challenge_id)
+
+
+def compare(results, baseline, tolerance, min_delta_ms):
+    """Cases slower than the baseline beyond the tolerance (and by more than min_delta_ms at p50)"""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get('cases', {}).get(name)
+        if not base:
+            continue
+        p50_ratio = result['p50_ms'] / base['p50_ms'] if base['p50_ms'] else 1.0
+        rps_ratio = base['throughput_rps'] / result['throughput_rps'] if result['throughput_rps'] else float('inf')
+        slower = result['p50_ms'] - base['p50_ms'] > min_delta_ms  # Microsecond cases are mostly noise
+        status = 'REGRESSION' if slower and max(p50_ratio, rps_ratio) > 1 + tolerance else 'ok'
+        print(f"{name:<28}{base['p50_ms']:>10.3f}{result['p50_ms']:>10.3f}{p50_ratio:>8.2f}x"
+              f"{base['throughput_rps']:>12.1f}{result['throughput_rps']:>12.1f}  {status}")
+        if status != 'ok':
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--only', help='run cases whose name starts with this prefix')
+    parser.add_argument('--quick', action='store_true', help='a tenth of the requests per case')
+    parser.add_argument('--save', help='write results to this JSON baseline')
+    parser.add_argument('--compare', help='compare against this JSON baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed slowdown (0.25 = 25%%)')
+    parser.add_argument('--min-delta-ms', type=float, default=0.05, help='ignore p50 slowdowns smaller than this')
+    args = parser.parse_args()
+
+    ctx = build_app(os.path.join(tempfile.gettempdir(), 'tradesense_suite.db'))
+    results = {}
+    print(f"{'case':<28}{'requests':>9}{'conc':>6}{'req/s':>12}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for name, (factory, requests, concurrency) in CASES.items():
+        if args.only and not name.startswith(args.only):
+            continue
+        op = factory(ctx)
+        count = max(10, requests // 10) if args.quick else requests
+        result = run_load(op, requests=count, concurrency=concurrency, warmup=min(20, count))
+        results[name] = result
+        print(f"{name:<28}{result['requests']:>9}{concurrency:>6}{result['throughput_rps']:>12.1f}"
+              f"{result['p50_ms']:>10.3f}{result['p99_ms']:>10.3f}{result['errors']:>8}")
+    write_behind.shutdown()
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, 'w') as f:
+            json.dump({
+                "recorded_at": datetime.utcnow().isoformat(timespec='seconds'),
+                "python": platform.python_version(),
+                "machine": f"{platform.system()} {platform.machine()}, {os.cpu_count()} cpus",
+                "quick": args.quick,
+                "cases": results,
+            }, f, indent=2)
+        print(f"\nSaved baseline to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"\n{'case':<28}{'base p50':>10}{'p50':>10}{'ratio':>9}{'base req/s':>12}{'req/s':>12}")
+        regressions = compare(results, baseline, args.tolerance, args.min_delta_ms)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
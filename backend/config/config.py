@@ -6,6 +6,77 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', 'sqlite:///tradesense.db')
     OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY')
     POLYGON_API_KEY = os.environ.get('POLYGON_API_KEY')
+    
+    # Database engine profile (see utils/database.py)
+    DATABASE_PROFILE = os.environ.get('DATABASE_PROFILE', 'default') # default, production
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+    DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 30))
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800)) # seconds
+    DB_BUSY_TIMEOUT_MS = int(os.environ.get('DB_BUSY_TIMEOUT_MS', 5000)) # SQLite only
+    
+    # Read replicas (see utils/db_routing.py), comma-separated URLs
+    REPLICA_DATABASE_URIS = [u for u in os.environ.get('DATABASE_REPLICA_URLS', '').split(',') if u]
+    REPLICA_MAX_LAG_SECONDS = float(os.environ.get('REPLICA_MAX_LAG_SECONDS', 5))
+    READ_YOUR_WRITES_SECONDS = float(os.environ.get('READ_YOUR_WRITES_SECONDS', 10))
+    
+    # Write-behind insert batching (see services/write_behind.py)
+    WRITE_BEHIND_DURABILITY = os.environ.get('WRITE_BEHIND_DURABILITY', 'sync') # sync, async
+    WRITE_BEHIND_MAX_BATCH = int(os.environ.get('WRITE_BEHIND_MAX_BATCH', 500))
+    WRITE_BEHIND_FLUSH_MS = int(os.environ.get('WRITE_BEHIND_FLUSH_MS', 20))
+    WRITE_BEHIND_MAX_PENDING = int(os.environ.get('WRITE_BEHIND_MAX_PENDING', 10000))
+    WRITE_BEHIND_RESULT_TIMEOUT_MS = int(os.environ.get('WRITE_BEHIND_RESULT_TIMEOUT_MS', 10000))
+    WRITE_BEHIND_MAX_DEAD_LETTERS = int(os.environ.get('WRITE_BEHIND_MAX_DEAD_LETTERS', 10000))
+    
+    # Market data provider resilience (see services/provider_resilience.py)
+    MARKET_DATA_DEADLINE_MS = int(os.environ.get('MARKET_DATA_DEADLINE_MS', 2000))
+    MARKET_DATA_HEDGE = os.environ.get('MARKET_DATA_HEDGE', 'true').lower() == 'true'
+    MARKET_DATA_BREAKER_FAILURES = int(os.environ.get('MARKET_DATA_BREAKER_FAILURES', 5))
+    MARKET_DATA_BREAKER_RESET_SECONDS = int(os.environ.get('MARKET_DATA_BREAKER_RESET_SECONDS', 30))
+    
+    # Multi-timeframe OHLCV (see services/resampler.py): one base series per symbol, bars held per base series
+    RESAMPLER_ENABLED = os.environ.get('RESAMPLER_ENABLED', 'true').lower() == 'true'
+    RESAMPLER_MAX_BASE_BARS = int(os.environ.get('RESAMPLER_MAX_BASE_BARS', 10000))
+    
+    # Cross-worker cache and pub/sub (see services/shared_cache.py): unset = in-process,
+    # redis://host:6379/0 or fakeredis:// to share quotes, analyses and tenant settings
+    SHARED_CACHE_URL = os.environ.get('SHARED_CACHE_URL')
+    # Leader-polled last prices (see services/quote_poller.py), comma-separated symbols
+    QUOTE_POLL_SYMBOLS = [s for s in os.environ.get('QUOTE_POLL_SYMBOLS', '').split(',') if s]
+    QUOTE_POLL_INTERVAL_SECONDS = float(os.environ.get('QUOTE_POLL_INTERVAL_SECONDS', 5))
+    # Live 1m bars from the polled quotes (see services/tick_aggregator.py), closed LATE_SECONDS after their minute
+    TICK_BARS_ENABLED = os.environ.get('TICK_BARS_ENABLED', 'true').lower() == 'true'
+    TICK_BARS_STORE = os.environ.get('TICK_BARS_STORE', 'true').lower() == 'true'
+    TICK_BARS_LATE_SECONDS = float(os.environ.get('TICK_BARS_LATE_SECONDS', 5))
+    # Regime snapshots (see services/regime_service.py): workers re-read the table at most this often
+    REGIME_RELOAD_SECONDS = float(os.environ.get('REGIME_RELOAD_SECONDS', 30))
+    
+    # Cross-origin requests (flask-cors, also applied by routes/async_routes.py), comma-separated origins
+    CORS_ORIGINS = [o for o in os.environ.get('CORS_ORIGINS', '*').split(',') if o]
+    
+    # Response caching and compression (see utils/http_cache.py)
+    HTTP_CACHE_ENABLED = os.environ.get('HTTP_CACHE_ENABLED', 'true').lower() == 'true'
+    COMPRESS_MIN_BYTES = int(os.environ.get('COMPRESS_MIN_BYTES', 1024))
+    COMPRESS_LEVEL = int(os.environ.get('COMPRESS_LEVEL', 5)) # gzip level
+    
+    # Admission control (see utils/admission.py): plan rate limits and overload shedding
+    ADMISSION_ENABLED = os.environ.get('ADMISSION_ENABLED', 'true').lower() == 'true'
+    # Processes sharing the tenant limits; gunicorn takes its worker count from WEB_CONCURRENCY too
+    ADMISSION_WORKERS = int(os.environ.get('ADMISSION_WORKERS', os.environ.get('WEB_CONCURRENCY', 1)))
+    ADMISSION_TRUSTED_PROXIES = int(os.environ.get('ADMISSION_TRUSTED_PROXIES', 0)) # proxies appending X-Forwarded-For
+    ADMISSION_MAX_IN_FLIGHT = int(os.environ.get('ADMISSION_MAX_IN_FLIGHT', 0)) # per process, 0 = no queueing
+    ADMISSION_QUEUE_SIZE = int(os.environ.get('ADMISSION_QUEUE_SIZE', 64))
+    ADMISSION_QUEUE_TIMEOUT_MS = int(os.environ.get('ADMISSION_QUEUE_TIMEOUT_MS', 1000))
+    
+    # Instrumentation (see utils/metrics.py): /metrics endpoint, analyze_symbol stage spans
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+    TRACING_ENABLED = os.environ.get('TRACING_ENABLED', 'false').lower() == 'true'
+    
+    # Request profiler (see utils/profiler.py)
+    PROFILER_MODE = os.environ.get('PROFILER_MODE', 'off') # off, sample, cprofile
+    PROFILER_SAMPLE_RATE = float(os.environ.get('PROFILER_SAMPLE_RATE', 0.0)) # fraction of requests
+    PROFILER_TOKEN = os.environ.get('PROFILER_TOKEN') # X-Profile header value that forces profiling
+    PROFILER_INTERVAL_MS = int(os.environ.get('PROFILER_INTERVAL_MS', 5))
 
 class DevelopmentConfig(Config):
     DEBUG = True
@@ -14,3 +85,4 @@ class ProductionConfig(Config):
     DEBUG = False
     # In prod, this should be set to the postgres URL
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL')
+    DATABASE_PROFILE = os.environ.get('DATABASE_PROFILE', 'production')
@@ -0,0 +1,19 @@
+import argparse
+from app import create_app
+from services.news_ingestion import news_ingestion
+
+def main():
+    parser = argparse.ArgumentParser(description="Poll tenant news & calendar feeds into news_events")
+    parser.add_argument('--interval', type=float, default=60.0, help='seconds between polls')
+    parser.add_argument('--once', action='store_true', help='poll a single time and exit')
+    args = parser.parse_args()
+    
+    app = create_app()
+    if args.once:
+        with app.app_context():
+            print(news_ingestion.poll_once())
+    else:
+        news_ingestion.run_forever(app, interval=args.interval)
+
+if __name__ == '__main__':
+    main()
@@ -1,11 +1,13 @@
 from app import create_app
 from extensions import db
 from models import Tenant, TenantSettings
+from utils.schema import upgrade_schema
 
 def init_db():
     app = create_app()
     with app.app_context():
         db.create_all()
+        upgrade_schema()
         
         # Create Default Tenant
         if not Tenant.query.filter_by(subdomain='tradesense').first():
@@ -1,3 +1,3 @@
 from .tenant import Tenant, TenantSettings
 from .user import User
-from .trading import UserChallenge, Trade, PriceData, NewsEvent, LeaderboardSnapshot
+from .trading import UserChallenge, Trade, PriceData, NewsEvent, RegimeSnapshot, LeaderboardSnapshot
@@ -24,6 +24,11 @@ class UserChallenge(db.Model):
     
     trades = db.relationship('Trade', backref='challenge', lazy=True)
 
+    __table_args__ = (
+        db.Index('ix_user_challenges_tenant_user', 'tenant_id', 'user_id'),
+        db.Index('ix_user_challenges_tenant_status', 'tenant_id', 'status'),
+    )
+
 class Trade(db.Model):
     __tablename__ = 'trades'
     
@@ -45,13 +50,22 @@ class Trade(db.Model):
     stop_loss = db.Column(db.Float, nullable=True)
     take_profit = db.Column(db.Float, nullable=True)
 
+    __table_args__ = (
+        db.Index('ix_trades_tenant_challenge_opened', 'tenant_id', 'challenge_id', 'opened_at'),
+        db.Index('ix_trades_tenant_symbol_opened', 'tenant_id', 'symbol', 'opened_at'),
+        # Partial index: open positions only (closed_at IS NULL)
+        db.Index('ix_trades_open_by_challenge', 'tenant_id', 'challenge_id',
+                 sqlite_where=closed_at.is_(None), postgresql_where=closed_at.is_(None)),
+    )
+
 class PriceData(db.Model):
     __tablename__ = 'price_data'
     
     id = db.Column(db.Integer, primary_key=True)
     tenant_id = db.Column(db.Integer, db.ForeignKey('tenants.id'), nullable=True) # Nullable if shared data? Spec says tenant_id present.
     symbol = db.Column(db.String(20), nullable=False)
-    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    timeframe = db.Column(db.String(5), nullable=False, default='1d', server_default='1d') # 1m, 5m, 15m, 1h, 1d
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow) # Bar open time (UTC)
     
     open = db.Column(db.Float)
     high = db.Column(db.Float)
@@ -61,6 +75,14 @@ class PriceData(db.Model):
     
     source = db.Column(db.String(50)) # YFINANCE, CASABLANCA, etc.
 
+    __table_args__ = (
+        db.Index('ix_price_data_tenant_symbol_ts', 'tenant_id', 'symbol', 'timestamp'),
+        db.Index('ix_price_data_symbol_ts', 'symbol', 'timestamp'), # Shared (tenant_id NULL) series
+        # One shared bar per (symbol, timeframe, open time): backfill / bar upserts and resume point
+        db.Index('uq_price_data_shared_bar', 'symbol', 'timeframe', 'timestamp', unique=True,
+                 sqlite_where=tenant_id.is_(None), postgresql_where=tenant_id.is_(None)),
+    )
+
 class NewsEvent(db.Model):
     __tablename__ = 'news_events'
     
@@ -80,6 +102,33 @@ class NewsEvent(db.Model):
     forecast = db.Column(db.String(50))
     previous = db.Column(db.String(50))
 
+    __table_args__ = (
+        db.UniqueConstraint('tenant_id', 'external_id', name='uq_news_events_tenant_external'),
+        db.Index('ix_news_events_tenant_currency_time', 'tenant_id', 'currency', 'event_time'),
+        db.Index('ix_news_events_tenant_time', 'tenant_id', 'event_time'),
+    )
+
+class RegimeSnapshot(db.Model):
+    __tablename__ = 'regime_snapshots'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    symbol = db.Column(db.String(20), nullable=False)
+    timeframe = db.Column(db.String(5), nullable=False)
+    
+    regime_key = db.Column(db.String(20), nullable=False) # TRENDING, HIGH_VOL, RANGE, NEUTRAL
+    trend = db.Column(db.String(10)) # UP, DOWN
+    adx = db.Column(db.Float)
+    realized_vol = db.Column(db.Float)
+    vol_percentile = db.Column(db.Float)
+    range_compression = db.Column(db.Float)
+    close = db.Column(db.Float)
+    
+    as_of = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint('symbol', 'timeframe', name='uq_regime_snapshots_symbol_timeframe'),
+    )
+
 class LeaderboardSnapshot(db.Model):
     __tablename__ = 'leaderboard_snapshots'
     
@@ -91,3 +140,8 @@ class LeaderboardSnapshot(db.Model):
     
     profit_percent = db.Column(db.Float)
     rank = db.Column(db.Integer)
+
+    __table_args__ = (
+        db.UniqueConstraint('tenant_id', 'period', 'user_id', name='uq_leaderboard_tenant_period_user'),
+        db.Index('ix_leaderboard_tenant_period_rank', 'tenant_id', 'period', 'rank'),
+    )
@@ -1,4 +1,14 @@
-from flask import Blueprint, jsonify
+from urllib.parse import urlparse
+from flask import Blueprint, Response, jsonify, request, g
+from models import TenantSettings
+from extensions import db
+from services.tenant_service import tenant_resolver
+from utils.database import pool_stats
+from utils.db_routing import replica_router
+from services.provider_resilience import market_data
+from services.tick_aggregator import tick_aggregator
+from utils.profiler import profiler
+from utils.admission import admission
 
 admin_bp = Blueprint('admin', __name__)
 
@@ -6,6 +16,104 @@ admin_bp = Blueprint('admin', __name__)
 def list_users(tenant):
     return jsonify([])
 
+@admin_bp.route('/db-pool', methods=['GET'])
+def get_db_pool(tenant):
+    engines = db.engines
+    return jsonify({
+        "engines": {key or 'primary': pool_stats(engine) for key, engine in engines.items()},
+        "replicas": replica_router.status(engines)
+    })
+
+@admin_bp.route('/providers', methods=['GET'])
+def get_providers(tenant):
+    # Circuit breaker state, p95 latency and stale / fallback counts per market data provider
+    return jsonify(market_data.status())
+
+@admin_bp.route('/tick-bars', methods=['GET'])
+def get_tick_bars(tenant):
+    # Live 1m bar aggregation: symbols held, late / dropped ticks, bars emitted and stored (this worker)
+    return jsonify(tick_aggregator.status())
+
+@admin_bp.route('/admission', methods=['GET'])
+def get_admission(tenant):
+    # In-flight slots, priority queue depth and rate-limit / shed counters (this worker)
+    return jsonify(admission.status())
+
+@admin_bp.route('/profiles', methods=['GET'])
+def get_profiles(tenant):
+    # Endpoints with profiled requests (see utils/profiler.py)
+    return jsonify(profiler.summary())
+
+@admin_bp.route('/profiles/stacks', methods=['GET'])
+def get_profile_stacks(tenant):
+    # Collapsed stacks for flamegraph.pl / speedscope; ?endpoint=/api/v1/<tenant>/market-data/ohlcv
+    return Response(profiler.collapsed(request.args.get('endpoint')), mimetype='text/plain')
+
+@admin_bp.route('/profiles/functions', methods=['GET'])
+def get_profile_functions(tenant):
+    # cProfile function table for one endpoint, slowest cumulative first
+    endpoint = request.args.get('endpoint')
+    if not endpoint:
+        return jsonify({"error": "endpoint is required"}), 400
+    return jsonify(profiler.functions(endpoint, int(request.args.get('limit', 30))))
+
+@admin_bp.route('/profiles', methods=['DELETE'])
+def reset_profiles(tenant):
+    profiler.reset()
+    return jsonify({"message": "Profiles cleared"})
+
+# Settings a tenant may change here, with their column length (None: a non-negative price).
+# Credentials (news_api_key, paypal_*) are not editable through this endpoint: it has no admin auth.
+EDITABLE_SETTINGS = {
+    'default_language': 10, 'base_currency': 10,
+    'market_data_provider': 50, 'data_quality_level': 50, 'ai_service_level': 50, 'news_api_base_url': 200,
+    'price_starter': None, 'price_pro': None, 'price_elite': None,
+}
+
+def clean_setting(key, value):
+    """Validated column value for one setting; ValueError on bad input"""
+    max_length = EDITABLE_SETTINGS[key]
+    if max_length is None:
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+            raise ValueError(f"{key} must be a non-negative number")
+        return float(value)
+    if value is None and key == 'news_api_base_url':
+        return None  # Stops the feed polling
+    if not isinstance(value, str) or not value or len(value) > max_length:
+        raise ValueError(f"{key} must be a string of 1 to {max_length} characters")
+    if key == 'news_api_base_url':
+        url = urlparse(value)
+        if url.scheme not in ('http', 'https') or not url.hostname:
+            raise ValueError("news_api_base_url must be an http(s) URL")
+    return value
+
 @admin_bp.route('/settings', methods=['PUT'])
 def update_settings(tenant):
-    return jsonify({"message": "Settings updated"})
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"error": "Invalid settings", "message": "expected a JSON object"}), 400
+    rejected = sorted(set(data) - set(EDITABLE_SETTINGS))
+    if rejected:
+        return jsonify({"error": "Invalid settings", "message": f"not editable: {', '.join(rejected)}"}), 400
+    try:
+        values = {key: clean_setting(key, value) for key, value in data.items()}
+    except ValueError as e:
+        return jsonify({"error": "Invalid settings", "message": str(e)}), 400
+    
+    try:
+        settings = TenantSettings.query.filter_by(tenant_id=g.tenant.id).first()
+        if not settings:
+            settings = TenantSettings(tenant_id=g.tenant.id)
+            db.session.add(settings)
+        for key, value in values.items():
+            setattr(settings, key, value)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print(f"Settings update for {tenant} failed: {e}")
+        return jsonify({"error": "Failed to update settings"}), 500
+    
+    # Next request for this tenant reloads settings & provider config
+    tenant_resolver.invalidate(tenant)
+    
+    return jsonify({"message": "Settings updated", "updated": sorted(values)})
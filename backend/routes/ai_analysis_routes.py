@@ -1,7 +1,7 @@
 """
 AI Analysis Routes - Trading Analysis API
 """
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify, request, g
 from services.ai_analysis_service import AIAnalysisService
 
 ai_analysis_bp = Blueprint('ai_analysis', __name__)
@@ -27,7 +27,7 @@ def analyze_symbol(tenant):
     timeframe = data.get('timeframe', '1D')
     
     try:
-        analysis = analysis_service.analyze_symbol(symbol, timeframe)
+        analysis = analysis_service.analyze_symbol(symbol, timeframe, tenant_id=g.tenant.id)
         return jsonify(analysis), 200
     except Exception as e:
         return jsonify({
@@ -45,7 +45,7 @@ def quick_signal(tenant, symbol):
         Simplified recommendation (BUY/SELL/WAIT) with confidence
     """
     try:
-        analysis = analysis_service.analyze_symbol(symbol)
+        analysis = analysis_service.analyze_symbol(symbol, tenant_id=g.tenant.id)
         decision = analysis['analysis']['decision']
         
         return jsonify({
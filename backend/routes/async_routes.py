@@ -0,0 +1,215 @@
+"""
+Async Routes - ASGI serving mode
+Native coroutine handlers for the endpoints dominated by upstream I/O
+(market data providers, the LLM). Under asgi.py they run on the event loop,
+so one worker keeps thousands of slow requests in flight; every other path
+(and any method not listed here) falls through to the Flask app.
+
+Responses match the Flask routes of the same path: tenant resolution, rate
+limits, HTTP caching and CORS go through the same helpers as the Flask hooks
+(TenantResolver.resolve, AdmissionController.rate_limited, HttpCache.apply
+and flask-cors with the app's CORS_* settings).
+"""
+import asyncio
+import json
+import re
+import time
+from typing import Callable, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+from flask_cors.core import get_cors_headers, get_cors_options
+from werkzeug.datastructures import Headers
+
+from routes.ai_analysis_routes import analysis_service
+from routes.market_routes import parse_limit
+from services.provider_resilience import market_data
+from services.tenant_service import tenant_resolver, unknown_tenant
+from utils.admission import admission, rejection
+from utils.http_cache import cache_policy, http_cache
+from utils.metrics import REQUEST_LATENCY
+
+ROUTES: List[Tuple[str, re.Pattern, str, Callable]] = []  # (method, pattern, rule, handler)
+
+
+def route(rule: str, method: str = 'GET', route_class: str = 'read'):
+    """Register a handler for a Flask-style rule ('/api/v1/<tenant>/...'); route_class as in utils/admission.py"""
+    pattern = re.compile('^' + re.sub(r'<(\w+)>', r'(?P<\1>[^/]+)', rule) + '$')
+
+    def register(fn):
+        fn.route_class = route_class
+        ROUTES.append((method, pattern, rule, fn))
+        return fn
+    return register
+
+
+class AsyncRequest:
+    def __init__(self, scope, body: bytes, flask_app):
+        self.method = scope['method']
+        self.path = scope['path']
+        self.args = {k: v[0] for k, v in parse_qs(scope.get('query_string', b'').decode('latin-1')).items()}
+        self.headers = Headers([(k.decode('latin-1'), v.decode('latin-1')) for k, v in scope.get('headers', ())])
+        self.remote_addr = (scope.get('client') or (None,))[0]
+        self.body = body
+        self.app = flask_app
+
+    def get_json(self):
+        try:
+            return json.loads(self.body) if self.body else None
+        except ValueError:
+            return None
+
+
+def json_response(payload, status: int = 200, headers: dict = None):
+    return status, {'Content-Type': 'application/json', **(headers or {})}, json.dumps(payload).encode()
+
+
+async def resolve_tenant(flask_app, subdomain: str):
+    """TenantContext from the resolver cache; a miss loads it on a thread inside an app context"""
+    hit, context = tenant_resolver.cached(subdomain)
+    if hit:
+        return context
+
+    def load():
+        with flask_app.app_context():
+            return tenant_resolver.resolve(subdomain)
+    return await asyncio.to_thread(load)
+
+
+# --- Handlers ---
+
+@route('/api/v1/<tenant>/market-data/last')
+async def get_last_price(request, tenant):
+    symbol = request.args.get('symbol')
+    result = await market_data.last_price_async(symbol)
+    return json_response({
+        "symbol": symbol,
+        "price": result.value,
+        "source": result.source,
+        "stale": result.stale,
+        "age_seconds": round(result.age, 1) if result.age is not None else None,
+    })
+
+
+@route('/api/v1/<tenant>/market-data/ohlcv')
+@cache_policy(max_age=15)
+async def get_ohlcv(request, tenant):
+    symbol = request.args.get('symbol')
+    timeframe = request.args.get('timeframe', '1d')
+    try:
+        limit = parse_limit(request.args.get('limit'))
+    except ValueError as e:
+        return json_response({"error": "Invalid limit", "message": str(e)}, 400)
+
+    result = await market_data.ohlcv_async(symbol, timeframe, limit)
+    headers = {'X-Data-Source': result.source, 'X-Data-Stale': 'true' if result.stale else 'false'}
+    if result.stale:
+        headers['Cache-Control'] = 'no-cache'  # Revalidate until live data is back
+    return json_response(result.value, headers=headers)
+
+
+@route('/api/v1/<tenant>/ai-analysis/analyze', method='POST', route_class='ai')
+async def analyze_symbol(request, tenant):
+    data = request.get_json() or {}
+    symbol = data.get('symbol', 'EURUSD')
+    timeframe = data.get('timeframe', '1D')
+
+    def gather():
+        # News features come from the database
+        with request.app.app_context():
+            return analysis_service.gather_inputs(symbol, tenant.id)
+
+    try:
+        cached = analysis_service.cached_analysis(symbol, timeframe, tenant.id)
+        if cached is not None:
+            return json_response(cached)
+        inputs = await asyncio.to_thread(gather)
+        analysis = await analysis_service.analyze_symbol_async(symbol, timeframe, inputs=inputs, tenant_id=tenant.id)
+        return json_response(analysis)
+    except Exception as e:
+        return json_response({"error": str(e), "message": "Failed to analyze symbol"}, 500)
+
+
+# --- ASGI dispatch ---
+
+def match(method: str, path: str) -> Optional[Tuple[str, Callable, dict]]:
+    for route_method, pattern, rule, handler in ROUTES:
+        if route_method == method:
+            found = pattern.match(path)
+            if found:
+                return rule, handler, found.groupdict()
+    return None
+
+
+async def _read_body(receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body'):
+            return b''.join(chunks)
+
+
+class AsyncDispatcher:
+    """ASGI app: native handlers above, everything else through `fallback` (the Flask app via WsgiToAsgi)"""
+
+    def __init__(self, flask_app, fallback):
+        self.flask_app = flask_app
+        self.fallback = fallback
+        self.cors = get_cors_options(flask_app)  # What CORS(app) applies to the Flask routes
+        self.http_cache = flask_app.config.get('HTTP_CACHE_ENABLED', True)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self._lifespan(receive, send)
+        found = match(scope.get('method'), scope.get('path', '')) if scope['type'] == 'http' else None
+        if found is None:
+            return await self.fallback(scope, receive, send)
+
+        rule, handler, params = found
+        started = time.perf_counter()
+        request = AsyncRequest(scope, await _read_body(receive), self.flask_app)
+        status, headers, body = await self._respond(request, handler, rule, params)
+        if request.method == 'GET' and self.http_cache:
+            status, headers, body = http_cache.finalize_asgi(request.headers, status, headers, body,
+                                                             getattr(handler, 'cache_control', None))
+
+        headers = Headers(headers)
+        for name, value in get_cors_headers(self.cors, request.headers, request.method).items():
+            headers.add(name, value)
+        if status != 304:
+            headers['Content-Length'] = str(len(body))
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(k.lower().encode('latin-1'), str(v).encode('latin-1')) for k, v in headers.items()],
+        })
+        await send({'type': 'http.response.body', 'body': body})
+        REQUEST_LATENCY.observe(time.perf_counter() - started, rule, request.method, str(status))
+
+    async def _respond(self, request, handler, rule: str, params: dict):
+        """The before_request hooks of the Flask app (tenant, rate limits), then the handler"""
+        subdomain = params.pop('tenant')
+        tenant = await resolve_tenant(self.flask_app, subdomain)
+        if tenant is None:
+            return json_response(unknown_tenant(subdomain), 404)
+        if admission.enabled:
+            rejected = admission.rate_limited(tenant, handler.route_class, request.headers, request.remote_addr)
+            if rejected:
+                payload, headers = rejection(*rejected)
+                return json_response(payload, 429, headers)
+        try:
+            return await handler(request, tenant, **params)
+        except Exception as e:
+            print(f"Async handler {rule} failed: {e}")
+            return json_response({"error": "Internal server error"}, 500)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                from services.write_behind import write_behind
+                await asyncio.to_thread(write_behind.shutdown)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
 from services.challenge_service import ChallengeService
 from models import UserChallenge
+from utils.http_cache import cache_policy
 
 challenge_bp = Blueprint('challenge', __name__)
 
@@ -13,6 +14,7 @@ def create_challenge_endpoint(tenant):
     return jsonify({"message": "Challenge created", "id": 1}), 201
 
 @challenge_bp.route('/<int:id>', methods=['GET'])
+@cache_policy(private=True)
 def get_challenge(tenant, id):
     challenge = UserChallenge.query.get(id)
     if not challenge:
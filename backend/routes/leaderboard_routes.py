@@ -1,8 +1,10 @@
 from flask import Blueprint, jsonify
+from utils.http_cache import cache_policy
 
 leaderboard_bp = Blueprint('leaderboard', __name__)
 
 @leaderboard_bp.route('/', methods=['GET'])
+@cache_policy(max_age=60)
 def get_leaderboard(tenant):
     # logic to aggregate UserChallenges and sort by profit
     return jsonify([
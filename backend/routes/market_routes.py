@@ -1,36 +1,68 @@
 from flask import Blueprint, request, jsonify
-from services.market_data_service import MarketDataFactory
+from services.provider_resilience import market_data
 from models import TenantSettings
+from services.symbol_registry import symbol_registry
+from services.market_calendar import market_calendar
+from utils.http_cache import cache_policy
 
 market_bp = Blueprint('market', __name__)
 
+MAX_OHLCV_LIMIT = 5000
+
+def parse_limit(value, default=100):
+    """?limit= of an OHLCV request (shared with routes/async_routes.py); ValueError unless 1..MAX_OHLCV_LIMIT"""
+    if value is None:
+        return default
+    try:
+        limit = int(value)
+    except ValueError:
+        raise ValueError(f"limit must be an integer, got '{value}'") from None
+    if not 1 <= limit <= MAX_OHLCV_LIMIT:
+        raise ValueError(f"limit must be between 1 and {MAX_OHLCV_LIMIT}")
+    return limit
+
 @market_bp.route('/last', methods=['GET'])
 def get_last_price(tenant):
     symbol = request.args.get('symbol')
     
-    # Get tenant provider settings
-    try:
-        provider = MarketDataFactory.get_provider()
-        price = provider.get_last_price(symbol)
-    except Exception as e:
-        print(f"Primary provider failed for {symbol}: {e}. Falling back to mock.")
-        provider = MarketDataFactory.get_fallback_provider()
-        price = provider.get_last_price(symbol)
-    
-    return jsonify({"symbol": symbol, "price": price})
+    # Breakers / deadline / hedging live in the resilience layer; stale=True
+    # means the price is the last known good value (or simulated)
+    result = market_data.last_price(symbol)
+    return jsonify({
+        "symbol": symbol,
+        "price": result.value,
+        "source": result.source,
+        "stale": result.stale,
+        "age_seconds": round(result.age, 1) if result.age is not None else None,
+    })
 
 @market_bp.route('/ohlcv', methods=['GET'])
+@cache_policy(max_age=15)
 def get_ohlcv(tenant):
     symbol = request.args.get('symbol')
     timeframe = request.args.get('timeframe', '1d')
-    limit = int(request.args.get('limit', 100))
-    
     try:
-        provider = MarketDataFactory.get_provider()
-        data = provider.get_ohlcv(symbol, timeframe, limit)
-    except Exception as e:
-        print(f"Primary provider failed for {symbol} OHLCV: {e}. Falling back to mock.")
-        provider = MarketDataFactory.get_fallback_provider()
-        data = provider.get_ohlcv(symbol, timeframe, limit)
-        
-    return jsonify(data)
+        limit = parse_limit(request.args.get('limit'))
+    except ValueError as e:
+        return jsonify({"error": "Invalid limit", "message": str(e)}), 400
+    
+    result = market_data.ohlcv(symbol, timeframe, limit)
+    response = jsonify(result.value)
+    response.headers['X-Data-Source'] = result.source
+    response.headers['X-Data-Stale'] = 'true' if result.stale else 'false'
+    if result.stale:
+        response.headers['Cache-Control'] = 'no-cache'  # Revalidate until live data is back
+    return response
+
+@market_bp.route('/symbols', methods=['GET'])
+@cache_policy(max_age=3600)
+def list_symbols(tenant):
+    # Optional ?asset_class=MA_EQUITY (Moroccan stocks), FOREX, CRYPTO, COMMODITY, US_EQUITY
+    asset_class = request.args.get('asset_class')
+    return jsonify([info.to_dict() for info in symbol_registry.symbols(asset_class)])
+
+@market_bp.route('/status', methods=['GET'])
+def market_status(tenant):
+    # Session state used to schedule quote refreshes (open / next open)
+    symbol = request.args.get('symbol', 'EURUSD')
+    return jsonify(market_calendar.status(symbol))
@@ -1,147 +1,62 @@
-from flask import Blueprint, jsonify, request
-import random
-from datetime import datetime, timedelta
+from flask import Blueprint, jsonify, request, url_for, g
+from services.news_store import news_store, NEWS_TEMPLATES, CATEGORIES
+from services.calendar_service import calendar_service
+from utils.http_cache import cache_policy, not_modified
 
 news_bp = Blueprint('news', __name__)
 
-# Realistic news templates by source
-NEWS_TEMPLATES = {
-    'Reuters': [
-        {"headline": "Oil prices surge {percent}% on OPEC+ supply cut announcement", "category": "Commodities", "impact": "HIGH"},
-        {"headline": "Federal Reserve signals potential rate pause amid inflation concerns", "category": "Markets", "impact": "HIGH"},
-        {"headline": "Tech stocks rally as earnings beat expectations", "category": "Stocks", "impact": "MEDIUM"},
-        {"headline": "Dollar strengthens against major currencies on strong jobs data", "category": "Forex", "impact": "MEDIUM"},
-        {"headline": "Gold hits {price}-month high as safe-haven demand rises", "category": "Commodities", "impact": "MEDIUM"},
-    ],
-    'Bloomberg': [
-        {"headline": "S&P 500 reaches new record high on tech sector strength", "category": "Markets", "impact": "HIGH"},
-        {"headline": "European Central Bank maintains rates, cites economic uncertainty", "category": "Markets", "impact": "HIGH"},
-        {"headline": "Emerging markets see capital inflows amid dollar weakness", "category": "Forex", "impact": "MEDIUM"},
-        {"headline": "Cryptocurrency market cap surpasses ${trillion} trillion milestone", "category": "Markets", "impact": "LOW"},
-        {"headline": "Treasury yields fall as investors seek safety", "category": "Markets", "impact": "MEDIUM"},
-    ],
-    'TheStreet': [
-        {"headline": "Top analyst upgrades {stock} stock to 'Strong Buy'", "category": "Stocks", "impact": "LOW"},
-        {"headline": "5 dividend stocks to watch this quarter", "category": "Stocks", "impact": "LOW"},
-        {"headline": "Market volatility creates buying opportunity, strategists say", "category": "Markets", "impact": "MEDIUM"},
-        {"headline": "Retail investors flock to {sector} sector amid recovery hopes", "category": "Stocks", "impact": "LOW"},
-        {"headline": "Earnings season preview: What to expect from major banks", "category": "Stocks", "impact": "MEDIUM"},
-    ],
-    'Forex Factory': [
-        {"headline": "EUR/USD breaks key resistance at {level}, targets {target}", "category": "Forex", "impact": "HIGH"},
-        {"headline": "GBP/USD consolidates ahead of Bank of England decision", "category": "Forex", "impact": "MEDIUM"},
-        {"headline": "USD/JPY retreats from highs on intervention concerns", "category": "Forex", "impact": "MEDIUM"},
-        {"headline": "Australian dollar surges on strong employment data", "category": "Forex", "impact": "MEDIUM"},
-        {"headline": "Swiss franc gains as geopolitical tensions escalate", "category": "Forex", "impact": "LOW"},
-    ],
-    'ADVFN': [
-        {"headline": "{stock} shares jump {percent}% on merger speculation", "category": "Stocks", "impact": "MEDIUM"},
-        {"headline": "Insider buying activity surges in {sector} sector", "category": "Stocks", "impact": "LOW"},
-        {"headline": "Short interest declines in major tech stocks", "category": "Stocks", "impact": "LOW"},
-        {"headline": "Options activity suggests bullish sentiment for {stock}", "category": "Stocks", "impact": "LOW"},
-        {"headline": "Institutional investors increase positions in {sector} ETFs", "category": "Stocks", "impact": "MEDIUM"},
-    ]
-}
-
-def generate_realistic_news(count=20):
-    """Generate realistic financial news articles"""
-    news_items = []
-    sources = list(NEWS_TEMPLATES.keys())
-    
-    for i in range(count):
-        source = random.choice(sources)
-        template = random.choice(NEWS_TEMPLATES[source])
-        
-        # Fill in placeholders
-        headline = template['headline']
-        headline = headline.replace('{percent}', str(random.randint(2, 8)))
-        headline = headline.replace('{price}', str(random.randint(3, 12)))
-        headline = headline.replace('{trillion}', str(round(random.uniform(1.5, 3.5), 1)))
-        headline = headline.replace('{level}', f"1.{random.randint(1000, 2000)}")
-        headline = headline.replace('{target}', f"1.{random.randint(2000, 3000)}")
-        headline = headline.replace('{stock}', random.choice(['AAPL', 'TSLA', 'MSFT', 'GOOGL', 'AMZN']))
-        headline = headline.replace('{sector}', random.choice(['technology', 'healthcare', 'energy', 'financial']))
-        
-        # Generate timestamp (last 24 hours)
-        hours_ago = random.randint(0, 24)
-        timestamp = datetime.now() - timedelta(hours=hours_ago)
-        
-        # Generate summary
-        summaries = [
-            "Market analysts are closely monitoring the situation as volatility increases.",
-            "Traders are positioning for potential breakout as key levels are tested.",
-            "This development could have significant implications for global markets.",
-            "Investors are advised to watch for further updates throughout the trading session.",
-            "The move comes amid broader market uncertainty and shifting sentiment.",
-        ]
-        
-        news_items.append({
-            'id': i + 1,
-            'source': source,
-            'headline': headline,
-            'summary': random.choice(summaries),
-            'category': template['category'],
-            'impact': template['impact'],
-            'timestamp': timestamp.isoformat(),
-            'time_ago': f"{hours_ago}h ago" if hours_ago > 0 else "Just now"
-        })
-    
-    # Sort by timestamp (newest first)
-    news_items.sort(key=lambda x: x['timestamp'], reverse=True)
-    
-    # Add frontend compatibility fields
-    for item in news_items:
-        item['title'] = item['headline']
-        item['time'] = item['time_ago']
-        
-    return news_items
-
 @news_bp.route('/calendar', methods=['GET'])
+@cache_policy(max_age=60)
 def get_calendar(tenant):
-    """Get economic calendar events"""
-    symbol = request.args.get('symbol', 'EURUSD')
+    """
+    Get economic calendar events for the currencies behind a symbol.
     
-    # Mock data for economic calendar
-    events = [
-        {"title": "Non-Farm Payrolls", "currency": "USD", "impact": "HIGH", "time": "14:30", "actual": "225K", "forecast": "180K"},
-        {"title": "ECB Interest Rate Decision", "currency": "EUR", "impact": "HIGH", "time": "13:45", "actual": "4.5%", "forecast": "4.5%"},
-        {"title": "CPI m/m", "currency": "USD", "impact": "MEDIUM", "time": "14:30", "actual": "0.3%", "forecast": "0.2%"},
-        {"title": "Retail Sales", "currency": "GBP", "impact": "MEDIUM", "time": "08:00", "actual": "0.1%", "forecast": "0.1%"},
-    ]
+    Query: symbol (default EURUSD), impact (comma list, e.g. HIGH,MEDIUM),
+           past_hours (default 12), hours ahead (default 24)
+    """
+    symbol = request.args.get('symbol', 'EURUSD')
+    impacts = [i.strip().upper() for i in request.args.get('impact', '').split(',') if i.strip()]
+    past_hours = request.args.get('past_hours', 12, type=float)
+    ahead_hours = request.args.get('hours', 24, type=float)
     
-    # Filter/Customise based on symbol if needed
-    if 'USD' in symbol:
-        events = [e for e in events if e['currency'] == 'USD']
-    elif 'EUR' in symbol:
-        events = [e for e in events if e['currency'] == 'EUR']
-    elif 'GBP' in symbol:
-        events = [e for e in events if e['currency'] == 'GBP']
-        
+    events = calendar_service.events_for_symbol(g.tenant.id, symbol, impacts, past_hours, ahead_hours)
     return jsonify(events)
 
 @news_bp.route('/', methods=['GET'])
+@cache_policy()
 def get_news(tenant):
-    """Get financial news with optional filtering"""
+    """
+    Get financial news with optional filtering, newest first.
+    
+    Query: source, category, cursor (from X-Next-Cursor), limit (default 30, max 100)
+    """
     source_filter = request.args.get('source')
     category_filter = request.args.get('category')
-    
-    news_items = generate_realistic_news(count=30)
-    
-    # Apply filters
-    if source_filter:
-        news_items = [n for n in news_items if n['source'] == source_filter]
-    
-    if category_filter:
-        news_items = [n for n in news_items if n['category'] == category_filter]
-    
-    return jsonify(news_items)
+    cursor = request.args.get('cursor')
+    limit = max(1, min(request.args.get('limit', 30, type=int), 100))
+    
+    news_items, next_cursor = news_store.page(source_filter, category_filter, cursor, limit)
+    etag = news_store.etag(news_items, next_cursor)
+    if not_modified(etag):
+        return '', 304, {'ETag': f'"{etag}"'}
+    
+    response = jsonify(news_items)
+    response.set_etag(etag)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+        next_args = {k: v for k, v in request.args.items() if k != 'cursor'}
+        next_url = url_for('news.get_news', tenant=tenant, cursor=next_cursor, **next_args)
+        response.headers['Link'] = f'<{next_url}>; rel="next"'
+    return response
 
 @news_bp.route('/sources', methods=['GET'])
+@cache_policy(max_age=3600)
 def get_sources(tenant):
     """Get available news sources"""
     return jsonify(list(NEWS_TEMPLATES.keys()))
 
 @news_bp.route('/categories', methods=['GET'])
+@cache_policy(max_age=3600)
 def get_categories(tenant):
     """Get available news categories"""
-    return jsonify(['Markets', 'Forex', 'Stocks', 'Commodities'])
+    return jsonify(CATEGORIES)
@@ -1,30 +1,40 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, g
 from services.challenge_service import ChallengeService
 from models import Trade, UserChallenge
-from extensions import db
+from services.write_behind import write_behind, InvalidRow, WriteBehindFull, WriteBehindTimeout
 
 trade_bp = Blueprint('trade', __name__)
 
 @trade_bp.route('/', methods=['POST'])
 def place_trade(tenant):
-    data = request.json
+    data = request.get_json(silent=True) or {}
     # data: challenge_id, symbol, side, volume
     
     # Mock execution
     # 1. Get Price
     # 2. Create Trade
-    trade = Trade(
-        tenant_id=1, # Mock
-        challenge_id=data['challenge_id'],
-        symbol=data['symbol'],
-        side=data['side'],
-        volume=data['volume'],
-        entry_price=100.0, # Mock
-        stop_loss=data.get('stop_loss'),
-        take_profit=data.get('take_profit'),
-        pnl=0.0 # Open trade
-    )
-    db.session.add(trade)
-    db.session.commit()
+    try:
+        trade_id = write_behind.submit(Trade, dict(
+            tenant_id=g.tenant.id,
+            challenge_id=data.get('challenge_id'),
+            symbol=data.get('symbol'),
+            side=data.get('side'),
+            volume=data.get('volume'),
+            entry_price=100.0, # Mock
+            stop_loss=data.get('stop_loss'),
+            take_profit=data.get('take_profit'),
+            pnl=0.0 # Open trade
+        ))
+    except InvalidRow as e:
+        return jsonify({"error": "Invalid trade", "message": str(e)}), 400
+    except WriteBehindFull:
+        return jsonify({"error": "Trade queue is full, retry shortly"}), 503, {"Retry-After": "1"}
+    except WriteBehindTimeout:
+        # Still queued: it commits with its batch, the id is just not known yet
+        return jsonify({"message": "Trade accepted"}), 202
     
-    return jsonify({"message": "Trade executed", "trade_id": trade.id}), 201
+    if trade_id is None:
+        # Async durability: the trade is queued and will be committed in the next batch
+        return jsonify({"message": "Trade accepted"}), 202
+    
+    return jsonify({"message": "Trade executed", "trade_id": trade_id}), 201
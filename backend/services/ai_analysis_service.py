@@ -5,53 +5,138 @@ Supports:
 2. REAL Mode: Uses OpenAI GPT-4o to analyze data (Requires OPENAI_API_KEY)
 """
 import random
+import asyncio
 import os
 import json
+import time
 from datetime import datetime
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
+from services.news_features import news_features
+from services.shared_cache import shared_cache
+from services.symbol_registry import symbol_registry
+from utils.metrics import LLM_LATENCY, metrics
 
 try:
-    from openai import OpenAI
+    from openai import OpenAI, AsyncOpenAI
 except ImportError:
-    OpenAI = None
+    OpenAI = AsyncOpenAI = None
 
 class AIAnalysisService:
     """AI-powered trading analysis engine"""
     
+    STOP_LOSS_PCT = 0.01  # Tight SL
+    TAKE_PROFIT_PCT = 0.03  # 1:3 RR roughly
+    ANALYSIS_TTL = 60  # seconds an LLM analysis is shared across workers
+    
     def __init__(self):
+        self.cache_ttl = self.ANALYSIS_TTL
         self.api_key = os.environ.get('OPENAI_API_KEY')
         if self.api_key and OpenAI:
             self.client = OpenAI(api_key=self.api_key)
+            self.async_client = AsyncOpenAI(api_key=self.api_key)  # ASGI mode
             self.mode = "REAL"
             print("AI Service initialized in REAL mode (GPT-4o).")
         else:
             self.client = None
+            self.async_client = None
             self.mode = "DEMO"
             print("AI Service initialized in DEMO mode.")
     
-    def analyze_symbol(self, symbol: str, timeframe: str = "1D") -> Dict[str, Any]:
+    def analyze_symbol(self, symbol: str, timeframe: str = "1D", tenant_id: Optional[int] = None) -> Dict[str, Any]:
         """
         Perform comprehensive AI analysis on a symbol
         """
+        cached = self.cached_analysis(symbol, timeframe, tenant_id)
+        if cached is not None:
+            return cached
+        price, news_analysis, technical = self.gather_inputs(symbol, tenant_id)
+        
+        if self.mode == "REAL":
+            try:
+                with metrics.span('analyze_symbol.llm'):
+                    analysis = self._call_llm_analysis(symbol, timeframe, price, technical, news_analysis)
+                return self._share_analysis(symbol, timeframe, tenant_id, analysis)
+            except Exception as e:
+                print(f"LLM Analysis failed: {e}. Falling back to DEMO.")
+                # Fallback to demo logic if API fails
+        
+        with metrics.span('analyze_symbol.simulated'):
+            return self._get_simulated_analysis(symbol, timeframe, price, news_analysis, technical)
+
+    def gather_inputs(self, symbol: str, tenant_id: Optional[int] = None):
+        """(price, news features, technicals) fed to the LLM or the demo logic; may read the DB"""
         # Simulate current price (Step 0: Data Gathering)
         # In a full production version, this would call MarketDataService
-        price = self._get_simulated_price(symbol)
+        with metrics.span('analyze_symbol.price'):
+            price = self._get_simulated_price(symbol)
         
         # Gather basic technical/news data to feed the AI (or use in Demo)
-        news_analysis = self._analyze_news(symbol)
-        technical = self._analyze_technical_indicators(symbol, price)
+        with metrics.span('analyze_symbol.news'):
+            news_analysis = self._analyze_news(symbol, tenant_id)
+        with metrics.span('analyze_symbol.technical'):
+            technical = self._analyze_technical_indicators(symbol, price)
+        return price, news_analysis, technical
+    
+    async def analyze_symbol_async(self, symbol: str, timeframe: str = "1D", inputs=None,
+                                   tenant_id: Optional[int] = None) -> Dict[str, Any]:
+        """
+        analyze_symbol for the ASGI mode: the LLM call is awaited on the event
+        loop. Pass `inputs` from gather_inputs when it has to run elsewhere
+        (it reads the database).
+        """
+        cached = self.cached_analysis(symbol, timeframe, tenant_id)
+        if cached is not None:
+            return cached
+        price, news_analysis, technical = inputs or self.gather_inputs(symbol, tenant_id)
         
         if self.mode == "REAL":
             try:
-                return self._call_llm_analysis(symbol, timeframe, price, technical, news_analysis)
+                with metrics.span('analyze_symbol.llm'):
+                    if self.async_client is None:
+                        analysis = await asyncio.to_thread(self._call_llm_analysis, symbol, timeframe, price, technical, news_analysis)
+                    else:
+                        analysis = await self._call_llm_analysis_async(symbol, timeframe, price, technical, news_analysis)
+                return self._share_analysis(symbol, timeframe, tenant_id, analysis)
             except Exception as e:
                 print(f"LLM Analysis failed: {e}. Falling back to DEMO.")
-                # Fallback to demo logic if API fails
         
-        return self._get_simulated_analysis(symbol, timeframe, price, news_analysis, technical)
+        with metrics.span('analyze_symbol.simulated'):
+            return self._get_simulated_analysis(symbol, timeframe, price, news_analysis, technical)
+
+    def cached_analysis(self, symbol: str, timeframe: str, tenant_id: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """LLM analysis produced by any worker within cache_ttl (REAL mode only)"""
+        if self.mode != "REAL" or not self.cache_ttl:
+            return None
+        return shared_cache.get(('analysis', tenant_id, symbol, timeframe))
+
+    def _share_analysis(self, symbol, timeframe, tenant_id, analysis: Dict[str, Any]) -> Dict[str, Any]:
+        if self.cache_ttl:
+            shared_cache.set(('analysis', tenant_id, symbol, timeframe), analysis, self.cache_ttl)
+        return analysis
 
     def _call_llm_analysis(self, symbol, timeframe, price, technical, news) -> Dict[str, Any]:
         """Call OpenAI GPT-4o to generate analysis"""
+        started = time.perf_counter()
+        try:
+            response = self.client.chat.completions.create(**self._llm_request(symbol, timeframe, price, technical, news))
+        except Exception:
+            LLM_LATENCY.observe(time.perf_counter() - started, "gpt-4o", "error")
+            raise
+        LLM_LATENCY.observe(time.perf_counter() - started, "gpt-4o", "success")
+        return self._llm_result(symbol, timeframe, price, response)
+
+    async def _call_llm_analysis_async(self, symbol, timeframe, price, technical, news) -> Dict[str, Any]:
+        started = time.perf_counter()
+        try:
+            response = await self.async_client.chat.completions.create(**self._llm_request(symbol, timeframe, price, technical, news))
+        except Exception:
+            LLM_LATENCY.observe(time.perf_counter() - started, "gpt-4o", "error")
+            raise
+        LLM_LATENCY.observe(time.perf_counter() - started, "gpt-4o", "success")
+        return self._llm_result(symbol, timeframe, price, response)
+
+    def _llm_request(self, symbol, timeframe, price, technical, news) -> Dict[str, Any]:
+        """Chat completion arguments for the analysis prompt"""
         
         system_prompt = "You are an expert institutional trading AI. You provide data-driven trading analysis, strict risk management, and clear execution signals."
         
@@ -94,7 +179,7 @@ class AIAnalysisService:
         }}
         """
         
-        response = self.client.chat.completions.create(
+        return dict(
             model="gpt-4o",
             messages=[
                 {"role": "system", "content": system_prompt},
@@ -103,7 +188,8 @@ class AIAnalysisService:
             response_format={"type": "json_object"},
             temperature=0.3
         )
-        
+
+    def _llm_result(self, symbol, timeframe, price, response) -> Dict[str, Any]:
         content = response.choices[0].message.content
         data = json.loads(content)
         
@@ -153,7 +239,7 @@ class AIAnalysisService:
             "timestamp": datetime.now().isoformat(),
             "mode": "Simulated Professional (Demo)",
             "analysis": {
-                "news_macro": self._generate_coherent_news(trend_direction, symbol),
+                "news_macro": self._generate_coherent_news(trend_direction, symbol, news_analysis),
                 "market_structure": market_structure,
                 "technical": technical,
                 "sentiment": sentiment,
@@ -244,19 +330,24 @@ class AIAnalysisService:
             "positioning": f"Biased {trend}"
         }
 
-    def _generate_coherent_news(self, trend, symbol):
+    def _generate_coherent_news(self, trend, symbol, news_analysis=None):
         impact = trend if trend != "Range" else "Neutral"
         headlines = {
             "Bullish": ["Strong Earnings Beat Expectations", "Analyst Upgrades to Outperform", "Positive Macro Data Release"],
             "Bearish": ["Inflation Concerns Rise", "Missed Earnings & Weak Guidance", "Regulatory Headwinds Intensify"],
             "Neutral": ["Market Awaits Fed Decision", "Consolidation Continues on Low Vol", "Mixed Economic Data"]
         }
-        return {
+        news_macro = {
             "impact": impact,
             "key_events": random.sample(headlines.get(trend, headlines["Neutral"]), 2),
             "description": f"News flow is supporting a {trend.lower()} outlook.",
             "overreaction_risk": "Medium"
         }
+        if news_analysis:
+            news_macro["impact_features"] = news_analysis["features"]
+            if news_analysis["sentiment"] == "HIGH_VOLATILITY":
+                news_macro["overreaction_risk"] = "High"
+        return news_macro
 
     def _evaluate_coherent_scenarios(self, trend, price):
         if trend == "Bullish":
@@ -300,20 +391,17 @@ class AIAnalysisService:
     
     def _get_simulated_price(self, symbol: str) -> float:
         """Generate realistic simulated price"""
-        base_prices = {
-            "EURUSD": 1.0950, "GBPUSD": 1.2750, "USDJPY": 148.50,
-            "BTCUSD": 45000.00, "TSLA": 245.00, "AAPL": 185.00, "GOLD": 2030.00,
-        }
-        if symbol.endswith('.MA'):
-            base = 100.0 + (sum(ord(c) for c in symbol) % 500)
-        else:
-            base = base_prices.get(symbol, 100.0)
+        info = symbol_registry.get(symbol)
+        base = info.base_price or 100.0
         variation = (random.random() - 0.5) * (base * 0.02)
-        return round(base + variation, 2)
+        return info.round_price(base + variation)
     
-    def _analyze_news(self, symbol: str) -> Dict[str, Any]:
-        """Placeholder for Real Mode pre-analysis"""
-        return {}
+    def _analyze_news(self, symbol: str, tenant_id: Optional[int] = None) -> Dict[str, Any]:
+        """Precomputed news-impact features for the symbol's currencies (O(1) read)"""
+        if tenant_id is None:
+            return {}
+        news_features.warm(tenant_id)
+        return news_features.symbol_features(tenant_id, symbol)
     
     def _analyze_technical_indicators(self, symbol: str, price: float) -> Dict[str, Any]:
         """Placeholder for Real Mode pre-analysis"""
@@ -340,8 +428,8 @@ class AIAnalysisService:
         rec = decision['recommendation']
         if rec == "BUY":
             entry = price
-            sl = round(price * 0.99, 2) # Tight SL
-            tp = round(price * 1.03, 2) # 1:3 RR roughly
+            sl = round(price * (1 - self.STOP_LOSS_PCT), 2)
+            tp = round(price * (1 + self.TAKE_PROFIT_PCT), 2)
             return {
                 "entry_zone": f"{round(entry*0.999, 2)} - {round(entry*1.001, 2)}",
                 "stop_loss": sl,
@@ -350,8 +438,8 @@ class AIAnalysisService:
             }
         elif rec == "SELL":
             entry = price
-            sl = round(price * 1.01, 2)
-            tp = round(price * 0.97, 2)
+            sl = round(price * (1 + self.STOP_LOSS_PCT), 2)
+            tp = round(price * (1 - self.TAKE_PROFIT_PCT), 2)
             return {
                 "entry_zone": f"{round(entry*0.999, 2)} - {round(entry*1.001, 2)}",
                 "stop_loss": sl,
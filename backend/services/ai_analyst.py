@@ -1,5 +1,12 @@
 from datetime import datetime, timedelta
 import random
+from services.news_features import news_features
+from services.regime_service import regime_service, REGIMES
+from services.symbol_registry import symbol_registry
+
+# Trade setup offsets in pips (pip size per symbol from the registry)
+STOP_PIPS = 30
+TAKE_PROFIT_PIPS = (40, 80)
 
 class AIAnalyst:
     def __init__(self, tenant_id):
@@ -22,42 +29,55 @@ class AIAnalyst:
         
         return sentiment
 
-    def detect_regime(self):
-        # Mock Regime Detection
-        regimes = [
-            "Risk-On / Trending",
-            "Risk-Off / High-Volatility",
-            "Range-bound / Low-Volatility",
-            "Neutral / Consolidation"
-        ]
-        return random.choice(regimes)
+    def classify_symbol_news(self, symbol):
+        """Same classification as classify_news, read from the precomputed per-currency aggregates"""
+        news_features.warm(self.tenant_id)
+        return news_features.symbol_features(self.tenant_id, symbol)
+
+    def detect_regime(self, symbol="EURUSD"):
+        """Regime label precomputed on bar close by regime_service (Neutral when there is no history)"""
+        snapshot = regime_service.get(symbol)
+        return snapshot["regime"] if snapshot else REGIMES['NEUTRAL']
 
     def generate_trade_idea(self, symbol="EURUSD"):
-        # 1. Analyze Market Regime
-        regime = self.detect_regime()
+        # 1. Market Regime (precomputed) and news impact
+        snapshot = regime_service.get(symbol)
+        regime = snapshot["regime"] if snapshot else REGIMES['NEUTRAL']
+        news = self.classify_symbol_news(symbol)
         
-        # 2. Simulate Technical Analysis (Mock)
-        bias = random.choice(["LONG", "SHORT"])
-        current_price = 1.0850 if symbol == "EURUSD" else 150.00
+        # 2. Simulate Technical Analysis (Mock); trending regimes follow the trend direction
+        if snapshot and snapshot["regime_key"] == 'TRENDING':
+            bias = "LONG" if snapshot["trend"] == "UP" else "SHORT"
+        else:
+            bias = random.choice(["LONG", "SHORT"])
+        info = symbol_registry.get(symbol)
+        if snapshot:
+            current_price = snapshot["close"]
+        else:
+            current_price = info.base_price or 150.00
+        stop_distance = STOP_PIPS * info.pip_size
+        tp_distances = [pips * info.pip_size for pips in TAKE_PROFIT_PIPS]
         
         # 3. Construct Trade Setup
         if bias == "LONG":
             entry = current_price
-            stop_loss = current_price - 0.0030 # 30 pips SL
-            take_profit_1 = current_price + 0.0040 # 40 pips
-            take_profit_2 = current_price + 0.0080 # 80 pips
+            stop_loss = info.round_price(current_price - stop_distance)
+            take_profit_1 = info.round_price(current_price + tp_distances[0])
+            take_profit_2 = info.round_price(current_price + tp_distances[1])
             explanation = "Price rejected key support level with strong volume confirmation. Momentum indicators crossing upward."
         else:
             entry = current_price
-            stop_loss = current_price + 0.0030
-            take_profit_1 = current_price - 0.0040
-            take_profit_2 = current_price - 0.0080
+            stop_loss = info.round_price(current_price + stop_distance)
+            take_profit_1 = info.round_price(current_price - tp_distances[0])
+            take_profit_2 = info.round_price(current_price - tp_distances[1])
             explanation = "Failed to break resistance at key level. Bearish divergence observed on RSI."
 
         return {
             "market_summary": f"Market is currently in a {regime} mode. Focus on {bias} setups.",
             "regime": regime,
-            "news_driver": "Upcoming Central Bank decision causing pre-event positioning.",
+            "regime_metrics": {k: snapshot[k] for k in ("trend", "adx", "vol_percentile", "range_compression", "as_of")} if snapshot else None,
+            "news_driver": self._news_driver(news),
+            "news_features": news["features"],
             "trade_setup": {
                 "asset": symbol,
                 "bias": bias,
@@ -72,6 +92,15 @@ class AIAnalyst:
             "entry_logic": explanation
         }
 
-    def get_latest_analysis(self):
-        # In a real scenario, this would aggregate data from DB price_data and news_events
-        return self.generate_trade_idea()
+    def _news_driver(self, news):
+        features = news["features"]
+        currencies = "/".join(news["currencies"])
+        if features.get("scheduled_high_impact"):
+            return f"Upcoming high-impact {currencies} events causing pre-event positioning."
+        if news["sentiment"] == "HIGH_VOLATILITY":
+            return f"{features['high_impact_4h']} high-impact {currencies} releases in the last 4h are driving volatility."
+        return f"Quiet {currencies} news flow; price action is technically driven."
+
+    def get_latest_analysis(self, symbol="EURUSD"):
+        # News impact is read from precomputed aggregates fed by news_events ingestion
+        return self.generate_trade_idea(symbol)
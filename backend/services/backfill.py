@@ -0,0 +1,246 @@
+"""
+Historical Backfill
+Downloads deep OHLCV history for a symbol universe into price_data, the
+shared bar store (tenant_id NULL, one row per symbol / timeframe / open time):
+- each symbol's range is split into date-range chunks no longer than the
+  provider serves per request (HISTORY_SPAN), aligned to the bar grid and
+  clamped to how far back the provider serves the timeframe (HISTORY_DEPTH)
+- chunks download concurrently; a rate limiter per provider spaces requests
+  to its quota (REQUESTS_PER_SECOND) and failed requests retry with backoff
+- a symbol's chunks are stored in date order (a chunk that finishes early
+  waits for its predecessors), so the stored series never has a gap and a
+  rerun resumes from the last stored bar. A chunk that keeps failing stops
+  its symbol; the next run picks it up from there
+- bars are upserted on the shared bar key through the write-behind queue,
+  so the resumed bar (partial if it was still open when stored) is refreshed
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import func
+
+from extensions import db
+from models import PriceData
+from services.market_data_service import TIMEFRAME_SECONDS
+from services.write_behind import write_behind
+
+DEFAULT_HISTORY = timedelta(days=3650)
+CHUNK_BARS = 5000  # Chunk length for providers without a HISTORY_SPAN
+STORE_BATCH = 2000  # Rows per durable write-behind submit
+
+
+class RateLimiter:
+    """Spaces acquire() calls 1 / rate seconds apart across threads (blocking)"""
+    def __init__(self, rate: Optional[float], clock=time.monotonic, sleep=time.sleep):
+        self.interval = 1.0 / rate if rate else 0.0
+        self.clock = clock
+        self.sleep = sleep
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Wait for the next request slot; returns the seconds waited"""
+        if not self.interval:
+            return 0.0
+        with self._lock:
+            now = self.clock()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        wait = slot - now
+        if wait > 0:
+            self.sleep(wait)
+        return wait
+
+
+@dataclass
+class Chunk:
+    symbol: str
+    index: int  # Position in the symbol's range
+    start: datetime
+    end: datetime
+
+
+class _SymbolProgress:
+    def __init__(self):
+        self.next = 0  # Next chunk index to store
+        self.ready: Dict[int, list] = {}  # Downloaded ahead of order
+        self.bars = 0
+        self.failed: Optional[str] = None
+        self.store_lock = threading.Lock()  # One writer per symbol
+
+
+class _Run:
+    def __init__(self, provider, timeframe: str, rate: Optional[float]):
+        self.provider = provider
+        self.timeframe = timeframe
+        self.source = provider.SOURCE or provider.__class__.__name__
+        self.limiter = RateLimiter(provider.REQUESTS_PER_SECOND if rate is None else rate)
+        self.progress: Dict[str, _SymbolProgress] = {}
+        self.counters = {"requests": 0, "retries": 0, "throttled_seconds": 0.0}
+
+
+def naive_utc(ts: Optional[datetime]) -> Optional[datetime]:
+    """Bar times are naive UTC: convert an aware datetime (e.g. --start 2024-01-01T00:00+02:00) and drop the zone"""
+    if ts is None or ts.tzinfo is None:
+        return ts
+    return ts.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _floor(ts: datetime, step: int) -> datetime:
+    epoch = datetime(1970, 1, 1)
+    return epoch + timedelta(seconds=int((ts - epoch).total_seconds()) // step * step)
+
+
+class BackfillService:
+    def __init__(self, max_workers: int = 8, retries: int = 3, backoff: float = 1.0):
+        self.max_workers = max_workers
+        self.retries = retries
+        self.backoff = backoff
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self.stats = {"runs": 0, "requests": 0, "bars": 0, "failed_symbols": 0}
+
+    # --- Planning ---
+
+    def last_bars(self, symbols: List[str], timeframe: str) -> Dict[str, datetime]:
+        """Open time of each symbol's latest stored bar (the resume point), on uq_price_data_shared_bar"""
+        rows = db.session.query(PriceData.symbol, func.max(PriceData.timestamp)).filter(
+            PriceData.tenant_id.is_(None), PriceData.timeframe == timeframe, PriceData.symbol.in_(symbols)
+        ).group_by(PriceData.symbol).all()
+        return {symbol: last for symbol, last in rows if last is not None}
+
+    def plan(self, provider, symbols: List[str], timeframe: str, start: datetime = None, end: datetime = None,
+             full: bool = False) -> List[Chunk]:
+        """Date-range chunks per symbol from its last stored bar (or start) to end, earliest chunks first"""
+        step = TIMEFRAME_SECONDS[timeframe]
+        end = naive_utc(end) or datetime.utcnow()
+        earliest = naive_utc(start) or end - DEFAULT_HISTORY
+        depth = provider.HISTORY_DEPTH.get(timeframe)
+        if depth:
+            earliest = max(earliest, end - depth + timedelta(seconds=step))
+        earliest = _floor(earliest, step)
+        span = provider.HISTORY_SPAN.get(timeframe) or timedelta(seconds=step * CHUNK_BARS)
+        span = timedelta(seconds=max(step, int(span.total_seconds()) // step * step))
+        resume = {} if full else self.last_bars(symbols, timeframe)
+
+        chunks = []
+        for symbol in symbols:
+            # Inclusive: the last stored bar may have been stored while still open
+            cursor = max(earliest, resume[symbol]) if symbol in resume else earliest
+            index = 0
+            while cursor < end:
+                chunks.append(Chunk(symbol, index, cursor, min(cursor + span, end)))
+                cursor += span
+                index += 1
+        # Round-robin over symbols so every series advances from its start
+        return sorted(chunks, key=lambda c: (c.index, c.symbol))
+
+    # --- Running ---
+
+    def run(self, provider, symbols: List[str], timeframe: str = '1d', start: datetime = None, end: datetime = None,
+            full: bool = False, max_workers: int = None, rate: float = None) -> dict:
+        """Plan and download (inside an app context). rate overrides the provider's requests per second."""
+        if timeframe not in TIMEFRAME_SECONDS:
+            raise ValueError(f"Unknown timeframe '{timeframe}' (expected one of {', '.join(TIMEFRAME_SECONDS)})")
+        if not getattr(provider, 'SUPPORTS_HISTORY', False):
+            raise ValueError(f"{provider.__class__.__name__} does not serve ranged history")
+        started = time.monotonic()
+        chunks = self.plan(provider, symbols, timeframe, start, end, full)
+        run = _Run(provider, timeframe, rate)
+        run.progress = {symbol: _SymbolProgress() for symbol in symbols}
+
+        self._stop.clear()
+        pool = ThreadPoolExecutor(max_workers=max_workers or self.max_workers, thread_name_prefix='backfill')
+        try:
+            for future in [pool.submit(self._run_chunk, run, chunk) for chunk in chunks]:
+                future.result()
+        except KeyboardInterrupt:
+            self._stop.set()  # Chunks not yet started are skipped; what is stored stays gap-free
+            raise
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+        failed = {symbol: p.failed for symbol, p in run.progress.items() if p.failed}
+        bars = sum(p.bars for p in run.progress.values())
+        with self._lock:
+            self.stats["runs"] += 1
+            self.stats["requests"] += run.counters["requests"]
+            self.stats["bars"] += bars
+            self.stats["failed_symbols"] += len(failed)
+        return {
+            "provider": run.source,
+            "timeframe": timeframe,
+            "symbols": len(symbols),
+            "chunks": len(chunks),
+            "requests": run.counters["requests"],
+            "retries": run.counters["retries"],
+            "throttled_seconds": round(run.counters["throttled_seconds"], 2),
+            "bars": bars,
+            "failed": failed,
+            "seconds": round(time.monotonic() - started, 2),
+        }
+
+    def _run_chunk(self, run: _Run, chunk: Chunk):
+        progress = run.progress[chunk.symbol]
+        if self._stop.is_set() or progress.failed:
+            return
+        try:
+            bars = self._download(run, chunk)
+        except Exception as e:
+            progress.failed = progress.failed or f"{chunk.start:%Y-%m-%d %H:%M}: {e}"
+            print(f"Backfill {chunk.symbol} {run.timeframe} stopped at {chunk.start:%Y-%m-%d %H:%M}: {e}")
+            return
+        with self._lock:
+            progress.ready[chunk.index] = bars
+        self._store(run, chunk.symbol, progress)
+
+    def _download(self, run: _Run, chunk: Chunk) -> list:
+        for attempt in range(self.retries + 1):
+            waited = run.limiter.acquire()
+            with self._lock:
+                run.counters["requests"] += 1
+                run.counters["throttled_seconds"] += waited
+            try:
+                bars = run.provider.get_history(chunk.symbol, run.timeframe, chunk.start, chunk.end)
+                return [bar for bar in bars if chunk.start <= bar['time'] < chunk.end]
+            except ValueError:
+                raise  # The provider does not carry the symbol / timeframe: retrying cannot help
+            except Exception:
+                if attempt == self.retries or self._stop.is_set():
+                    raise
+                with self._lock:
+                    run.counters["retries"] += 1
+                time.sleep(self.backoff * 2 ** attempt)
+
+    def _store(self, run: _Run, symbol: str, progress: _SymbolProgress):
+        """Write every downloaded chunk that is next in date order"""
+        with progress.store_lock:
+            while not progress.failed:
+                with self._lock:
+                    bars = progress.ready.pop(progress.next, None)
+                if bars is None:
+                    return
+                rows = [{
+                    'tenant_id': None, 'symbol': symbol, 'timeframe': run.timeframe, 'timestamp': bar['time'],
+                    # Plain floats: providers hand back numpy scalars
+                    'open': float(bar['open']), 'high': float(bar['high']), 'low': float(bar['low']),
+                    'close': float(bar['close']),
+                    'volume': float(bar['volume']) if bar.get('volume') is not None else None,
+                    'source': run.source,
+                } for bar in bars]
+                try:
+                    for i in range(0, len(rows), STORE_BATCH):
+                        write_behind.submit_many(PriceData, rows[i:i + STORE_BATCH], durable=True)
+                except Exception as e:
+                    progress.failed = f"store failed: {e}"
+                    print(f"Backfill {symbol} {run.timeframe} could not store bars: {e}")
+                    return
+                progress.bars += len(rows)
+                progress.next += 1
+
+
+backfill = BackfillService()
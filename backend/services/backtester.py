@@ -0,0 +1,271 @@
+"""
+Backtester
+Replays a signal function over stored OHLCV history (PriceData) and
+simulates stop-loss / take-profit fills:
+- a signal maps a symbol's bars to per-bar side (+1 long, -1 short, 0 flat),
+  stop and target levels; entries fill at the signal bar's close
+- exits are found with a vectorized scan of the next `horizon` bars (first
+  bar whose low/high crosses the stop or target; the stop wins ties and
+  fills at the open when price gaps through it; otherwise a time exit)
+- one position per symbol at a time, symbols run in parallel across a
+  process pool
+
+Built-in signals mirror the two analysis paths: AIAnalyst trade ideas
+(regime trend bias, stop / take-profit in registry pips) and
+AIAnalysisService decisions (EMA alignment, percentage stop / take-profit).
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import select
+
+from extensions import db
+from models import PriceData
+from services.ai_analysis_service import AIAnalysisService
+from services.ai_analyst import STOP_PIPS, TAKE_PROFIT_PIPS
+from services.regime_service import LOOKBACK, regime_series
+from services.symbol_registry import symbol_registry
+
+Bars = Dict[str, np.ndarray]  # open / high / low / close arrays, oldest bar first
+
+
+# --- Signals ---
+# Signals take (S, T) arrays for S equal-length symbols so the recursive
+# indicators (Wilder smoothing, EMAs) are vectorized across symbols, plus
+# an (S, 1) 'pip_size' column.
+
+def trade_idea_signal(bars: Bars, take_profit_index: int = 0) -> Dict[str, np.ndarray]:
+    """
+    AIAnalyst.generate_trade_idea: trade the trend direction while the regime
+    is TRENDING, stop / take-profit in pips of each symbol (bars['pip_size']).
+    """
+    close = bars['close']
+    if close.shape[1] < LOOKBACK:
+        return {'side': np.zeros(close.shape, dtype=int), 'stop': close, 'target': close}
+    series = regime_series(bars['high'], bars['low'], close)
+    direction = np.where(series['plus_di'] >= series['minus_di'], 1, -1)
+    side = np.where(series['regime'] == 'TRENDING', direction, 0)
+    pip = bars['pip_size']
+    return {
+        'side': side,
+        'stop': close - side * STOP_PIPS * pip,
+        'target': close + side * TAKE_PROFIT_PIPS[take_profit_index] * pip,
+    }
+
+
+def _ema(x: np.ndarray, span: int) -> np.ndarray:
+    """pandas ewm(span, adjust=False).mean() along the bar axis"""
+    alpha = 2.0 / (span + 1)
+    out = np.empty_like(x)
+    out[:, 0] = x[:, 0]
+    for t in range(1, x.shape[1]):
+        out[:, t] = out[:, t - 1] + alpha * (x[:, t] - out[:, t - 1])
+    return out
+
+
+def analysis_decision_signal(bars: Bars) -> Dict[str, np.ndarray]:
+    """
+    AIAnalysisService decision: BUY when EMA 20 > 50 > 200, SELL when
+    20 < 50 < 200 (TechnicalAnalysisUtils alignment), WAIT otherwise, with
+    the service's percentage stop / take-profit.
+    """
+    close = bars['close']
+    ema20, ema50, ema200 = _ema(close, 20), _ema(close, 50), _ema(close, 200)
+    side = np.where((ema20 > ema50) & (ema50 > ema200), 1, np.where((ema20 < ema50) & (ema50 < ema200), -1, 0))
+    side[:, :200] = 0  # EMA 200 warm-up
+    return {
+        'side': side,
+        'stop': close * (1 - side * AIAnalysisService.STOP_LOSS_PCT),
+        'target': close * (1 + side * AIAnalysisService.TAKE_PROFIT_PCT),
+    }
+
+
+SIGNALS: Dict[str, Callable[[Bars], Dict[str, np.ndarray]]] = {
+    'trade_idea': trade_idea_signal,
+    'analysis_decision': analysis_decision_signal,
+}
+
+
+# --- Simulation ---
+
+def scan_exits(side: np.ndarray, entry_idx: np.ndarray, stop: np.ndarray, target: np.ndarray,
+               bars: Bars, horizon: int) -> Dict[str, np.ndarray]:
+    """Exit bar and price for every candidate entry at once ((k, horizon) path windows)"""
+    n = len(bars['close'])
+    pad = np.full(horizon, np.nan)
+    windows = {k: np.lib.stride_tricks.sliding_window_view(np.concatenate([bars[k][1:], pad]), horizon)[entry_idx]
+               for k in ('open', 'high', 'low')}
+    long = (side > 0)[:, None]
+    stop_, target_ = stop[:, None], target[:, None]
+
+    stop_hit = np.where(long, windows['low'] <= stop_, windows['high'] >= stop_)
+    target_hit = np.where(long, windows['high'] >= target_, windows['low'] <= target_)
+    first_stop = np.where(stop_hit.any(axis=1), stop_hit.argmax(axis=1), horizon)
+    first_target = np.where(target_hit.any(axis=1), target_hit.argmax(axis=1), horizon)
+
+    last_bar = np.minimum(entry_idx + horizon, n - 1)
+    exit_bar = last_bar.copy()
+    exit_price = bars['close'][last_bar]
+    reason = np.full(len(entry_idx), 'time', dtype=object)
+
+    stopped = (first_stop < horizon) & (first_stop <= first_target)
+    hit_target = (first_target < horizon) & ~stopped
+    rows = np.arange(len(entry_idx))
+    gap_open = windows['open'][rows, np.minimum(first_stop, horizon - 1)]
+    stop_fill = np.where(side > 0, np.minimum(stop, gap_open), np.maximum(stop, gap_open))
+
+    exit_bar = np.where(stopped, entry_idx + 1 + first_stop, np.where(hit_target, entry_idx + 1 + first_target, exit_bar))
+    exit_price = np.where(stopped, stop_fill, np.where(hit_target, target, exit_price))
+    reason[stopped] = 'stop'
+    reason[hit_target] = 'target'
+    return {'exit_bar': exit_bar, 'exit_price': exit_price, 'reason': reason}
+
+
+def simulate(bars: Bars, signal: Dict[str, np.ndarray], horizon: int = 20, cost_bps: float = 0.0) -> Dict[str, np.ndarray]:
+    """Trades taken by one symbol (one open position at a time)"""
+    side = np.asarray(signal['side'])
+    candidates = np.flatnonzero(side[:-1] != 0)
+    if not len(candidates):
+        return {k: np.array([]) for k in ('entry_bar', 'exit_bar', 'side', 'entry', 'exit', 'reason', 'returns')}
+
+    stop, target = signal['stop'][candidates], signal['target'][candidates]
+    exits = scan_exits(side[candidates], candidates, stop, target, bars, horizon)
+
+    # Walk candidates in order, skipping entries while a position is open
+    taken, free_at = [], 0
+    for i, (entry_bar, exit_bar) in enumerate(zip(candidates, exits['exit_bar'])):
+        if entry_bar >= free_at:
+            taken.append(i)
+            free_at = exit_bar
+    taken = np.asarray(taken)
+
+    trade_side = side[candidates][taken]
+    entry = bars['close'][candidates][taken]
+    exit_price = exits['exit_price'][taken]
+    returns = trade_side * (exit_price - entry) / entry - 2 * cost_bps / 10000
+    return {
+        'entry_bar': candidates[taken],
+        'exit_bar': exits['exit_bar'][taken],
+        'side': trade_side,
+        'entry': entry,
+        'exit': exit_price,
+        'reason': exits['reason'][taken],
+        'returns': returns,
+    }
+
+
+def summarize(returns: np.ndarray, bars_held: np.ndarray = None) -> Dict[str, float]:
+    """PnL, drawdown and win-rate for a sequence of per-trade returns (profit_factor None without losses)"""
+    if not len(returns):
+        return {"trades": 0, "win_rate": 0.0, "total_return": 0.0, "max_drawdown": 0.0,
+                "avg_return": 0.0, "profit_factor": None, "avg_bars_held": 0.0}
+    equity = np.cumprod(1 + returns)
+    peaks = np.maximum.accumulate(np.concatenate([[1.0], equity]))[1:]
+    gains, losses = returns[returns > 0].sum(), -returns[returns < 0].sum()
+    return {
+        "trades": int(len(returns)),
+        "win_rate": round(float((returns > 0).mean()) * 100, 2),
+        "total_return": round(float(equity[-1] - 1) * 100, 2),
+        "max_drawdown": round(float((1 - equity / peaks).max()) * 100, 2),
+        "avg_return": round(float(returns.mean()) * 100, 4),
+        "profit_factor": round(float(gains / losses), 3) if losses else None,
+        "avg_bars_held": round(float(bars_held.mean()), 1) if bars_held is not None else None,
+    }
+
+
+def backtest_symbol(symbol: str, bars: Bars, signal: Dict[str, np.ndarray], horizon: int, cost_bps: float) -> Dict:
+    """Simulation + stats for one symbol (1-D bars and signal)"""
+    trades = simulate(bars, signal, horizon, cost_bps)
+    stats = summarize(trades['returns'], trades['exit_bar'] - trades['entry_bar'])
+    return {"symbol": symbol, **stats, "_returns": trades['returns']}
+
+
+def _backtest_chunk(chunk, signal_name, horizon, cost_bps):
+    """Process-pool task: one signal call per group of equal-length symbols, then per-symbol fills"""
+    by_length: Dict[int, list] = {}
+    for symbol, bars in chunk:
+        by_length.setdefault(len(bars['close']), []).append((symbol, bars))
+    results = []
+    for group in by_length.values():
+        stacked = {k: np.stack([bars[k] for _, bars in group]) for k in ('open', 'high', 'low', 'close')}
+        stacked['pip_size'] = np.array([[symbol_registry.get(symbol).pip_size] for symbol, _ in group])
+        signals = SIGNALS[signal_name](stacked)
+        for row, (symbol, bars) in enumerate(group):
+            signal = {k: v[row] for k, v in signals.items()}
+            results.append(backtest_symbol(symbol, bars, signal, horizon, cost_bps))
+    return results
+
+
+class Backtester:
+    def __init__(self, signal: str = 'trade_idea', horizon: int = 20, cost_bps: float = 0.0,
+                 workers: Optional[int] = None, chunk_size: int = 25):
+        if signal not in SIGNALS:
+            raise ValueError(f"Unknown signal '{signal}' (expected one of {', '.join(SIGNALS)})")
+        self.signal = signal
+        self.horizon = horizon
+        self.cost_bps = cost_bps
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+
+    def load_history(self, symbols: List[str] = None, start: datetime = None, end: datetime = None,
+                     timeframe: str = '1d') -> Dict[str, Bars]:
+        """OHLCV per symbol from price_data, one ordered scan on ix_price_data_symbol_ts"""
+        stmt = select(PriceData.symbol, PriceData.open, PriceData.high, PriceData.low, PriceData.close
+                      ).where(PriceData.close.isnot(None), PriceData.timeframe == timeframe)
+        if symbols:
+            stmt = stmt.where(PriceData.symbol.in_(symbols))
+        if start:
+            stmt = stmt.where(PriceData.timestamp >= start)
+        if end:
+            stmt = stmt.where(PriceData.timestamp <= end)
+        rows = db.session.execute(stmt.order_by(PriceData.symbol, PriceData.timestamp)).all()
+        if not rows:
+            return {}
+
+        names = np.array([r[0] for r in rows], dtype=object)
+        ohlc = np.array([r[1:] for r in rows], dtype=float)
+        # Missing open/high/low fall back to the close
+        ohlc = np.where(np.isnan(ohlc), ohlc[:, 3:4], ohlc)
+        bounds = np.flatnonzero(names[1:] != names[:-1]) + 1
+        history = {}
+        for lo, hi in zip(np.r_[0, bounds], np.r_[bounds, len(rows)]):
+            block = ohlc[lo:hi]
+            history[names[lo]] = {'open': block[:, 0], 'high': block[:, 1], 'low': block[:, 2], 'close': block[:, 3]}
+        return history
+
+    def run(self, history: Dict[str, Bars]) -> Dict:
+        """Backtest every symbol; per-symbol stats plus totals over all trades"""
+        items = [(s, b) for s, b in history.items() if len(b['close']) > self.horizon]
+        chunks = [items[i:i + self.chunk_size] for i in range(0, len(items), self.chunk_size)]
+        args = (self.signal, self.horizon, self.cost_bps)
+
+        if self.workers > 1 and len(chunks) > 1:
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                results = [r for chunk in pool.map(_backtest_chunk, chunks, *([a] * len(chunks) for a in args))
+                           for r in chunk]
+        else:
+            results = [r for chunk in chunks for r in _backtest_chunk(chunk, *args)]
+
+        all_returns = np.concatenate([r.pop('_returns') for r in results]) if results else np.array([])
+        overall = summarize(all_returns)
+        overall.pop("total_return")  # Compounding across symbols in sequence is meaningless
+        overall.pop("max_drawdown")
+        overall.pop("avg_bars_held")
+        return {
+            "signal": self.signal,
+            "horizon": self.horizon,
+            "symbols": len(results),
+            "summary": {
+                **overall,
+                "avg_symbol_return": round(float(np.mean([r["total_return"] for r in results])), 2) if results else 0.0,
+                "worst_drawdown": max((r["max_drawdown"] for r in results), default=0.0),
+            },
+            "results": sorted(results, key=lambda r: r["total_return"], reverse=True),
+        }
+
+    def run_stored(self, symbols: List[str] = None, start: datetime = None, end: datetime = None,
+                   timeframe: str = '1d') -> Dict:
+        return self.run(self.load_history(symbols, start, end, timeframe))
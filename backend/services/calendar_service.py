@@ -0,0 +1,149 @@
+"""
+Economic Calendar Service
+Indexed time-range queries over NewsEvent (tenant_id, currency, event_time)
+with symbol -> currency-leg mapping (EURUSD -> EUR, USD).
+
+The window most requests ask for (last 12h + next 24h per tenant and
+currency) is cached in memory and filtered by impact/time at read time.
+Entries expire after CACHE_TTL so the window slides, and are invalidated
+as soon as the ingestion pipeline upserts events for that tenant/currency,
+in every worker (its ingest broadcast, see NewsIngestionPipeline.init_app).
+
+A tenant with no ingested events yet (no feed configured, or the first poll
+has not run) gets SAMPLE_EVENTS, the static calendar served before
+ingestion existed, instead of an empty list.
+"""
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+
+from models import NewsEvent
+from services.symbol_registry import symbol_registry
+
+IMPACT_LEVELS = ('HIGH', 'MEDIUM', 'LOW')
+
+SAMPLE_EVENTS = [
+    {"title": "Non-Farm Payrolls", "currency": "USD", "impact": "HIGH", "time": "14:30", "actual": "225K", "forecast": "180K"},
+    {"title": "ECB Interest Rate Decision", "currency": "EUR", "impact": "HIGH", "time": "13:45", "actual": "4.5%", "forecast": "4.5%"},
+    {"title": "CPI m/m", "currency": "USD", "impact": "MEDIUM", "time": "14:30", "actual": "0.3%", "forecast": "0.2%"},
+    {"title": "Retail Sales", "currency": "GBP", "impact": "MEDIUM", "time": "08:00", "actual": "0.1%", "forecast": "0.1%"},
+]
+
+
+def currency_legs(symbol: str) -> List[str]:
+    """Currencies whose calendar events move a symbol (from the symbol registry)"""
+    return symbol_registry.currency_legs(symbol)
+
+
+def serialize_event(event: NewsEvent) -> dict:
+    return {
+        "id": event.id,
+        "title": event.event_name,
+        "currency": event.currency,
+        "impact": event.impact,
+        "time": event.event_time.strftime('%H:%M') if event.event_time else None,
+        "event_time": event.event_time.isoformat() if event.event_time else None,
+        "actual": event.actual,
+        "forecast": event.forecast,
+        "previous": event.previous,
+    }
+
+
+class CalendarService:
+    CACHE_PAST_HOURS = 12
+    CACHE_AHEAD_HOURS = 24
+    CACHE_TTL = 300  # seconds
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cache: Dict[Tuple[int, str], Tuple[float, datetime, List[dict]]] = {}
+        self._ingested = set()  # Tenants known to have events
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0, "samples": 0}
+
+    def query(self, tenant_id: int, currencies: List[str], start: datetime, end: datetime,
+              impacts: List[str] = None, limit: int = 200) -> List[dict]:
+        """Range scan on ix_news_events_tenant_currency_time"""
+        q = NewsEvent.query.filter(
+            NewsEvent.tenant_id == tenant_id,
+            NewsEvent.currency.in_(currencies),
+            NewsEvent.event_time >= start,
+            NewsEvent.event_time <= end,
+        )
+        if impacts:
+            q = q.filter(NewsEvent.impact.in_(impacts))
+        return [serialize_event(e) for e in q.order_by(NewsEvent.event_time).limit(limit)]
+
+    def events_for_symbol(self, tenant_id: int, symbol: str, impacts: List[str] = None,
+                          past_hours: float = 12, ahead_hours: float = 24, now: datetime = None) -> List[dict]:
+        now = now or datetime.utcnow()
+        start, end = now - timedelta(hours=past_hours), now + timedelta(hours=ahead_hours)
+        legs = currency_legs(symbol)
+
+        if past_hours > self.CACHE_PAST_HOURS or ahead_hours > self.CACHE_AHEAD_HOURS:
+            events = self.query(tenant_id, legs, start, end, impacts)
+            return events or self._samples(tenant_id, legs, impacts)
+
+        events = []
+        for currency in legs:
+            events.extend(self._window(tenant_id, currency, now))
+        start_iso, end_iso = start.isoformat(), end.isoformat()
+        events = [e for e in events if start_iso <= e['event_time'] <= end_iso
+                  and (not impacts or e['impact'] in impacts)]
+        events.sort(key=lambda e: e['event_time'])
+        return events or self._samples(tenant_id, legs, impacts)
+
+    def has_events(self, tenant_id: int) -> bool:
+        """Whether anything was ingested for the tenant (EXISTS on ix_news_events_tenant_time; positives cached)"""
+        if tenant_id in self._ingested:
+            return True
+        if NewsEvent.query.filter(NewsEvent.tenant_id == tenant_id).first() is None:
+            return False
+        self._ingested.add(tenant_id)
+        return True
+
+    def _samples(self, tenant_id: int, legs: List[str], impacts: List[str] = None) -> List[dict]:
+        """The static calendar, for tenants without ingested events only (an empty window stays empty)"""
+        if self.has_events(tenant_id):
+            return []
+        self.stats["samples"] += 1
+        return [dict(e) for e in SAMPLE_EVENTS if e['currency'] in legs and (not impacts or e['impact'] in impacts)]
+
+    def upcoming_high_impact(self, tenant_id: int, currency: str, now: datetime = None) -> List[dict]:
+        """High-impact events for one currency in the next 24h (served from cache)"""
+        now = now or datetime.utcnow()
+        now_iso = now.isoformat()
+        return [e for e in self._window(tenant_id, currency, now) if e['impact'] == 'HIGH' and e['event_time'] >= now_iso]
+
+    def _window(self, tenant_id: int, currency: str, now: datetime) -> List[dict]:
+        key = (tenant_id, currency)
+        entry = self._cache.get(key)
+        if entry and time.monotonic() - entry[0] < self.CACHE_TTL:
+            self.stats["hits"] += 1
+            return entry[2]
+
+        self.stats["misses"] += 1
+        # Cover the TTL so the window stays complete until the entry expires
+        start = now - timedelta(hours=self.CACHE_PAST_HOURS)
+        end = now + timedelta(hours=self.CACHE_AHEAD_HOURS, seconds=self.CACHE_TTL)
+        events = [e for e in self.query(tenant_id, [currency], start, end, limit=1000) if e['event_time']]
+        with self._lock:
+            self._cache[key] = (time.monotonic(), now, events)
+        return events
+
+    def invalidate(self, tenant_id: int = None, currency: str = None):
+        with self._lock:
+            keys = [k for k in self._cache
+                    if (tenant_id is None or k[0] == tenant_id) and (currency is None or k[1] == currency)]
+            for k in keys:
+                del self._cache[k]
+            self.stats["invalidations"] += len(keys)
+
+    def on_ingest(self, rows: List[dict]):
+        """news_ingestion listener: drop cached windows touched by upserted rows"""
+        for tenant_id, currency in {(r.get('tenant_id'), r.get('currency')) for r in rows}:
+            self._ingested.add(tenant_id)
+            self.invalidate(tenant_id, currency)
+
+
+calendar_service = CalendarService()
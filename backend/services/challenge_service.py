@@ -1,7 +1,31 @@
+from dataclasses import dataclass
+from typing import Optional
 from models import UserChallenge, Trade
 from extensions import db
 from datetime import datetime
 
+PLAN_BALANCES = {'STARTER': 10000.0, 'PRO': 50000.0, 'ELITE': 100000.0}
+
+
+@dataclass(frozen=True)
+class ChallengeRules:
+    """Challenge limits as fractions of the initial balance"""
+    daily_loss_pct: Optional[float] = 0.05
+    max_drawdown_pct: float = 0.10
+    profit_target_pct: float = 0.10
+
+    def limits(self, initial_balance: float) -> dict:
+        """UserChallenge limit columns (absolute amounts)"""
+        return {
+            'daily_max_loss': initial_balance * (self.daily_loss_pct or 0.0),
+            'max_drawdown': initial_balance * self.max_drawdown_pct,
+            'profit_target': initial_balance * self.profit_target_pct,
+        }
+
+
+DEFAULT_RULES = ChallengeRules()
+
+
 class ChallengeService:
     
     @staticmethod
@@ -42,11 +66,9 @@ class ChallengeService:
         pass
 
     @staticmethod
-    def create_challenge(user, plan_type, settings):
+    def create_challenge(user, plan_type, settings, rules: ChallengeRules = DEFAULT_RULES):
         # Logic to create challenge based on plan settings
-        initial_balance = 10000.0
-        if plan_type == 'PRO': initial_balance = 50000.0
-        if plan_type == 'ELITE': initial_balance = 100000.0
+        initial_balance = PLAN_BALANCES.get(plan_type, PLAN_BALANCES['STARTER'])
         
         challenge = UserChallenge(
             tenant_id=user.tenant_id,
@@ -54,10 +76,8 @@ class ChallengeService:
             challenge_type=plan_type,
             initial_balance=initial_balance,
             current_equity=initial_balance,
-            daily_max_loss=initial_balance * 0.05, # 5%
-            max_drawdown=initial_balance * 0.10,   # 10%
-            profit_target=initial_balance * 0.10,  # 10%
-            status='ACTIVE'
+            status='ACTIVE',
+            **rules.limits(initial_balance),
         )
         db.session.add(challenge)
         db.session.commit()
@@ -0,0 +1,203 @@
+"""
+Challenge Replay Simulator
+Replays trade streams (closed trades from the `trades` table, or synthetic
+ones) through the challenge rules for a grid of rule variants, to see how
+pass rates move with the daily loss / max drawdown / profit target limits.
+
+State is array-backed: each challenge's trades are a row of a padded
+(challenges x trades) matrix of PnL as a fraction of the initial balance.
+Because each rule only depends on its own threshold, the first trade that
+breaches every distinct threshold value is computed once per dimension;
+a variant's outcome is then the earliest of its three breach indices. The
+cost is O(challenges x trades x distinct thresholds) plus
+O(challenges x variants), and challenge chunks run across a process pool.
+
+Rule semantics follow ChallengeService.evaluate_rules (drawdown measured
+from the initial balance, failure checked before the profit target on the
+same trade) plus the daily loss limit the UserChallenge columns define:
+the loss since the equity at the start of the trade's UTC day.
+"""
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import select
+
+from extensions import db
+from models import Trade, UserChallenge
+from services.challenge_service import ChallengeRules, DEFAULT_RULES
+
+NEVER = np.iinfo(np.int32).max
+
+
+@dataclass
+class TradeStreams:
+    """Padded per-challenge trade streams; rows past `counts` repeat the last day with zero PnL"""
+    returns: np.ndarray  # (C, K) float: trade PnL / initial balance
+    days: np.ndarray  # (C, K) int: day number of the trade close
+    counts: np.ndarray  # (C,) trades per challenge
+
+    def __len__(self):
+        return len(self.counts)
+
+    def chunk(self, start: int, stop: int) -> 'TradeStreams':
+        width = max(int(self.counts[start:stop].max(initial=1)), 1)
+        return TradeStreams(self.returns[start:stop, :width], self.days[start:stop, :width], self.counts[start:stop])
+
+
+def rule_grid(daily_loss_pcts: Sequence[Optional[float]] = (DEFAULT_RULES.daily_loss_pct,),
+              max_drawdown_pcts: Sequence[float] = (DEFAULT_RULES.max_drawdown_pct,),
+              profit_target_pcts: Sequence[float] = (DEFAULT_RULES.profit_target_pct,)) -> List[ChallengeRules]:
+    """Every combination of the given limits (None disables the daily loss rule)"""
+    return [ChallengeRules(d, m, p) for d, m, p in itertools.product(daily_loss_pcts, max_drawdown_pcts, profit_target_pcts)]
+
+
+def _pad_streams(challenge_ids: np.ndarray, returns: np.ndarray, days: np.ndarray) -> TradeStreams:
+    """Flat trades sorted by challenge then time -> padded (C, K) matrices"""
+    _, starts, counts = np.unique(challenge_ids, return_index=True, return_counts=True)
+    width = int(counts.max()) if len(counts) else 1
+    rows = np.repeat(np.arange(len(counts)), counts)
+    cols = np.arange(len(returns)) - np.repeat(starts, counts)
+
+    padded_returns = np.zeros((len(counts), width), dtype=np.float64)
+    padded_returns[rows, cols] = returns
+    padded_days = np.full((len(counts), width), -1, dtype=np.int32)
+    padded_days[rows, cols] = days
+    padded_days = np.maximum.accumulate(padded_days, axis=1)  # Forward-fill the last day into the padding
+    return TradeStreams(padded_returns, padded_days, counts.astype(np.int32))
+
+
+def _first_true(mask: np.ndarray) -> np.ndarray:
+    """Index of the first True per row, NEVER if none"""
+    return np.where(mask.any(axis=1), mask.argmax(axis=1), NEVER).astype(np.int32)
+
+
+def _breach_indices(streams: TradeStreams, daily: np.ndarray, drawdown: np.ndarray, target: np.ndarray):
+    """First breaching trade per challenge for every distinct threshold: (C, len(values)) each"""
+    equity = np.cumsum(streams.returns, axis=1)  # Relative to the initial balance
+    low_water = np.minimum.accumulate(equity, axis=1)
+    high_water = np.maximum.accumulate(equity, axis=1)
+
+    # Equity at the start of each trade's day (before its first trade that day)
+    previous = np.concatenate([np.zeros((len(equity), 1)), equity[:, :-1]], axis=1)
+    new_day = np.ones_like(streams.days, dtype=bool)
+    new_day[:, 1:] = streams.days[:, 1:] != streams.days[:, :-1]
+    day_start_col = np.maximum.accumulate(np.where(new_day, np.arange(equity.shape[1]), 0), axis=1)
+    day_pnl = equity - np.take_along_axis(previous, day_start_col, axis=1)
+
+    first_daily = np.stack([_first_true(day_pnl < -v) for v in daily], axis=1)
+    first_drawdown = np.stack([_first_true(low_water < -v) for v in drawdown], axis=1)
+    first_target = np.stack([_first_true(high_water >= v) for v in target], axis=1)
+    return first_daily, first_drawdown, first_target
+
+
+def simulate_chunk(streams: TradeStreams, grid: List[ChallengeRules]) -> Dict[str, np.ndarray]:
+    """Outcome counts per variant for one chunk of challenges (process-pool task)"""
+    daily_limits = [np.inf if r.daily_loss_pct is None else r.daily_loss_pct for r in grid]  # inf never breaches
+    daily_values = sorted(set(daily_limits))
+    drawdown_values = sorted({r.max_drawdown_pct for r in grid})
+    target_values = sorted({r.profit_target_pct for r in grid})
+    first_daily, first_drawdown, first_target = _breach_indices(
+        streams, np.array(daily_values), np.array(drawdown_values), np.array(target_values))
+
+    daily_col = np.searchsorted(daily_values, daily_limits)
+    drawdown_col = np.searchsorted(drawdown_values, [r.max_drawdown_pct for r in grid])
+    target_col = np.searchsorted(target_values, [r.profit_target_pct for r in grid])
+
+    # (C, R) breach indices per variant
+    daily = first_daily[:, daily_col]
+    drawdown = first_drawdown[:, drawdown_col]
+    target = first_target[:, target_col]
+    failed_at = np.minimum(daily, drawdown)
+    failed = failed_at <= target
+    failed &= failed_at != NEVER
+    passed = ~failed & (target != NEVER)
+    trades_to_pass = np.where(passed, target + 1, 0)
+
+    return {
+        "passed": passed.sum(axis=0),
+        "failed_daily": (failed & (daily <= drawdown)).sum(axis=0),
+        "failed_drawdown": (failed & (drawdown < daily)).sum(axis=0),
+        "trades_to_pass": trades_to_pass.sum(axis=0),
+    }
+
+
+class ChallengeSimulator:
+    def __init__(self, workers: Optional[int] = None, chunk_size: int = 1000):
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+
+    # --- Trade streams ---
+
+    def load_trade_streams(self, tenant_id: int = None, challenge_type: str = None) -> TradeStreams:
+        """Closed trades per challenge in close order, PnL relative to the challenge's initial balance"""
+        stmt = select(Trade.challenge_id, Trade.pnl, Trade.closed_at, UserChallenge.initial_balance).join(
+            UserChallenge, UserChallenge.id == Trade.challenge_id
+        ).where(Trade.closed_at.isnot(None), Trade.pnl.isnot(None))
+        if tenant_id is not None:
+            stmt = stmt.where(Trade.tenant_id == tenant_id)
+        if challenge_type:
+            stmt = stmt.where(UserChallenge.challenge_type == challenge_type)
+        rows = db.session.execute(stmt.order_by(Trade.challenge_id, Trade.closed_at)).all()
+        if not rows:
+            return TradeStreams(np.zeros((0, 1)), np.zeros((0, 1), dtype=np.int32), np.zeros(0, dtype=np.int32))
+
+        challenge_ids = np.array([r[0] for r in rows])
+        returns = np.array([r[1] / r[3] for r in rows])
+        days = np.array([r[2].toordinal() for r in rows], dtype=np.int32)
+        return _pad_streams(challenge_ids, returns, days)
+
+    def synthetic_streams(self, challenges: int, trades_per_challenge: int = 100, trades_per_day: float = 4.0,
+                          win_rate: float = 0.48, avg_win: float = 0.012, avg_loss: float = 0.010,
+                          seed: int = 0) -> TradeStreams:
+        """Random trader population: per-challenge skill spread around the given win rate"""
+        rng = np.random.default_rng(seed)
+        counts = rng.integers(max(1, trades_per_challenge // 4), trades_per_challenge * 2, challenges)
+        width = int(counts.max())
+        skill = np.clip(rng.normal(win_rate, 0.05, (challenges, 1)), 0.05, 0.95)
+        wins = rng.random((challenges, width)) < skill
+        size = rng.exponential(1.0, (challenges, width))
+        returns = np.where(wins, avg_win * size, -avg_loss * size)
+        returns[np.arange(width)[None, :] >= counts[:, None]] = 0.0
+        days = np.cumsum(rng.random((challenges, width)) < 1.0 / trades_per_day, axis=1).astype(np.int32)
+        return TradeStreams(returns, days, counts.astype(np.int32))
+
+    # --- Replay ---
+
+    def run(self, streams: TradeStreams, grid: List[ChallengeRules]) -> List[dict]:
+        """Pass / fail rates for every rule variant, best pass rate first"""
+        bounds = [(i, min(i + self.chunk_size, len(streams))) for i in range(0, len(streams), self.chunk_size)]
+        chunks = [streams.chunk(lo, hi) for lo, hi in bounds]
+
+        if self.workers > 1 and len(chunks) > 1:
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                parts = list(pool.map(simulate_chunk, chunks, [grid] * len(chunks)))
+        else:
+            parts = [simulate_chunk(chunk, grid) for chunk in chunks]
+
+        totals = {key: sum(part[key] for part in parts) for key in parts[0]} if parts else {}
+        total = len(streams)
+        results = []
+        for i, rules in enumerate(grid):
+            passed = int(totals["passed"][i]) if totals else 0
+            failed_daily = int(totals["failed_daily"][i]) if totals else 0
+            failed_drawdown = int(totals["failed_drawdown"][i]) if totals else 0
+            results.append({
+                "daily_loss_pct": rules.daily_loss_pct,
+                "max_drawdown_pct": rules.max_drawdown_pct,
+                "profit_target_pct": rules.profit_target_pct,
+                "challenges": total,
+                "passed": passed,
+                "failed_daily": failed_daily,
+                "failed_drawdown": failed_drawdown,
+                "active": total - passed - failed_daily - failed_drawdown,
+                "pass_rate": round(passed / total * 100, 2) if total else 0.0,
+                "avg_trades_to_pass": round(int(totals["trades_to_pass"][i]) / passed, 1) if passed else None,
+            })
+        return sorted(results, key=lambda r: r["pass_rate"], reverse=True)
+
+    def run_stored(self, grid: List[ChallengeRules], tenant_id: int = None, challenge_type: str = None) -> List[dict]:
+        return self.run(self.load_trade_streams(tenant_id, challenge_type), grid)
@@ -0,0 +1,129 @@
+"""
+Market Calendar
+Trading sessions per asset class, from the symbol registry's "sessions"
+table (local open/close times, opening weekdays, optional holidays).
+
+Cache layers and pollers ask for a TTL instead of a fixed expiry: while a
+market trades they get their normal refresh interval; once it has closed
+(and the closing print has had time to settle) the TTL runs to the next
+session open, so weekend and overnight polls of TSLA or Casablanca names
+stop hitting upstream for prices that cannot change.
+"""
+import threading
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from services.symbol_registry import symbol_registry
+
+SETTLE_SECONDS = 15 * 60  # keep the open TTL this long after the close (delayed feeds, closing auction)
+MAX_LOOKAHEAD_DAYS = 14
+
+
+def _parse_clock(value: str) -> timedelta:
+    hours, minutes = value.split(':')
+    return timedelta(hours=int(hours), minutes=int(minutes))  # "24:00" is the next midnight
+
+
+def _utc(now: Optional[datetime]) -> datetime:
+    """Aware UTC datetime; naive input is treated as UTC like the rest of the app"""
+    if now is None:
+        return datetime.now(timezone.utc)
+    return now.replace(tzinfo=timezone.utc) if now.tzinfo is None else now.astimezone(timezone.utc)
+
+
+class TradingSession:
+    def __init__(self, name: str, spec: dict):
+        self.name = name
+        self.tz = ZoneInfo(spec.get('timezone', 'UTC'))
+        self.days = set(spec.get('days', range(7)))
+        self.open = _parse_clock(spec.get('open', '00:00'))
+        self.close = _parse_clock(spec.get('close', '24:00'))
+        if self.close <= self.open:
+            self.close += timedelta(days=1)  # Overnight session closes the next day
+        self.holidays = {date.fromisoformat(d) for d in spec.get('holidays', [])}
+        self.always_open = self.days == set(range(7)) and self.close - self.open >= timedelta(days=1) and not self.holidays
+
+    def _interval(self, day: date) -> Optional[Tuple[datetime, datetime]]:
+        """UTC [open, close) of the session opening on a local date, if it trades that day"""
+        if day.weekday() not in self.days or day in self.holidays:
+            return None
+        midnight = datetime(day.year, day.month, day.day, tzinfo=self.tz)
+        return (midnight + self.open).astimezone(timezone.utc), (midnight + self.close).astimezone(timezone.utc)
+
+    def state(self, now: datetime) -> Tuple[bool, datetime, Optional[datetime]]:
+        """(is_open, next state change, last close) at an aware UTC instant"""
+        today = now.astimezone(self.tz).date()
+        last_close = None
+        for offset in range(-2, MAX_LOOKAHEAD_DAYS):
+            interval = self._interval(today + timedelta(days=offset))
+            if interval is None:
+                continue
+            start, end = interval
+            if start <= now < end:
+                return True, end, last_close
+            if end <= now:
+                last_close = end
+            elif start > now:
+                return False, start, last_close
+        return False, now + timedelta(days=MAX_LOOKAHEAD_DAYS), last_close
+
+
+class MarketCalendar:
+    def __init__(self, sessions: Dict[str, dict] = None):
+        self._sessions = {name: TradingSession(name, spec) for name, spec in (sessions or symbol_registry.sessions).items()}
+        self._state_cache: Dict[str, Tuple[datetime, bool, datetime, Optional[datetime]]] = {}
+        self._lock = threading.Lock()
+
+    def session(self, symbol: str) -> Optional[TradingSession]:
+        return self._sessions.get(symbol_registry.get(symbol).session)
+
+    def _state(self, session: TradingSession, now: datetime):
+        # A session's state only changes at its next boundary: reuse it until then
+        cached = self._state_cache.get(session.name)
+        if cached and cached[0] <= now < cached[2]:
+            return cached[1:]
+        is_open, change_at, last_close = session.state(now)
+        with self._lock:
+            self._state_cache[session.name] = (now, is_open, change_at, last_close)
+        return is_open, change_at, last_close
+
+    def is_open(self, symbol: str, now: datetime = None) -> bool:
+        session = self.session(symbol)
+        if session is None or session.always_open:
+            return True
+        return self._state(session, _utc(now))[0]
+
+    def next_open(self, symbol: str, now: datetime = None) -> Optional[datetime]:
+        """Next session open (UTC, naive) if the market is closed, else None"""
+        session = self.session(symbol)
+        if session is None or session.always_open:
+            return None
+        is_open, change_at, _ = self._state(session, _utc(now))
+        return None if is_open else change_at.replace(tzinfo=None)
+
+    def ttl(self, symbol: str, open_ttl: float, now: datetime = None) -> float:
+        """Seconds a cached value for `symbol` stays valid"""
+        session = self.session(symbol)
+        if session is None or session.always_open:
+            return open_ttl
+        now = _utc(now)
+        is_open, change_at, last_close = self._state(session, now)
+        if is_open:
+            return open_ttl
+        if last_close is not None and (now - last_close).total_seconds() < SETTLE_SECONDS:
+            return open_ttl
+        return max(open_ttl, (change_at - now).total_seconds())
+
+    def status(self, symbol: str, now: datetime = None) -> dict:
+        session = self.session(symbol)
+        next_open = self.next_open(symbol, now)
+        return {
+            "symbol": symbol,
+            "session": session.name if session else None,
+            "open": self.is_open(symbol, now),
+            "next_open": next_open.isoformat() if next_open else None,
+        }
+
+
+market_calendar = MarketCalendar()
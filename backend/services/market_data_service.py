@@ -1,15 +1,70 @@
+import asyncio
 import yfinance as yf
 from abc import ABC, abstractmethod
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import random
 import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+from services.symbol_registry import symbol_registry
+from services.market_calendar import market_calendar
+from services.shared_cache import shared_cache
 
 try:
     from polygon import RESTClient
 except ImportError:
     RESTClient = None
 
+try:
+    import httpx  # Async HTTP for the ASGI serving mode
+except ImportError:
+    httpx = None
+
+# Bar length per chart timeframe
+TIMEFRAME_SECONDS = {'1m': 60, '5m': 300, '15m': 900, '1h': 3600, '1d': 86400}
+
+
+def history_lookback(timeframe: str, limit: int) -> timedelta:
+    """Calendar span holding `limit` bars: markets close at night, at weekends and on holidays"""
+    seconds = TIMEFRAME_SECONDS.get(timeframe, 86400) * limit
+    return timedelta(seconds=seconds * (1.6 if timeframe == '1d' else 5.0), days=4)
+
+
+def bar_time(ts, timeframe: str) -> datetime:
+    """Naive UTC open time of a bar; daily bars are keyed by their trading date"""
+    if isinstance(ts, (int, float)):
+        ts = datetime.fromtimestamp(ts / 1000, timezone.utc)  # Epoch milliseconds
+    if hasattr(ts, 'to_pydatetime'):
+        ts = ts.to_pydatetime()
+    if timeframe == '1d':
+        return datetime(ts.year, ts.month, ts.day)
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return ts
+
+
+def chart_time_format(timeframe: str) -> str:
+    """get_ohlcv 'time' format: the date for daily bars, date and minute (UTC) for intraday bars"""
+    return '%Y-%m-%d' if TIMEFRAME_SECONDS.get(timeframe, 86400) >= 86400 else '%Y-%m-%d %H:%M'
+
+
+def chart_bar(bar: dict, timeframe: str) -> dict:
+    """get_ohlcv row from a history bar"""
+    return dict(bar, time=bar['time'].strftime(chart_time_format(timeframe)))
+
+
 class IMarketDataProvider(ABC):
+    # Ranged history (see services/backfill.py): whether get_history is served,
+    # longest range one request may cover, how far back the provider serves,
+    # and its request quota
+    SUPPORTS_HISTORY = False
+    HISTORY_SPAN: Dict[str, timedelta] = {}
+    HISTORY_DEPTH: Dict[str, timedelta] = {}
+    REQUESTS_PER_SECOND: Optional[float] = None  # None = unlimited
+    SOURCE = None  # price_data.source of stored bars
+
     @abstractmethod
     def get_last_price(self, symbol: str) -> float:
         pass
@@ -18,7 +73,27 @@ class IMarketDataProvider(ABC):
     def get_ohlcv(self, symbol: str, timeframe: str, limit: int):
         pass
 
+    # Async variants (ASGI mode); blocking providers run on a worker thread
+    async def aget_last_price(self, symbol: str) -> float:
+        return await asyncio.to_thread(self.get_last_price, symbol)
+
+    async def aget_ohlcv(self, symbol: str, timeframe: str, limit: int):
+        return await asyncio.to_thread(self.get_ohlcv, symbol, timeframe, limit)
+
+    def get_history(self, symbol: str, timeframe: str, start: datetime, end: datetime) -> list:
+        """Bars opening in [start, end) (naive UTC), oldest first, 'time' as a datetime"""
+        raise NotImplementedError(f"{self.__class__.__name__} does not serve ranged history")
+
+
 class PolygonProvider(IMarketDataProvider):
+    TIMESPANS = {'1m': (1, 'minute'), '5m': (5, 'minute'), '15m': (15, 'minute'), '1h': (1, 'hour'), '1d': (1, 'day')}
+    # ~40000 bars of 24h markets per request, under the 50000 page size
+    HISTORY_SPAN = {'1m': timedelta(days=28), '5m': timedelta(days=140), '15m': timedelta(days=400),
+                    '1h': timedelta(days=1600), '1d': timedelta(days=7300)}
+    REQUESTS_PER_SECOND = 5 / 60  # Free tier: 5 calls per minute
+    SOURCE = 'POLYGON'
+    SUPPORTS_HISTORY = True
+
     def __init__(self, api_key):
         self.api_key = api_key
         self.client = RESTClient(api_key=api_key)
@@ -52,65 +127,103 @@ class PolygonProvider(IMarketDataProvider):
 
     def get_ohlcv(self, symbol: str, timeframe: str, limit: int):
         try:
-            ticker = self._format_symbol(symbol)
-            # basic mapping
-            multiplier = 1
-            timespan = "day"
-            if timeframe == '1h': timespan = "hour"
-            
-            # Date range
-            end = datetime.now()
-            start = end - timedelta(days=limit * 2) # Buffer
-            
-            aggs = self.client.get_aggs(ticker, multiplier, timespan, start, end)
-            data = []
-            for agg in aggs:
-                # Polygon timestamp is ms
-                dt = datetime.fromtimestamp(agg.timestamp / 1000)
-                data.append({
-                    'time': dt.strftime('%Y-%m-%d'),
-                    'open': agg.open,
-                    'high': agg.high,
-                    'low': agg.low,
-                    'close': agg.close,
-                    'volume': agg.volume
-                })
-            return data[-limit:] # Return requested limit
+            end = datetime.utcnow()
+            data = self.get_history(symbol, timeframe, end - history_lookback(timeframe, limit), end)
+            return [chart_bar(bar, timeframe) for bar in data[-limit:]] # Return requested limit
         except Exception as e:
              print(f"Polygon OHLCV Error for {symbol}: {e}")
              raise e
 
+    def get_history(self, symbol: str, timeframe: str, start: datetime, end: datetime) -> list:
+        multiplier, timespan = self.TIMESPANS.get(timeframe, (1, 'day'))
+        ticker = self._format_symbol(symbol)
+        # list_aggs follows next_url, so a range past one page (50000 bars) comes back whole
+        aggs = self.client.list_aggs(ticker, multiplier, timespan, _epoch_ms(start), _epoch_ms(end) - 1, limit=50000)
+        return [{
+            'time': bar_time(agg.timestamp, timeframe),
+            'open': agg.open,
+            'high': agg.high,
+            'low': agg.low,
+            'close': agg.close,
+            'volume': agg.volume
+        } for agg in aggs]
+
+    # --- Async (httpx against the REST aggregates endpoint) ---
+
+    BASE_URL = 'https://api.polygon.io'
+    TIMEOUT = 10.0
+
+    async def aget_last_price(self, symbol: str) -> float:
+        if httpx is None:
+            return await super().aget_last_price(symbol)
+        try:
+            rows = await self._aaggs(symbol, 1, 'day', datetime.now() - timedelta(days=4), datetime.now())
+            return rows[-1]['c'] if rows else 0.0
+        except Exception as e:
+            print(f"Polygon Price Error for {symbol}: {e}")
+            raise e
+
+    async def aget_ohlcv(self, symbol: str, timeframe: str, limit: int):
+        if httpx is None:
+            return await super().aget_ohlcv(symbol, timeframe, limit)
+        try:
+            multiplier, timespan = self.TIMESPANS.get(timeframe, (1, 'day'))
+            end = datetime.utcnow()
+            rows = await self._aaggs(symbol, multiplier, timespan, end - history_lookback(timeframe, limit), end)
+            data = [{
+                'time': bar_time(row['t'], timeframe).strftime(chart_time_format(timeframe)),
+                'open': row['o'],
+                'high': row['h'],
+                'low': row['l'],
+                'close': row['c'],
+                'volume': row.get('v'),
+            } for row in rows]
+            return data[-limit:]
+        except Exception as e:
+            print(f"Polygon OHLCV Error for {symbol}: {e}")
+            raise e
+
+    async def _aaggs(self, symbol, multiplier, timespan, start, end):
+        if getattr(self, '_async_client', None) is None:
+            self._async_client = httpx.AsyncClient(base_url=self.BASE_URL, timeout=self.TIMEOUT)
+        ticker = self._format_symbol(symbol)
+        response = await self._async_client.get(
+            f"/v2/aggs/ticker/{ticker}/range/{multiplier}/{timespan}/{_epoch_ms(start)}/{_epoch_ms(end) - 1}",
+            params={'adjusted': 'true', 'sort': 'asc', 'limit': 50000, 'apiKey': self.api_key},
+        )
+        response.raise_for_status()
+        payload = response.json()
+        rows = payload.get('results') or []
+        while payload.get('next_url'):  # Ranges past one page
+            response = await self._async_client.get(payload['next_url'], params={'apiKey': self.api_key})
+            response.raise_for_status()
+            payload = response.json()
+            rows += payload.get('results') or []
+        return rows
+
     def _format_symbol(self, symbol):
-        # Helper to format for Polygon
-        s = symbol.upper()
-        if s == 'EURUSD': return 'C:EURUSD'
-        if s == 'GBPUSD': return 'C:GBPUSD'
-        if s == 'USDJPY': return 'C:USDJPY'
-        if s == 'BTCUSD': return 'X:BTCUSD'
-        if s == 'ETHUSD': return 'X:ETHUSD'
-        if s == 'GOLD': return 'C:XAUUSD'
-        if s == 'SILVER': return 'C:XAGUSD'
-        
-        # If it's a Moroccan stock, Polygon won't have it, so let it fail and fallback
-        return s
+        # Helper to format for Polygon (C: forex/metals, X: crypto, plain stock tickers)
+        ticker = symbol_registry.ticker(symbol, 'polygon')
+        if ticker is None:
+            # e.g. Moroccan stocks: Polygon doesn't list them, fail fast so callers fall back
+            raise ValueError(f"{symbol} is not available on Polygon")
+        return ticker
 
 class YFinanceProvider(IMarketDataProvider):
+    # Yahoo serves 1m bars 7 days per request and 30 days back, 5m / 15m 60 days, 1h 730 days
+    HISTORY_SPAN = {'1m': timedelta(days=7), '5m': timedelta(days=59), '15m': timedelta(days=59),
+                    '1h': timedelta(days=729), '1d': timedelta(days=3650)}
+    HISTORY_DEPTH = {'1m': timedelta(days=29), '5m': timedelta(days=59), '15m': timedelta(days=59),
+                     '1h': timedelta(days=729)}
+    REQUESTS_PER_SECOND = 2.0  # Unofficial API: throttled above a few requests per second
+    SOURCE = 'YFINANCE'
+    SUPPORTS_HISTORY = True
+
     def __init__(self):
         print("Market Data initialized with YFinanceProvider (Free Tier).")
-        self.symbol_map = {
-            'EURUSD': 'EURUSD=X',
-            'GBPUSD': 'GBPUSD=X',
-            'USDJPY': 'USDJPY=X',
-            'BTCUSD': 'BTC-USD',
-            'ETHUSD': 'ETH-USD',
-            'GOLD': 'GC=F',
-            'SILVER': 'SI=F',
-            'TSLA': 'TSLA',
-            'AAPL': 'AAPL'
-        }
 
     def _map_symbol(self, symbol: str) -> str:
-        return self.symbol_map.get(symbol, symbol)
+        return symbol_registry.ticker(symbol, 'yfinance') or symbol
 
     def get_last_price(self, symbol: str) -> float:
         ticker_symbol = self._map_symbol(symbol)
@@ -136,12 +249,16 @@ class YFinanceProvider(IMarketDataProvider):
         ticker_symbol = self._map_symbol(symbol)
         ticker = yf.Ticker(ticker_symbol)
         try:
-            # period depends on limit and timeframe, simplified here
-            hist = ticker.history(period="1mo", interval=interval)
+            # Enough calendar time for `limit` bars, within how far back Yahoo serves the interval
+            lookback = history_lookback(interval, limit)
+            depth = self.HISTORY_DEPTH.get(interval)
+            start = datetime.now(timezone.utc) - (min(lookback, depth) if depth else lookback)
+            hist = ticker.history(start=start, interval=interval)
             # transform to list of dicts
             data = []
+            fmt = chart_time_format(interval)
             for index, row in hist.tail(limit).iterrows():
-                time_val = index.strftime('%Y-%m-%d')
+                time_val = bar_time(index, interval).strftime(fmt)
                 data.append({
                     'time': time_val,
                     'open': row['Open'],
@@ -159,36 +276,178 @@ class YFinanceProvider(IMarketDataProvider):
             print(f"Error fetching YF OHLCV for {symbol}: {e}")
             raise e
 
+    def get_history(self, symbol: str, timeframe: str, start: datetime, end: datetime) -> list:
+        interval = timeframe if timeframe in TIMEFRAME_SECONDS else '1d'
+        ticker = yf.Ticker(self._map_symbol(symbol))
+        hist = ticker.history(start=start.replace(tzinfo=timezone.utc), end=end.replace(tzinfo=timezone.utc),
+                              interval=interval)
+        return [{
+            'time': bar_time(index, timeframe),
+            'open': row['Open'],
+            'high': row['High'],
+            'low': row['Low'],
+            'close': row['Close'],
+            'volume': row['Volume']
+        } for index, row in hist.iterrows()]
+
 class MockProvider(IMarketDataProvider):
     """Fallback if everything fails"""
+    SOURCE = 'MOCK'
+    SUPPORTS_HISTORY = True
+
     def __init__(self):
         print("Market Data initialized with MockProvider (Simulation).")
 
+    # No I/O: answer on the event loop instead of hopping to a thread
+    async def aget_last_price(self, symbol: str) -> float:
+        return self.get_last_price(symbol)
+
+    async def aget_ohlcv(self, symbol: str, timeframe: str, limit: int):
+        return self.get_ohlcv(symbol, timeframe, limit)
+
     def get_last_price(self, symbol: str) -> float:
-        base = 100.0 + (sum(ord(c) for c in symbol) % 500)
-        variation = (random.random() - 0.5) * 2
-        return round(base + variation, 2)
+        """Within 0.2% of the registry's reference level, on the instrument's tick"""
+        info = symbol_registry.get(symbol)
+        return info.round_price(info.base_price * (1 + (random.random() - 0.5) * 0.004))
 
     def get_ohlcv(self, symbol: str, timeframe: str, limit: int):
+        """The last `limit` bars of the timeframe (UTC), up to the open bar"""
         data = []
-        import datetime as dt
+        step = TIMEFRAME_SECONDS.get(timeframe, 86400)
+        fmt = chart_time_format(timeframe)
+        info = symbol_registry.get(symbol)
         base_price = self.get_last_price(symbol)
-        start_date = datetime.now() - dt.timedelta(days=limit)
+        now = int((datetime.utcnow() - datetime(1970, 1, 1)).total_seconds())
+        start_date = datetime(1970, 1, 1) + timedelta(seconds=now - now % step - (limit - 1) * step)
         for i in range(limit):
-            current_date = start_date + dt.timedelta(days=i)
-            move = (random.random() - 0.5) * 2
-            close_p = base_price + move
+            current_date = start_date + timedelta(seconds=i * step)
+            close_p = base_price * (1 + (random.random() - 0.5) * 0.004)
             data.append({
-                'time': current_date.strftime('%Y-%m-%d'),
-                'open': round(base_price, 2),
-                'high': round(max(base_price, close_p) + 1, 2),
-                'low': round(min(base_price, close_p) - 1, 2),
-                'close': round(close_p, 2),
+                'time': current_date.strftime(fmt),
+                'open': info.round_price(base_price),
+                'high': info.round_price(max(base_price, close_p) * 1.001),
+                'low': info.round_price(min(base_price, close_p) * 0.999),
+                'close': info.round_price(close_p),
                 'volume': int(random.random() * 100000)
             })
             base_price = close_p
         return data
 
+    def get_history(self, symbol: str, timeframe: str, start: datetime, end: datetime) -> list:
+        """Random walk on the timeframe's bar boundaries"""
+        step = TIMEFRAME_SECONDS.get(timeframe, 86400)
+        epoch = datetime(1970, 1, 1)
+        first = -(-int((start - epoch).total_seconds()) // step) * step
+        last = int((end - epoch).total_seconds())
+        price = self.get_last_price(symbol)
+        data = []
+        for seconds in range(first, last, step):
+            close_p = price * (1 + (random.random() - 0.5) * 0.01)
+            data.append({
+                'time': epoch + timedelta(seconds=seconds),
+                'open': round(price, 4),
+                'high': round(max(price, close_p) * 1.001, 4),
+                'low': round(min(price, close_p) * 0.999, 4),
+                'close': round(close_p, 4),
+                'volume': int(random.random() * 100000)
+            })
+            price = close_p
+        return data
+
+
+def _epoch_ms(ts: datetime) -> int:
+    """Naive UTC datetime to epoch milliseconds"""
+    return int(ts.replace(tzinfo=timezone.utc).timestamp() * 1000)
+
+
+class QuoteCache:
+    """
+    Shared last-price / OHLCV cache. Entries live for the normal refresh
+    interval while the symbol's market trades and until the next session
+    open once it has closed (see MarketCalendar.ttl).
+
+    With a remote shared cache (SHARED_CACHE_URL) entries are also written
+    there, and a local miss is looked up in it before going upstream, so
+    workers and nodes fetch each quote once.
+
+    Keys carry client-supplied symbols and limits, so the local store is an
+    LRU of MAX_ENTRIES; each put also drops expired entries from its cold end.
+    """
+    LAST_PRICE_TTL = 15  # seconds, market open
+    OHLCV_TTL = 60
+    MAX_ENTRIES = 10000
+
+    def __init__(self, calendar=market_calendar, clock=time.time, shared=shared_cache):
+        self.calendar = calendar
+        self.clock = clock
+        self.shared = shared
+        self._entries: 'OrderedDict[tuple, tuple]' = OrderedDict()  # key -> (expires_at, value), coldest first
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "shared_hits": 0, "evicted": 0}
+
+    def get(self, key):
+        """Unexpired value or None"""
+        entry = self._entries.get(key)
+        if entry and entry[0] > self.clock():
+            with self._lock:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return entry[1]
+        if self.shared is not None and self.shared.remote:
+            entry = self.shared.get(('quote',) + tuple(key))
+            if entry and entry[0] > self.clock():
+                self._store(key, entry[0], entry[1], self.clock())
+                self.stats["shared_hits"] += 1
+                return entry[1]
+        self.stats["misses"] += 1
+        return None
+
+    def put(self, key, symbol, value, open_ttl, share=True):
+        """Store for the calendar TTL; share=False keeps it local (e.g. a value received from another worker)"""
+        now = self.clock()
+        ttl = self.calendar.ttl(symbol, open_ttl, datetime.fromtimestamp(now, timezone.utc))
+        self._store(key, now + ttl, value, now)
+        if share and ttl > 0 and self.shared is not None and self.shared.remote:
+            self.shared.set(('quote',) + tuple(key), [now + ttl, value], ttl)
+
+    def _store(self, key, expires_at, value, now):
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while self._entries:
+                oldest = next(iter(self._entries.values()))
+                if len(self._entries) <= self.MAX_ENTRIES and oldest[0] > now:
+                    break
+                self._entries.popitem(last=False)
+                self.stats["evicted"] += 1
+
+    def get_or_fetch(self, key, symbol, fetch, open_ttl):
+        value = self.get(key)
+        if value is None:
+            value = fetch()
+            self.put(key, symbol, value, open_ttl)
+        return value
+
+
+quote_cache = QuoteCache()
+
+
+class CachedProvider(IMarketDataProvider):
+    """Serves a provider's quotes through the market-hours aware quote cache"""
+    def __init__(self, provider: IMarketDataProvider, cache: QuoteCache = None):
+        self.provider = provider
+        self.cache = cache or quote_cache
+        self.name = provider.__class__.__name__
+
+    def get_last_price(self, symbol: str) -> float:
+        return self.cache.get_or_fetch((self.name, 'last', symbol), symbol,
+                                       lambda: self.provider.get_last_price(symbol), self.cache.LAST_PRICE_TTL)
+
+    def get_ohlcv(self, symbol: str, timeframe: str, limit: int):
+        return self.cache.get_or_fetch((self.name, 'ohlcv', symbol, timeframe, limit), symbol,
+                                       lambda: self.provider.get_ohlcv(symbol, timeframe, limit), self.cache.OHLCV_TTL)
+
 class MarketDataFactory:
     @staticmethod
     def get_provider() -> IMarketDataProvider:
@@ -198,14 +457,27 @@ class MarketDataFactory:
         if api_key and RESTClient:
             try:
                 # Test connection (optional, or just return)
-                return PolygonProvider(api_key)
+                return CachedProvider(PolygonProvider(api_key))
             except:
                 pass
         
         # Priority 2: YFinance (Free Tier)
         # Note: YFinance can be flaky, so we wrap in try/catch logic in consumption too,
         # but here we just return the provider.
-        return YFinanceProvider()
+        return CachedProvider(YFinanceProvider())
+
+    @staticmethod
+    def get_upstream_providers():
+        """Live providers in priority order (primary first), uncached"""
+        providers = []
+        api_key = os.environ.get('POLYGON_API_KEY')
+        if api_key and RESTClient:
+            try:
+                providers.append(PolygonProvider(api_key))
+            except Exception as e:
+                print(f"Polygon unavailable: {e}")
+        providers.append(YFinanceProvider())
+        return providers
 
     @staticmethod
     def get_fallback_provider():
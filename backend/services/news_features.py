@@ -0,0 +1,184 @@
+"""
+News Impact Features
+Rolling per-currency news-impact aggregates maintained incrementally as
+NewsEvent rows are ingested, so analysis reads them in O(1) instead of
+rescanning news on every call:
+- decayed impact score (exponential decay, 4h half-life)
+- event / high-impact counts and impact weight over 1h, 4h and 24h
+
+Scheduled (future) calendar events wait in a heap and enter the windows
+when their release time passes. Symbol features combine the currency legs.
+
+A tenant's state is loaded from the database on first use in a process
+(warm); later ingests, wherever they run, arrive through the ingestion
+pipeline's shared_cache broadcast (on_ingest). Rows are deduplicated by
+external_id, so overlapping a load with a broadcast is harmless.
+"""
+import heapq
+import math
+import threading
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from models import NewsEvent
+from services.calendar_service import currency_legs
+
+IMPACT_WEIGHTS = {'HIGH': 2, 'MEDIUM': 1, 'LOW': 0}
+WINDOWS = {'1h': 3600, '4h': 4 * 3600, '24h': 24 * 3600}
+HALF_LIFE = 4 * 3600
+HIGH_VOLATILITY_THRESHOLD = 3  # impact weight over 4h, same cut-off as AIAnalyst.classify_news
+SEEN_RETENTION = 2 * WINDOWS['24h']  # external ids remembered for deduplication
+SEEN_PRUNE_INTERVAL = 3600  # seconds between sweeps of a tenant's seen ids
+
+
+class _CurrencyState:
+    __slots__ = ('pending', 'windows', 'sums', 'score', 'score_at')
+
+    def __init__(self):
+        self.pending = []  # heap of (ts, weight, is_high) not yet released
+        self.windows = {name: deque() for name in WINDOWS}
+        self.sums = {name: [0, 0, 0] for name in WINDOWS}  # events, high, weight
+        self.score = 0.0
+        self.score_at = 0.0
+
+    def add(self, ts: float, weight: int, is_high: bool, now: float):
+        if ts > now:
+            heapq.heappush(self.pending, (ts, weight, is_high))
+        else:
+            self._release(ts, weight, is_high)
+
+    def _release(self, ts: float, weight: int, is_high: bool):
+        for name, window in self.windows.items():
+            if window and ts < window[-1][0]:
+                # Late event: keep the window time-ordered (scan from the tail, where it usually belongs)
+                pos = len(window)
+                while pos and window[pos - 1][0] > ts:
+                    pos -= 1
+                window.insert(pos, (ts, weight, is_high))
+            else:
+                window.append((ts, weight, is_high))
+            sums = self.sums[name]
+            sums[0] += 1
+            sums[1] += is_high
+            sums[2] += weight
+        # Decay is applied relative to the newest release; late events are pre-decayed
+        if ts >= self.score_at:
+            self.score = self.score * _decay(ts - self.score_at) + weight
+            self.score_at = ts
+        else:
+            self.score += weight * _decay(self.score_at - ts)
+
+    def advance(self, now: float):
+        while self.pending and self.pending[0][0] <= now:
+            self._release(*heapq.heappop(self.pending))
+        for name, span in WINDOWS.items():
+            window, sums = self.windows[name], self.sums[name]
+            while window and window[0][0] < now - span:
+                _, weight, is_high = window.popleft()
+                sums[0] -= 1
+                sums[1] -= is_high
+                sums[2] -= weight
+
+    def snapshot(self, now: float) -> Dict[str, float]:
+        features = {'decayed_impact': round(self.score * _decay(max(0.0, now - self.score_at)), 3)}
+        for name, (events, high, weight) in self.sums.items():
+            features[f'events_{name}'] = events
+            features[f'high_impact_{name}'] = high
+            features[f'impact_{name}'] = weight
+        features['scheduled_high_impact'] = sum(1 for _, _, is_high in self.pending if is_high)
+        return features
+
+
+def _decay(seconds: float) -> float:
+    return math.pow(0.5, seconds / HALF_LIFE)
+
+
+class NewsImpactAggregator:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._states: Dict[tuple, _CurrencyState] = {}  # (tenant_id, currency) -> state
+        self._seen: Dict[int, Dict[str, float]] = {}  # tenant_id -> external_id -> event ts
+        self._pruned_at: Dict[int, float] = {}  # tenant_id -> time of the last sweep of its seen ids
+        self._warm_tenants = set()
+
+    def observe(self, tenant_id: int, currency: str, event_time: datetime, impact: str,
+                external_id: str = None, now: float = None):
+        if not currency or event_time is None:
+            return
+        ts = event_time.timestamp() if isinstance(event_time, datetime) else float(event_time)
+        now = now if now is not None else datetime.utcnow().timestamp()
+        with self._lock:
+            seen = self._seen.setdefault(tenant_id, {})
+            if now - self._pruned_at.get(tenant_id, now) >= SEEN_PRUNE_INTERVAL:
+                self._prune_seen(tenant_id, now)
+            self._pruned_at.setdefault(tenant_id, now)
+            if external_id:
+                if external_id in seen:
+                    return  # Upserts re-deliver rows whose actual/forecast changed
+                seen[external_id] = ts
+            state = self._states.get((tenant_id, currency))
+            if state is None:
+                state = self._states[(tenant_id, currency)] = _CurrencyState()
+            weight = IMPACT_WEIGHTS.get((impact or '').upper(), 0)
+            state.add(ts, weight, weight == IMPACT_WEIGHTS['HIGH'], now)
+
+    def on_ingest(self, rows: List[dict]):
+        """news_ingestion listener (runs in every process, see NewsIngestionPipeline.init_app)"""
+        now = datetime.utcnow().timestamp()
+        for row in rows:
+            self.observe(row.get('tenant_id'), row.get('currency'), row.get('event_time'),
+                         row.get('impact'), row.get('external_id'), now)
+
+    def warm(self, tenant_id: int):
+        """Load the last 24h (and scheduled next 24h) of events once per tenant per process"""
+        if tenant_id in self._warm_tenants:
+            return
+        now = datetime.utcnow()
+        rows = NewsEvent.query.with_entities(
+            NewsEvent.currency, NewsEvent.event_time, NewsEvent.impact, NewsEvent.external_id
+        ).filter(
+            NewsEvent.tenant_id == tenant_id,
+            NewsEvent.event_time >= now - timedelta(seconds=WINDOWS['24h']),
+            NewsEvent.event_time <= now + timedelta(hours=24),
+        ).order_by(NewsEvent.event_time)
+        for currency, event_time, impact, external_id in rows:
+            self.observe(tenant_id, currency, event_time, impact, external_id, now.timestamp())
+        with self._lock:
+            self._prune_seen(tenant_id, now.timestamp())
+        self._warm_tenants.add(tenant_id)  # Only once loaded: a failed query is retried by the next call
+
+    def _prune_seen(self, tenant_id: int, now: float):
+        """Forget ids of events older than SEEN_RETENTION (caller holds the lock)"""
+        seen = self._seen.get(tenant_id, {})
+        cutoff = now - SEEN_RETENTION
+        for external_id in [k for k, ts in seen.items() if ts < cutoff]:
+            del seen[external_id]
+        self._pruned_at[tenant_id] = now
+
+    def currency_features(self, tenant_id: int, currency: str, now: float = None) -> Dict[str, float]:
+        now = now if now is not None else datetime.utcnow().timestamp()
+        with self._lock:
+            state = self._states.get((tenant_id, currency))
+            if state is None:
+                return _CurrencyState().snapshot(now)
+            state.advance(now)
+            return state.snapshot(now)
+
+    def symbol_features(self, tenant_id: int, symbol: str, now: float = None) -> Dict[str, object]:
+        """Sum of the currency-leg features plus a volatility label"""
+        legs = currency_legs(symbol)
+        combined: Dict[str, float] = {}
+        for currency in legs:
+            for key, value in self.currency_features(tenant_id, currency, now).items():
+                combined[key] = combined.get(key, 0) + value
+        combined['decayed_impact'] = round(combined.get('decayed_impact', 0.0), 3)
+        return {
+            "symbol": symbol,
+            "currencies": legs,
+            "features": combined,
+            "sentiment": "HIGH_VOLATILITY" if combined.get('impact_4h', 0) > HIGH_VOLATILITY_THRESHOLD else "NEUTRAL",
+        }
+
+
+news_features = NewsImpactAggregator()
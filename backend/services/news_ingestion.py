@@ -0,0 +1,279 @@
+"""
+News Ingestion Pipeline
+Polls each tenant's news and economic calendar feeds (TenantSettings.
+news_api_base_url / news_api_key) and upserts the events into NewsEvent.
+
+- Tenants configured with the same feed (URL + key) share one upstream
+  fetch; its events are fanned out to every tenant.
+- Feeds are fetched concurrently over a pooled requests.Session.
+- Conditional requests (ETag / If-Modified-Since): an unchanged feed costs
+  a 304 and no database work; a changed feed only upserts the events whose
+  fields differ from the previous poll.
+- Rows are upserted in bulk by (tenant_id, external_id) through the
+  write-behind queue, then ingest listeners are notified. NEWS_API ids are
+  stored as "news:<id>" so they cannot collide with calendar ids.
+- Listeners run in every process: with init_app() the upserted rows are
+  broadcast on the shared_cache `news_ingest` channel (compact rows, see
+  MESSAGE_COLUMNS), so an ingest in ingest_news.py or one gunicorn worker
+  updates the derived views of all of them.
+- A feed's validators and event fingerprints are only recorded once its
+  upsert committed: a failed write is retried in full on the next poll.
+  Fingerprints are kept for the events of the feed's latest response only,
+  and for the feeds of the latest poll only.
+  One feed failing (fetch or write) does not stop the others, and an item
+  with an unparseable time is dropped without failing its feed.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from models import NewsEvent, TenantSettings
+from services.shared_cache import shared_cache
+from services.write_behind import write_behind
+
+FEED_PATHS = {
+    'CALENDAR_API': '/calendar',
+    'NEWS_API': '/news',
+}
+ID_PREFIXES = {'NEWS_API': 'news:'}  # Calendar ids are stored as sent
+INGEST_CHANNEL = 'news_ingest'
+MESSAGE_COLUMNS = ('tenant_id', 'external_id', 'currency', 'event_time', 'impact')  # What listeners receive
+MESSAGE_ROWS = 5000  # Rows per broadcast message
+UPSERT_COLUMNS = ('source', 'currency', 'event_name', 'category', 'event_time', 'impact', 'actual', 'forecast', 'previous')
+
+
+def _parse_time(value) -> Optional[datetime]:
+    if value is None or isinstance(value, datetime):
+        return value
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value / 1000 if value > 1e11 else value, timezone.utc).replace(tzinfo=None)
+    parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def normalize_event(evt: dict, source: str) -> Optional[dict]:
+    """Map a feed item to NewsEvent columns (tenant_id added at fan-out)"""
+    external_id = evt.get('id') or evt.get('external_id')
+    if not external_id:
+        return None
+    try:
+        event_time = _parse_time(evt.get('time') or evt.get('event_time') or evt.get('timestamp'))
+    except (ValueError, OverflowError, OSError):
+        return None  # Out-of-range epochs raise OverflowError / OSError
+    return {
+        'external_id': ID_PREFIXES.get(source, '') + str(external_id),
+        'source': source,
+        'currency': evt.get('currency'),
+        'event_name': evt.get('name') or evt.get('title') or evt.get('headline'),
+        'category': evt.get('category'),
+        'event_time': event_time,
+        'impact': (evt.get('impact') or '').upper() or None,
+        'actual': evt.get('actual'),
+        'forecast': evt.get('forecast'),
+        'previous': evt.get('previous'),
+    }
+
+
+class NewsIngestionPipeline:
+    def __init__(self, max_workers=8, timeout=10):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers, max_retries=2)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._validators: Dict[Tuple[str, str, str], Dict[str, str]] = {}  # (url, key, source) -> ETag / Last-Modified
+        self._fingerprints: Dict[tuple, Dict[str, int]] = {}  # (feed, tenants) -> external_id -> hash
+        self._listeners: List[Callable[[List[dict]], None]] = []
+        self._lock = threading.Lock()
+        self._broadcast = False
+        self.stats = {"polls": 0, "fetches": 0, "not_modified": 0, "errors": 0, "events": 0, "dropped": 0,
+                      "rows_upserted": 0}
+
+    def init_app(self, app):
+        """Deliver ingests to the listeners of every process through shared_cache pub/sub"""
+        if not self._broadcast:
+            shared_cache.subscribe(INGEST_CHANNEL, self._on_message)
+            self._broadcast = True
+
+    def subscribe(self, listener: Callable[[List[dict]], None]):
+        """listener(rows) is called after every ingest, in every process, with MESSAGE_COLUMNS of the rows"""
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    # --- Fetching ---
+
+    def fetch_feed(self, base_url: str, api_key: str, source: str,
+                   currencies: List[str] = None) -> Tuple[Optional[List[dict]], Dict[str, str]]:
+        """
+        Conditional GET of one feed. Returns (normalized events, validators),
+        events being None when the feed is unchanged since the last commit
+        (304). The validators are not recorded here: see commit_feed().
+        """
+        key = (base_url, api_key or '', source)
+        headers = {}
+        validators = self._validators.get(key, {})
+        if validators.get('etag'):
+            headers['If-None-Match'] = validators['etag']
+        if validators.get('last_modified'):
+            headers['If-Modified-Since'] = validators['last_modified']
+
+        params = {'token': api_key} if api_key else {}
+        if currencies:
+            params['currencies'] = ','.join(currencies)
+
+        resp = self.session.get(base_url.rstrip('/') + FEED_PATHS[source], params=params,
+                                headers=headers, timeout=self.timeout)
+        with self._lock:
+            self.stats["fetches"] += 1
+        if resp.status_code == 304:
+            with self._lock:
+                self.stats["not_modified"] += 1
+            return None, validators
+        resp.raise_for_status()
+
+        payload = resp.json()
+        items = payload.get('events', payload.get('items', [])) if isinstance(payload, dict) else payload
+        events = [evt for evt in (normalize_event(item, source) for item in items) if evt]
+        if len(events) < len(items):
+            with self._lock:
+                self.stats["dropped"] += len(items) - len(events)
+        return events, {'etag': resp.headers.get('ETag'), 'last_modified': resp.headers.get('Last-Modified')}
+
+    @staticmethod
+    def _fingerprint(evt: dict) -> int:
+        return hash(tuple(evt.get(col) for col in UPSERT_COLUMNS))
+
+    def changed_events(self, feed_key: tuple, events: List[dict]) -> List[dict]:
+        """Keep only events that are new or whose fields changed since the last committed poll of this feed"""
+        seen = self._fingerprints.get(feed_key, {})
+        return [evt for evt in events if seen.get(evt['external_id']) != self._fingerprint(evt)]
+
+    def ingest_feed(self, tenant_ids: List[int], base_url: str, api_key: str, source: str,
+                    currencies: List[str] = None, fetched: tuple = None) -> List[dict]:
+        """Fetch one feed (unless `fetched` = fetch_feed() result is given), upsert its changes, then commit it"""
+        events, validators = fetched or self.fetch_feed(base_url, api_key, source, currencies)
+        if events is None:
+            return []
+        with self._lock:
+            self.stats["events"] += len(events)
+        # Keyed by tenant set too: a tenant joining a feed gets the full backlog
+        feed_key = (base_url, api_key or '', source, tuple(tenant_ids))
+        rows = self.upsert_events(tenant_ids, self.changed_events(feed_key, events))
+        self.commit_feed(base_url, api_key, source, validators, feed_key, events)
+        return rows
+
+    def commit_feed(self, base_url: str, api_key: str, source: str, validators: Dict[str, str], feed_key: tuple,
+                    events: List[dict]):
+        """Record a feed's validators and event fingerprints, once its events are stored"""
+        with self._lock:
+            self._validators[(base_url, api_key or '', source)] = validators
+            # The response is the feed's whole window: events that left it are not fingerprinted any more
+            self._fingerprints[feed_key] = {evt['external_id']: self._fingerprint(evt) for evt in events}
+
+    # --- Persistence ---
+
+    def upsert_events(self, tenant_ids: List[int], events: List[dict]) -> List[dict]:
+        """Fan events out to tenants and upsert them in bulk by (tenant_id, external_id)"""
+        rows = [dict(evt, tenant_id=tenant_id) for tenant_id in tenant_ids for evt in events]
+        if not rows:
+            return []
+        write_behind.submit_many(NewsEvent, rows, durable=True)
+        with self._lock:
+            self.stats["rows_upserted"] += len(rows)
+        if not self._broadcast:
+            self._deliver([{col: row.get(col) for col in MESSAGE_COLUMNS} for row in rows])
+            return rows
+        for i in range(0, len(rows), MESSAGE_ROWS):
+            shared_cache.publish(INGEST_CHANNEL, {"rows": [
+                [row.get(col).isoformat() if col == 'event_time' and row.get(col) else row.get(col)
+                 for col in MESSAGE_COLUMNS] for row in rows[i:i + MESSAGE_ROWS]
+            ]})
+        return rows
+
+    def _on_message(self, message: dict):
+        rows = [dict(zip(MESSAGE_COLUMNS, values)) for values in message["rows"]]
+        for row in rows:
+            row['event_time'] = _parse_time(row['event_time'])
+        self._deliver(rows)
+
+    def _deliver(self, rows: List[dict]):
+        for listener in self._listeners:
+            try:
+                listener(rows)
+            except Exception as e:
+                print(f"News ingest listener failed: {e}")
+
+    # --- Polling ---
+
+    def feed_groups(self) -> Dict[Tuple[str, str], List[int]]:
+        """Tenants grouped by shared feed (base URL, API key)"""
+        groups: Dict[Tuple[str, str], List[int]] = {}
+        configured = TenantSettings.query.filter(TenantSettings.news_api_base_url.isnot(None)).all()
+        for settings in configured:
+            groups.setdefault((settings.news_api_base_url, settings.news_api_key or ''), []).append(settings.tenant_id)
+        return groups
+
+    def poll_once(self, currencies: List[str] = None) -> dict:
+        """Fetch every distinct feed once (concurrently) and upsert changes for all its tenants"""
+        groups = self.feed_groups()
+        jobs = [(url, key, source) for (url, key) in groups for source in FEED_PATHS]
+
+        def fetch(job):
+            url, key, source = job
+            try:
+                return job, self.fetch_feed(url, key, source, currencies)
+            except Exception as e:
+                self._feed_failed(job, e)
+                return job, None
+
+        upserted = failed = 0
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            for (url, key, source), fetched in pool.map(fetch, jobs):
+                if fetched is None:
+                    failed += 1
+                    continue
+                try:
+                    upserted += len(self.ingest_feed(groups[(url, key)], url, key, source, fetched=fetched))
+                except Exception as e:
+                    failed += 1
+                    self._feed_failed((url, key, source), e)
+
+        self._forget_feeds({(url, key, source, tuple(groups[(url, key)])) for url, key, source in jobs})
+        self.stats["polls"] += 1
+        return {"feeds": len(groups), "requests": len(jobs), "rows_upserted": upserted, "failed": failed}
+
+    def _forget_feeds(self, feed_keys: set):
+        """Drop the state of feeds (or tenant sets) no longer configured"""
+        with self._lock:
+            for feed_key in [k for k in self._fingerprints if k not in feed_keys]:
+                del self._fingerprints[feed_key]
+            feeds = {feed_key[:3] for feed_key in feed_keys}  # (url, key, source)
+            for key in [k for k in self._validators if k not in feeds]:
+                del self._validators[key]
+
+    def _feed_failed(self, job: tuple, error: Exception):
+        url, _, source = job
+        with self._lock:
+            self.stats["errors"] += 1
+        print(f"News feed {url}{FEED_PATHS[source]} failed: {error}")
+
+    def run_forever(self, app, interval: float = 60.0, currencies: List[str] = None):
+        while True:
+            started = time.monotonic()
+            with app.app_context():
+                try:
+                    print(f"News poll: {self.poll_once(currencies)}")
+                except Exception as e:
+                    print(f"News poll failed: {e}")
+            time.sleep(max(0.0, interval - (time.monotonic() - started)))
+
+
+news_ingestion = NewsIngestionPipeline()
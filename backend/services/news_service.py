@@ -1,6 +1,4 @@
-import requests
-from models import NewsEvent
-from extensions import db
+from services.news_ingestion import news_ingestion
 from datetime import datetime
 
 class NewsService:
@@ -9,36 +7,27 @@ class NewsService:
         self.api_key = api_key
 
     def fetch_daily_calendar(self, currencies: list, tenant_id: int):
-        # Mock implementation of fetching from HorizonFX or JBlanked
-        # url = f"{self.api_base_url}/calendar"
-        # params = {'currencies': ','.join(currencies), 'token': self.api_key}
-        # resp = requests.get(url, params=params)
+        """Fetch the calendar (HorizonFX / JBlanked compatible feed) and upsert it for one tenant"""
+        if self.api_base_url:
+            # Only changed events are upserted; [] when the feed is not modified since the last fetch
+            return news_ingestion.ingest_feed([tenant_id], self.api_base_url, self.api_key, 'CALENDAR_API',
+                                              currencies)
         
-        # Mock Data
-        mock_events = [
+        # Upserted by (tenant_id, external_id): re-running never duplicates rows
+        return news_ingestion.upsert_events([tenant_id], self._mock_events())
+
+    def _mock_events(self):
+        return [
             {
-                'id': 'evt_1',
+                'external_id': 'evt_1',
+                'source': 'CALENDAR_API',
                 'currency': 'USD',
-                'name': 'Non-Farm Payrolls',
+                'event_name': 'Non-Farm Payrolls',
+                'category': None,
                 'impact': 'HIGH',
                 'actual': '200K',
                 'forecast': '180K',
-                'time': datetime.utcnow()
+                'previous': None,
+                'event_time': datetime.utcnow()
             }
         ]
-        
-        for evt in mock_events:
-            event = NewsEvent(
-                tenant_id=tenant_id,
-                external_id=evt['id'],
-                source='CALENDAR_API',
-                currency=evt['currency'],
-                event_name=evt['name'],
-                impact=evt['impact'],
-                actual=evt['actual'],
-                forecast=evt['forecast'],
-                event_time=evt['time']
-            )
-            db.session.add(event)
-        
-        db.session.commit()
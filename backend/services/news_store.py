@@ -0,0 +1,262 @@
+"""
+News Store
+Builds the simulated news feed once into an append-only pool indexed by
+source, category and time, instead of synthesising 30 headlines per request.
+
+The pool is the same in every process: each refresh interval (slot) of
+wall-clock time gets a batch of items generated from the slot number as
+seed, and an item's ID is a hash of its content. So the opaque
+(timestamp, id) cursor of one gunicorn worker pages correctly on another,
+and the ETag, a hash of the page's item ids and timestamps, only matches
+when the page content does (no false 304 across workers or restarts).
+"""
+import base64
+import bisect
+import hashlib
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+# Realistic news templates by source
+NEWS_TEMPLATES = {
+    'Reuters': [
+        {"headline": "Oil prices surge {percent}% on OPEC+ supply cut announcement", "category": "Commodities", "impact": "HIGH"},
+        {"headline": "Federal Reserve signals potential rate pause amid inflation concerns", "category": "Markets", "impact": "HIGH"},
+        {"headline": "Tech stocks rally as earnings beat expectations", "category": "Stocks", "impact": "MEDIUM"},
+        {"headline": "Dollar strengthens against major currencies on strong jobs data", "category": "Forex", "impact": "MEDIUM"},
+        {"headline": "Gold hits {price}-month high as safe-haven demand rises", "category": "Commodities", "impact": "MEDIUM"},
+    ],
+    'Bloomberg': [
+        {"headline": "S&P 500 reaches new record high on tech sector strength", "category": "Markets", "impact": "HIGH"},
+        {"headline": "European Central Bank maintains rates, cites economic uncertainty", "category": "Markets", "impact": "HIGH"},
+        {"headline": "Emerging markets see capital inflows amid dollar weakness", "category": "Forex", "impact": "MEDIUM"},
+        {"headline": "Cryptocurrency market cap surpasses ${trillion} trillion milestone", "category": "Markets", "impact": "LOW"},
+        {"headline": "Treasury yields fall as investors seek safety", "category": "Markets", "impact": "MEDIUM"},
+    ],
+    'TheStreet': [
+        {"headline": "Top analyst upgrades {stock} stock to 'Strong Buy'", "category": "Stocks", "impact": "LOW"},
+        {"headline": "5 dividend stocks to watch this quarter", "category": "Stocks", "impact": "LOW"},
+        {"headline": "Market volatility creates buying opportunity, strategists say", "category": "Markets", "impact": "MEDIUM"},
+        {"headline": "Retail investors flock to {sector} sector amid recovery hopes", "category": "Stocks", "impact": "LOW"},
+        {"headline": "Earnings season preview: What to expect from major banks", "category": "Stocks", "impact": "MEDIUM"},
+    ],
+    'Forex Factory': [
+        {"headline": "EUR/USD breaks key resistance at {level}, targets {target}", "category": "Forex", "impact": "HIGH"},
+        {"headline": "GBP/USD consolidates ahead of Bank of England decision", "category": "Forex", "impact": "MEDIUM"},
+        {"headline": "USD/JPY retreats from highs on intervention concerns", "category": "Forex", "impact": "MEDIUM"},
+        {"headline": "Australian dollar surges on strong employment data", "category": "Forex", "impact": "MEDIUM"},
+        {"headline": "Swiss franc gains as geopolitical tensions escalate", "category": "Forex", "impact": "LOW"},
+    ],
+    'ADVFN': [
+        {"headline": "{stock} shares jump {percent}% on merger speculation", "category": "Stocks", "impact": "MEDIUM"},
+        {"headline": "Insider buying activity surges in {sector} sector", "category": "Stocks", "impact": "LOW"},
+        {"headline": "Short interest declines in major tech stocks", "category": "Stocks", "impact": "LOW"},
+        {"headline": "Options activity suggests bullish sentiment for {stock}", "category": "Stocks", "impact": "LOW"},
+        {"headline": "Institutional investors increase positions in {sector} ETFs", "category": "Stocks", "impact": "MEDIUM"},
+    ]
+}
+
+
+CATEGORIES = ['Markets', 'Forex', 'Stocks', 'Commodities']
+
+SUMMARIES = [
+    "Market analysts are closely monitoring the situation as volatility increases.",
+    "Traders are positioning for potential breakout as key levels are tested.",
+    "This development could have significant implications for global markets.",
+    "Investors are advised to watch for further updates throughout the trading session.",
+    "The move comes amid broader market uncertainty and shifting sentiment.",
+]
+
+
+def _fill_headline(headline: str, rng=random) -> str:
+    """Fill template placeholders in a single pass"""
+    if '{' not in headline:
+        return headline
+    return headline.format_map({
+        'percent': rng.randint(2, 8),
+        'price': rng.randint(3, 12),
+        'trillion': round(rng.uniform(1.5, 3.5), 1),
+        'level': f"1.{rng.randint(1000, 2000)}",
+        'target': f"1.{rng.randint(2000, 3000)}",
+        'stock': rng.choice(['AAPL', 'TSLA', 'MSFT', 'GOOGL', 'AMZN']),
+        'sector': rng.choice(['technology', 'healthcare', 'energy', 'financial']),
+    })
+
+
+def _time_ago(timestamp: datetime, now: datetime) -> str:
+    hours_ago = int((now - timestamp).total_seconds() // 3600)
+    return f"{hours_ago}h ago" if hours_ago > 0 else "Just now"
+
+
+def generate_realistic_news(count=20, start_id=1, now: datetime = None, max_hours_ago=24):
+    """Generate realistic financial news articles (newest first)"""
+    now = now or datetime.now()
+    sources = list(NEWS_TEMPLATES.keys())
+    news_items = []
+
+    for i in range(count):
+        source = random.choice(sources)
+        template = random.choice(NEWS_TEMPLATES[source])
+        headline = _fill_headline(template['headline'])
+        timestamp = now - timedelta(hours=random.randint(0, max_hours_ago), minutes=random.randint(0, 59))
+        time_ago = _time_ago(timestamp, now)
+
+        news_items.append({
+            'id': start_id + i,
+            'source': source,
+            'headline': headline,
+            'summary': random.choice(SUMMARIES),
+            'category': template['category'],
+            'impact': template['impact'],
+            'timestamp': timestamp.isoformat(),
+            'time_ago': time_ago,
+            # Frontend compatibility fields
+            'title': headline,
+            'time': time_ago,
+        })
+
+    news_items.sort(key=lambda x: x['timestamp'], reverse=True)
+    return news_items
+
+
+def slot_news(slot: int, count: int, interval: float) -> List[dict]:
+    """The items published during refresh slot `slot` (seconds [slot * interval, +interval)), without ids"""
+    rng = random.Random(slot)
+    sources = list(NEWS_TEMPLATES.keys())
+    items = []
+    for _ in range(count):
+        source = rng.choice(sources)
+        template = rng.choice(NEWS_TEMPLATES[source])
+        headline = _fill_headline(template['headline'], rng)
+        timestamp = datetime.fromtimestamp(round((slot + rng.random()) * interval))
+        items.append({
+            'source': source,
+            'headline': headline,
+            'summary': rng.choice(SUMMARIES),
+            'category': template['category'],
+            'impact': template['impact'],
+            'timestamp': timestamp.isoformat(),
+            'title': headline,
+        })
+    return items
+
+
+def content_id(item) -> int:
+    """Stable id from the item's content (fits a JSON number)"""
+    raw = f"{item['source']}|{item['headline']}|{item['timestamp']}".encode()
+    return int(hashlib.sha1(raw).hexdigest()[:13], 16)
+
+
+def _sort_key(item) -> Tuple[float, int]:
+    # Ascending key == newest first
+    return (-item['_ts'], -item['id'])
+
+
+def encode_cursor(item) -> str:
+    raw = f"{item['_ts']:.6f}:{item['id']}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Optional[Tuple[float, int]]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        ts, item_id = raw.split(':')
+        return (-float(ts), -int(item_id))
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+class NewsStore:
+    """Append-only, indexed news pool; identical in every process for the same wall-clock time"""
+
+    def __init__(self, initial_size=200, refresh_interval=600, batch_size=5, max_items=5000, clock=time.time):
+        self.initial_size = initial_size
+        self.refresh_interval = refresh_interval
+        self.batch_size = batch_size
+        self.max_items = max_items
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._slot = None  # Last refresh slot ingested
+        self._ids = set()
+        self._index: Dict[Tuple[Optional[str], Optional[str]], List[dict]] = {}
+        self._keys: Dict[Tuple[Optional[str], Optional[str]], List[Tuple[float, int]]] = {}
+
+    def ingest(self, items: List[dict]):
+        """Add items to the pool; an item without an id gets its content id, duplicates are skipped"""
+        with self._lock:
+            self._ingest_locked(items)
+
+    def _ingest_locked(self, items: List[dict]):
+        for item in items:
+            item = dict(item)
+            item.setdefault('id', content_id(item))
+            if item['id'] in self._ids:
+                continue
+            self._ids.add(item['id'])
+            item['_ts'] = datetime.fromisoformat(item['timestamp']).timestamp()
+            key = _sort_key(item)
+            for index_key in ((None, None), (item['source'], None), (None, item['category']),
+                              (item['source'], item['category'])):
+                keys = self._keys.setdefault(index_key, [])
+                pos = bisect.bisect_left(keys, key)
+                keys.insert(pos, key)
+                self._index.setdefault(index_key, []).insert(pos, item)
+        self._trim()
+
+    def _trim(self):
+        for index_key, items in self._index.items():
+            if len(items) > self.max_items:
+                del items[self.max_items:]
+                del self._keys[index_key][self.max_items:]
+        if len(self._ids) > len(self._index.get((None, None), ())):
+            self._ids = {item['id'] for item in self._index.get((None, None), ())}
+
+    def _maybe_refresh(self):
+        # Only completed slots are published, so no item is dated in the future
+        slot = int(self.clock() // self.refresh_interval) - 1
+        if slot == self._slot:
+            return
+        with self._lock:
+            if slot == self._slot:
+                return
+            backlog = max(1, self.initial_size // self.batch_size)  # Slots making up the initial pool
+            first = slot - backlog + 1 if self._slot is None else max(self._slot + 1, slot - backlog + 1)
+            for s in range(first, slot + 1):
+                self._ingest_locked(slot_news(s, self.batch_size, self.refresh_interval))
+            self._slot = slot
+
+    def page(self, source: str = None, category: str = None, cursor: str = None, limit: int = 30):
+        """Returns (items, next_cursor) for one page, newest first"""
+        self._maybe_refresh()
+        index_key = (source or None, category or None)
+        items = self._index.get(index_key, [])
+        keys = self._keys.get(index_key, [])
+
+        start = 0
+        if cursor:
+            position = decode_cursor(cursor)
+            if position is not None:
+                start = bisect.bisect_right(keys, position)
+
+        now = datetime.fromtimestamp(self.clock())
+        page = []
+        for item in items[start:start + limit]:
+            time_ago = _time_ago(datetime.fromtimestamp(item['_ts']), now)
+            page.append({k: v for k, v in item.items() if k != '_ts'} | {'time_ago': time_ago, 'time': time_ago})
+
+        has_more = start + limit < len(items)
+        next_cursor = encode_cursor(items[start + limit - 1]) if has_more and page else None
+        return page, next_cursor
+
+    @staticmethod
+    def etag(page: List[dict], next_cursor: str = None) -> str:
+        """Strong validator for a page, from its content: item ids, timestamps and ages, and the next cursor"""
+        digest = hashlib.sha1((next_cursor or '').encode())
+        for item in page:
+            digest.update(f"|{item['id']}:{item['timestamp']}:{item['time_ago']}".encode())
+        return digest.hexdigest()[:20]
+
+
+news_store = NewsStore()
@@ -0,0 +1,508 @@
+"""
+Provider Resilience
+Keeps the market-data routes responsive when Polygon or Yahoo Finance is
+slow or down, instead of paying the full upstream timeout on every request:
+- a circuit breaker per provider: closed, open after consecutive failures
+  (calls are skipped), half-open after a cooldown (one probe call decides)
+- every upstream call is bounded by a deadline; an overrun counts as a
+  failure, and a late answer still refreshes the cache
+- hedging: if the primary has not answered within its recent p95 latency
+  the secondary is asked as well and the first answer wins; a failed call
+  moves on to the next provider immediately
+- when no provider answers in time the last known good value is served
+  with stale=True; MockProvider stays the last resort
+- OHLCV for every timeframe is derived from one cached base series per
+  symbol (see services/resampler.py), fetched as ranged history
+"""
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from services.market_data_service import TIMEFRAME_SECONDS, MarketDataFactory, QuoteCache, quote_cache
+from services.resampler import Resampler
+from utils.metrics import CIRCUIT_TRANSITIONS, PROVIDER_CALLS, PROVIDER_LATENCY
+from utils.profiler import profiler
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+LATENCY_WINDOW = 200  # recent successful calls per provider
+MIN_LATENCY_SAMPLES = 20  # below this the hedge waits half the deadline
+MIN_HEDGE_DELAY = 0.05  # seconds
+LAST_GOOD_MAX = 10000  # last known good entries kept
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = CLOSED
+        self.failures = 0  # consecutive
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+        self.stats = {"opened": 0, "rejected": 0}
+
+    def allow(self) -> bool:
+        """Whether a call may go out now; in half-open only one probe at a time"""
+        with self._lock:
+            if self.state == OPEN:
+                if self.clock() - self._opened_at < self.reset_timeout:
+                    self.stats["rejected"] += 1
+                    return False
+                self.state = HALF_OPEN
+                self._probing = False
+                CIRCUIT_TRANSITIONS.inc(self.name, HALF_OPEN)
+            if self.state == HALF_OPEN:
+                if self._probing:
+                    self.stats["rejected"] += 1
+                    return False
+                self._probing = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self._probing = False
+            if self.state != CLOSED:
+                print(f"Circuit {self.name} closed")
+                self.state = CLOSED
+                CIRCUIT_TRANSITIONS.inc(self.name, CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == HALF_OPEN or (self.state == CLOSED and self.failures >= self.failure_threshold):
+                print(f"Circuit {self.name} opened after {self.failures} failures")
+                self.state = OPEN
+                self._opened_at = self.clock()
+                self.stats["opened"] += 1
+                CIRCUIT_TRANSITIONS.inc(self.name, OPEN)
+
+    def status(self) -> dict:
+        return {"state": self.state, "consecutive_failures": self.failures, **self.stats}
+
+
+class LatencyWindow:
+    """Rolling window of successful call latencies (seconds)"""
+    def __init__(self, size: int = LATENCY_WINDOW):
+        self._samples = deque(maxlen=size)
+
+    def add(self, seconds: float):
+        self._samples.append(seconds)
+
+    def percentile(self, q: float, default: float) -> float:
+        samples = sorted(self._samples)
+        if len(samples) < MIN_LATENCY_SAMPLES:
+            return default
+        return samples[min(len(samples) - 1, int(len(samples) * q / 100))]
+
+
+@dataclass
+class ProviderResult:
+    value: Any
+    source: str  # Provider that produced the value
+    stale: bool = False  # True when served from last known good (or simulated) data
+    age: Optional[float] = None  # Seconds since the value was fetched
+
+
+class _Upstream:
+    def __init__(self, provider, breaker: CircuitBreaker, max_workers: int):
+        self.provider = provider
+        self.name = breaker.name
+        self.breaker = breaker
+        self.latency = LatencyWindow()
+        # Own pool per provider: calls hung on one upstream cannot starve the others
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f'market-data-{self.name}')
+
+
+class _Attempt:
+    """One upstream call; whichever of completion / deadline comes first settles the breaker"""
+    def __init__(self):
+        self._settled = threading.Lock()
+
+    def settle(self) -> bool:
+        return self._settled.acquire(blocking=False)
+
+
+class ResilientMarketData:
+    def __init__(self, providers: List = None, fallback=None, cache: QuoteCache = None,
+                 deadline: float = 2.0, hedge: bool = True, failure_threshold: int = 5,
+                 reset_timeout: float = 30.0, max_workers: int = 32, clock: Callable[[], float] = time.time):
+        self._providers = providers
+        self._fallback = fallback
+        self.cache = cache or quote_cache
+        self.deadline = deadline
+        self.hedge = hedge
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self._upstreams: Optional[List[_Upstream]] = None
+        self.max_workers = max_workers
+        self._last_good: Dict[tuple, tuple] = {}  # key -> (value, source, fetched_at)
+        self._outstanding = deque()  # (deadline, future, upstream, attempt) of calls that lost a hedge
+        self._lock = threading.Lock()
+        self.stats = {"cached": 0, "live": 0, "hedged": 0, "secondary_wins": 0, "timeouts": 0, "errors": 0,
+                      "stale": 0, "fallback": 0}
+        self.resample = True
+        self.resampler = Resampler(fetch=self.history, depth=self._history_reach,
+                                   ttl=lambda symbol, seconds: self.cache.calendar.ttl(symbol, seconds), clock=clock)
+
+    def init_app(self, app):
+        self.deadline = app.config.get('MARKET_DATA_DEADLINE_MS', 2000) / 1000
+        self.hedge = app.config.get('MARKET_DATA_HEDGE', True)
+        self.failure_threshold = app.config.get('MARKET_DATA_BREAKER_FAILURES', 5)
+        self.reset_timeout = app.config.get('MARKET_DATA_BREAKER_RESET_SECONDS', 30)
+        self.resample = app.config.get('RESAMPLER_ENABLED', True)
+        self.resampler.max_base_bars = app.config.get('RESAMPLER_MAX_BASE_BARS', self.resampler.max_base_bars)
+
+    def _chain(self) -> List[_Upstream]:
+        """Provider chain, built on first use so breakers and latency history persist"""
+        if self._upstreams is None:
+            with self._lock:
+                if self._upstreams is None:
+                    providers = self._providers or MarketDataFactory.get_upstream_providers()
+                    self._upstreams = [
+                        _Upstream(p, CircuitBreaker(getattr(p, 'name', p.__class__.__name__),
+                                                    self.failure_threshold, self.reset_timeout), self.max_workers)
+                        for p in providers
+                    ]
+        return self._upstreams
+
+    # --- Public API ---
+
+    def last_price(self, symbol: str) -> ProviderResult:
+        return self._get(('last', symbol), symbol, self.cache.LAST_PRICE_TTL,
+                         lambda p: p.get_last_price(symbol))
+
+    def ohlcv(self, symbol: str, timeframe: str, limit: int) -> ProviderResult:
+        if self._resampled(timeframe):
+            return self._from_resampler(symbol, timeframe, limit, self.resampler.ohlcv(symbol, timeframe, limit))
+        return self._get(('ohlcv', symbol, timeframe, limit), symbol, self.cache.OHLCV_TTL,
+                         lambda p: p.get_ohlcv(symbol, timeframe, limit))
+
+    def history(self, symbol: str, timeframe: str, start: datetime, end: datetime) -> Optional[ProviderResult]:
+        """Ranged history bars, uncached (the resampler holds them); None when no provider answered"""
+        # Ranged downloads are larger than a quote: a longer deadline, and no hedge (it would double quota use)
+        live = self._call_live(None, symbol, 0, lambda p: p.get_history(symbol, timeframe, start, end),
+                               deadline=self.deadline * 3, hedge=False)
+        if live is not None:
+            self.stats["live"] += 1
+        return live
+
+    def refresh_last_price(self, symbol: str) -> Optional[ProviderResult]:
+        """Live fetch that skips the cache (and stores the answer); None when no provider answered"""
+        live = self._call_live(('last', symbol), symbol, self.cache.LAST_PRICE_TTL,
+                               lambda p: p.get_last_price(symbol))
+        if live is not None:
+            self.stats["live"] += 1
+        return live
+
+    async def last_price_async(self, symbol: str) -> ProviderResult:
+        return await self._get_async(('last', symbol), symbol, self.cache.LAST_PRICE_TTL,
+                                     lambda p: _aget(p, 'get_last_price', symbol))
+
+    async def ohlcv_async(self, symbol: str, timeframe: str, limit: int) -> ProviderResult:
+        if self._resampled(timeframe):
+            served = self.resampler.cached(symbol, timeframe, limit)
+            if served is None:
+                served = await asyncio.to_thread(self.resampler.ohlcv, symbol, timeframe, limit)
+            return self._from_resampler(symbol, timeframe, limit, served)
+        return await self._get_async(('ohlcv', symbol, timeframe, limit), symbol, self.cache.OHLCV_TTL,
+                                     lambda p: _aget(p, 'get_ohlcv', symbol, timeframe, limit))
+
+    def status(self) -> dict:
+        upstreams = self._upstreams or []
+        return {
+            "deadline_ms": int(self.deadline * 1000),
+            "hedge": self.hedge,
+            "providers": [{
+                "name": u.name,
+                **u.breaker.status(),
+                "p95_ms": round(u.latency.percentile(95, 0.0) * 1000, 1),
+            } for u in upstreams],
+            "last_good_entries": len(self._last_good),
+            "resampler": self.resampler.status() if self.resample else None,
+            **self.stats,
+        }
+
+    # --- Internals ---
+
+    def _resampled(self, timeframe: str) -> bool:
+        """Whether OHLCV comes from the resampler: every upstream serves ranged history"""
+        return self.resample and timeframe in TIMEFRAME_SECONDS and all(
+            getattr(u.provider, 'SUPPORTS_HISTORY', False) for u in self._chain())
+
+    def _history_reach(self, timeframe: str) -> Optional[timedelta]:
+        """How far back one history request reaches on every upstream (depth and span)"""
+        limits = []
+        for u in self._chain():
+            for by_timeframe in (getattr(u.provider, 'HISTORY_DEPTH', {}), getattr(u.provider, 'HISTORY_SPAN', {})):
+                if by_timeframe.get(timeframe):
+                    limits.append(by_timeframe[timeframe])
+        return min(limits, default=None)
+
+    def _from_resampler(self, symbol: str, timeframe: str, limit: int, served: Optional[tuple]) -> ProviderResult:
+        if served is None:
+            fallback = self._use_fallback(symbol)
+            return ProviderResult(fallback.get_ohlcv(symbol, timeframe, limit), fallback.__class__.__name__,
+                                  stale=True)
+        rows, source, stale, age = served
+        if stale:
+            self.stats["stale"] += 1
+        return ProviderResult(rows, source, stale=stale, age=age)
+
+    def _get(self, key: tuple, symbol: str, open_ttl: float, call: Callable) -> ProviderResult:
+        cached = self._cached(key)
+        if cached is not None:
+            return cached
+        live = self._call_live(key, symbol, open_ttl, call)
+        if live is not None:
+            self.stats["live"] += 1
+            return live
+        stale = self._stale(key)
+        if stale is not None:
+            return stale
+        fallback = self._use_fallback(symbol)
+        return ProviderResult(call(fallback), fallback.__class__.__name__, stale=True)
+
+    def _cached(self, key: tuple) -> Optional[ProviderResult]:
+        cached = self.cache.get(key)
+        if cached is None:
+            return None
+        self.stats["cached"] += 1
+        value, source, fetched_at = cached
+        return ProviderResult(value, source, age=self.clock() - fetched_at)
+
+    def _stale(self, key: tuple) -> Optional[ProviderResult]:
+        """Last known good value when no provider answered in time"""
+        good = self._last_good.get(key)
+        if good is None:
+            return None
+        self.stats["stale"] += 1
+        value, source, fetched_at = good
+        return ProviderResult(value, source, stale=True, age=self.clock() - fetched_at)
+
+    def _use_fallback(self, symbol: str):
+        print(f"No live market data for {symbol}. Falling back to mock.")
+        self.stats["fallback"] += 1
+        if self._fallback is None:
+            self._fallback = MarketDataFactory.get_fallback_provider()
+        return self._fallback
+
+    def _expire_outstanding(self, now: float):
+        """Hedge losers still running past their deadline count as timeouts"""
+        while self._outstanding and self._outstanding[0][0] <= now:
+            try:
+                _, future, upstream, attempt = self._outstanding.popleft()
+            except IndexError:
+                break
+            if not future.done():
+                self._timed_out(upstream, attempt)
+
+    def _timed_out(self, upstream: _Upstream, attempt: _Attempt):
+        if attempt.settle():
+            self.stats["timeouts"] += 1
+            PROVIDER_CALLS.inc(upstream.name, 'timeout')
+            upstream.breaker.record_failure()
+
+    def _hedge_at(self, first: _Upstream, started: float, waiting: list) -> Optional[float]:
+        if not self.hedge or not waiting:
+            return None
+        delay = first.latency.percentile(95, self.deadline / 2)
+        return started + min(max(delay, MIN_HEDGE_DELAY), self.deadline)
+
+    def _call_live(self, key: Optional[tuple], symbol: str, open_ttl: float, call: Callable,
+                   deadline: float = None, hedge: bool = True) -> Optional[ProviderResult]:
+        """key=None: the answer is not cached (nor sampled for the hedge delay)"""
+        started = time.monotonic()
+        self._expire_outstanding(started)
+        deadline = started + (deadline or self.deadline)
+        waiting = list(self._chain())
+        pending = {}  # future -> (upstream, attempt)
+        profiled = profiler.active_endpoint()  # Sample the provider call with the request
+
+        def launch() -> bool:
+            while waiting:
+                upstream = waiting.pop(0)
+                if upstream.breaker.allow():
+                    attempt = _Attempt()
+                    future = upstream.executor.submit(self._run, upstream, attempt, key, symbol, open_ttl, call, profiled)
+                    pending[future] = (upstream, attempt)
+                    return True
+            return False
+
+        if not launch():
+            return None
+        first = next(iter(pending.values()))[0]
+        hedge_at = self._hedge_at(first, started, waiting) if hedge else None
+
+        while pending:
+            now = time.monotonic()
+            if now >= deadline:
+                break
+            timeout = deadline - now
+            if hedge_at is not None:
+                timeout = min(timeout, max(0.0, hedge_at - now))
+            done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                upstream, _ = pending.pop(future)
+                if future.exception() is None:
+                    if upstream is not first:
+                        self.stats["secondary_wins"] += 1
+                    for loser, (other, attempt) in pending.items():
+                        self._outstanding.append((deadline, loser, other, attempt))
+                    return future.result()
+            if not pending or (hedge_at is not None and time.monotonic() >= hedge_at):
+                # Fail over after an error, or hedge once the primary is past its p95
+                if pending:
+                    self.stats["hedged"] += 1
+                hedge_at = None
+                launch()
+
+        for upstream, attempt in pending.values():
+            self._timed_out(upstream, attempt)
+            print(f"{upstream.name} missed the {int((deadline - started) * 1000)}ms deadline for {symbol}")
+        return None
+
+    def _run(self, upstream: _Upstream, attempt: _Attempt, key: tuple, symbol: str, open_ttl: float,
+             call: Callable, profiled: Optional[str] = None) -> ProviderResult:
+        started = time.monotonic()
+        try:
+            with profiler.attach(profiled):
+                value = call(upstream.provider)
+        except Exception as e:
+            self._failed(upstream, attempt, started, symbol, e)
+            raise
+        return self._succeeded(upstream, attempt, started, key, symbol, open_ttl, value)
+
+    def _failed(self, upstream: _Upstream, attempt: _Attempt, started: float, symbol: str, error: Exception):
+        PROVIDER_LATENCY.observe(time.monotonic() - started, upstream.name, 'error')
+        if attempt.settle():
+            self.stats["errors"] += 1
+            PROVIDER_CALLS.inc(upstream.name, 'error')
+            upstream.breaker.record_failure()
+        print(f"{upstream.name} failed for {symbol}: {error}")
+
+    def _succeeded(self, upstream: _Upstream, attempt: _Attempt, started: float, key: tuple, symbol: str,
+                   open_ttl: float, value) -> ProviderResult:
+        elapsed = time.monotonic() - started
+        PROVIDER_LATENCY.observe(elapsed, upstream.name, 'success')
+        PROVIDER_CALLS.inc(upstream.name, 'success')
+        if attempt.settle():
+            upstream.breaker.record_success()
+        if key is not None:
+            upstream.latency.add(elapsed)
+            self._store(key, symbol, open_ttl, value, upstream.name)  # Late answers still warm the cache
+        return ProviderResult(value, upstream.name, age=0.0)
+
+    # --- Async twin (ASGI mode): same breakers, cache and hedging on the event loop ---
+
+    async def _get_async(self, key: tuple, symbol: str, open_ttl: float, call: Callable) -> ProviderResult:
+        cached = self._cached(key)
+        if cached is not None:
+            return cached
+        live = await self._call_live_async(key, symbol, open_ttl, call)
+        if live is not None:
+            self.stats["live"] += 1
+            return live
+        stale = self._stale(key)
+        if stale is not None:
+            return stale
+        fallback = self._use_fallback(symbol)
+        return ProviderResult(await call(fallback), fallback.__class__.__name__, stale=True)
+
+    async def _call_live_async(self, key: tuple, symbol: str, open_ttl: float,
+                               call: Callable) -> Optional[ProviderResult]:
+        started = time.monotonic()
+        self._expire_outstanding(started)
+        deadline = started + self.deadline
+        waiting = list(self._chain())
+        pending = {}  # task -> (upstream, attempt)
+
+        def launch() -> bool:
+            while waiting:
+                upstream = waiting.pop(0)
+                if upstream.breaker.allow():
+                    attempt = _Attempt()
+                    task = asyncio.ensure_future(self._run_async(upstream, attempt, key, symbol, open_ttl, call))
+                    task.add_done_callback(_retrieve)  # Abandoned losers must not log "exception never retrieved"
+                    pending[task] = (upstream, attempt)
+                    return True
+            return False
+
+        if not launch():
+            return None
+        first = next(iter(pending.values()))[0]
+        hedge_at = self._hedge_at(first, started, waiting)
+
+        while pending:
+            now = time.monotonic()
+            if now >= deadline:
+                break
+            timeout = deadline - now
+            if hedge_at is not None:
+                timeout = min(timeout, max(0.0, hedge_at - now))
+            done, _ = await asyncio.wait(list(pending), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                upstream, _ = pending.pop(task)
+                if task.exception() is None:
+                    if upstream is not first:
+                        self.stats["secondary_wins"] += 1
+                    for loser, (other, attempt) in pending.items():
+                        self._outstanding.append((deadline, loser, other, attempt))
+                    return task.result()
+            if not pending or (hedge_at is not None and time.monotonic() >= hedge_at):
+                if pending:
+                    self.stats["hedged"] += 1
+                hedge_at = None
+                launch()
+
+        # Overrunning tasks keep running: a late answer still refreshes the cache
+        for upstream, attempt in pending.values():
+            self._timed_out(upstream, attempt)
+            print(f"{upstream.name} missed the {int(self.deadline * 1000)}ms deadline for {symbol}")
+        return None
+
+    async def _run_async(self, upstream: _Upstream, attempt: _Attempt, key: tuple, symbol: str, open_ttl: float,
+                         call: Callable) -> ProviderResult:
+        started = time.monotonic()
+        try:
+            value = await call(upstream.provider)
+        except Exception as e:
+            self._failed(upstream, attempt, started, symbol, e)
+            raise
+        return self._succeeded(upstream, attempt, started, key, symbol, open_ttl, value)
+
+    def _store(self, key: tuple, symbol: str, open_ttl: float, value, source: str):
+        entry = (value, source, self.clock())
+        self.cache.put(key, symbol, entry, open_ttl)
+        with self._lock:
+            self._last_good.pop(key, None)
+            self._last_good[key] = entry
+            if len(self._last_good) > LAST_GOOD_MAX:
+                del self._last_good[next(iter(self._last_good))]
+
+
+def _retrieve(task):
+    if not task.cancelled():
+        task.exception()
+
+
+async def _aget(provider, method: str, *args):
+    """Call a provider's async variant (aget_*), or run the blocking one on a worker thread"""
+    native = getattr(provider, 'a' + method, None)
+    if native is not None:
+        return await native(*args)
+    return await asyncio.to_thread(getattr(provider, method), *args)
+
+
+market_data = ResilientMarketData()
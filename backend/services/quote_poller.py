@@ -0,0 +1,143 @@
+"""
+Quote Poller
+Keeps the last price of QUOTE_POLL_SYMBOLS fresh without every worker
+polling the same upstream. Each symbol has a lease in the shared cache:
+the worker holding it fetches the live price every QUOTE_POLL_INTERVAL_SECONDS
+and publishes it on the `quotes` channel; every other worker subscribes
+and puts the price in its local quote cache. A worker that dies stops
+renewing and another one takes the symbol over within a lease TTL.
+
+Symbols whose market has closed (and whose closing print has settled, see
+MarketCalendar.ttl) are not polled until the next session open, so
+weekend and overnight quotes neither hit upstream nor reach the tick
+aggregator as flat bars.
+
+Quote messages: {"symbol", "price", "source", "fetched_at"}.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Callable, Dict, List
+
+from services.market_calendar import market_calendar
+from services.provider_resilience import market_data
+from services.shared_cache import shared_cache
+
+QUOTES_CHANNEL = 'quotes'
+LEASE_INTERVALS = 3  # a lease outlives this many missed polls
+
+
+class QuotePoller:
+    def __init__(self, cache=shared_cache, market=None, max_workers: int = 8, calendar=market_calendar,
+                 clock: Callable[[], float] = time.time):
+        self.cache = cache
+        self.market = market or market_data
+        self.calendar = calendar
+        self.clock = clock
+        self._paused: Dict[str, float] = {}  # symbol -> epoch seconds of its next session open
+        self.symbols: List[str] = []
+        self.interval = 5.0
+        self.max_workers = max_workers
+        self._thread = None
+        self._stop = threading.Event()
+        self._listeners: List[Callable[[dict], None]] = []
+        self._subscribed = False
+        self.leading: List[str] = []
+        self.stats = {"polls": 0, "published": 0, "received": 0, "failed": 0, "paused": 0}
+
+    def init_app(self, app):
+        self.symbols = [s for s in app.config.get('QUOTE_POLL_SYMBOLS', []) if s]
+        self.interval = app.config.get('QUOTE_POLL_INTERVAL_SECONDS', 5.0)
+        if self.symbols:
+            self.start()
+
+    def subscribe(self, listener: Callable[[dict], None]):
+        """listener(quote) for every polled quote, whichever worker polled it"""
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+        self._ensure_subscribed()
+
+    def _ensure_subscribed(self):
+        if not self._subscribed:
+            self._subscribed = True
+            self.cache.subscribe(QUOTES_CHANNEL, self._on_quote)
+
+    # --- Polling ---
+
+    def start(self):
+        self._ensure_subscribed()
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='quote-poller', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+            self._thread = None
+        for symbol in self.leading:
+            self.cache.release(f'poll:{symbol}')
+        self.leading = []
+
+    def _run(self):
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='quote-poll') as pool:
+            while not self._stop.is_set():
+                started = time.monotonic()
+                try:
+                    self.poll_once(pool)
+                except Exception as e:
+                    print(f"Quote poll failed: {e}")
+                self._stop.wait(max(0.0, self.interval - (time.monotonic() - started)))
+
+    def poll_once(self, pool=None) -> List[str]:
+        """Poll the symbols whose market trades and whose lease this worker holds; returns them"""
+        ttl = self.interval * LEASE_INTERVALS
+        now = self.clock()
+        self.leading = [s for s in self.symbols if self._trading(s, now) and self.cache.acquire(f'poll:{s}', ttl)]
+        if pool is not None:
+            list(pool.map(self._poll, self.leading))
+        else:
+            for symbol in self.leading:
+                self._poll(symbol)
+        self.stats["polls"] += 1
+        return self.leading
+
+    def _trading(self, symbol: str, now: float) -> bool:
+        """False from the end of the settle window after a close until the next open"""
+        if now < self._paused.get(symbol, 0.0):
+            return False
+        ttl = self.calendar.ttl(symbol, self.interval, datetime.fromtimestamp(now, timezone.utc))
+        if ttl > self.interval:
+            self._paused[symbol] = now + ttl  # The TTL of a closed market runs to its next open
+            self.stats["paused"] += 1
+            print(f"Quote polling for {symbol} paused until the next session open")
+            return False
+        self._paused.pop(symbol, None)
+        return True
+
+    def _poll(self, symbol: str):
+        result = self.market.refresh_last_price(symbol)
+        if result is None:
+            self.stats["failed"] += 1
+            return
+        self.cache.publish(QUOTES_CHANNEL, {
+            "symbol": symbol, "price": result.value, "source": result.source, "fetched_at": time.time(),
+        })
+        self.stats["published"] += 1
+
+    def _on_quote(self, quote: dict):
+        self.stats["received"] += 1
+        cache = self.market.cache
+        # Already in the shared cache (the poller stored it); only the local tier needs it
+        cache.put(('last', quote["symbol"]), quote["symbol"], (quote["price"], quote["source"], quote["fetched_at"]),
+                  cache.LAST_PRICE_TTL, share=False)
+        for listener in self._listeners:
+            try:
+                listener(quote)
+            except Exception as e:
+                print(f"Quote listener failed: {e}")
+
+
+quote_poller = QuotePoller()
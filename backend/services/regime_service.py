@@ -0,0 +1,279 @@
+"""
+Market Regime Service
+Classifies every tracked symbol's regime from stored OHLCV (PriceData) in
+one vectorized numpy batch:
+- realized volatility (20-bar stdev of log returns) and its percentile
+  against the symbol's own trailing history
+- ADX(14) trend strength and direction (+DI vs -DI)
+- range compression: last 20-bar range / full lookback range
+
+The batch runs on bar close (on_bar_close), in whichever process sees the
+close (a web worker's tick aggregator or update_regimes.py), and upserts a
+snapshot per symbol into regime_snapshots. Every process reads the table
+into a local dict, re-read when a refresh is announced on the shared_cache
+`regimes` channel or after REGIME_RELOAD_SECONDS, so
+AIAnalyst.detect_regime is a dict lookup.
+"""
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import func
+
+from extensions import db
+from models import PriceData, RegimeSnapshot
+from services.market_data_service import TIMEFRAME_SECONDS
+from services.shared_cache import shared_cache
+from services.write_behind import write_behind
+
+REGIMES = {
+    'TRENDING': "Risk-On / Trending",
+    'HIGH_VOL': "Risk-Off / High-Volatility",
+    'RANGE': "Range-bound / Low-Volatility",
+    'NEUTRAL': "Neutral / Consolidation",
+}
+
+LOOKBACK = 120  # bars per symbol
+VOL_WINDOW = 20
+ADX_PERIOD = 14
+RANGE_WINDOW = 20
+
+HIGH_VOL_PERCENTILE = 80
+LOW_VOL_PERCENTILE = 35
+TREND_ADX = 25
+COMPRESSED_RANGE = 0.35
+
+# Stored snapshot columns besides the (symbol, timeframe) key
+REGIME_COLUMNS = ('regime_key', 'trend', 'adx', 'realized_vol', 'vol_percentile', 'range_compression', 'close',
+                  'as_of')
+RELOAD_SECONDS = 30.0
+
+
+def _wilder(x: np.ndarray, n: int) -> np.ndarray:
+    """Wilder smoothing along the bar axis of an (S, T) array, vectorized across symbols"""
+    out = np.empty_like(x)
+    out[:, n - 1] = x[:, :n].mean(axis=1)
+    for t in range(n, x.shape[1]):
+        out[:, t] = out[:, t - 1] + (x[:, t] - out[:, t - 1]) / n
+    return out[:, n - 1:]
+
+
+def _pad(x: np.ndarray, width: int) -> np.ndarray:
+    """Left-pad with NaN so column t lines up with bar t"""
+    return np.concatenate([np.full((x.shape[0], width - x.shape[1]), np.nan), x], axis=1)
+
+
+def _rolling(x: np.ndarray, window: int) -> np.ndarray:
+    return np.lib.stride_tricks.sliding_window_view(x, window, axis=1)
+
+
+def regime_series(high: np.ndarray, low: np.ndarray, close: np.ndarray, lookback: int = LOOKBACK) -> Dict[str, np.ndarray]:
+    """
+    Per-bar regime metrics for S symbols x T bars (oldest bar first); every
+    array is (S, T) and NaN (regime NEUTRAL) until enough bars have passed.
+    """
+    width = close.shape[1]
+
+    # Realized volatility and its percentile within the trailing lookback
+    returns = np.diff(np.log(close), axis=1)
+    vol = _pad(_rolling(returns, VOL_WINDOW).std(axis=-1), width)
+    history = _rolling(vol, lookback - VOL_WINDOW)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        vol_percentile = (history <= history[..., -1:]).sum(axis=-1) / (~np.isnan(history)).sum(axis=-1) * 100
+    vol_percentile = _pad(np.where(np.isnan(history[..., -1]), np.nan, vol_percentile), width)
+
+    # ADX / directional movement
+    prev_close = close[:, :-1]
+    h, l = high[:, 1:], low[:, 1:]
+    true_range = np.maximum(h - l, np.maximum(np.abs(h - prev_close), np.abs(l - prev_close)))
+    up, down = np.diff(high, axis=1), -np.diff(low, axis=1)
+    plus_dm = np.where((up > down) & (up > 0), up, 0.0)
+    minus_dm = np.where((down > up) & (down > 0), down, 0.0)
+
+    atr = _wilder(true_range, ADX_PERIOD)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        plus_di = np.nan_to_num(100 * _wilder(plus_dm, ADX_PERIOD) / atr)
+        minus_di = np.nan_to_num(100 * _wilder(minus_dm, ADX_PERIOD) / atr)
+        dx = np.nan_to_num(100 * np.abs(plus_di - minus_di) / (plus_di + minus_di))
+    adx = _pad(_wilder(dx, ADX_PERIOD), width)
+    plus_di, minus_di = _pad(plus_di, width), _pad(minus_di, width)
+
+    # Range compression: recent range relative to the lookback range
+    recent_range = _rolling(high, RANGE_WINDOW).max(axis=-1) - _rolling(low, RANGE_WINDOW).min(axis=-1)
+    full_range = _rolling(high, lookback).max(axis=-1) - _rolling(low, lookback).min(axis=-1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        compression = _pad(np.nan_to_num(recent_range[:, -full_range.shape[1]:] / full_range, nan=1.0), width)
+
+    regime = np.full(close.shape, 'NEUTRAL', dtype=object)
+    regime[(compression <= COMPRESSED_RANGE) & (vol_percentile <= LOW_VOL_PERCENTILE)] = 'RANGE'
+    regime[adx >= TREND_ADX] = 'TRENDING'
+    regime[vol_percentile >= HIGH_VOL_PERCENTILE] = 'HIGH_VOL'
+
+    return {
+        'regime': regime,
+        'realized_vol': vol,
+        'vol_percentile': vol_percentile,
+        'adx': adx,
+        'plus_di': plus_di,
+        'minus_di': minus_di,
+        'range_compression': compression,
+    }
+
+
+def compute_regimes(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> Dict[str, np.ndarray]:
+    """Regime metrics at the last bar, one value per symbol"""
+    series = regime_series(high, low, close, lookback=close.shape[1])
+    return {
+        'regime': series['regime'][:, -1],
+        'realized_vol': series['realized_vol'][:, -1],
+        'vol_percentile': series['vol_percentile'][:, -1],
+        'adx': series['adx'][:, -1],
+        'trend': np.where(series['plus_di'][:, -1] >= series['minus_di'][:, -1], 'UP', 'DOWN'),
+        'range_compression': series['range_compression'][:, -1],
+        'close': close[:, -1],
+    }
+
+
+def _snapshot(row: RegimeSnapshot) -> dict:
+    return {
+        "symbol": row.symbol,
+        "regime": REGIMES.get(row.regime_key, REGIMES['NEUTRAL']),
+        "regime_key": row.regime_key,
+        "trend": row.trend,
+        "adx": row.adx,
+        "realized_vol": row.realized_vol,
+        "vol_percentile": row.vol_percentile,
+        "range_compression": row.range_compression,
+        "close": row.close,
+        "as_of": row.as_of.isoformat() if row.as_of else None,
+    }
+
+
+class RegimeService:
+    def __init__(self, lookback: int = LOOKBACK, timeframe: str = '1d', reload_seconds: float = RELOAD_SECONDS):
+        self.lookback = lookback
+        self.timeframe = timeframe
+        self.reload_seconds = reload_seconds
+        self._lock = threading.Lock()
+        self._regimes: Dict[str, dict] = {}  # symbol -> latest snapshot (local copy of regime_snapshots)
+        self._loaded_at: Optional[float] = None  # None = re-read the table on the next get()
+        self._bar_ends: Dict[str, int] = {}  # symbol -> regime-timeframe bucket of the latest live bar's end
+        self.stats = {"runs": 0, "symbols": 0, "last_run_ms": 0.0, "loads": 0}
+
+    def init_app(self, app):
+        self.reload_seconds = app.config.get('REGIME_RELOAD_SECONDS', RELOAD_SECONDS)
+        shared_cache.subscribe('regimes', self._on_refreshed)
+
+    def _on_refreshed(self, message):
+        """A process stored new snapshots: re-read them on the next get()"""
+        self._loaded_at = None
+
+    def load_bars(self, symbols: List[str] = None) -> Dict[str, np.ndarray]:
+        """Last `lookback` bars per symbol in one windowed query on ix_price_data_symbol_ts"""
+        rank = func.row_number().over(partition_by=PriceData.symbol, order_by=PriceData.timestamp.desc()).label('rank')
+        inner = db.session.query(
+            PriceData.symbol, PriceData.timestamp, PriceData.high, PriceData.low, PriceData.close, rank
+        ).filter(PriceData.close.isnot(None), PriceData.timeframe == self.timeframe)
+        if symbols:
+            inner = inner.filter(PriceData.symbol.in_(symbols))
+        inner = inner.subquery()
+        rows = db.session.query(inner.c.symbol, inner.c.high, inner.c.low, inner.c.close).filter(
+            inner.c.rank <= self.lookback
+        ).order_by(inner.c.symbol, inner.c.timestamp).all()
+
+        bars: Dict[str, list] = {}
+        for symbol, high, low, close in rows:
+            bars.setdefault(symbol, []).append((high if high is not None else close,
+                                                low if low is not None else close, close))
+        return {symbol: np.asarray(series, dtype=float) for symbol, series in bars.items()}
+
+    def refresh(self, symbols: List[str] = None) -> int:
+        """Recompute regimes for every symbol with a full lookback of bars; returns symbols classified"""
+        started = time.perf_counter()
+        bars = {s: b for s, b in self.load_bars(symbols).items() if len(b) >= self.lookback}
+        if not bars:
+            return 0
+        names = list(bars)
+        stacked = np.stack([bars[s] for s in names])  # (S, T, [high, low, close])
+        metrics = compute_regimes(stacked[:, :, 0], stacked[:, :, 1], stacked[:, :, 2])
+
+        as_of = datetime.utcnow()
+        rows = [RegimeSnapshot(
+            symbol=symbol,
+            timeframe=self.timeframe,
+            regime_key=str(metrics['regime'][i]),
+            trend=str(metrics['trend'][i]),
+            adx=round(float(metrics['adx'][i]), 2),
+            realized_vol=round(float(metrics['realized_vol'][i]), 6),
+            vol_percentile=round(float(metrics['vol_percentile'][i]), 1),
+            range_compression=round(float(metrics['range_compression'][i]), 3),
+            close=float(metrics['close'][i]),
+            as_of=as_of,
+        ) for i, symbol in enumerate(names)]
+        # Stored before anyone is told: other processes read them from the table
+        write_behind.submit_many(RegimeSnapshot, [
+            {col: getattr(row, col) for col in ('symbol', 'timeframe') + REGIME_COLUMNS} for row in rows
+        ], durable=True)
+        with self._lock:
+            self._regimes.update({row.symbol: _snapshot(row) for row in rows})
+        shared_cache.publish('regimes', {"timeframe": self.timeframe, "symbols": len(rows)})
+        self.stats["runs"] += 1
+        self.stats["symbols"] = len(self._regimes)
+        self.stats["last_run_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        return len(rows)
+
+    def on_bar_close(self, symbols: List[str] = None):
+        """Bar-close hook: reclassify (by default every tracked symbol, it is one batch)"""
+        try:
+            self.refresh(symbols)
+        except Exception as e:
+            print(f"Regime refresh failed: {e}")
+
+    def on_bars(self, timeframe: str, bars: Dict[str, list]):
+        """Live bar listener (tick aggregator): reclassify the symbols whose regime-timeframe bar just closed"""
+        step, bar_step = TIMEFRAME_SECONDS[self.timeframe], TIMEFRAME_SECONDS[timeframe]
+        closed = []
+        for symbol, symbol_bars in bars.items():
+            end = int((symbol_bars[-1]['time'] - datetime(1970, 1, 1)).total_seconds()) + bar_step
+            previous = self._bar_ends.get(symbol)
+            if previous is not None and end // step <= previous:
+                continue  # Still inside the same bar (or a late revision)
+            self._bar_ends[symbol] = end // step
+            # A bar ending on the boundary completes its bucket; the first bar of a new bucket completes the last
+            if end % step == 0 or previous is not None:
+                closed.append(symbol)
+        if closed:
+            self.on_bar_close(closed)
+
+    def load(self) -> int:
+        """Re-read every stored snapshot of the timeframe (one small table scan)"""
+        rows = RegimeSnapshot.query.filter_by(timeframe=self.timeframe).all()
+        snapshots = {row.symbol: _snapshot(row) for row in rows}
+        with self._lock:
+            self._regimes = snapshots
+        self.stats["loads"] += 1
+        self.stats["symbols"] = len(snapshots)
+        return len(snapshots)
+
+    def get(self, symbol: str) -> Optional[dict]:
+        """Latest stored snapshot for a symbol (None until a batch has classified it)"""
+        now = time.monotonic()
+        if self._loaded_at is None or now - self._loaded_at >= self.reload_seconds:
+            self._loaded_at = now
+            try:
+                self.load()
+            except Exception as e:
+                print(f"Regime snapshot load failed: {e}")
+        return self._regimes.get(symbol)
+
+    def run_forever(self, app, interval: float = 60.0):
+        while True:
+            started = time.monotonic()
+            with app.app_context():
+                self.on_bar_close()
+            time.sleep(max(0.0, interval - (time.monotonic() - started)))
+
+
+regime_service = RegimeService()
@@ -0,0 +1,330 @@
+"""
+Multi-Timeframe Resampler
+One upstream series per symbol serves every chart timeframe. Base bars are
+fetched once and higher timeframes are derived from them with vectorized
+OHLCV aggregation (numpy reduceat per bucket: first open, max high, min
+low, last close, summed volume).
+
+- the base is the finest timeframe that divides the requested one and
+  covers the requested bars within MAX_BASE_BARS and the upstream's
+  HISTORY_DEPTH, e.g. 1m bars serve 1m-1h charts. Daily charts always use
+  the provider's daily bars: those follow the exchange session and are keyed
+  by trading date, which UTC-day buckets of intraday bars would not match
+- derived series are cached per (symbol, base, timeframe) and updated
+  incrementally: merged base bars re-aggregate only from the bucket the
+  earliest of them falls in (the open bar, for a live update)
+- a base series is topped up with a ranged fetch from its last bar (which
+  may have been partial) once per base bar while the market trades; bars
+  pushed with add_bars() (the live tick aggregator) count as a top-up, and
+  a coarser intraday base of the symbol tops up from a fresh finer one
+  without a fetch, so a dashboard showing 1m to 1h charts makes one call
+  per refresh (and its daily chart one per daily top-up)
+- memory is bounded: MAX_BASE_BARS per base series (trimmed at a day
+  boundary, so every derived bucket stays whole) and MAX_SERIES series
+  per process, least recently used evicted
+"""
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+from services.market_calendar import market_calendar
+from services.market_data_service import TIMEFRAME_SECONDS, chart_time_format, history_lookback
+
+MAX_BASE_BARS = 10000
+MAX_SERIES = 256
+REFRESH_MAX_SECONDS = 60  # Top-up interval cap for coarse bases (1h, 1d)
+DAY = 86400
+EPOCH = datetime(1970, 1, 1)
+
+
+def _epoch(ts: datetime) -> int:
+    return int((ts - EPOCH).total_seconds())
+
+
+def _align_up(ts: int, step: int) -> int:
+    return -(-ts // step) * step
+
+
+class BarSeries:
+    """Sorted OHLCV columns; t is the bar open time in epoch seconds"""
+    __slots__ = ('t', 'o', 'h', 'l', 'c', 'v')
+
+    def __init__(self, t, o, h, l, c, v):
+        self.t, self.o, self.h, self.l, self.c, self.v = t, o, h, l, c, v
+
+    @classmethod
+    def empty(cls) -> 'BarSeries':
+        return cls(np.empty(0, dtype=np.int64), *(np.empty(0) for _ in range(5)))
+
+    @classmethod
+    def from_bars(cls, bars: list) -> 'BarSeries':
+        """From provider history bars ('time' a naive UTC datetime)"""
+        if not bars:
+            return cls.empty()
+        t = np.array([_epoch(bar['time']) for bar in bars], dtype=np.int64)
+        cols = np.array([(bar['open'], bar['high'], bar['low'], bar['close'], bar.get('volume') or 0.0)
+                         for bar in bars], dtype=float)
+        series = cls(t, *cols.T.copy())
+        return series if np.all(np.diff(t) > 0) else series._normalized()
+
+    def __len__(self) -> int:
+        return len(self.t)
+
+    def _take(self, index) -> 'BarSeries':
+        return BarSeries(*(col[index] for col in (self.t, self.o, self.h, self.l, self.c, self.v)))
+
+    def _normalized(self) -> 'BarSeries':
+        """Sorted by open time, keeping the last of duplicate times"""
+        order = np.argsort(self.t, kind='stable')
+        t = self.t[order]
+        return self._take(order[np.append(t[1:] != t[:-1], True)])
+
+    def since(self, ts: int) -> 'BarSeries':
+        return self._take(slice(np.searchsorted(self.t, ts), None))
+
+    def before(self, ts: int) -> 'BarSeries':
+        return self._take(slice(None, np.searchsorted(self.t, ts)))
+
+    def concat(self, other: 'BarSeries') -> 'BarSeries':
+        return BarSeries(*(np.concatenate((a, b)) for a, b in zip(
+            (self.t, self.o, self.h, self.l, self.c, self.v), (other.t, other.o, other.h, other.l, other.c, other.v))))
+
+    def merge(self, other: 'BarSeries') -> 'BarSeries':
+        """Union by open time; other's bar wins where both have one (a later revision). Both sorted."""
+        if not len(other):
+            return self
+        if not len(self) or other.t[0] >= self.t[-1]:
+            return self.before(other.t[0]).concat(other)  # Appending, possibly revising the last bar
+        return self.concat(other)._normalized()
+
+    def to_chart(self, limit: int, timeframe: str) -> list:
+        """Last `limit` bars as get_ohlcv rows"""
+        tail = self._take(slice(-limit, None)) if limit else self._take(slice(None))
+        fmt = chart_time_format(timeframe)
+        times = [(EPOCH + timedelta(seconds=int(t))).strftime(fmt) for t in tail.t]
+        return [{'time': time_val, 'open': o, 'high': h, 'low': l, 'close': c, 'volume': v}
+                for time_val, o, h, l, c, v in zip(times, tail.o.tolist(), tail.h.tolist(), tail.l.tolist(),
+                                                   tail.c.tolist(), tail.v.tolist())]
+
+
+def aggregate(bars: BarSeries, step: int) -> BarSeries:
+    """OHLCV of `bars` grouped into `step`-second buckets, vectorized"""
+    if not len(bars):
+        return BarSeries.empty()
+    buckets = bars.t - bars.t % step
+    starts = np.concatenate(([0], np.flatnonzero(buckets[1:] != buckets[:-1]) + 1))
+    ends = np.append(starts[1:], len(buckets)) - 1
+    return BarSeries(buckets[starts], bars.o[starts], np.maximum.reduceat(bars.h, starts),
+                     np.minimum.reduceat(bars.l, starts), bars.c[ends], np.add.reduceat(bars.v, starts))
+
+
+class _BaseSeries:
+    def __init__(self, symbol: str, timeframe: str):
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.step = TIMEFRAME_SECONDS[timeframe]
+        self.bars = BarSeries.empty()
+        self.covered_from: Optional[int] = None  # Bars are complete from here on
+        self.requested_from: Optional[int] = None  # Earliest start fetched, so a short history is not refetched
+        self.derived: Dict[str, BarSeries] = {}
+        self.source: Optional[str] = None
+        self.fetched_at = 0.0
+        self.refresh_at = 0.0
+        self.lock = threading.Lock()
+
+
+class Resampler:
+    def __init__(self, fetch: Callable = None, depth: Callable[[str], Optional[timedelta]] = None,
+                 ttl: Callable[[str, float], float] = market_calendar.ttl, max_base_bars: int = MAX_BASE_BARS,
+                 max_series: int = MAX_SERIES, clock: Callable[[], float] = time.time):
+        self.fetch = fetch  # fetch(symbol, timeframe, start, end) -> ProviderResult of history bars, or None
+        self.depth = depth or (lambda timeframe: None)  # How far back the upstream serves a timeframe
+        self.ttl = ttl  # ttl(symbol, open_ttl): market-hours aware refresh interval
+        self.max_base_bars = max_base_bars
+        self.max_series = max_series
+        self.clock = clock
+        self._series: 'OrderedDict[tuple, _BaseSeries]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"served": 0, "fetches": 0, "fetch_failures": 0, "finer_top_ups": 0, "bars_added": 0,
+                      "evicted": 0}
+
+    def base_for(self, timeframe: str, limit: int) -> str:
+        """Finest timeframe dividing `timeframe` that covers `limit` bars of it; daily bars are never derived"""
+        step = TIMEFRAME_SECONDS[timeframe]
+        if step >= DAY:
+            return timeframe
+        span = history_lookback(timeframe, limit)
+        for base, base_step in sorted(TIMEFRAME_SECONDS.items(), key=lambda item: item[1]):
+            if base_step > step or step % base_step:
+                continue
+            depth = self.depth(base)
+            if span.total_seconds() // base_step <= self.max_base_bars and (depth is None or depth >= span):
+                return base
+        return timeframe
+
+    # --- Serving ---
+
+    def ohlcv(self, symbol: str, timeframe: str, limit: int) -> Optional[tuple]:
+        """
+        (rows, source, stale, age) derived from the symbol's base series,
+        fetching or topping it up first if needed; None when no bars are held
+        and no provider answered.
+        """
+        series = self._get_series(symbol, self.base_for(timeframe, limit))
+        now = self.clock()
+        with series.lock:
+            stale = False
+            needed = self._needed(series, timeframe, limit, now)
+            if series.covered_from is None:
+                series.covered_from = series.requested_from = needed
+                if self._load(series, needed, now, now):
+                    series.refresh_at = now + self._refresh_interval(series)
+                else:
+                    series.covered_from = series.requested_from = None
+                    return None
+            elif needed < series.requested_from and len(self._derived(series, timeframe)) < limit:
+                # Deeper history than held so far
+                if self._load(series, needed, series.covered_from, now):
+                    series.covered_from = series.requested_from = needed
+                    series.derived.clear()
+                else:
+                    stale = True
+            if now >= series.refresh_at and not self._top_up_from_finer(series, now):
+                # Top up from the last bar held: it may have been partial when fetched
+                start = int(series.bars.t[-1]) if len(series.bars) else series.covered_from
+                stale = not self._load(series, start, now, now) or stale
+                series.refresh_at = now + self._refresh_interval(series)
+            if not len(series.bars):
+                return None
+            rows = self._derived(series, timeframe).to_chart(limit, timeframe)
+            source, age = series.source, now - series.fetched_at
+        self.stats["served"] += 1
+        return rows, source, stale, age
+
+    def cached(self, symbol: str, timeframe: str, limit: int) -> Optional[tuple]:
+        """ohlcv() when it needs no upstream call (served on the event loop), else None"""
+        series = self._series.get((symbol, self.base_for(timeframe, limit)))
+        now = self.clock()
+        if series is None or series.covered_from is None or now >= series.refresh_at:
+            return None
+        with series.lock:
+            derived = self._derived(series, timeframe)
+            if len(derived) < limit and self._needed(series, timeframe, limit, now) < series.requested_from:
+                return None
+            rows = derived.to_chart(limit, timeframe)
+            source, age = series.source, now - series.fetched_at
+        self.stats["served"] += 1
+        return rows, source, False, age
+
+    def _needed(self, series: '_BaseSeries', timeframe: str, limit: int, now: float) -> int:
+        """Start of the base range holding `limit` bars of `timeframe`, within the upstream's depth"""
+        needed = int(now - history_lookback(timeframe, limit).total_seconds())
+        depth = self.depth(series.timeframe)
+        if depth is not None:
+            needed = max(needed, int(now - depth.total_seconds()) + series.step)
+        return needed - needed % series.step
+
+    # --- Updates ---
+
+    def add_bars(self, symbol: str, timeframe: str, bars: list, source: str = None):
+        """Merge base bars (e.g. live 1m bars) and update every derived timeframe from the earliest one"""
+        new = BarSeries.from_bars(bars)
+        if not len(new):
+            return
+        series = self._get_series(symbol, timeframe)
+        now = self.clock()
+        with series.lock:
+            if series.covered_from is None:
+                series.covered_from = series.requested_from = int(new.t[0])
+            self._merge(series, new.since(series.covered_from), source or series.source or 'live', now)
+            series.refresh_at = max(series.refresh_at, now + self._refresh_interval(series))
+
+    def _top_up_from_finer(self, series: _BaseSeries, now: float) -> bool:
+        """Aggregate the bars since series' last one from a fresh finer base of the symbol (no fetch)"""
+        if not len(series.bars) or series.step >= DAY:
+            return False  # Daily bars follow the session, not UTC days
+        last = int(series.bars.t[-1])
+        with self._lock:
+            finer = [s for (symbol, _), s in self._series.items() if symbol == series.symbol
+                     and s.step < series.step and series.step % s.step == 0]
+        for other in sorted(finer, key=lambda s: s.step):
+            # Lock order is always coarse -> fine, so two top-ups cannot deadlock
+            with other.lock:
+                fresh = other.refresh_at > now and len(other.bars) and other.bars.t[-1] >= last
+                if not fresh or other.covered_from > last:
+                    continue
+                new = aggregate(other.bars.since(last), series.step)
+                source, fetched_at, refresh_at = other.source, other.fetched_at, other.refresh_at
+            self._merge(series, new, source, fetched_at)
+            series.refresh_at = refresh_at
+            self.stats["finer_top_ups"] += 1
+            return True
+        return False
+
+    def _load(self, series: _BaseSeries, start: int, end: float, now: float) -> bool:
+        if self.fetch is None:
+            return False
+        self.stats["fetches"] += 1
+        result = self.fetch(series.symbol, series.timeframe, EPOCH + timedelta(seconds=start),
+                            EPOCH + timedelta(seconds=end))
+        if result is None:
+            self.stats["fetch_failures"] += 1
+            return False
+        self._merge(series, BarSeries.from_bars(result.value), result.source, now)
+        return True
+
+    def _merge(self, series: _BaseSeries, new: BarSeries, source: str, now: float):
+        series.source, series.fetched_at = source, now
+        if not len(new):
+            return
+        self.stats["bars_added"] += len(new)
+        series.bars = series.bars.merge(new)
+        if len(series.bars) > self.max_base_bars * 5 // 4:
+            # Trim at a day boundary so derived buckets stay whole; rebuilt on next use
+            cut = _align_up(int(series.bars.t[-self.max_base_bars]), DAY)
+            series.bars = series.bars.since(cut)
+            series.covered_from = max(series.covered_from, cut)
+            series.derived.clear()
+            return
+        changed = int(new.t[0])
+        for timeframe, derived in series.derived.items():
+            step = TIMEFRAME_SECONDS[timeframe]
+            start = max(changed - changed % step, _align_up(series.covered_from, step))
+            series.derived[timeframe] = derived.before(start).concat(aggregate(series.bars.since(start), step))
+
+    def _derived(self, series: _BaseSeries, timeframe: str) -> BarSeries:
+        if timeframe == series.timeframe:
+            return series.bars.since(series.covered_from)
+        derived = series.derived.get(timeframe)
+        if derived is None:
+            step = TIMEFRAME_SECONDS[timeframe]
+            # Buckets starting before the covered range would be partial
+            derived = series.derived[timeframe] = aggregate(series.bars.since(_align_up(series.covered_from, step)), step)
+        return derived
+
+    def _refresh_interval(self, series: _BaseSeries) -> float:
+        """One base bar while the market trades (capped), until the next open once it has closed"""
+        return self.ttl(series.symbol, min(series.step, REFRESH_MAX_SECONDS))
+
+    def _get_series(self, symbol: str, timeframe: str) -> _BaseSeries:
+        key = (symbol, timeframe)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _BaseSeries(symbol, timeframe)
+                if len(self._series) > self.max_series:
+                    self._series.popitem(last=False)
+                    self.stats["evicted"] += 1
+            else:
+                self._series.move_to_end(key)
+            return series
+
+    def status(self) -> dict:
+        with self._lock:
+            series = list(self._series.values())
+        return {"series": len(series), "base_bars": sum(len(s.bars) for s in series),
+                "derived_series": sum(len(s.derived) for s in series), **self.stats}
@@ -0,0 +1,298 @@
+"""
+Shared Cache and Pub/Sub
+One cache / message bus for every gunicorn worker and node, so quotes,
+OHLCV tails, LLM analyses and tenant settings are fetched once instead of
+once per process.
+
+SHARED_CACHE_URL picks the backend:
+- unset or memory://: in-process dict and callbacks (single worker, the default)
+- redis://host:6379/0: any Redis-compatible server (needs the redis package)
+- fakeredis://: in-memory Redis emulation, for tests and local runs
+
+Values are JSON encoded on Redis, so tuples come back as lists. A failing
+backend counts as a miss and is never raised to the request.
+
+Leases elect one worker for a periodic job (e.g. polling a symbol):
+`shared_cache.acquire('poll:EURUSD', ttl=15)` is True for exactly one owner,
+which renews by calling it again; if it stops, the lease frees after ttl.
+"""
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+try:
+    import fakeredis
+except ImportError:
+    fakeredis = None
+
+
+class InProcessBackend:
+    """Dict with expiry, synchronous pub/sub and leases, all local to this process"""
+    remote = False
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self._entries: Dict[str, Tuple[Optional[float], Any]] = {}
+        self._channels: Dict[str, List[Callable]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= self.clock():
+            self._entries.pop(key, None)
+            return None
+        return value
+
+    def set(self, key: str, value, ttl: Optional[float] = None):
+        self._entries[key] = (self.clock() + ttl if ttl else None, value)
+
+    def delete(self, key: str):
+        self._entries.pop(key, None)
+
+    def publish(self, channel: str, message):
+        for callback in list(self._channels.get(channel, ())):
+            _deliver(callback, channel, message)
+
+    def subscribe(self, channel: str, callback: Callable):
+        with self._lock:
+            self._channels.setdefault(channel, []).append(callback)
+
+    def acquire(self, name: str, owner: str, ttl: float) -> bool:
+        with self._lock:
+            current = self.get(name)
+            if current is not None and current != owner:
+                return False
+            self.set(name, owner, ttl)
+            return True
+
+    def release(self, name: str, owner: str):
+        with self._lock:
+            if self.get(name) == owner:
+                self.delete(name)
+
+    def close(self):
+        pass
+
+
+class RedisBackend:
+    """Redis (or fakeredis) client; one listener thread dispatches subscribed channels"""
+    remote = True
+
+    def __init__(self, client):
+        self.client = client
+        self._pubsub = None
+        self._listener = None
+        self._channels: Dict[str, List[Callable]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        raw = self.client.get(key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key: str, value, ttl: Optional[float] = None):
+        self.client.set(key, json.dumps(value, default=str), px=int(ttl * 1000) if ttl else None)
+
+    def delete(self, key: str):
+        self.client.delete(key)
+
+    def publish(self, channel: str, message):
+        self.client.publish(channel, json.dumps(message, default=str))
+
+    def subscribe(self, channel: str, callback: Callable):
+        with self._lock:
+            callbacks = self._channels.setdefault(channel, [])
+            callbacks.append(callback)
+            if len(callbacks) > 1:
+                return
+            if self._pubsub is None:
+                self._pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+            self._pubsub.subscribe(**{channel: self._dispatch})
+            if self._listener is None:
+                self._listener = self._pubsub.run_in_thread(sleep_time=0.05, daemon=True)
+
+    def _dispatch(self, message):
+        channel = message['channel']
+        channel = channel.decode() if isinstance(channel, bytes) else channel
+        data = json.loads(message['data'])
+        for callback in list(self._channels.get(channel, ())):
+            _deliver(callback, channel, data)
+
+    def acquire(self, name: str, owner: str, ttl: float) -> bool:
+        """Take the lease if free, or renew it if this owner holds it"""
+        ms = int(ttl * 1000)
+        if self.client.set(name, owner, nx=True, px=ms):
+            return True
+        with self.client.pipeline() as pipe:
+            try:
+                pipe.watch(name)
+                if pipe.get(name) != owner:
+                    pipe.unwatch()
+                    return False
+                pipe.multi()
+                pipe.pexpire(name, ms)
+                pipe.execute()
+                return True
+            except redis.WatchError:
+                return False
+
+    def release(self, name: str, owner: str):
+        with self.client.pipeline() as pipe:
+            try:
+                pipe.watch(name)
+                if pipe.get(name) == owner:
+                    pipe.multi()
+                    pipe.delete(name)
+                    pipe.execute()
+                else:
+                    pipe.unwatch()
+            except redis.WatchError:
+                pass
+
+    def close(self):
+        if self._listener is not None:
+            self._listener.stop()
+        if self._pubsub is not None:
+            self._pubsub.close()
+
+
+def _deliver(callback: Callable, channel: str, message):
+    try:
+        callback(message)
+    except Exception as e:
+        print(f"Subscriber of {channel} failed: {e}")
+
+
+def make_backend(url: Optional[str]):
+    if not url or url.startswith('memory://'):
+        return InProcessBackend()
+    if url.startswith('fakeredis://'):
+        if fakeredis is None:
+            print("fakeredis not installed. Shared cache stays in-process.")
+            return InProcessBackend()
+        return RedisBackend(fakeredis.FakeRedis(decode_responses=True))
+    if redis is None:
+        print("redis not installed. Shared cache stays in-process.")
+        return InProcessBackend()
+    return RedisBackend(redis.Redis.from_url(url, decode_responses=True, socket_timeout=0.5,
+                                             socket_connect_timeout=0.5))
+
+
+class SharedCache:
+    def __init__(self, backend=None, namespace: str = 'tradesense'):
+        self.backend = backend or InProcessBackend()
+        self.namespace = namespace
+        self._owner = (None, None)  # (pid, owner id)
+        self._subscriptions: List[Tuple[str, Callable]] = []
+        self.stats = {"hits": 0, "misses": 0, "errors": 0, "published": 0, "received": 0}
+
+    def init_app(self, app):
+        url = app.config.get('SHARED_CACHE_URL')
+        if not url and isinstance(self.backend, InProcessBackend):
+            return
+        self.use(make_backend(url))
+
+    def use(self, backend):
+        """Swap the backend; existing subscriptions move over"""
+        old, self.backend = self.backend, backend
+        for channel, callback in self._subscriptions:
+            self._attach(channel, callback)
+        old.close()
+
+    @property
+    def owner(self) -> str:
+        """Lease owner id of this process (regenerated after a fork, e.g. gunicorn --preload)"""
+        pid, owner = self._owner
+        if pid != os.getpid():
+            pid, owner = os.getpid(), f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+            self._owner = (pid, owner)
+        return owner
+
+    @property
+    def remote(self) -> bool:
+        return self.backend.remote
+
+    def _key(self, key) -> str:
+        if isinstance(key, (tuple, list)):
+            key = ':'.join(str(part) for part in key)
+        return f"{self.namespace}:{key}"
+
+    # --- Cache ---
+
+    def get(self, key):
+        try:
+            value = self.backend.get(self._key(key))
+        except Exception as e:
+            self._error('get', e)
+            return None
+        self.stats["hits" if value is not None else "misses"] += 1
+        return value
+
+    def set(self, key, value, ttl: Optional[float] = None):
+        try:
+            self.backend.set(self._key(key), value, ttl)
+        except Exception as e:
+            self._error('set', e)
+
+    def delete(self, key):
+        try:
+            self.backend.delete(self._key(key))
+        except Exception as e:
+            self._error('delete', e)
+
+    # --- Pub/sub ---
+
+    def publish(self, channel: str, message):
+        try:
+            self.backend.publish(self._key(channel), message)
+            self.stats["published"] += 1
+        except Exception as e:
+            self._error('publish', e)
+
+    def subscribe(self, channel: str, callback: Callable[[Any], None]):
+        """callback(message) for every message on channel, from any worker (this one included)"""
+        self._subscriptions.append((channel, callback))
+        self._attach(channel, callback)
+
+    def _attach(self, channel: str, callback: Callable):
+        def receive(message):
+            self.stats["received"] += 1
+            callback(message)
+        try:
+            self.backend.subscribe(self._key(channel), receive)
+        except Exception as e:
+            self._error('subscribe', e)
+
+    # --- Leases ---
+
+    def acquire(self, name: str, ttl: float) -> bool:
+        """Take or renew the lease `name` for ttl seconds; False while another owner holds it"""
+        try:
+            return self.backend.acquire(self._key(('lease', name)), self.owner, ttl)
+        except Exception as e:
+            self._error('acquire', e)
+            return False
+
+    def release(self, name: str):
+        try:
+            self.backend.release(self._key(('lease', name)), self.owner)
+        except Exception as e:
+            self._error('release', e)
+
+    def _error(self, op: str, error: Exception):
+        self.stats["errors"] += 1
+        print(f"Shared cache {op} failed: {error}")
+
+
+shared_cache = SharedCache()
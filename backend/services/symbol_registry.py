@@ -0,0 +1,153 @@
+"""
+Symbol Registry
+One place for symbol metadata, loaded once per process from
+data/symbols.json:
+- provider tickers (Polygon, Yahoo Finance, TradingView)
+- asset class, quote currency and the currency legs calendar events move
+- tick size / pip size for price rounding and risk math
+- trading session (hours live in the file's "sessions" table)
+
+Lookups are dict hits. Symbols missing from the file are derived once from
+their shape (6-letter currency pair, *.MA Casablanca listing, otherwise a
+USD-quoted equity) and cached, so callers never special-case suffixes.
+"""
+import json
+import math
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+DATA_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'symbols.json')
+
+CURRENCIES = {'USD', 'EUR', 'GBP', 'JPY', 'CHF', 'AUD', 'CAD', 'NZD', 'CNY', 'MAD'}
+PROVIDERS = ('polygon', 'yfinance', 'tradingview')
+MOROCCAN_SUFFIX = '.MA'
+
+
+@dataclass(frozen=True)
+class SymbolInfo:
+    symbol: str
+    name: str
+    asset_class: str  # FOREX, CRYPTO, COMMODITY, US_EQUITY, MA_EQUITY
+    quote_currency: str
+    currency_legs: Tuple[str, ...]
+    tick_size: float
+    pip_size: float
+    session: str
+    base_price: Optional[float] = None  # Reference level for simulated prices (hashed from the symbol if not configured)
+    tickers: Dict[str, Optional[str]] = field(default_factory=dict)
+    listed: bool = True  # False when derived from the symbol's shape
+
+    def ticker(self, provider: str) -> Optional[str]:
+        """Provider ticker; None when the provider does not carry the symbol"""
+        return self.tickers.get(provider, self.symbol)
+
+    def round_price(self, price: float) -> float:
+        """Round to the instrument's tick size"""
+        decimals = max(0, -int(math.floor(math.log10(self.tick_size))))
+        return round(round(price / self.tick_size) * self.tick_size, decimals)
+
+    def to_dict(self) -> dict:
+        return {
+            "symbol": self.symbol,
+            "name": self.name,
+            "asset_class": self.asset_class,
+            "quote_currency": self.quote_currency,
+            "currency_legs": list(self.currency_legs),
+            "tick_size": self.tick_size,
+            "pip_size": self.pip_size,
+            "session": self.session,
+            "tickers": {p: self.ticker(p) for p in PROVIDERS},
+            "listed": self.listed,
+        }
+
+
+def _hashed_base_price(symbol: str) -> float:
+    """Deterministic simulated price level for symbols without a configured one"""
+    return 100.0 + (sum(ord(c) for c in symbol) % 500)
+
+
+class SymbolRegistry:
+    def __init__(self, symbols: Dict[str, SymbolInfo] = None, sessions: Dict[str, dict] = None):
+        self._symbols: Dict[str, SymbolInfo] = symbols or {}
+        self._aliases: Dict[str, str] = {}
+        self._derived: Dict[str, SymbolInfo] = {}
+        self._lock = threading.Lock()
+        self.sessions: Dict[str, dict] = sessions or {}
+
+    @classmethod
+    def load(cls, path: str = DATA_FILE) -> 'SymbolRegistry':
+        with open(path) as f:
+            doc = json.load(f)
+        registry = cls(sessions=doc.get('sessions', {}))
+        for symbol, entry in doc.get('symbols', {}).items():
+            registry._add(symbol, entry)
+        for group in doc.get('groups', {}).values():
+            defaults = group.get('defaults', {})
+            for symbol, name in group.get('symbols', []):
+                code = symbol.split('.')[0]
+                tickers = {p: t.format(code=code) if t else t for p, t in defaults.get('tickers', {}).items()}
+                registry._add(symbol, {**defaults, 'name': name, 'tickers': tickers})
+        return registry
+
+    def _add(self, symbol: str, entry: dict):
+        info = SymbolInfo(
+            symbol=symbol,
+            name=entry.get('name', symbol),
+            asset_class=entry['asset_class'],
+            quote_currency=entry['quote_currency'],
+            currency_legs=tuple(entry['currency_legs']),
+            tick_size=entry['tick_size'],
+            pip_size=entry.get('pip_size', entry['tick_size']),
+            session=entry['session'],
+            base_price=entry.get('base_price') or _hashed_base_price(symbol),
+            tickers=entry.get('tickers', {}),
+        )
+        self._symbols[symbol] = info
+        for alias in entry.get('aliases', []):
+            self._aliases[alias] = symbol
+
+    # --- Lookups ---
+
+    def get(self, symbol: str) -> SymbolInfo:
+        s = (symbol or '').upper()
+        info = self._symbols.get(s) or self._symbols.get(self._aliases.get(s, ''))
+        if info is not None:
+            return info
+        info = self._derived.get(s)
+        if info is None:
+            info = self._derive(s)
+            with self._lock:
+                self._derived[s] = info
+        return info
+
+    def __contains__(self, symbol: str) -> bool:
+        s = (symbol or '').upper()
+        return s in self._symbols or s in self._aliases
+
+    def ticker(self, symbol: str, provider: str) -> Optional[str]:
+        return self.get(symbol).ticker(provider)
+
+    def currency_legs(self, symbol: str) -> List[str]:
+        return list(self.get(symbol).currency_legs)
+
+    def symbols(self, asset_class: str = None) -> List[SymbolInfo]:
+        return [info for info in self._symbols.values() if asset_class is None or info.asset_class == asset_class]
+
+    def _derive(self, s: str) -> SymbolInfo:
+        if s.endswith(MOROCCAN_SUFFIX):
+            code = s[:-len(MOROCCAN_SUFFIX)]
+            return SymbolInfo(s, s, 'MA_EQUITY', 'MAD', ('MAD',), 0.01, 0.01, 'CASABLANCA',
+                              _hashed_base_price(s), {'polygon': None, 'tradingview': f'CSEMA:{code}'}, listed=False)
+        legs = tuple(leg for leg in (s[:3], s[3:]) if leg in CURRENCIES) if len(s) == 6 and s.isalpha() else ()
+        if legs:
+            jpy = s[3:] == 'JPY'
+            return SymbolInfo(s, f'{s[:3]}/{s[3:]}', 'FOREX', s[3:], legs,
+                              0.001 if jpy else 0.00001, 0.01 if jpy else 0.0001, 'FX', _hashed_base_price(s),
+                              {'polygon': f'C:{s}', 'yfinance': f'{s}=X', 'tradingview': f'FX:{s}'}, listed=False)
+        return SymbolInfo(s, s, 'US_EQUITY', 'USD', ('USD',), 0.01, 0.01, 'US_EQUITY', _hashed_base_price(s), {},
+                          listed=False)
+
+
+symbol_registry = SymbolRegistry.load()
@@ -0,0 +1,189 @@
+"""
+Tenant Resolution Service
+Resolves the <tenant> URL segment (subdomain) to an immutable TenantContext
+holding the tenant, its settings and provider configuration.
+
+Contexts are cached in-process by subdomain, so a request costs a dict hit
+instead of two queries. Every subdomain carries a version number; updating
+settings bumps it and the next lookup reloads from the database. The cache
+is an LRU of MAX_ENTRIES subdomains (unknown ones included, so random
+subdomains cannot grow it), and without a remote shared cache, where
+invalidate() only reaches the current process, positive entries expire
+after LOCAL_TTL so other workers pick up changes too.
+
+With a remote shared cache, a local miss is served from the shared copy
+before the database, and invalidations are broadcast to every worker.
+Shared copies are keyed by a generation: invalidating every tenant starts
+a new one, which orphans all shared copies (they expire after SHARED_TTL)
+without having to know their subdomains.
+"""
+import itertools
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field, replace
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from flask import g, request, jsonify
+from models import Tenant, TenantSettings
+from services.shared_cache import shared_cache
+
+PROVIDER_FIELDS = ('market_data_provider', 'data_quality_level', 'ai_service_level', 'news_api_base_url', 'news_api_key')
+SETTINGS_FIELDS = (
+    'default_language', 'base_currency', *PROVIDER_FIELDS,
+    'paypal_client_id', 'paypal_secret', 'price_starter', 'price_pro', 'price_elite',
+)
+
+
+@dataclass(frozen=True)
+class TenantContext:
+    """Detached snapshot of a tenant safe to share across requests and threads"""
+    id: int
+    name: str
+    subdomain: str
+    plan: str
+    settings: Dict[str, Any] = field(default_factory=dict)
+    version: int = 0
+
+    @property
+    def provider_config(self) -> Dict[str, Any]:
+        return {key: self.settings.get(key) for key in PROVIDER_FIELDS}
+
+
+class TenantResolver:
+    """In-process subdomain -> TenantContext cache with versioned invalidation"""
+
+    MISSING_TTL = 30  # seconds an unknown subdomain stays negatively cached
+    LOCAL_TTL = 60  # seconds a tenant stays cached when invalidations are not broadcast
+    SHARED_TTL = 300  # bounds a shared copy written by a load that raced an update
+    MAX_ENTRIES = 10000  # subdomains cached, and invalidated versions kept, per process
+
+    def __init__(self, shared=shared_cache, clock: Callable[[], float] = time.monotonic):
+        self._lock = threading.Lock()
+        self._cache: 'OrderedDict[str, tuple]' = OrderedDict()  # subdomain -> (version, TenantContext | None, expires_at)
+        self._versions: 'OrderedDict[str, int]' = OrderedDict()  # Invalidated subdomains -> version
+        self._sequence = itertools.count(1)
+        self._floor = 0  # Version of every subdomain not in _versions
+        self.clock = clock
+        self._generation: Optional[str] = None  # Shared key generation, read from the shared cache on first use
+        self.shared = shared
+        shared.subscribe('tenant.invalidate', self._on_invalidate)
+
+    def cached(self, subdomain: str) -> Tuple[bool, Optional[TenantContext]]:
+        """(hit, context) from the in-process cache only; never touches the database"""
+        entry = self._cache.get(subdomain)
+        if entry and entry[0] == self._version(subdomain) and (entry[2] is None or entry[2] > self.clock()):
+            try:
+                self._cache.move_to_end(subdomain)
+            except KeyError:
+                pass  # Evicted or invalidated meanwhile; the entry read is still consistent
+            return True, entry[1]
+        return False, None
+
+    def resolve(self, subdomain: str) -> Optional[TenantContext]:
+        hit, context = self.cached(subdomain)
+        if hit:
+            return context
+
+        version = self._version(subdomain)
+        context = self._load_shared(subdomain, version)
+        if context is None:
+            expires_at = self.clock() + self.MISSING_TTL
+        else:
+            expires_at = None if self.shared.remote else self.clock() + self.LOCAL_TTL
+        with self._lock:
+            # Only store if no invalidation raced with the load
+            if self._version(subdomain) == version:
+                self._cache[subdomain] = (version, context, expires_at)
+                self._cache.move_to_end(subdomain)
+                if len(self._cache) > self.MAX_ENTRIES:
+                    self._cache.popitem(last=False)
+        return context
+
+    def invalidate(self, subdomain: str = None):
+        """Bump the version of one subdomain (or all) so the next lookup reloads, in every worker"""
+        message = {"subdomain": subdomain}
+        if self.shared.remote:
+            if subdomain:
+                self.shared.delete(('tenant', self.generation, subdomain))
+            else:
+                message["generation"] = self._generation = uuid.uuid4().hex[:12]
+                self.shared.set(('tenant', 'generation'), self._generation)
+        self._invalidate_local(subdomain)
+        self.shared.publish('tenant.invalidate', message)
+
+    def _on_invalidate(self, message: dict):
+        if message.get("generation"):
+            self._generation = message["generation"]
+        self._invalidate_local(message.get("subdomain"))
+
+    @property
+    def generation(self) -> str:
+        if self._generation is None:
+            self._generation = self.shared.get(('tenant', 'generation')) or '0'
+        return self._generation
+
+    def _version(self, subdomain: str) -> int:
+        return self._versions.get(subdomain, self._floor)
+
+    def _invalidate_local(self, subdomain: str = None):
+        with self._lock:
+            version = next(self._sequence)
+            if not subdomain:
+                self._floor = version
+                self._versions.clear()
+                self._cache.clear()
+                return
+            self._versions[subdomain] = version
+            self._versions.move_to_end(subdomain)
+            self._cache.pop(subdomain, None)
+            if len(self._versions) > self.MAX_ENTRIES:
+                # Forgetting a version raises the floor past it: at worst a racing load is not cached
+                _, oldest = self._versions.popitem(last=False)
+                self._floor = max(self._floor, oldest)
+
+    def _load_shared(self, subdomain: str, version: int) -> Optional[TenantContext]:
+        if not self.shared.remote:
+            return self._load(subdomain, version)
+        key = ('tenant', self.generation, subdomain)
+        shared = self.shared.get(key)
+        if shared is not None:
+            return replace(TenantContext(**shared), version=version)
+        context = self._load(subdomain, version)
+        if context is not None:
+            self.shared.set(key, asdict(context), self.SHARED_TTL)
+        return context
+
+    def _load(self, subdomain: str, version: int) -> Optional[TenantContext]:
+        tenant = Tenant.query.filter_by(subdomain=subdomain).first()
+        if not tenant:
+            return None
+        settings = TenantSettings.query.filter_by(tenant_id=tenant.id).first()
+        return TenantContext(
+            id=tenant.id,
+            name=tenant.name,
+            subdomain=tenant.subdomain,
+            plan=tenant.plan or 'FREE',
+            settings={key: getattr(settings, key) for key in SETTINGS_FIELDS} if settings else {},
+            version=version,
+        )
+
+    def load_request_tenant(self):
+        """before_request hook: bind the URL tenant to g.tenant or reject the request"""
+        subdomain = (request.view_args or {}).get('tenant')
+        if subdomain is None:
+            return None
+        context = self.resolve(subdomain)
+        if context is None:
+            return jsonify(unknown_tenant(subdomain)), 404
+        g.tenant = context
+        return None
+
+
+def unknown_tenant(subdomain: str) -> dict:
+    """404 body for a subdomain without a tenant"""
+    return {"error": f"Unknown tenant '{subdomain}'"}
+
+
+tenant_resolver = TenantResolver()
@@ -0,0 +1,267 @@
+"""
+Tick Aggregator
+Builds live 1m bars from quote updates (the quote poller's `quotes`
+channel, or any feed calling on_tick) and emits each bar once it closes:
+- to price_data, the shared bar store (tenant_id NULL, timeframe 1m),
+  through the write-behind queue. With the quote poller only the worker
+  leading a symbol stores it; every worker builds the same bars
+- to the resampler, so charts of every timeframe include the live bars
+  (the forming bar too, refreshed on every flush)
+- to subscribe()d listeners (regime reclassification on bar close)
+
+Each symbol keeps a fixed ring of RING_BARS one-minute slots (numpy
+columns), so memory per symbol is constant. Ticks may arrive late or out
+of order: open and close follow tick time, not arrival, and a bar closes
+LATE_SECONDS after its minute ends. A tick for an already emitted minute
+still in the ring revises that bar and it is emitted again (the store
+upserts it); older ticks, and ticks from further than MAX_SKEW_SECONDS in
+the future, are dropped.
+"""
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from models import PriceData
+from services.provider_resilience import market_data
+from services.quote_poller import quote_poller
+from services.write_behind import WriteBehindFull, write_behind
+
+TIMEFRAME = '1m'
+STEP = 60
+RING_BARS = 64  # Minutes kept per symbol: the late-tick horizon
+LATE_SECONDS = 5.0
+MAX_SKEW_SECONDS = 5.0
+MAX_SYMBOLS = 2000
+FLUSH_INTERVAL = 1.0
+EPOCH = datetime(1970, 1, 1)
+
+
+class _Ring:
+    """One symbol's minute slots; slot = minute % RING_BARS, valid while minute[slot] matches"""
+    __slots__ = ('minute', 'o', 'h', 'l', 'c', 'v', 'first', 'last', 'sized', 'head', 'emitted', 'revised',
+                 'source')
+
+    def __init__(self):
+        self.minute = np.full(RING_BARS, -1, dtype=np.int64)
+        self.o, self.h, self.l, self.c, self.v = (np.zeros(RING_BARS) for _ in range(5))
+        self.first = np.zeros(RING_BARS)  # Time of the tick that set the open
+        self.last = np.zeros(RING_BARS)  # Time of the tick that set the close
+        self.sized = np.zeros(RING_BARS, dtype=bool)  # Any tick carried a size
+        self.head = -1  # Newest minute seen
+        self.emitted = -1  # Every minute up to here has been emitted
+        self.revised = set()  # Emitted minutes changed by a late tick
+        self.source: Optional[str] = None
+
+    def add(self, minute: int, ts: float, price: float, size: Optional[float]):
+        slot = minute % RING_BARS
+        if self.minute[slot] != minute:
+            self.minute[slot] = minute
+            self.o[slot] = self.h[slot] = self.l[slot] = self.c[slot] = price
+            self.v[slot] = size or 0.0
+            self.first[slot] = self.last[slot] = ts
+            self.sized[slot] = size is not None
+            return
+        if ts < self.first[slot]:
+            self.o[slot], self.first[slot] = price, ts
+        if ts >= self.last[slot]:
+            self.c[slot], self.last[slot] = price, ts
+        self.h[slot] = max(self.h[slot], price)
+        self.l[slot] = min(self.l[slot], price)
+        if size is not None:
+            self.v[slot] += size
+            self.sized[slot] = True
+
+    def bar(self, minute: int) -> Optional[dict]:
+        slot = minute % RING_BARS
+        if self.minute[slot] != minute:
+            return None  # No tick in that minute
+        return {'time': EPOCH + timedelta(seconds=minute * STEP), 'open': float(self.o[slot]),
+                'high': float(self.h[slot]), 'low': float(self.l[slot]), 'close': float(self.c[slot]),
+                'volume': float(self.v[slot]) if self.sized[slot] else None}
+
+    def close_through(self, minute: int) -> List[dict]:
+        """Bars of the minutes up to `minute` not emitted yet, plus revised ones"""
+        bars = []
+        for m in sorted(self.revised):
+            bar = self.bar(m)
+            if bar is not None:
+                bars.append(bar)
+        self.revised.clear()
+        if minute > self.emitted:
+            for m in range(max(self.emitted + 1, minute - RING_BARS + 1), minute + 1):
+                bar = self.bar(m)
+                if bar is not None:
+                    bars.append(bar)
+            self.emitted = minute
+        return sorted(bars, key=lambda bar: bar['time'])
+
+
+class TickAggregator:
+    def __init__(self, clock: Callable[[], float] = time.time, late_seconds: float = LATE_SECONDS,
+                 max_symbols: int = MAX_SYMBOLS):
+        self.clock = clock
+        self.late_seconds = late_seconds
+        self.max_symbols = max_symbols
+        self.app = None
+        self.enabled = True
+        self.store = True
+        self.poller = None  # Set when fed by the quote poller: only a symbol's leader stores it
+        self._rings: 'OrderedDict[str, _Ring]' = OrderedDict()
+        self._ready: Dict[str, List[dict]] = {}  # Closed bars of evicted symbols / forced closes
+        self._listeners: List[Callable[[str, Dict[str, List[dict]]], None]] = []
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self.stats = {"ticks": 0, "late_ticks": 0, "dropped_late": 0, "dropped_future": 0, "bars": 0,
+                      "revisions": 0, "stored": 0, "store_rejected": 0, "evicted": 0}
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config.get('TICK_BARS_ENABLED', True)
+        self.store = app.config.get('TICK_BARS_STORE', True)
+        self.late_seconds = app.config.get('TICK_BARS_LATE_SECONDS', LATE_SECONDS)
+        if not self.enabled or not quote_poller.symbols:
+            return
+        self.poller = quote_poller
+        quote_poller.subscribe(self.on_quote)
+        self.start()
+
+    def subscribe(self, listener: Callable[[str, Dict[str, List[dict]]], None]):
+        """listener(timeframe, {symbol: closed bars}) after each flush that closed bars"""
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    # --- Ticks ---
+
+    def on_quote(self, quote: dict):
+        """Quote poller listener: {"symbol", "price", "source", "fetched_at"}"""
+        self.on_tick(quote["symbol"], quote["price"], quote.get("fetched_at"), source=quote.get("source"))
+
+    def on_tick(self, symbol: str, price: float, ts: float = None, size: float = None, source: str = None):
+        now = self.clock()
+        ts = now if ts is None else ts
+        if ts > now + MAX_SKEW_SECONDS:
+            self.stats["dropped_future"] += 1
+            return
+        minute = int(ts // STEP)
+        with self._lock:
+            ring = self._ring(symbol)
+            if minute > ring.head:
+                if ring.head >= 0 and minute - RING_BARS > ring.emitted:
+                    # Slots about to be reused may hold unemitted bars (a jump ahead): close them now
+                    self._hold(symbol, ring.close_through(minute - RING_BARS))
+                ring.head = minute
+            elif minute <= ring.head - RING_BARS:
+                self.stats["dropped_late"] += 1
+                return
+            elif minute <= ring.emitted:
+                self.stats["late_ticks"] += 1
+                ring.revised.add(minute)
+            ring.add(minute, ts, float(price), size)
+            ring.source = source or ring.source
+            self.stats["ticks"] += 1
+
+    def _ring(self, symbol: str) -> _Ring:
+        ring = self._rings.get(symbol)
+        if ring is not None:
+            self._rings.move_to_end(symbol)
+            return ring
+        ring = self._rings[symbol] = _Ring()
+        if len(self._rings) > self.max_symbols:
+            # The least recently ticked symbol goes; its open bars are closed as they are
+            evicted, old = self._rings.popitem(last=False)
+            self._hold(evicted, old.close_through(old.head))
+            self.stats["evicted"] += 1
+        return ring
+
+    def _hold(self, symbol: str, bars: List[dict]):
+        """Keep bars closed outside a flush for the next one"""
+        if bars:
+            self._ready.setdefault(symbol, []).extend(bars)
+
+    # --- Closing ---
+
+    def flush(self, now: float = None, force: bool = False) -> Dict[str, List[dict]]:
+        """Close the bars whose minute ended LATE_SECONDS ago (every open bar with force) and emit them"""
+        now = self.clock() if now is None else now
+        closed_minute = int((now - self.late_seconds) // STEP) - 1
+        with self._lock:
+            closed, self._ready = self._ready, {}
+            forming, sources = {}, {}
+            for symbol, ring in self._rings.items():
+                self.stats["revisions"] += len(ring.revised)
+                bars = ring.close_through(ring.head if force else min(closed_minute, ring.head))
+                if bars:
+                    closed.setdefault(symbol, []).extend(bars)
+                if ring.head > ring.emitted:
+                    forming[symbol] = ring.bar(ring.head)
+                sources[symbol] = ring.source
+        if closed or forming:
+            self._emit(closed, forming, sources)
+        return closed
+
+    def _emit(self, closed: Dict[str, List[dict]], forming: Dict[str, dict], sources: Dict[str, Optional[str]]):
+        """Closed bars to the store, resampler and listeners; the forming bar to the resampler only (charts)"""
+        if market_data.resample:
+            for symbol in set(closed) | set(forming):
+                bars = closed.get(symbol, []) + ([forming[symbol]] if symbol in forming else [])
+                market_data.resampler.add_bars(symbol, TIMEFRAME, bars, sources.get(symbol) or 'TICKS')
+        if not closed:
+            return
+        self.stats["bars"] += sum(len(b) for b in closed.values())
+        rows = []
+        for symbol, symbol_bars in closed.items():
+            source = sources.get(symbol) or 'TICKS'
+            if self.store and (self.poller is None or symbol in self.poller.leading):
+                rows += [{'tenant_id': None, 'symbol': symbol, 'timeframe': TIMEFRAME, 'timestamp': bar['time'],
+                          'open': bar['open'], 'high': bar['high'], 'low': bar['low'], 'close': bar['close'],
+                          'volume': bar['volume'], 'source': source} for bar in symbol_bars]
+        if rows:
+            try:
+                write_behind.submit_many(PriceData, rows, durable=False)
+                self.stats["stored"] += len(rows)
+            except WriteBehindFull as e:
+                self.stats["store_rejected"] += len(rows)
+                print(f"Tick bars not stored: {e}")
+        for listener in self._listeners:
+            try:
+                if self.app is not None:
+                    with self.app.app_context():
+                        listener(TIMEFRAME, closed)
+                else:
+                    listener(TIMEFRAME, closed)
+            except Exception as e:
+                print(f"Bar listener failed: {e}")
+
+    # --- Background flusher ---
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='tick-aggregator', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=FLUSH_INTERVAL + 1)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(FLUSH_INTERVAL):
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Tick bar flush failed: {e}")
+
+    def status(self) -> dict:
+        with self._lock:
+            symbols = len(self._rings)
+        return {"symbols": symbols, "ring_bars": RING_BARS, "late_seconds": self.late_seconds, **self.stats}
+
+
+tick_aggregator = TickAggregator()
@@ -0,0 +1,340 @@
+"""
+Write-Behind Insert Queue
+Buffers inserts for high-frequency tables (Trade, NewsEvent, PriceData) and
+flushes them as multi-row INSERTs in one transaction when a batch fills up
+or the flush interval elapses, instead of one commit (one fsync) per row.
+
+Durability modes:
+- sync:  submit() blocks until the batch holding the row is committed and
+         returns its primary key (group commit).
+- async: submit() returns as soon as the row is queued; rows still pending
+         at shutdown are flushed by the atexit hook.
+A full queue rejects new rows with WriteBehindFull (backpressure). Models
+registered with a unique key are written with ON CONFLICT DO NOTHING/UPDATE.
+
+Rows are checked against the model (unknown columns, missing NOT NULL
+values) before they are queued, so a bad row fails its own submit() with
+InvalidRow. A batch that still fails is retried row by row: only the
+offending row fails. A failed async row has no caller to report to; it is
+kept in dead_letters (bounded) until retry_dead_letters() requeues it.
+"""
+import atexit
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Dict, Any, Optional, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.dialects import postgresql, sqlite
+from extensions import db
+
+
+class WriteBehindFull(Exception):
+    """Raised when the pending queue is full: callers should shed or retry later"""
+
+
+class WriteBehindTimeout(Exception):
+    """Raised when a durable submit is not committed in time: the row is still queued and may commit later"""
+
+
+class InvalidRow(ValueError):
+    """Raised by submit() for a row the table would reject (unknown column, missing NOT NULL value)"""
+
+
+class WriteBehindQueue:
+    def __init__(self, app=None):
+        self.app = None
+        self.durability = 'sync'
+        self.max_batch = 500
+        self.flush_interval = 0.02
+        self.put_timeout = 0.5
+        self.result_timeout = 10.0
+        self._queue: queue.Queue = queue.Queue(maxsize=10000)
+        self.dead_letters: deque = deque(maxlen=10000)  # (model, mapping, error) of failed async rows
+        self._conflict_keys: Dict[type, Tuple[str, ...]] = {}
+        self._update_columns: Dict[type, Tuple[str, ...]] = {}
+        self._index_where: Dict[type, Any] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._pid = None
+        self._stop = threading.Event()
+        self._start_lock = threading.Lock()
+        self._atexit_registered = False
+        self._required: Dict[type, Tuple[set, set]] = {}  # model -> (columns, NOT NULL columns without default)
+        self.stats = {"submitted": 0, "flushed": 0, "batches": 0, "rejected": 0, "invalid": 0, "failed": 0,
+                      "row_retries": 0, "dead_lettered": 0}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.durability = app.config.get('WRITE_BEHIND_DURABILITY', 'sync')
+        self.max_batch = app.config.get('WRITE_BEHIND_MAX_BATCH', 500)
+        self.flush_interval = app.config.get('WRITE_BEHIND_FLUSH_MS', 20) / 1000
+        self.put_timeout = app.config.get('WRITE_BEHIND_PUT_TIMEOUT_MS', 500) / 1000
+        self.result_timeout = app.config.get('WRITE_BEHIND_RESULT_TIMEOUT_MS', 10000) / 1000
+        self._queue = queue.Queue(maxsize=app.config.get('WRITE_BEHIND_MAX_PENDING', 10000))
+        self.dead_letters = deque(maxlen=app.config.get('WRITE_BEHIND_MAX_DEAD_LETTERS', 10000))
+        if not self._atexit_registered:
+            atexit.register(self.shutdown)
+            self._atexit_registered = True
+
+    def register(self, model, conflict_keys: Tuple[str, ...], update_columns: Tuple[str, ...] = None,
+                 index_where=None):
+        """
+        Declare the unique key of a model. Colliding rows are skipped, or
+        upserted (update_columns overwritten) instead of failing the batch.
+        index_where is the predicate of a partial unique index.
+        """
+        self._conflict_keys[model] = tuple(conflict_keys)
+        if update_columns:
+            self._update_columns[model] = tuple(update_columns)
+        if index_where is not None:
+            self._index_where[model] = index_where
+
+    # --- Producer side ---
+
+    def submit(self, model, mapping: Dict[str, Any], durable: bool = None) -> Optional[int]:
+        """
+        Queue one row. In sync mode (or durable=True) waits for the commit
+        and returns the new primary key; otherwise returns None immediately.
+        """
+        durable = self.durability == 'sync' if durable is None else durable
+        self.validate(model, mapping)
+        self._ensure_worker()
+        future = Future() if durable else None
+        try:
+            self._queue.put((model, mapping, future), timeout=self.put_timeout)
+        except queue.Full:
+            self.stats["rejected"] += 1
+            raise WriteBehindFull(f"{self._queue.qsize()} inserts pending")
+        self.stats["submitted"] += 1
+        return self._result(future) if future else None
+
+    def submit_many(self, model, mappings: list, durable: bool = None) -> list:
+        """Queue several rows; with durability, waits for all of them and returns their keys"""
+        durable = self.durability == 'sync' if durable is None else durable
+        for mapping in mappings:
+            self.validate(model, mapping)
+        self._ensure_worker()
+        futures = []
+        for mapping in mappings:
+            future = Future() if durable else None
+            try:
+                self._queue.put((model, mapping, future), timeout=self.put_timeout)
+            except queue.Full:
+                self.stats["rejected"] += len(mappings) - len(futures)
+                raise WriteBehindFull(f"{self._queue.qsize()} inserts pending")
+            futures.append(future)
+        self.stats["submitted"] += len(mappings)
+        if not durable:
+            return []
+        deadline = time.monotonic() + self.result_timeout
+        return [self._result(future, deadline - time.monotonic()) for future in futures]
+
+    def _result(self, future: Future, timeout: float = None):
+        try:
+            return future.result(timeout=max(0.0, self.result_timeout if timeout is None else timeout))
+        except FutureTimeout:
+            raise WriteBehindTimeout(f"Not committed within {self.result_timeout:g}s, "
+                                     f"{self._queue.qsize()} inserts pending")
+
+    def validate(self, model, mapping: Dict[str, Any]):
+        """Raise InvalidRow for unknown columns or missing NOT NULL values without a default"""
+        if model not in self._required:
+            columns = model.__table__.columns
+            required = {c.key for c in columns if not c.nullable and c.default is None and c.server_default is None
+                        and not (c.primary_key and c.autoincrement in (True, 'auto'))}
+            self._required[model] = ({c.key for c in columns}, required)
+        columns, required = self._required[model]
+        unknown = set(mapping) - columns
+        missing = sorted(c for c in required if mapping.get(c) is None)
+        if unknown or missing:
+            self.stats["invalid"] += 1
+            problems = []
+            if unknown:
+                problems.append(f"unknown columns {', '.join(sorted(unknown))}")
+            if missing:
+                problems.append(f"missing {', '.join(missing)}")
+            raise InvalidRow(f"{model.__tablename__}: {'; '.join(problems)}")
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def retry_dead_letters(self) -> int:
+        """Requeue the failed async rows (e.g. after the database came back); returns how many"""
+        retried = 0
+        while self.dead_letters:
+            model, mapping, _ = self.dead_letters.popleft()
+            try:
+                self.submit(model, mapping, durable=False)
+            except InvalidRow:
+                continue
+            except WriteBehindFull:
+                self.dead_letters.appendleft((model, mapping, 'queue full'))
+                break
+            retried += 1
+        return retried
+
+    # --- Worker side ---
+
+    def _ensure_worker(self):
+        # Start lazily (and again after a fork): gunicorn workers each get their own flusher
+        if self._thread and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._thread and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._stop.clear()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='write-behind', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set() or not self._queue.empty():
+            batch = self._collect()
+            if batch:
+                self._flush(batch)
+
+    def _collect(self) -> list:
+        """
+        Group commit: a batch holding a sync waiter is flushed as soon as the
+        queue is drained; async-only batches keep filling until max_batch or
+        the flush interval elapses.
+        """
+        try:
+            batch = [self._queue.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+        has_waiter = batch[0][2] is not None
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.max_batch:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                timeout = deadline - time.monotonic()
+                if has_waiter or timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+            batch.append(item)
+            has_waiter = has_waiter or item[2] is not None
+        return batch
+
+    def _flush(self, batch: list):
+        try:
+            self._write(batch)
+        finally:
+            for _ in batch:
+                self._queue.task_done()
+
+    def _write(self, batch: list):
+        by_model: Dict[type, list] = {}
+        for model, mapping, future in batch:
+            by_model.setdefault(model, []).append((mapping, future))
+
+        with self.app.app_context():
+            try:
+                for model, items in by_model.items():
+                    self._insert(model, items)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                if len(batch) == 1:
+                    self._failed(batch[0], e)
+                    return
+                print(f"Write-behind flush of {len(batch)} rows failed ({e}), retrying row by row")
+                self._write_rows(batch)
+                return
+
+        self.stats["flushed"] += len(batch)
+        self.stats["batches"] += 1
+        for _, _, future in batch:
+            if future and not future.done():
+                future.set_result(getattr(future, 'row_id', None))
+
+    def _write_rows(self, batch: list):
+        """One transaction per row, so only the rows the database rejects fail (inside an app context)"""
+        for item in batch:
+            model, mapping, future = item
+            self.stats["row_retries"] += 1
+            try:
+                self._insert(model, [(mapping, future)])
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                self._failed(item, e)
+                continue
+            self.stats["flushed"] += 1
+            if future and not future.done():
+                future.set_result(getattr(future, 'row_id', None))
+
+    def _failed(self, item: tuple, error: Exception):
+        model, mapping, future = item
+        self.stats["failed"] += 1
+        if future is not None:
+            if not future.done():
+                future.set_exception(error)
+            return
+        self.dead_letters.append((model, mapping, str(error)))
+        self.stats["dead_lettered"] += 1
+        print(f"Write-behind {model.__tablename__} row failed, kept for retry: {error}")
+
+    def _insert(self, model, items: list):
+        keys = self._conflict_keys.get(model)
+        if keys:
+            # One statement cannot touch the same key twice (Postgres ON CONFLICT): last row wins
+            latest = {tuple(mapping.get(k) for k in keys): i for i, (mapping, _) in enumerate(items)}
+            for i, (_, future) in enumerate(items):
+                if future and latest[tuple(items[i][0].get(k) for k in keys)] != i:
+                    future.row_id = None
+            items = [items[i] for i in sorted(latest.values())]
+        rows = [mapping for mapping, _ in items]
+        stmt = self._insert_statement(model)
+        waiters = [future for _, future in items if future]
+        if not waiters:
+            db.session.execute(stmt, rows)
+            return
+
+        pk = model.__table__.primary_key.columns.values()[0]
+        result = db.session.execute(stmt.returning(pk, sort_by_parameter_order=True), rows)
+        ids = [row[0] for row in result]
+        if len(ids) == len(items):
+            for (_, future), row_id in zip(items, ids):
+                if future:
+                    future.row_id = row_id
+
+    def _insert_statement(self, model):
+        keys = self._conflict_keys.get(model)
+        dialect = db.session.get_bind().dialect.name
+        if not keys or dialect not in ('sqlite', 'postgresql'):
+            return insert(model)
+        stmt = (sqlite if dialect == 'sqlite' else postgresql).insert(model)
+        update_columns = self._update_columns.get(model)
+        index_where = self._index_where.get(model)
+        if update_columns:
+            return stmt.on_conflict_do_update(
+                index_elements=list(keys), index_where=index_where,
+                set_={col: stmt.excluded[col] for col in update_columns}
+            )
+        return stmt.on_conflict_do_nothing(index_elements=list(keys), index_where=index_where)
+
+    def flush(self, timeout: float = 5.0):
+        """Block until everything queued so far has been written"""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(self.flush_interval / 2)
+
+    def shutdown(self, timeout: float = 10.0):
+        """Flush pending rows and stop the worker (registered with atexit)"""
+        if not self._thread or self._pid != os.getpid():
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+
+
+write_behind = WriteBehindQueue()
@@ -0,0 +1,31 @@
+import argparse
+import json
+from app import create_app
+from services.challenge_simulator import ChallengeSimulator, rule_grid
+
+def pcts(value):
+    return [None if v in ('none', '-') else float(v) for v in value.split(',')]
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay closed trades through a grid of challenge rules")
+    parser.add_argument('--daily-loss', type=pcts, default=[None, 0.04, 0.05], help="comma list, 'none' disables")
+    parser.add_argument('--max-drawdown', type=pcts, default=[0.08, 0.10, 0.12])
+    parser.add_argument('--profit-target', type=pcts, default=[0.08, 0.10])
+    parser.add_argument('--tenant-id', type=int)
+    parser.add_argument('--plan', help='STARTER, PRO or ELITE')
+    parser.add_argument('--synthetic', type=int, help='simulate N synthetic challenges instead of stored trades')
+    parser.add_argument('--workers', type=int)
+    args = parser.parse_args()
+    
+    simulator = ChallengeSimulator(workers=args.workers)
+    grid = rule_grid(args.daily_loss, args.max_drawdown, args.profit_target)
+    if args.synthetic:
+        results = simulator.run(simulator.synthetic_streams(args.synthetic), grid)
+    else:
+        app = create_app()
+        with app.app_context():
+            results = simulator.run_stored(grid, args.tenant_id, args.plan)
+    print(json.dumps(results, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,35 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.config import Config
+from app import create_app
+from extensions import db
+from models import Tenant
+from services.write_behind import write_behind
+from utils.admission import admission
+
+
+@pytest.fixture
+def app(tmp_path):
+    class TestConfig(Config):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'test.db'}"
+        DATABASE_PROFILE = 'production'
+
+    app = create_app(TestConfig)
+    admission._buckets.clear()  # Rate limits are per process, tenant ids repeat across test databases
+    with app.app_context():
+        db.create_all()
+        db.session.add(Tenant(name='Acme', subdomain='acme', plan='PRO'))
+        db.session.commit()
+    yield app
+    write_behind.shutdown()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
@@ -0,0 +1,32 @@
+from models import TenantSettings
+
+URL = '/api/v1/acme/admin/settings'
+
+
+def stored(app):
+    with app.app_context():
+        return TenantSettings.query.filter_by(tenant_id=1).first()
+
+
+def test_valid_settings_are_stored(app, client):
+    response = client.put(URL, json={'price_pro': 249, 'news_api_base_url': 'https://feeds.example/v1'})
+    assert response.status_code == 200 and response.get_json()['updated'] == ['news_api_base_url', 'price_pro']
+    settings = stored(app)
+    assert settings.price_pro == 249.0 and settings.news_api_base_url == 'https://feeds.example/v1'
+
+
+def test_bad_values_are_a_400_and_nothing_is_stored(app, client):
+    for body in ({'price_pro': ['x']}, {'price_pro': -1}, {'price_pro': True}, {'base_currency': 'X' * 11},
+                 {'news_api_base_url': 'file:///etc/passwd'}, {'news_api_base_url': 'gopher://10.0.0.1/'},
+                 {'price_pro': 1, 'default_language': 5}, ['price_pro']):
+        response = client.put(URL, json=body)
+        assert response.status_code == 400, body
+    assert stored(app) is None
+    assert client.get('/api/v1/acme/admin/users').status_code == 200  # The session is still usable
+
+
+def test_credentials_are_not_editable(app, client):
+    for key in ('paypal_secret', 'paypal_client_id', 'news_api_key'):
+        response = client.put(URL, json={key: 'attacker'})
+        assert response.status_code == 400 and key in response.get_json()['message']
+    assert stored(app) is None
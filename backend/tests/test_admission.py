@@ -0,0 +1,21 @@
+from werkzeug.datastructures import Headers
+
+from utils.admission import USER_LIMITS, client_key
+
+
+def test_client_key_ignores_client_supplied_identity():
+    headers = Headers({'X-User-Id': 'anyone', 'Authorization': 'Bearer made-up',
+                       'X-Forwarded-For': '6.6.6.6, 203.0.113.7'})
+    assert client_key(headers, '10.0.0.2') == 'ip:10.0.0.2'  # No trusted proxy: the socket peer
+    assert client_key(headers, '10.0.0.2', trusted_proxies=1) == 'ip:203.0.113.7'  # Not the spoofable first hop
+    assert client_key(headers, '10.0.0.2', trusted_proxies=3) == 'ip:10.0.0.2'  # Fewer hops than proxies
+    assert client_key(headers, '10.0.0.2', user_id=42) == 'user:42'
+
+
+def test_rotating_headers_does_not_reset_the_user_limit(client):
+    burst = USER_LIMITS['read'][1]
+    statuses = [client.get('/api/v1/acme/news/sources', headers={'X-User-Id': f'u{i}',
+                                                                 'Authorization': f'Bearer t{i}'}).status_code
+                for i in range(burst + 1)]
+    assert statuses[:burst] == [200] * burst
+    assert statuses[-1] == 429
@@ -0,0 +1,65 @@
+import asyncio
+import json
+
+from routes import async_routes
+from routes.async_routes import AsyncDispatcher
+from services.provider_resilience import ProviderResult
+
+
+def call(app, path, query='', headers=()):
+    """One GET through the ASGI dispatcher: (status, headers, body)"""
+    scope = {'type': 'http', 'method': 'GET', 'path': path, 'query_string': query.encode(),
+             'headers': [(k.lower().encode(), v.encode()) for k, v in headers], 'client': ('127.0.0.1', 5000)}
+    sent = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b''}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(AsyncDispatcher(app, fallback=None)(scope, receive, send))
+    return sent[0]['status'], {k.decode(): v.decode() for k, v in sent[0]['headers']}, sent[1]['body']
+
+
+def test_bad_limit_is_a_400_on_both_stacks(app, client):
+    for limit in ('abc', '0', '100000'):
+        status, _, body = call(app, '/api/v1/acme/market-data/ohlcv', f'symbol=EURUSD&limit={limit}')
+        assert status == 400 and json.loads(body)['error'] == 'Invalid limit'
+        response = client.get(f'/api/v1/acme/market-data/ohlcv?symbol=EURUSD&limit={limit}')
+        assert response.status_code == 400 and response.get_json()['error'] == 'Invalid limit'
+
+
+def test_unknown_tenant_matches_the_flask_response(app, client):
+    status, _, body = call(app, '/api/v1/nobody/market-data/last', 'symbol=EURUSD')
+    flask = client.get('/api/v1/nobody/market-data/last?symbol=EURUSD')
+    assert status == flask.status_code == 404
+    assert json.loads(body) == flask.get_json()
+
+
+def test_cors_follows_the_app_settings(app, client):
+    origin = [('Origin', 'https://app.example')]
+    _, headers, _ = call(app, '/api/v1/nobody/market-data/last', headers=origin)
+    flask = client.get('/api/v1/nobody/market-data/last', headers=dict(origin))
+    assert headers['access-control-allow-origin'] == flask.headers['Access-Control-Allow-Origin']
+
+    app.config['CORS_ORIGINS'] = ['https://app.example']
+    _, headers, _ = call(app, '/api/v1/nobody/market-data/last', headers=origin)
+    assert headers['access-control-allow-origin'] == 'https://app.example'
+    _, headers, _ = call(app, '/api/v1/nobody/market-data/last', headers=[('Origin', 'https://evil.example')])
+    assert 'access-control-allow-origin' not in headers
+
+
+def test_ohlcv_is_cached_like_the_flask_route(app, monkeypatch):
+    class StubMarketData:
+        async def ohlcv_async(self, symbol, timeframe, limit):
+            return ProviderResult([{'time': '2026-03-04', 'close': 1.0}] * limit, 'STUB')
+
+    monkeypatch.setattr(async_routes, 'market_data', StubMarketData())
+    status, headers, body = call(app, '/api/v1/acme/market-data/ohlcv', 'symbol=EURUSD&limit=5')
+    assert status == 200 and len(json.loads(body)) == 5
+    assert headers['cache-control'] == 'public, max-age=15' and headers['x-data-source'] == 'STUB'
+
+    status, headers, body = call(app, '/api/v1/acme/market-data/ohlcv', 'symbol=EURUSD&limit=5',
+                                 [('If-None-Match', headers['etag'])])
+    assert status == 304 and body == b''
@@ -0,0 +1,95 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from benchmarks.stubs import FaultyProvider, HistoryStubProvider
+from extensions import db
+from models import PriceData
+from services.backfill import BackfillService, RateLimiter
+
+END = datetime(2026, 1, 1)
+START = END - timedelta(days=40)
+
+
+def stored(symbol):
+    return [row[0] for row in db.session.query(PriceData.timestamp).filter(
+        PriceData.symbol == symbol, PriceData.timeframe == '1d').order_by(PriceData.timestamp)]
+
+
+def gap_free(stamps):
+    return all(b - a == timedelta(days=1) for a, b in zip(stamps, stamps[1:]))
+
+
+def test_rerun_resumes_from_the_last_stored_bar(app):
+    service = BackfillService(max_workers=4)
+    with app.app_context():
+        first = service.run(HistoryStubProvider(latency=0, span_days=10), ['EURUSD', 'AAPL'], '1d', START,
+                            END - timedelta(days=15))
+        assert first["chunks"] == 6 and not first["failed"]
+
+        provider = HistoryStubProvider(latency=0, span_days=10)
+        second = service.run(provider, ['EURUSD', 'AAPL'], '1d', START, END)
+        # From the last stored bar (refreshed, it may have been open) to END: 16 days, 2 chunks per symbol
+        assert second["chunks"] == 4 and provider.calls == 4
+        for symbol in ('EURUSD', 'AAPL'):
+            stamps = stored(symbol)
+            assert len(stamps) == 40 and stamps[0] == START and gap_free(stamps)
+            last = PriceData.query.filter_by(symbol=symbol, timestamp=stamps[-1]).one()
+            assert last.close == provider.bars(symbol, '1d', stamps[-1], END)[0]['close']
+
+
+def test_failed_chunk_keeps_the_stored_series_gap_free(app):
+    service = BackfillService(max_workers=4, retries=1, backoff=0.01)
+    symbols = ['EURUSD', 'GBPUSD', 'AAPL']
+    with app.app_context():
+        # Chunks finish out of order; the outage stops each symbol at its first missing chunk
+        outage = service.run(HistoryStubProvider(latency=0.01, span_days=5, fail_after=10), symbols, '1d', START, END)
+        assert set(outage["failed"]) == set(symbols)
+        for symbol in symbols:
+            stamps = stored(symbol)
+            assert not stamps or (stamps[0] == START and gap_free(stamps))
+
+        resumed = service.run(HistoryStubProvider(latency=0.01, span_days=5), symbols, '1d', START, END)
+        assert not resumed["failed"]
+        for symbol in symbols:
+            stamps = stored(symbol)
+            assert len(stamps) == 40 and gap_free(stamps)
+
+
+def test_aware_bounds_are_converted_to_utc(app):
+    service = BackfillService()
+    provider = HistoryStubProvider(latency=0, span_days=10)
+    start = datetime(2025, 12, 1, 2, 0, tzinfo=timezone(timedelta(hours=2)))
+    with app.app_context():
+        chunks = service.plan(provider, ['EURUSD'], '1d', start, END.replace(tzinfo=timezone.utc))
+    assert chunks[0].start == datetime(2025, 12, 1) and chunks[-1].end == END
+
+
+def test_rate_limiter_spaces_requests():
+    now = [0.0]
+    waits = []
+
+    def sleep(seconds):
+        waits.append(seconds)
+
+    limiter = RateLimiter(4, clock=lambda: now[0], sleep=sleep)
+    assert [limiter.acquire() for _ in range(3)] == [0.0, 0.25, 0.5]
+    now[0] = 2.0
+    assert limiter.acquire() == 0.0  # Idle time is not banked into a burst
+    assert waits == [0.25, 0.5]
+    assert RateLimiter(None).acquire() == 0.0
+
+
+def test_limiter_keeps_a_run_within_the_provider_quota(app):
+    service = BackfillService(max_workers=8, retries=0)
+    provider = HistoryStubProvider(latency=0, span_days=5, requests_per_second=20)
+    with app.app_context():
+        summary = service.run(provider, ['EURUSD', 'AAPL'], '1d', START, END)
+    assert provider.rejected == 0 and not summary["failed"]
+    assert summary["requests"] == 16 and summary["throttled_seconds"] > 0
+
+
+def test_provider_without_history_is_rejected(app):
+    with app.app_context():
+        with pytest.raises(ValueError, match='ranged history'):
+            BackfillService().run(FaultyProvider('A'), ['EURUSD'], '1d', START, END)
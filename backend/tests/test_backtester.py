@@ -0,0 +1,47 @@
+import numpy as np
+
+from services.backtester import simulate, summarize
+
+
+def bars(*rows):
+    """(open, high, low, close) per bar"""
+    ohlc = np.array(rows, dtype=float)
+    return {'open': ohlc[:, 0], 'high': ohlc[:, 1], 'low': ohlc[:, 2], 'close': ohlc[:, 3]}
+
+
+def signal(side, stop, target):
+    return {'side': np.array(side), 'stop': np.array(stop, dtype=float), 'target': np.array(target, dtype=float)}
+
+
+def test_stop_wins_when_stop_and_target_hit_in_the_same_bar():
+    history = bars((100, 100, 100, 100), (100, 102, 98, 100), (100, 100, 100, 100))
+    trades = simulate(history, signal([1, 0, 0], [99, 0, 0], [101, 0, 0]), horizon=2)
+    assert list(trades['reason']) == ['stop'] and list(trades['exit']) == [99.0]
+    assert list(trades['exit_bar']) == [1]
+
+
+def test_gap_through_the_stop_fills_at_the_open():
+    history = bars((100, 100, 100, 100), (97, 98, 96, 97), (97, 97, 97, 97))
+    trades = simulate(history, signal([1, 0, 0], [99, 0, 0], [105, 0, 0]), horizon=2)
+    assert list(trades['exit']) == [97.0]
+
+    history = bars((100, 100, 100, 100), (103, 104, 102, 103), (103, 103, 103, 103))
+    trades = simulate(history, signal([-1, 0, 0], [101, 0, 0], [95, 0, 0]), horizon=2)
+    assert list(trades['exit']) == [103.0] and trades['returns'][0] < 0
+
+
+def test_one_position_at_a_time():
+    flat = (100, 100, 100, 100)
+    history = bars(flat, flat, flat, (100, 102, 100, 101), flat, flat, flat)
+    side = [1, 1, 1, 1, 1, 0, 0]
+    trades = simulate(history, signal(side, [90] * 7, [101.5] * 7), horizon=3)
+    # The first trade is open until its target at bar 3 and the second until its time exit at bar 6
+    assert list(trades['entry_bar']) == [0, 3]
+    assert list(trades['exit_bar']) == [3, 6]
+    assert list(trades['reason']) == ['target', 'time']
+
+
+def test_profit_factor_is_none_without_losses():
+    assert summarize(np.array([]))['profit_factor'] is None
+    assert summarize(np.array([0.01, 0.02]))['profit_factor'] is None
+    assert summarize(np.array([0.02, -0.01]))['profit_factor'] == 2.0
@@ -0,0 +1,45 @@
+from datetime import datetime
+
+import fakeredis
+import pytest
+
+from services.calendar_service import calendar_service
+from services.news_ingestion import NewsIngestionPipeline, news_ingestion
+from services.shared_cache import InProcessBackend, RedisBackend, shared_cache
+from tests.test_news_features import event, wait_for
+
+
+@pytest.fixture(autouse=True)
+def fresh_calendar():
+    # The singleton outlives each test's database
+    calendar_service.invalidate()
+    calendar_service._ingested.clear()
+
+
+def test_sample_calendar_until_the_first_ingest(client):
+    events = client.get('/api/v1/acme/news/calendar?symbol=EURUSD').get_json()
+    assert {e['title'] for e in events} == {'Non-Farm Payrolls', 'ECB Interest Rate Decision', 'CPI m/m'}
+    assert [e['title'] for e in client.get('/api/v1/acme/news/calendar?symbol=GBPJPY&impact=MEDIUM').get_json()] == [
+        'Retail Sales']
+
+    with client.application.app_context():
+        news_ingestion.upsert_events([1], [event('evt_1', minutes_ago=-30)])
+    events = client.get('/api/v1/acme/news/calendar?symbol=EURUSD').get_json()
+    assert [e['title'] for e in events] == ['NFP']
+    assert client.get('/api/v1/acme/news/calendar?symbol=GBPJPY').get_json() == []  # Ingested: no samples
+
+
+def test_ingest_elsewhere_invalidates_this_worker(app):
+    shared_cache.use(RedisBackend(fakeredis.FakeRedis(server=fakeredis.FakeServer(), decode_responses=True)))
+    try:
+        with app.app_context():
+            now = datetime.utcnow()
+            assert calendar_service.events_for_symbol(1, 'EURUSD', now=now)[0]['title'] == 'Non-Farm Payrolls'
+            ingester = NewsIngestionPipeline()  # e.g. ingest_news.py, reaching this worker through Redis only
+            ingester.init_app(app)
+            before = calendar_service.stats["invalidations"]
+            ingester.upsert_events([1], [event('evt_1', minutes_ago=-30)])
+            assert wait_for(lambda: calendar_service.stats["invalidations"] > before)
+            assert [e['title'] for e in calendar_service.events_for_symbol(1, 'EURUSD', now=now)] == ['NFP']
+    finally:
+        shared_cache.use(InProcessBackend())
@@ -0,0 +1,59 @@
+import numpy as np
+
+from models import UserChallenge
+from services.challenge_service import ChallengeService
+from services.challenge_simulator import ChallengeSimulator, TradeStreams, rule_grid
+
+BALANCE = 10000.0
+SERIES = [
+    [300, -200, 600, 400],  # Reaches +11%
+    [-400, -400, -300, 2000],  # Down 11% before the rally
+    [200, -100, 100],  # Still active
+    [-600, 1200, -300, -700],  # +6% then -4%
+    [500, 500],  # Exactly +10%
+]
+# evaluate_rules has no daily loss check: compare the drawdown / target rules only
+GRID = rule_grid(daily_loss_pcts=(None,), max_drawdown_pcts=(0.05, 0.10), profit_target_pcts=(0.05, 0.08, 0.10))
+
+
+def service_verdict(pnls, rules):
+    challenge = UserChallenge(initial_balance=BALANCE, current_equity=BALANCE, status='ACTIVE',
+                              **rules.limits(BALANCE))
+    for pnl in pnls:
+        challenge.current_equity += pnl
+        ChallengeService.evaluate_rules(challenge)
+        if challenge.status != 'ACTIVE':
+            break
+    return challenge.status
+
+
+def simulator_verdict(pnls, rules):
+    streams = TradeStreams(np.array([pnls], dtype=float) / BALANCE, np.zeros((1, len(pnls)), dtype=np.int32),
+                           np.array([len(pnls)], dtype=np.int32))
+    result = ChallengeSimulator(workers=1).run(streams, [rules])[0]
+    if result["passed"]:
+        return 'PASSED'
+    return 'FAILED' if result["failed_daily"] or result["failed_drawdown"] else 'ACTIVE'
+
+
+def test_simulator_matches_evaluate_rules():
+    verdicts = []
+    for pnls in SERIES:
+        for rules in GRID:
+            assert simulator_verdict(pnls, rules) == service_verdict(pnls, rules), (pnls, rules)
+            verdicts.append(service_verdict(pnls, rules))
+    assert {'PASSED', 'FAILED', 'ACTIVE'} <= set(verdicts)  # The series exercise every outcome
+
+
+def test_batched_replay_counts_match_evaluate_rules():
+    width = max(len(pnls) for pnls in SERIES)
+    returns = np.array([pnls + [0] * (width - len(pnls)) for pnls in SERIES], dtype=float) / BALANCE
+    streams = TradeStreams(returns, np.zeros(returns.shape, dtype=np.int32),
+                           np.array([len(pnls) for pnls in SERIES], dtype=np.int32))
+    results = ChallengeSimulator(workers=1).run(streams, GRID)
+    for result in results:
+        rules = next(r for r in GRID if (r.max_drawdown_pct, r.profit_target_pct) ==
+                     (result["max_drawdown_pct"], result["profit_target_pct"]))
+        statuses = [service_verdict(pnls, rules) for pnls in SERIES]
+        assert (result["passed"], result["failed_drawdown"], result["active"]) == (
+            statuses.count('PASSED'), statuses.count('FAILED'), statuses.count('ACTIVE'))
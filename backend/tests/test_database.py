@@ -0,0 +1,49 @@
+import sqlalchemy as sa
+
+from extensions import db
+from utils.database import InstrumentedQueuePool, apply_sqlite_tuning, engine_options, pool_stats
+
+CONFIG = {'DB_POOL_SIZE': 3, 'DB_MAX_OVERFLOW': 2, 'DB_POOL_TIMEOUT': 7, 'DB_POOL_RECYCLE': 600}
+
+
+def test_production_engine_options():
+    postgres = engine_options('postgresql://db.internal/tradesense', CONFIG)
+    assert postgres == {'poolclass': InstrumentedQueuePool, 'pool_size': 3, 'max_overflow': 2, 'pool_timeout': 7,
+                        'pool_recycle': 600, 'pool_pre_ping': True}
+    sqlite = engine_options('sqlite:////tmp/tradesense.db', CONFIG)
+    assert sqlite == {'poolclass': InstrumentedQueuePool, 'pool_size': 3, 'max_overflow': 2, 'pool_timeout': 7}
+    assert engine_options('sqlite://', CONFIG) == {}
+
+
+def test_sqlite_connections_get_wal_and_a_busy_timeout(app):
+    with app.app_context():
+        with db.engine.connect() as conn:
+            pragma = lambda name: conn.exec_driver_sql(f'PRAGMA {name}').scalar()
+            assert pragma('journal_mode') == 'wal'
+            assert pragma('synchronous') == 1  # NORMAL
+            assert pragma('busy_timeout') == 5000
+
+
+def test_pool_metrics_are_kept_per_engine(tmp_path):
+    engines = []
+    for name in ('a', 'b'):
+        url = f"sqlite:///{tmp_path / name}.db"
+        engine = sa.create_engine(url, **engine_options(url, CONFIG))
+        apply_sqlite_tuning(engine, busy_timeout_ms=100)
+        engines.append(engine)
+    first, second = engines
+    for _ in range(3):
+        with first.connect() as conn:
+            conn.execute(sa.text('SELECT 1'))
+    first.dispose()  # A recreated pool keeps the engine's counters
+    with second.connect() as conn:
+        conn.execute(sa.text('SELECT 1'))
+
+    assert pool_stats(first)['checkouts'] == 3 and pool_stats(second)['checkouts'] == 1
+    assert pool_stats(first)['size'] == 3 and pool_stats(first)['pool'] == 'InstrumentedQueuePool'
+
+
+def test_metrics_report_each_engine(client):
+    client.get('/api/v1/acme/leaderboard/')
+    body = client.get('/metrics').get_data(as_text=True)
+    assert 'db_pool_events_total{engine="primary",event="checkouts"}' in body
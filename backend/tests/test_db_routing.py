@@ -0,0 +1,74 @@
+import time
+
+import pytest
+import sqlalchemy as sa
+
+from app import create_app
+from config.config import Config
+from extensions import db
+from models import Tenant
+from services.write_behind import write_behind
+from utils.db_routing import PRIMARY_UNTIL_COOKIE, replica_router
+
+LEADERBOARD = '/api/v1/acme/leaderboard/'
+
+
+@pytest.fixture
+def routed_app(tmp_path):
+    class TestConfig(Config):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'primary.db'}"
+        REPLICA_DATABASE_URIS = [f"sqlite:///{tmp_path / 'replica.db'}"]
+        DATABASE_PROFILE = 'production'
+
+    replica_router._lag.clear()
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        db.session.add(Tenant(name='Acme', subdomain='acme', plan='PRO'))
+        db.session.commit()
+        replica = db.engines['replica_0']
+        db.metadata.create_all(replica, tables=[Tenant.__table__])
+        with replica.begin() as conn:
+            conn.execute(Tenant.__table__.insert().values(name='Replica', subdomain='replica', plan='PRO'))
+    yield app
+    write_behind.shutdown()
+    replica_router.replica_keys = []
+    db.metadatas.pop('replica_0', None)  # Registered on the shared db by the bind; later apps have no replica
+
+
+def bind(app, method='GET', headers=None, pending=False):
+    """Engine the session picks for a SELECT in a request to the leaderboard"""
+    with app.test_request_context(LEADERBOARD, method=method, headers=headers):
+        replica_router.route_request()
+        if pending:
+            db.session.add(Tenant(name='New', subdomain='new', plan='PRO'))
+        return db.session.get_bind(clause=sa.select(Tenant)), db.engines
+
+
+def test_reads_go_to_the_replica(routed_app):
+    engine, engines = bind(routed_app)
+    assert engine is engines['replica_0']
+    with routed_app.test_request_context(LEADERBOARD):
+        replica_router.route_request()
+        assert [t.subdomain for t in Tenant.query.all()] == ['replica']
+
+
+def test_writes_and_read_your_writes_stay_on_the_primary(routed_app):
+    engine, engines = bind(routed_app, method='POST')
+    assert engine is engines[None]
+    engine, engines = bind(routed_app, pending=True)
+    assert engine is engines[None]
+    engine, engines = bind(routed_app, headers={'Cookie': f'{PRIMARY_UNTIL_COOKIE}={time.time() + 10}'})
+    assert engine is engines[None]
+    engine, engines = bind(routed_app, headers={'Cookie': f'{PRIMARY_UNTIL_COOKIE}={time.time() - 1}'})
+    assert engine is engines['replica_0']
+
+
+def test_lagging_replica_falls_back_to_the_primary(routed_app, monkeypatch):
+    monkeypatch.setattr(replica_router, '_measure_lag', lambda engine: replica_router.max_lag + 1)
+    engine, engines = bind(routed_app)
+    assert engine is engines[None]
+    with routed_app.test_request_context(LEADERBOARD):
+        replica_router.route_request()
+        assert [t.subdomain for t in Tenant.query.all()] == ['acme']
@@ -0,0 +1,101 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from benchmarks.stubs import HistoryStubProvider, OpenMarketCalendar
+from services import market_data_service
+from services.market_data_service import MockProvider, PolygonProvider, QuoteCache, chart_bar
+from services.provider_resilience import ProviderResult
+from services.resampler import Resampler
+from services.symbol_registry import symbol_registry
+
+
+class Agg:
+    def __init__(self, timestamp):
+        self.timestamp, self.open, self.high, self.low, self.close, self.volume = timestamp, 1.0, 2.0, 0.5, 1.5, 10
+
+
+class StubClient:
+    def list_aggs(self, ticker, multiplier, timespan, start, end, limit):
+        # Two bars 15 minutes apart, epoch milliseconds (2026-03-04 14:30 / 14:45 UTC)
+        return [Agg(1772634600000), Agg(1772635500000)]
+
+
+def polygon():
+    provider = PolygonProvider.__new__(PolygonProvider)
+    provider.client = StubClient()
+    provider._format_symbol = lambda symbol: symbol
+    return provider
+
+
+def test_intraday_chart_bars_keep_the_time():
+    bar = {'time': datetime(2026, 3, 4, 14, 30), 'open': 1.0}
+    assert chart_bar(bar, '15m')['time'] == '2026-03-04 14:30'
+    assert chart_bar(bar, '1h')['time'] == '2026-03-04 14:30'
+    assert chart_bar(bar, '1d')['time'] == '2026-03-04'
+
+
+def test_polygon_intraday_bars_are_distinct():
+    times = [bar['time'] for bar in polygon().get_ohlcv('AAPL', '15m', 10)]
+    assert times == ['2026-03-04 14:30', '2026-03-04 14:45']
+    assert [bar['time'] for bar in polygon().get_ohlcv('AAPL', '1d', 10)] == ['2026-03-04', '2026-03-04']
+
+
+def test_polygon_async_intraday_bars_keep_the_time(monkeypatch):
+    provider = polygon()
+
+    async def aaggs(symbol, multiplier, timespan, start, end):
+        return [{'t': 1772634600000, 'o': 1.0, 'h': 2.0, 'l': 0.5, 'c': 1.5, 'v': 10}]
+
+    monkeypatch.setattr(market_data_service, 'httpx', object())
+    provider._aaggs = aaggs
+    assert asyncio.run(provider.aget_ohlcv('AAPL', '5m', 10))[0]['time'] == '2026-03-04 14:30'
+
+
+def test_mock_bars_are_one_timeframe_apart():
+    bars = MockProvider().get_ohlcv('EURUSD', '15m', 4)
+    times = [datetime.strptime(bar['time'], '%Y-%m-%d %H:%M') for bar in bars]
+    assert [b - a for a, b in zip(times, times[1:])] == [timedelta(minutes=15)] * 3
+    assert times[-1] <= datetime.utcnow() < times[-1] + timedelta(minutes=15)  # The open bar
+    assert len(MockProvider().get_ohlcv('EURUSD', '1d', 3)[0]['time']) == len('2026-03-04')
+
+
+def test_mock_prices_follow_the_registry_reference_level():
+    for symbol in ('EURUSD', 'USDJPY', 'IAM.MA'):
+        level = symbol_registry.get(symbol).base_price
+        assert abs(MockProvider().get_last_price(symbol) / level - 1) <= 0.002
+    assert 1.0 < MockProvider().get_ohlcv('EURUSD', '1h', 1)[0]['close'] < 1.2
+
+
+def test_daily_charts_come_from_daily_bars():
+    now = datetime(2026, 3, 4, 15, 0)
+    provider = HistoryStubProvider(latency=0)
+    fetched = []
+
+    def fetch(symbol, timeframe, start, end):
+        fetched.append(timeframe)
+        return ProviderResult(provider.get_history(symbol, timeframe, start, end), 'STUB')
+
+    resampler = Resampler(fetch=fetch, ttl=lambda symbol, seconds: seconds, clock=lambda: (now - datetime(1970, 1, 1)).total_seconds())
+    assert resampler.base_for('1d', 100) == '1d'
+    assert resampler.base_for('1h', 10) == '1m'
+    resampler.ohlcv('EURUSD', '1h', 10)
+    rows, source, stale, _ = resampler.ohlcv('EURUSD', '1d', 10)
+    assert fetched == ['1m', '1d']  # Not aggregated from the 1m base
+    assert rows[-1]['time'] == '2026-03-04' and source == 'STUB' and not stale
+
+
+def test_quote_cache_is_bounded_and_drops_expired_entries():
+    now = [1000.0]
+    cache = QuoteCache(calendar=OpenMarketCalendar(), clock=lambda: now[0], shared=None)
+    cache.MAX_ENTRIES = 3
+    for limit in (1, 2, 3):
+        cache.put(('ohlcv', 'EURUSD', limit), 'EURUSD', limit, 60)
+    assert cache.get(('ohlcv', 'EURUSD', 1)) == 1  # Now the most recently used
+    cache.put(('ohlcv', 'EURUSD', 4), 'EURUSD', 4, 60)
+    assert list(cache._entries) == [('ohlcv', 'EURUSD', limit) for limit in (3, 1, 4)]
+
+    now[0] += 30
+    cache.put(('last', 'EURUSD'), 'EURUSD', 1.1, 60)
+    now[0] += 45  # The three OHLCV entries have expired
+    cache.put(('last', 'GBPUSD'), 'GBPUSD', 1.3, 15)
+    assert list(cache._entries) == [('last', 'EURUSD'), ('last', 'GBPUSD')]
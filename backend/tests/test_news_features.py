@@ -0,0 +1,73 @@
+import time
+from datetime import datetime, timedelta
+
+import fakeredis
+import pytest
+
+from services.news_features import NewsImpactAggregator
+from services.news_ingestion import INGEST_CHANNEL, NewsIngestionPipeline
+from services.shared_cache import InProcessBackend, RedisBackend, SharedCache, shared_cache
+
+
+def event(external_id, minutes_ago=10, impact='HIGH'):
+    return {'external_id': external_id, 'source': 'CALENDAR_API', 'currency': 'USD', 'event_name': 'NFP',
+            'category': None, 'event_time': datetime.utcnow() - timedelta(minutes=minutes_ago), 'impact': impact,
+            'actual': None, 'forecast': None, 'previous': None}
+
+
+@pytest.fixture
+def redis_server(app):
+    server = fakeredis.FakeServer()
+    shared_cache.use(RedisBackend(fakeredis.FakeRedis(server=server, decode_responses=True)))
+    yield server
+    shared_cache.use(InProcessBackend())
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_ingest_reaches_other_workers(app, redis_server):
+    # Another gunicorn worker: its own pipeline, features and connection to the same Redis
+    other_pipeline, other_features = NewsIngestionPipeline(), NewsImpactAggregator()
+    other_pipeline.subscribe(other_features.on_ingest)
+    other_cache = SharedCache(RedisBackend(fakeredis.FakeRedis(server=redis_server, decode_responses=True)))
+    other_cache.subscribe(INGEST_CHANNEL, other_pipeline._on_message)
+
+    pipeline = NewsIngestionPipeline()
+    pipeline.init_app(app)
+    with app.app_context():
+        pipeline.upsert_events([1], [event('evt_1'), event('evt_2', impact='MEDIUM')])
+
+    assert wait_for(lambda: other_features.currency_features(1, 'USD')['events_1h'] == 2)
+    assert other_features.currency_features(1, 'USD')['impact_1h'] == 3
+    other_cache.backend.close()
+
+
+def test_tenant_is_warm_only_after_a_successful_load(app):
+    features = NewsImpactAggregator()
+    with pytest.raises(RuntimeError):
+        features.warm(1)  # No application context: the query fails
+    assert 1 not in features._warm_tenants
+
+    with app.app_context():
+        NewsIngestionPipeline().upsert_events([1], [event('evt_1')])
+        features.warm(1)
+    assert 1 in features._warm_tenants
+    assert features.currency_features(1, 'USD')['high_impact_1h'] == 1
+
+
+def test_seen_ids_are_pruned_as_ingests_advance():
+    aggregator = NewsImpactAggregator()
+    start = datetime(2026, 3, 2, 12, 0).timestamp()
+    for i in range(24):
+        hour = start + i * 3600
+        aggregator.observe(1, 'USD', hour, 'HIGH', f'cal_{i}', now=hour)
+    assert len(aggregator._seen[1]) == 24
+
+    later = start + 3 * 24 * 3600  # Two days after the last event
+    aggregator.observe(1, 'USD', later, 'LOW', 'cal_late', now=later)
+    assert list(aggregator._seen[1]) == ['cal_late']
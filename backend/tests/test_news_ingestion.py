@@ -0,0 +1,94 @@
+import json
+from datetime import datetime
+
+import pytest
+
+from benchmarks.stubs import FeedStubServer
+from extensions import db
+from models import NewsEvent, TenantSettings
+from services.news_ingestion import NewsIngestionPipeline, _parse_time
+from services.write_behind import write_behind
+
+
+@pytest.fixture
+def stub():
+    server = FeedStubServer(events_per_feed=20).start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def pipeline(app, stub):
+    with app.app_context():
+        db.session.add(TenantSettings(tenant_id=1, news_api_base_url=stub.url, news_api_key='demo'))
+        db.session.commit()
+        yield NewsIngestionPipeline(max_workers=2, timeout=2)
+
+
+def test_parse_time_converts_offsets_to_utc():
+    assert _parse_time('2026-03-04T09:30:00+02:00') == datetime(2026, 3, 4, 7, 30)
+    assert _parse_time('2026-03-04T09:30:00Z') == datetime(2026, 3, 4, 9, 30)
+    assert _parse_time('2026-03-04T09:30:00') == datetime(2026, 3, 4, 9, 30)
+    assert _parse_time(1772616600) == _parse_time(1772616600000) == datetime(2026, 3, 4, 9, 30)
+
+
+def test_malformed_time_drops_only_that_item(pipeline, stub):
+    calendar, etag, modified = stub.feeds['/calendar']
+    events = json.loads(calendar)['events']
+    events[0]['time'] = 'next tuesday'
+    stub.feeds['/calendar'] = (json.dumps({'events': events}).encode(), '"bad-time"', modified)
+    result = pipeline.poll_once()
+    assert result['failed'] == 0 and result['rows_upserted'] == 39
+    assert pipeline.stats['dropped'] == 1
+
+
+def test_fingerprints_cover_the_latest_window_only(pipeline, stub):
+    pipeline.poll_once()
+    calendar, _, modified = stub.feeds['/calendar']
+    events = json.loads(calendar)['events'][5:]  # The five oldest events left the feed
+    stub.feeds['/calendar'] = (json.dumps({'events': events}).encode(), '"rolled"', modified)
+    pipeline.poll_once()
+    fingerprints = {key[2]: len(seen) for key, seen in pipeline._fingerprints.items()}
+    assert fingerprints == {'CALENDAR_API': 15, 'NEWS_API': 20}
+
+    TenantSettings.query.filter_by(tenant_id=1).update({'news_api_base_url': None})
+    db.session.commit()
+    pipeline.poll_once()
+    assert not pipeline._fingerprints and not pipeline._validators
+
+
+def test_unchanged_feeds_cost_a_304(pipeline, stub):
+    assert pipeline.poll_once()['rows_upserted'] == 40
+    assert pipeline.poll_once()['rows_upserted'] == 0
+    assert stub.not_modified == 2
+    stub.publish(new_events=3)
+    assert pipeline.poll_once()['rows_upserted'] == 6
+    assert NewsEvent.query.count() == 46
+
+
+def test_news_and_calendar_ids_do_not_collide(pipeline, stub):
+    calendar, _, _ = stub.feeds['/calendar']
+    news = [dict(evt, headline=evt['name']) for evt in json.loads(calendar)['events']]  # Same ids as the calendar
+    stub.feeds['/news'] = (json.dumps(news).encode(), '"same-ids"', 'Mon, 05 Jan 2026 08:00:00 GMT')
+    pipeline.poll_once()
+    assert NewsEvent.query.filter_by(source='CALENDAR_API').count() == 20
+    assert NewsEvent.query.filter_by(source='NEWS_API').count() == 20
+
+
+def test_failed_write_is_refetched(pipeline, stub, monkeypatch):
+    def broken(*args, **kwargs):
+        raise RuntimeError('database is locked')
+
+    monkeypatch.setattr(write_behind, 'submit_many', broken)
+    assert pipeline.poll_once()['failed'] == 2
+    monkeypatch.undo()
+    result = pipeline.poll_once()
+    assert result == {"feeds": 1, "requests": 2, "rows_upserted": 40, "failed": 0}
+    assert stub.not_modified == 0  # Validators of the failed poll were not kept
+
+
+def test_one_failing_feed_does_not_stop_the_others(pipeline, stub):
+    db.session.add(TenantSettings(tenant_id=1, news_api_base_url='http://127.0.0.1:9', news_api_key='x'))
+    db.session.commit()
+    result = pipeline.poll_once()
+    assert result['failed'] == 2 and result['rows_upserted'] == 40
@@ -0,0 +1,33 @@
+from services.news_store import NewsStore
+
+NOW = 1_772_000_000.0
+
+
+def test_pool_is_identical_across_processes():
+    worker_a, worker_b = NewsStore(clock=lambda: NOW), NewsStore(clock=lambda: NOW + 30)
+    page_a, cursor_a = worker_a.page(limit=10)
+    page_b, cursor_b = worker_b.page(limit=10)
+    assert page_a == page_b and cursor_a == cursor_b
+    assert worker_a.etag(page_a, cursor_a) == worker_b.etag(page_b, cursor_b)
+    # A cursor from one worker continues the listing on another
+    assert worker_b.page(cursor=cursor_a, limit=10) == worker_a.page(cursor=cursor_a, limit=10)
+    assert [item['id'] for item in worker_b.page(cursor=cursor_a, limit=10)[0]][0] not in {
+        item['id'] for item in page_a}
+
+
+def test_etag_follows_content():
+    now = [NOW]
+    store = NewsStore(clock=lambda: now[0])
+    page, cursor = store.page(category='Forex', limit=5)
+    etag = store.etag(page, cursor)
+    assert store.etag(*store.page(category='Forex', limit=5)) == etag
+    assert store.etag(*store.page(category='Stocks', limit=5)) != etag
+    now[0] += 6 * 3600  # New slots published, ages changed
+    assert store.etag(*store.page(category='Forex', limit=5)) != etag
+
+
+def test_route_answers_304_only_for_the_same_page(app, client):
+    first = client.get('/api/v1/acme/news/?limit=5')
+    etag = first.headers['ETag']
+    assert client.get('/api/v1/acme/news/?limit=5', headers={'If-None-Match': etag}).status_code == 304
+    assert client.get('/api/v1/acme/news/?limit=6', headers={'If-None-Match': etag}).status_code == 200
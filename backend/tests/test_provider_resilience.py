@@ -0,0 +1,151 @@
+import time
+
+import pytest
+
+from benchmarks.stubs import FaultyProvider, HistoryStubProvider
+from services.market_data_service import QuoteCache
+from services.provider_resilience import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, ResilientMarketData
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def resilient(*providers, **kwargs):
+    options = dict(deadline=0.5, failure_threshold=2, reset_timeout=0.2, max_workers=4)
+    options.update(kwargs)
+    return ResilientMarketData(list(providers), cache=QuoteCache(shared=None), **options)
+
+
+@pytest.fixture
+def providers():
+    created = []
+
+    def make(name, **kwargs):
+        provider = FaultyProvider(name, latency=0.01, jitter=0.0, **kwargs)
+        created.append(provider)
+        return provider
+
+    yield make
+    for provider in created:
+        provider.set_mode('healthy')  # Release calls still blocked in hang mode
+
+
+def test_breaker_opens_after_consecutive_failures_and_probes_once_half_open():
+    clock = Clock()
+    breaker = CircuitBreaker('A', failure_threshold=3, reset_timeout=30, clock=clock)
+    breaker.record_failure()
+    breaker.record_success()  # Only consecutive failures count
+    for _ in range(3):
+        assert breaker.allow()
+        breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+    clock.now += 30
+    assert breaker.allow()  # The probe
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()  # One probe at a time
+    breaker.record_failure()
+    assert breaker.state == OPEN  # A failed probe reopens at once
+    assert not breaker.allow()
+
+    clock.now += 30
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.allow() and breaker.allow()
+    assert breaker.status()["opened"] == 2
+
+
+def test_failing_provider_is_skipped_while_open_and_closes_after_a_healthy_probe(providers):
+    provider = providers('A')
+    provider.set_mode('error')
+    market = resilient(provider, hedge=False)
+
+    assert market.refresh_last_price('EURUSD') is None
+    assert market.refresh_last_price('EURUSD') is None
+    breaker = market._chain()[0].breaker
+    assert breaker.state == OPEN
+    calls = provider.calls
+    assert market.refresh_last_price('EURUSD') is None
+    assert provider.calls == calls  # Open: no upstream call
+
+    time.sleep(0.25)
+    assert market.refresh_last_price('EURUSD') is None  # Half-open probe still failing
+    assert breaker.state == OPEN
+    assert provider.calls == calls + 1
+
+    provider.set_mode('healthy')
+    time.sleep(0.25)
+    result = market.refresh_last_price('EURUSD')
+    assert (result.value, result.source) == (100.0, 'A')
+    assert breaker.state == CLOSED and breaker.failures == 0
+
+
+def test_deadline_counts_as_failure_and_serves_last_known_good(providers):
+    provider = providers('A', hang_timeout=5.0)
+    market = resilient(provider, deadline=0.1, hedge=False)
+    assert market.last_price('EURUSD').stale is False
+
+    provider.set_mode('hang')
+    market.cache._entries.clear()
+    started = time.monotonic()
+    result = market.last_price('EURUSD')
+    assert time.monotonic() - started < 1.0  # Bounded by the deadline, not the upstream timeout
+    assert (result.value, result.source, result.stale) == (100.0, 'A', True)
+    assert market.stats["timeouts"] == 1
+    assert market._chain()[0].breaker.failures == 1
+
+
+def test_late_answer_does_not_settle_the_breaker_twice(providers):
+    provider = providers('A', slow_latency=0.3)
+    provider.set_mode('slow')
+    market = resilient(provider, deadline=0.1, hedge=False, failure_threshold=5)
+    assert market.refresh_last_price('EURUSD') is None
+    time.sleep(0.4)  # The call completes after its deadline
+    breaker = market._chain()[0].breaker
+    assert breaker.failures == 1  # Counted as a timeout, not reset by the late success
+    assert market.cache.get(('last', 'EURUSD'))[0] == 100.0  # But it still warms the cache
+
+
+def test_hedge_asks_the_secondary_when_the_primary_is_slow(providers):
+    primary, secondary = providers('A', slow_latency=2.0), providers('B', price=101.0)
+    primary.set_mode('slow')
+    market = resilient(primary, secondary, deadline=1.0)
+
+    started = time.monotonic()
+    result = market.refresh_last_price('EURUSD')
+    elapsed = time.monotonic() - started
+    assert (result.value, result.source) == (101.0, 'B')
+    assert 0.4 < elapsed < 0.9  # Hedged at half the deadline (no latency history yet)
+    assert market.stats["hedged"] == 1 and market.stats["secondary_wins"] == 1
+
+
+def test_error_fails_over_without_waiting_for_the_hedge(providers):
+    primary, secondary = providers('A'), providers('B', price=101.0)
+    primary.set_mode('error')
+    market = resilient(primary, secondary, deadline=1.0)
+
+    started = time.monotonic()
+    result = market.refresh_last_price('EURUSD')
+    assert result.source == 'B'
+    assert time.monotonic() - started < 0.3
+    assert market.stats["hedged"] == 0 and market.stats["errors"] == 1
+
+
+def test_no_hedge_without_the_flag(providers):
+    primary, secondary = providers('A', slow_latency=2.0), providers('B')
+    primary.set_mode('slow')
+    market = resilient(primary, secondary, deadline=0.3, hedge=False)
+    assert market.refresh_last_price('EURUSD') is None
+    assert secondary.calls == 0
+
+
+def test_ohlcv_is_resampled_only_when_every_upstream_serves_history(providers):
+    assert resilient(HistoryStubProvider(), HistoryStubProvider())._resampled('1h')
+    assert not resilient(HistoryStubProvider(), providers('A'))._resampled('1h')
@@ -0,0 +1,42 @@
+from datetime import datetime, timezone
+
+from services.market_calendar import SETTLE_SECONDS
+from services.provider_resilience import ProviderResult
+from services.quote_poller import QuotePoller
+from services.shared_cache import SharedCache
+
+
+class StubMarket:
+    def __init__(self):
+        self.calls = []
+
+    def refresh_last_price(self, symbol):
+        self.calls.append(symbol)
+        return ProviderResult(1.0, 'STUB')
+
+
+def poller_at(when):
+    now = [when.replace(tzinfo=timezone.utc).timestamp()]
+    poller = QuotePoller(cache=SharedCache(), market=StubMarket(), clock=lambda: now[0])
+    poller.symbols, poller.interval = ['TSLA', 'BTCUSD'], 5.0
+    return poller, now
+
+
+def test_closed_markets_are_not_polled_until_the_next_open():
+    poller, now = poller_at(datetime(2026, 3, 7, 12, 0))  # Saturday
+    assert poller.poll_once() == ['BTCUSD']
+    assert poller.market.calls == ['BTCUSD']
+
+    now[0] = datetime(2026, 3, 9, 13, 29, tzinfo=timezone.utc).timestamp()  # Monday 9:29 EDT
+    assert poller.poll_once() == ['BTCUSD']
+    now[0] += 120  # Past the 9:30 open
+    assert poller.poll_once() == ['TSLA', 'BTCUSD']
+
+
+def test_polling_continues_through_the_settle_window():
+    close = datetime(2026, 3, 6, 21, 0)  # Friday 16:00 ET
+    poller, now = poller_at(close)
+    now[0] += SETTLE_SECONDS - 60
+    assert 'TSLA' in poller.poll_once()
+    now[0] += 120
+    assert 'TSLA' not in poller.poll_once()
@@ -0,0 +1,50 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from extensions import db
+from models import PriceData, RegimeSnapshot
+from services.regime_service import LOOKBACK, RegimeService, regime_service
+
+
+@pytest.fixture
+def bars(app):
+    rng = np.random.default_rng(7)
+    with app.app_context():
+        rows = []
+        for symbol, drift in (('TREND', 0.01), ('FLAT', 0.0)):
+            closes = 100 * np.exp(np.cumsum(drift + 0.002 * rng.standard_normal(LOOKBACK)))
+            rows += [{'symbol': symbol, 'timeframe': '1d', 'timestamp': datetime(2026, 1, 1) + timedelta(days=t),
+                      'open': c, 'high': c * 1.001, 'low': c * 0.999, 'close': c} for t, c in enumerate(closes)]
+        db.session.execute(PriceData.__table__.insert(), rows)
+        db.session.commit()
+        yield
+
+
+def test_get_never_runs_the_batch(bars):
+    service = RegimeService()
+    assert service.get('TREND') is None
+    assert service.stats["runs"] == 0
+
+
+def test_snapshots_reach_other_processes(bars):
+    batch = RegimeService()  # e.g. update_regimes.py --once
+    assert batch.refresh() == 2
+    assert RegimeSnapshot.query.count() == 2
+
+    worker = RegimeService()  # A web worker that never ran the batch
+    snapshot = worker.get('TREND')
+    assert snapshot["regime_key"] == 'TRENDING' and snapshot["trend"] == 'UP'
+    assert worker.stats["runs"] == 0
+
+    batch.refresh()  # Upserted in place
+    assert RegimeSnapshot.query.count() == 2
+
+
+def test_refresh_announcement_triggers_a_reload(bars, monkeypatch):
+    monkeypatch.setattr(regime_service, 'reload_seconds', 3600)
+    monkeypatch.setattr(regime_service, '_loaded_at', None)
+    assert regime_service.get('TREND') is None  # Loaded: nothing stored yet
+    RegimeService().refresh()  # Another process; publishes on the `regimes` channel
+    assert regime_service.get('TREND')["regime_key"] == 'TRENDING'
@@ -0,0 +1,66 @@
+import fakeredis
+import pytest
+
+from extensions import db
+from models import Tenant
+from services.shared_cache import RedisBackend, SharedCache
+from services.tenant_service import TenantResolver
+
+
+@pytest.fixture
+def workers(app):
+    """Two workers' resolvers sharing one Redis"""
+    server = fakeredis.FakeServer()
+    caches = [SharedCache(RedisBackend(fakeredis.FakeRedis(server=server, decode_responses=True)))
+              for _ in range(2)]
+    with app.app_context():
+        yield [TenantResolver(shared=cache) for cache in caches]
+    for cache in caches:
+        cache.backend.close()
+
+
+def set_plan(plan):
+    Tenant.query.filter_by(subdomain='acme').update({'plan': plan})
+    db.session.commit()
+
+
+def test_invalidate_all_reaches_shared_copies_this_worker_never_cached(workers):
+    first, second = workers
+    assert first.resolve('acme').plan == 'PRO'  # Also stored in the shared cache
+    set_plan('ELITE')
+    second.invalidate()  # Has no local entry for acme
+    assert TenantResolver(shared=second.shared).resolve('acme').plan == 'ELITE'  # A fresh worker
+    assert second.resolve('acme').plan == 'ELITE'
+
+
+def test_invalidate_one_subdomain(workers):
+    first, second = workers
+    first.resolve('acme')
+    set_plan('BASIC')
+    second.invalidate('acme')
+    assert second.resolve('acme').plan == 'BASIC'
+
+
+def test_local_entries_expire_when_invalidations_are_not_broadcast(app):
+    now = [1000.0]
+    resolver = TenantResolver(shared=SharedCache(), clock=lambda: now[0])  # In-process: no broadcast invalidations
+    with app.app_context():
+        assert resolver.resolve('acme').plan == 'PRO'
+        set_plan('ELITE')
+        assert resolver.resolve('acme').plan == 'PRO'
+        now[0] += TenantResolver.LOCAL_TTL + 1
+        assert resolver.resolve('acme').plan == 'ELITE'
+
+
+def test_cache_and_versions_are_bounded(app):
+    resolver = TenantResolver(shared=SharedCache())
+    resolver.MAX_ENTRIES = 5
+    with app.app_context():
+        for i in range(50):
+            assert resolver.resolve(f'random-{i}') is None
+            resolver.invalidate(f'gone-{i}')
+        assert len(resolver._cache) <= 5 and len(resolver._versions) <= 5
+        assert resolver.resolve('acme').plan == 'PRO'
+        set_plan('BASIC')
+        resolver.invalidate('acme')
+        assert resolver.resolve('acme').plan == 'BASIC'
@@ -0,0 +1,69 @@
+import pytest
+
+from services import tick_aggregator as module
+from services.tick_aggregator import RING_BARS, TickAggregator
+
+T0 = 1772634600.0  # 2026-03-04 14:30:00 UTC, a minute boundary
+
+
+@pytest.fixture
+def aggregator(monkeypatch):
+    monkeypatch.setattr(module.market_data, 'resample', False)  # Keep the shared resampler out of it
+    now = [T0]
+    aggregator = TickAggregator(clock=lambda: now[0], late_seconds=5.0)
+    aggregator.store = False
+    aggregator.now = now
+    heard = []
+    aggregator.subscribe(lambda timeframe, closed: heard.append(closed))
+    aggregator.heard = heard
+    return aggregator
+
+
+def test_open_and_close_follow_tick_time(aggregator):
+    aggregator.now[0] = T0 + 59
+    for offset, price in ((30, 1.3), (10, 1.1), (50, 1.5), (20, 0.9)):
+        aggregator.on_tick('EURUSD', price, T0 + offset)
+    bar = aggregator.flush(force=True)['EURUSD'][0]
+    assert (bar['open'], bar['high'], bar['low'], bar['close']) == (1.1, 1.5, 0.9, 1.5)
+    assert bar['volume'] is None
+
+
+def test_bars_close_after_the_late_window(aggregator):
+    aggregator.now[0] = T0 + 30
+    aggregator.on_tick('EURUSD', 1.1, T0 + 1)
+    aggregator.on_tick('EURUSD', 1.2, T0 + 30, size=2)
+    assert aggregator.flush(now=T0 + 64) == {}  # Minute ended, but within LATE_SECONDS
+    closed = aggregator.flush(now=T0 + 66)
+    assert [bar['close'] for bar in closed['EURUSD']] == [1.2] and closed['EURUSD'][0]['volume'] == 2
+    assert aggregator.heard == [closed]
+    assert aggregator.flush(now=T0 + 90) == {}  # Each bar is emitted once
+
+
+def test_late_tick_revises_an_emitted_bar(aggregator):
+    aggregator.on_tick('EURUSD', 1.1, T0 + 1)
+    aggregator.now[0] = T0 + 70
+    aggregator.on_tick('EURUSD', 1.15, T0 + 70)
+    aggregator.flush()
+    aggregator.on_tick('EURUSD', 1.4, T0)  # Arrives after its minute was emitted, stamped before the first tick
+    assert aggregator.stats["late_ticks"] == 1
+    revised = aggregator.flush()['EURUSD']
+    assert len(revised) == 1
+    assert (revised[0]['open'], revised[0]['high'], revised[0]['close']) == (1.4, 1.4, 1.1)
+    assert aggregator.stats["revisions"] == 1
+
+
+def test_ticks_outside_the_ring_or_from_the_future_are_dropped(aggregator):
+    aggregator.now[0] = T0 + RING_BARS * 60
+    aggregator.on_tick('EURUSD', 1.2)
+    aggregator.on_tick('EURUSD', 1.1, T0 + 1)  # RING_BARS minutes behind the newest tick
+    aggregator.on_tick('EURUSD', 1.3, aggregator.now[0] + 60)
+    assert aggregator.stats["dropped_late"] == 1 and aggregator.stats["dropped_future"] == 1
+    assert [bar['close'] for bar in aggregator.flush(force=True)['EURUSD']] == [1.2]
+
+
+def test_jump_ahead_closes_the_bars_it_overwrites(aggregator):
+    aggregator.on_tick('EURUSD', 1.1, T0 + 1)
+    aggregator.now[0] = T0 + (RING_BARS + 1) * 60
+    aggregator.on_tick('EURUSD', 1.2)  # Reuses the first tick's slot before any flush
+    closed = aggregator.flush()['EURUSD']
+    assert [bar['close'] for bar in closed] == [1.1]
@@ -0,0 +1,69 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from extensions import db
+from models import Tenant, Trade
+from services.write_behind import InvalidRow, WriteBehindTimeout, write_behind
+
+
+def trade(**overrides):
+    row = dict(tenant_id=1, challenge_id=1, symbol='EURUSD', side='BUY', volume=1.0, entry_price=1.1, pnl=0.0)
+    row.update(overrides)
+    return row
+
+
+def test_invalid_row_fails_alone(app):
+    with pytest.raises(InvalidRow, match='side'):
+        write_behind.submit(Trade, trade(side=None))
+    with pytest.raises(InvalidRow, match='unknown columns colour'):
+        write_behind.submit(Trade, trade(colour='red'))
+    assert write_behind.submit(Trade, trade()) is not None
+
+
+def test_trade_route_rejects_bad_trade_only(client):
+    bodies = [{'challenge_id': 1, 'symbol': 'EURUSD', 'side': 'BUY', 'volume': 1.0} for _ in range(7)]
+    bodies.append({'challenge_id': 1, 'symbol': 'EURUSD', 'side': None, 'volume': 1.0})
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        statuses = list(pool.map(lambda body: client.post('/api/v1/acme/trades/', json=body).status_code, bodies))
+    assert statuses == [201] * 7 + [400]
+
+
+def test_failed_batch_is_retried_row_by_row(app):
+    rows = [dict(name='A', subdomain='a'), dict(name='Dup', subdomain='acme'), dict(name='B', subdomain='b')]
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        futures = [pool.submit(write_behind.submit, Tenant, row, True) for row in rows]
+    with pytest.raises(IntegrityError):
+        futures[1].result()
+    assert futures[0].result() and futures[2].result()
+    with app.app_context():
+        assert {t.subdomain for t in Tenant.query} == {'acme', 'a', 'b'}
+
+
+def test_failed_async_rows_are_kept_for_retry(app):
+    write_behind.submit_many(Tenant, [dict(name='A', subdomain='a'), dict(name='Dup', subdomain='acme')],
+                             durable=False)
+    write_behind.flush()
+    assert [row[1]['subdomain'] for row in write_behind.dead_letters] == ['acme']
+
+    with app.app_context():
+        Tenant.query.filter_by(subdomain='acme').delete()
+        db.session.commit()
+    assert write_behind.retry_dead_letters() == 1
+    write_behind.flush()
+    assert not write_behind.dead_letters
+    with app.app_context():
+        assert {t.subdomain for t in Tenant.query} == {'a', 'acme'}
+
+
+def test_durable_submit_times_out(app, monkeypatch):
+    ensure_worker = write_behind._ensure_worker
+    monkeypatch.setattr(write_behind, '_ensure_worker', lambda: None)  # Nothing flushes
+    monkeypatch.setattr(write_behind, 'result_timeout', 0.05)
+    with pytest.raises(WriteBehindTimeout):
+        write_behind.submit(Trade, trade())
+    ensure_worker()
+    write_behind.flush()
+    with app.app_context():
+        assert Trade.query.count() == 1  # Still committed later
@@ -0,0 +1,19 @@
+import argparse
+from app import create_app
+from services.regime_service import regime_service
+
+def main():
+    parser = argparse.ArgumentParser(description="Reclassify market regimes from price_data on every bar close")
+    parser.add_argument('--interval', type=float, default=60.0, help='seconds between runs (bar interval)')
+    parser.add_argument('--once', action='store_true', help='run a single batch and exit')
+    args = parser.parse_args()
+    
+    app = create_app()
+    if args.once:
+        with app.app_context():
+            print(f"Classified {regime_service.refresh()} symbols: {regime_service.stats}")
+    else:
+        regime_service.run_forever(app, interval=args.interval)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,266 @@
+"""
+Admission Control
+Per-tenant and per-user rate limits plus overload shedding, checked before
+a request reaches its view.
+
+Requests are classed by blueprint:
+- core: trades, challenges, auth (highest priority)
+- read: market data, news, leaderboard, analysis
+- ai: AI analysis / chat, the ones that spend OpenAI budget (lowest priority)
+
+Rate limits are token buckets for (tenant, class) and (user, class). A
+tenant's limits come from its plan (PLAN_LIMITS, looked up on the cached
+TenantContext, so no query). The user is the authenticated identity
+(g.user_id, set once an auth layer has verified the request) or else the
+client address: the X-Forwarded-For hop added by the nearest of
+ADMISSION_TRUSTED_PROXIES proxies, the socket address when there are none.
+Client-supplied headers (X-User-Id, an unverified bearer token, the first
+X-Forwarded-For hop) are never trusted: rotating them would mint fresh
+buckets. An empty bucket answers 429 with Retry-After.
+Limits are per process; ADMISSION_WORKERS (default: gunicorn's
+WEB_CONCURRENCY) divides the tenant rates so a node with that many workers
+keeps the plan's total.
+
+With ADMISSION_MAX_IN_FLIGHT set (threaded / async workers), requests past
+that many wait in a priority queue, ordered by class and then plan. When
+the queue is full, a newcomer with higher priority evicts the lowest
+queued request; otherwise the newcomer is shed. A shed request, or one
+that waits longer than ADMISSION_QUEUE_TIMEOUT_MS, also gets 429.
+"""
+import heapq
+import itertools
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from flask import g, jsonify, request
+
+CLASS_BY_BLUEPRINT = {
+    'trade': 'core', 'challenge': 'core', 'auth': 'core',
+    'market': 'read', 'news': 'read', 'leaderboard': 'read', 'market_analysis': 'read',
+    'ai_analysis': 'ai', 'ai': 'ai',
+}
+CLASS_PRIORITY = {'core': 3, 'read': 2, 'ai': 1}
+PLAN_TIER = {'FREE': 0, 'BASIC': 1, 'STARTER': 1, 'PRO': 2, 'ELITE': 3, 'ENTERPRISE': 3}
+
+# (tokens per second, burst) per route class
+PLAN_LIMITS = {
+    'FREE': {'core': (5, 10), 'read': (20, 40), 'ai': (0.05, 3)},
+    'BASIC': {'core': (10, 20), 'read': (50, 100), 'ai': (0.2, 5)},
+    'PRO': {'core': (50, 100), 'read': (200, 400), 'ai': (1, 10)},
+    'ELITE': {'core': (100, 200), 'read': (500, 1000), 'ai': (5, 20)},
+}
+PLAN_LIMITS['STARTER'] = PLAN_LIMITS['BASIC']
+PLAN_LIMITS['ENTERPRISE'] = PLAN_LIMITS['ELITE']
+USER_LIMITS = {'core': (5, 10), 'read': (10, 30), 'ai': (0.1, 3)}
+MAX_BUCKETS = 100000
+
+
+class TokenBucket:
+    __slots__ = ('rate', 'burst', 'tokens', 'updated')
+
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def refill(self, now: float) -> float:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return self.tokens
+
+    def wait(self) -> float:
+        """Seconds until one token is available"""
+        return max(0.0, (1 - self.tokens) / self.rate) if self.rate > 0 else math.inf
+
+
+class _Waiter:
+    __slots__ = ('priority', 'event', 'admitted', 'cancelled')
+
+    def __init__(self, priority: int):
+        self.priority = priority
+        self.event = threading.Event()
+        self.admitted = False
+        self.cancelled = False
+
+
+class AdmissionController:
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.enabled = True
+        self.workers = 1
+        self.trusted_proxies = 0
+        self.max_in_flight = 0
+        self.max_queue = 64
+        self.queue_timeout = 1.0
+        self.in_flight = 0
+        self._buckets: 'OrderedDict[tuple, TokenBucket]' = OrderedDict()
+        self._queue = []  # heap of (-priority, seq, waiter)
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self.stats = {"admitted": 0, "rate_limited": 0, "queued": 0, "shed": 0, "timed_out": 0}
+
+    def init_app(self, app):
+        self.enabled = app.config.get('ADMISSION_ENABLED', True)
+        self.workers = max(1, app.config.get('ADMISSION_WORKERS', 1))
+        self.trusted_proxies = app.config.get('ADMISSION_TRUSTED_PROXIES', 0)
+        self.max_in_flight = app.config.get('ADMISSION_MAX_IN_FLIGHT', 0)
+        self.max_queue = app.config.get('ADMISSION_QUEUE_SIZE', 64)
+        self.queue_timeout = app.config.get('ADMISSION_QUEUE_TIMEOUT_MS', 1000) / 1000
+        if not self.enabled:
+            return
+        app.before_request(self.admit_request)
+        app.teardown_request(self.release_request)
+
+    # --- Rate limits ---
+
+    def check(self, tenant, user: str, route_class: str) -> Tuple[bool, float, Optional[str]]:
+        """Take a token from the tenant and user buckets: (allowed, retry_after, limiting scope)"""
+        plan = PLAN_LIMITS.get((tenant.plan or 'FREE').upper(), PLAN_LIMITS['FREE'])
+        rate, burst = plan[route_class]
+        user_rate, user_burst = USER_LIMITS[route_class]
+        now = self.clock()
+        with self._lock:
+            buckets = (
+                ('tenant', self._bucket(('tenant', tenant.id, route_class), rate / self.workers, burst, now)),
+                ('user', self._bucket(('user', tenant.id, user, route_class), user_rate, user_burst, now)),
+            )
+            empty = [(scope, bucket) for scope, bucket in buckets if bucket.refill(now) < 1]
+            if empty:
+                self.stats["rate_limited"] += 1
+                scope, bucket = max(empty, key=lambda item: item[1].wait())
+                return False, bucket.wait(), scope
+            for _, bucket in buckets:
+                bucket.tokens -= 1
+        return True, 0.0, None
+
+    def _bucket(self, key: tuple, rate: float, burst: float, now: float) -> TokenBucket:
+        bucket = self._buckets.get(key)
+        if bucket is None or bucket.rate != rate or bucket.burst != burst:
+            # New key, or the tenant's plan changed
+            bucket = self._buckets[key] = TokenBucket(rate, burst, now)
+            if len(self._buckets) > MAX_BUCKETS:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+        return bucket
+
+    # --- Concurrency ---
+
+    def acquire(self, priority: int) -> bool:
+        """Take an in-flight slot, queueing by priority; False when shed or timed out"""
+        with self._lock:
+            if self.in_flight < self.max_in_flight:
+                self.in_flight += 1
+                return True
+            waiter = _Waiter(priority)
+            if self._queued() >= self.max_queue:
+                lowest = min((w for _, _, w in self._queue if not w.cancelled),
+                             key=lambda w: w.priority, default=None)
+                if lowest is None or lowest.priority >= priority:
+                    self.stats["shed"] += 1
+                    return False
+                lowest.cancelled = True  # Evicted: its request is shed
+                lowest.event.set()
+            heapq.heappush(self._queue, (-priority, next(self._seq), waiter))
+            self.stats["queued"] += 1
+
+        waiter.event.wait(self.queue_timeout)
+        with self._lock:
+            if waiter.admitted:
+                return True
+            if not waiter.cancelled:
+                waiter.cancelled = True
+                self.stats["timed_out"] += 1
+            else:
+                self.stats["shed"] += 1
+            return False
+
+    def release(self):
+        with self._lock:
+            while self._queue:
+                _, _, waiter = heapq.heappop(self._queue)
+                if not waiter.cancelled:
+                    waiter.admitted = True  # The slot passes straight to the waiter
+                    waiter.event.set()
+                    return
+            self.in_flight -= 1
+
+    def _queued(self) -> int:
+        if len(self._queue) > self.max_queue:
+            self._queue = [item for item in self._queue if not item[2].cancelled]
+            heapq.heapify(self._queue)
+        return sum(1 for _, _, w in self._queue if not w.cancelled)
+
+    # --- Flask hooks ---
+
+    def rate_limited(self, tenant, route_class: str, headers, remote_addr: Optional[str],
+                     user_id=None) -> Optional[Tuple[float, str]]:
+        """Rate limits for one request, on either serving stack: (retry_after, message) when rejected"""
+        user = client_key(headers, remote_addr, user_id, self.trusted_proxies)
+        allowed, retry_after, scope = self.check(tenant, user, route_class)
+        if allowed:
+            return None
+        return retry_after, f"{scope} rate limit exceeded for {route_class} requests"
+
+    def admit_request(self):
+        """before_request (after tenant resolution): rate limits, then an in-flight slot"""
+        route_class = CLASS_BY_BLUEPRINT.get(request.blueprint)
+        tenant = g.get('tenant')
+        if route_class is None or tenant is None:
+            return None
+        rejected = self.rate_limited(tenant, route_class, request.headers, request.remote_addr, g.get('user_id'))
+        if rejected:
+            return too_many_requests(*rejected)
+        if self.max_in_flight:
+            priority = CLASS_PRIORITY[route_class] * 10 + PLAN_TIER.get((tenant.plan or '').upper(), 0)
+            if not self.acquire(priority):
+                return too_many_requests(1.0, "Server busy, lower priority requests are being shed")
+            g._admission_slot = True
+        self.stats["admitted"] += 1
+        return None
+
+    def release_request(self, exc=None):
+        if g.pop('_admission_slot', None):
+            self.release()
+
+    def status(self) -> dict:
+        with self._lock:
+            return {"in_flight": self.in_flight, "queue_depth": self._queued(), "max_in_flight": self.max_in_flight,
+                    "buckets": len(self._buckets), **self.stats}
+
+
+def client_key(headers, remote_addr: Optional[str], user_id=None, trusted_proxies: int = 0) -> str:
+    """The authenticated user, or the client address as seen by the nearest trusted proxy"""
+    if user_id is not None:
+        return f'user:{user_id}'
+    if trusted_proxies:
+        # Each proxy appends the address it received from; the client can prepend anything
+        hops = [hop.strip() for hop in headers.get('X-Forwarded-For', '').split(',') if hop.strip()]
+        if len(hops) >= trusted_proxies:
+            return 'ip:' + hops[-trusted_proxies]
+    return 'ip:' + (remote_addr or 'unknown')
+
+
+def retry_seconds(retry_after: float) -> int:
+    return max(1, math.ceil(retry_after)) if math.isfinite(retry_after) else 3600
+
+
+def rejection(retry_after: float, message: str) -> Tuple[dict, dict]:
+    """429 body and headers"""
+    seconds = retry_seconds(retry_after)
+    return {"error": "Too many requests", "message": message, "retry_after": seconds}, {'Retry-After': str(seconds)}
+
+
+def too_many_requests(retry_after: float, message: str):
+    payload, headers = rejection(retry_after, message)
+    response = jsonify(payload)
+    response.status_code = 429
+    response.headers.extend(headers)
+    return response
+
+
+admission = AdmissionController()
@@ -0,0 +1,151 @@
+"""
+Database Engine Profile
+Engine options per backend and the connection pool instrumentation:
+- PostgreSQL: sized QueuePool with overflow, pre-ping and recycle.
+- SQLite (file): WAL journal, synchronous=NORMAL and a busy timeout set on
+  every new connection, so gunicorn workers stop failing with
+  "database is locked" under concurrent writes.
+"""
+import threading
+import time
+from typing import Dict, Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+from utils.db_routing import replica_router
+
+
+class PoolMetrics:
+    """Checkout latency / wait counters of one instrumented pool"""
+
+    SLOW_CHECKOUT_MS = 1.0  # a checkout slower than this had to wait for a connection
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.waits = 0
+            self.timeouts = 0
+            self.total_wait_ms = 0.0
+            self.max_wait_ms = 0.0
+
+    def record(self, wait_ms: float):
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait_ms += wait_ms
+            if wait_ms > self.max_wait_ms:
+                self.max_wait_ms = wait_ms
+            if wait_ms >= self.SLOW_CHECKOUT_MS:
+                self.waits += 1
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "waits": self.waits,
+                "timeouts": self.timeouts,
+                "avg_wait_ms": round(self.total_wait_ms / self.checkouts, 3) if self.checkouts else 0.0,
+                "max_wait_ms": round(self.max_wait_ms, 3),
+            }
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that times how long each checkout waits for a free connection (in `metrics`)"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics  # engine.dispose() swaps the pool, the engine keeps its counters
+        return pool
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except Exception:
+            self.metrics.record_timeout()
+            raise
+        self.metrics.record((time.perf_counter() - start) * 1000)
+        return conn
+
+
+def engine_options(database_uri: str, config) -> Dict[str, Any]:
+    """SQLALCHEMY_ENGINE_OPTIONS for the production profile"""
+    url = make_url(database_uri)
+    if url.get_backend_name() == 'sqlite':
+        if url.database in (None, '', ':memory:'):
+            return {}  # In-memory databases keep SQLAlchemy's single-connection pool
+        return {
+            'poolclass': InstrumentedQueuePool,
+            'pool_size': config.get('DB_POOL_SIZE', 5),
+            'max_overflow': config.get('DB_MAX_OVERFLOW', 10),
+            'pool_timeout': config.get('DB_POOL_TIMEOUT', 30),
+        }
+    return {
+        'poolclass': InstrumentedQueuePool,
+        'pool_size': config.get('DB_POOL_SIZE', 5),
+        'max_overflow': config.get('DB_MAX_OVERFLOW', 10),
+        'pool_timeout': config.get('DB_POOL_TIMEOUT', 30),
+        'pool_recycle': config.get('DB_POOL_RECYCLE', 1800),
+        'pool_pre_ping': True,
+    }
+
+
+def set_sqlite_pragmas(dbapi_connection, busy_timeout_ms: int = 5000):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={int(busy_timeout_ms)}")
+    cursor.close()
+
+
+def apply_sqlite_tuning(engine, busy_timeout_ms: int = 5000):
+    """Register the PRAGMA connect hook on a SQLite engine (no-op for other backends)"""
+    if engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(engine, 'connect')
+    def _on_connect(dbapi_connection, connection_record):
+        set_sqlite_pragmas(dbapi_connection, busy_timeout_ms)
+
+
+def init_database_profile(app, db):
+    """Call in place of db.init_app(app): applies DATABASE_PROFILE and replica binds before engines are created"""
+    replica_router.configure(app)
+
+    if app.config.get('DATABASE_PROFILE') == 'production':
+        options = engine_options(app.config['SQLALCHEMY_DATABASE_URI'], app.config)
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {**options, **app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})}
+
+    db.init_app(app)
+
+    if app.config.get('DATABASE_PROFILE') == 'production':
+        with app.app_context():
+            for engine in db.engines.values():
+                apply_sqlite_tuning(engine, app.config.get('DB_BUSY_TIMEOUT_MS', 5000))
+
+
+def pool_stats(engine) -> Dict[str, Any]:
+    """Pool occupancy and checkout metrics of one engine"""
+    pool = engine.pool
+    stats = {"pool": pool.__class__.__name__}
+    if isinstance(pool, QueuePool):
+        stats.update({
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+            "idle": pool.checkedin(),
+        })
+    stats.update((getattr(pool, 'metrics', None) or PoolMetrics()).snapshot())
+    return stats
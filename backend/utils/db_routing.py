@@ -0,0 +1,131 @@
+"""
+Read-Replica Routing
+Primary + read replicas as Flask-SQLAlchemy binds ('replica_0', 'replica_1', ...).
+
+GET/HEAD requests to read-only blueprints (leaderboard, news, challenge
+lookups, OHLCV history) run their SELECTs on a replica whose measured lag is
+within REPLICA_MAX_LAG_SECONDS. Everything else stays on the primary:
+writes, flushes, non-read blueprints, and read-your-writes windows (a client
+that wrote within READ_YOUR_WRITES_SECONDS, tracked with a cookie).
+"""
+import itertools
+import threading
+import time
+from typing import Optional
+
+import sqlalchemy as sa
+from flask import g, request, has_request_context
+from flask_sqlalchemy.session import Session
+
+PRIMARY_UNTIL_COOKIE = 'ts_primary_until'
+READ_METHODS = ('GET', 'HEAD')
+DEFAULT_READ_BLUEPRINTS = ('challenge', 'leaderboard', 'news', 'market', 'market_analysis')
+
+
+class ReplicaRouter:
+    def __init__(self):
+        self.replica_keys = []
+        self.read_blueprints = set(DEFAULT_READ_BLUEPRINTS)
+        self.max_lag = 5.0
+        self.lag_check_interval = 5.0
+        self.read_your_writes = 10.0
+        self._lag = {}  # bind key -> (checked_at, lag_seconds | None)
+        self._lock = threading.Lock()
+        self._round_robin = itertools.count()
+
+    def configure(self, app):
+        """Register replica binds from REPLICA_DATABASE_URIS; call before db.init_app"""
+        uris = app.config.get('REPLICA_DATABASE_URIS') or []
+        binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+        self.replica_keys = []
+        for i, uri in enumerate(uris):
+            key = f'replica_{i}'
+            binds[key] = uri
+            self.replica_keys.append(key)
+        app.config['SQLALCHEMY_BINDS'] = binds
+        self.read_blueprints = set(app.config.get('REPLICA_READ_BLUEPRINTS', DEFAULT_READ_BLUEPRINTS))
+        self.max_lag = app.config.get('REPLICA_MAX_LAG_SECONDS', 5.0)
+        self.read_your_writes = app.config.get('READ_YOUR_WRITES_SECONDS', 10.0)
+        if self.replica_keys:
+            app.before_request(self.route_request)
+            app.after_request(self.mark_writes)
+
+    # --- Request hooks ---
+
+    def route_request(self):
+        g.db_route = 'primary'
+        if request.method not in READ_METHODS or request.blueprint not in self.read_blueprints:
+            return
+        primary_until = request.cookies.get(PRIMARY_UNTIL_COOKIE, type=float)
+        if primary_until and primary_until > time.time():
+            return  # Read-your-writes: this client wrote recently
+        g.db_route = 'replica'
+
+    def mark_writes(self, response):
+        if request.method not in READ_METHODS and response.status_code < 400:
+            response.set_cookie(PRIMARY_UNTIL_COOKIE, str(time.time() + self.read_your_writes),
+                                max_age=int(self.read_your_writes) + 1, httponly=True, samesite='Lax')
+        return response
+
+    # --- Engine selection ---
+
+    def replica_for(self, engines) -> Optional[sa.engine.Engine]:
+        healthy = [key for key in self.replica_keys if key in engines and self._within_bound(key, engines[key])]
+        if not healthy:
+            return None
+        return engines[healthy[next(self._round_robin) % len(healthy)]]
+
+    def _within_bound(self, key, engine) -> bool:
+        checked_at, lag = self._lag.get(key, (0.0, None))
+        if time.monotonic() - checked_at > self.lag_check_interval:
+            lag = self._measure_lag(engine)
+            with self._lock:
+                self._lag[key] = (time.monotonic(), lag)
+        return lag is not None and lag <= self.max_lag
+
+    def _measure_lag(self, engine) -> Optional[float]:
+        """Replication lag in seconds, or None when the replica is unreachable"""
+        try:
+            with engine.connect() as conn:
+                if engine.dialect.name == 'postgresql':
+                    # An idle primary ages the last replayed transaction: caught up is no lag
+                    lag = conn.execute(sa.text(
+                        "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+                        "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+                    )).scalar()
+                    return float(lag)
+                conn.execute(sa.text("SELECT 1"))
+                return 0.0  # SQLite stand-ins have no replication lag to measure
+        except Exception as e:
+            print(f"Replica {engine.url.render_as_string(hide_password=True)} unavailable: {e}")
+            return None
+
+    def status(self, engines) -> dict:
+        return {
+            key: {"lag_seconds": self._lag.get(key, (0, None))[1], "healthy": self._within_bound(key, engines[key])}
+            for key in self.replica_keys if key in engines
+        }
+
+
+replica_router = ReplicaRouter()
+
+
+class RoutingSession(Session):
+    """Sends SELECTs to a replica when the current request is routed there"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self._use_replica(clause):
+            engine = getattr(self, '_replica_engine', None)
+            if engine is None:
+                engine = replica_router.replica_for(self._db.engines)
+                self._replica_engine = engine or False
+            if engine:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _use_replica(self, clause) -> bool:
+        if not replica_router.replica_keys or self._flushing or self.new or self.dirty or self.deleted:
+            return False
+        if not has_request_context() or g.get('db_route') != 'replica':
+            return False
+        return isinstance(clause, sa.sql.Select)
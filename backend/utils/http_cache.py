@@ -0,0 +1,176 @@
+"""
+HTTP Caching and Compression
+Response middleware for the read endpoints:
+- per-route policies (@cache_policy) set Cache-Control
+- policy routes get a strong ETag from a hash of the body unless the view set
+  one already (e.g. news, from the page's item ids, which answers 304
+  before serializing the page); a matching If-None-Match turns the response into
+  304 Not Modified with no body
+- JSON / text bodies of at least COMPRESS_MIN_BYTES are sent with gzip, or
+  brotli when the client accepts it and the brotli package is installed.
+  The ETag of an encoded body gets a -gzip / -br suffix, so each encoding
+  has its own strong validator, and not_modified() accepts every suffix
+
+Both serving stacks go through HttpCache.apply(): the Flask app from its
+after_request hook, the native async routes (routes/async_routes.py) through
+finalize_asgi(), with the route's @cache_policy.
+"""
+import gzip
+import hashlib
+from typing import Optional, Tuple
+
+from flask import current_app, request
+from werkzeug.datastructures import Headers
+from werkzeug.http import parse_accept_header, parse_etags
+from werkzeug.wrappers import Response
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE = ('application/json', 'text/')
+ENCODINGS = ('br', 'gzip')
+BROTLI_QUALITY = 4  # ~gzip -9 size at a tenth of the cost on OHLCV JSON
+
+
+def cache_policy(max_age: int = 0, private: bool = False):
+    """
+    Route decorator (place it under @bp.route). max_age=0 means the client
+    revalidates every time, which still saves the body when the ETag matches.
+    """
+    directives = ['private' if private else 'public', f'max-age={max_age}' if max_age else 'no-cache']
+
+    def register(fn):
+        fn.cache_control = ', '.join(directives)
+        return fn
+    return register
+
+
+def entity_tag(body: bytes) -> str:
+    return hashlib.sha1(body).hexdigest()[:20]
+
+
+def base_tag(tag: str) -> str:
+    """Entity tag without its content-coding suffix"""
+    for encoding in ENCODINGS:
+        if tag.endswith(f'-{encoding}'):
+            return tag[:-len(encoding) - 1]
+    return tag
+
+
+def matching_tag(etag: str, if_none_match) -> Optional[str]:
+    """The If-None-Match tag (any encoding of `etag`) the client holds, if any"""
+    if if_none_match.star_tag:
+        return etag
+    for tag in if_none_match.as_set(include_weak=True):
+        if base_tag(tag) == etag:
+            return tag
+    return None
+
+
+def not_modified(etag: str) -> bool:
+    """For views with their own validator: whether the client already has this version"""
+    return matching_tag(etag, request.if_none_match) is not None
+
+
+def choose_encoding(accept_encoding) -> Optional[str]:
+    if brotli is not None and accept_encoding['br']:
+        return 'br'
+    if accept_encoding['gzip']:
+        return 'gzip'
+    return None
+
+
+def encode(body: bytes, encoding: str, level: int = 5) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=level, mtime=0)
+
+
+class HttpCache:
+    def __init__(self):
+        self.min_bytes = 1024
+        self.level = 5
+        self.stats = {"not_modified": 0, "compressed": 0, "bytes_in": 0, "bytes_out": 0}
+
+    def init_app(self, app):
+        self.min_bytes = app.config.get('COMPRESS_MIN_BYTES', 1024)
+        self.level = app.config.get('COMPRESS_LEVEL', 5)
+        if app.config.get('HTTP_CACHE_ENABLED', True):
+            app.after_request(self.finalize)
+
+    def compressible(self, mimetype: str, size: int) -> bool:
+        return size >= self.min_bytes and (mimetype or '').startswith(COMPRESSIBLE)
+
+    def finalize(self, response):
+        """after_request: Cache-Control, ETag / 304, then compression"""
+        if request.method not in ('GET', 'HEAD'):
+            return response
+        view = current_app.view_functions.get(request.endpoint)
+        return self.apply(response, request.if_none_match, request.accept_encodings,
+                          getattr(view, 'cache_control', None))
+
+    def finalize_asgi(self, request_headers, status: int, headers: dict, body: bytes,
+                      cache_control: str = None) -> Tuple[int, Headers, bytes]:
+        """finalize() for the async routes' (status, headers, body) tuples"""
+        response = self.apply(Response(body, status, headers), parse_etags(request_headers.get('If-None-Match')),
+                              parse_accept_header(request_headers.get('Accept-Encoding')), cache_control)
+        return response.status_code, response.headers, response.get_data()
+
+    def apply(self, response, if_none_match, accept_encodings, cache_control: Optional[str] = None):
+        """Cache-Control, ETag / 304 and compression for one response (shared by both serving stacks)"""
+        if response.status_code == 304:
+            self._echo_tag(response, if_none_match)
+            return response
+        if response.status_code != 200 or response.direct_passthrough or response.is_streamed:
+            return response
+
+        if cache_control and 'Cache-Control' not in response.headers:
+            response.headers['Cache-Control'] = cache_control
+
+        etag, _ = response.get_etag()
+        if etag is None and cache_control:
+            etag = entity_tag(response.get_data())
+            response.set_etag(etag)
+        if etag is not None:
+            held = matching_tag(etag, if_none_match)
+            if held is not None:
+                self.stats["not_modified"] += 1
+                response.set_data(b'')
+                response.status_code = 304
+                response.set_etag(held)
+                for header in ('Content-Type', 'Content-Length'):
+                    response.headers.pop(header, None)
+                return response
+
+        self._compress(response, etag, accept_encodings)
+        return response
+
+    def _compress(self, response, etag: Optional[str], accept_encodings):
+        response.vary.add('Accept-Encoding')
+        if 'Content-Encoding' in response.headers:
+            return
+        encoding = choose_encoding(accept_encodings)
+        body = response.get_data()
+        if encoding is None or not self.compressible(response.mimetype, len(body)):
+            return
+        encoded = encode(body, encoding, self.level)
+        self.stats["compressed"] += 1
+        self.stats["bytes_in"] += len(body)
+        self.stats["bytes_out"] += len(encoded)
+        response.set_data(encoded)
+        response.headers['Content-Encoding'] = encoding
+        if etag is not None:
+            response.set_etag(f'{etag}-{encoding}')
+
+    def _echo_tag(self, response, if_none_match):
+        """A view's own 304: hand back the encoded tag the client sent"""
+        etag, _ = response.get_etag()
+        if etag is not None:
+            held = matching_tag(etag, if_none_match)
+            if held is not None:
+                response.set_etag(held)
+
+
+http_cache = HttpCache()
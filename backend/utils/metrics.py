@@ -0,0 +1,298 @@
+"""
+Metrics
+In-process counters and latency histograms, rendered in the Prometheus text
+format on GET /metrics:
+- http_request_duration_seconds per endpoint (Flask rule), method and status
+- market_data_provider_calls_total / _duration_seconds per provider and
+  outcome, circuit breaker transitions
+- llm_request_duration_seconds around GPT-4o calls
+- cache hit / miss, market data results (live, cached, stale, fallback),
+  write-behind and DB pool counters, read from the services' existing
+  stats at scrape time so the hot paths pay nothing extra for them
+
+Spans (TRACING_ENABLED) time each stage of analyze_symbol into
+span_duration_seconds. When tracing is off span() hands back a shared no-op
+context manager; with METRICS_ENABLED off every record call returns at once.
+"""
+import bisect
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+from flask import Response, g, request
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, registry: 'MetricsRegistry', name: str, help: str, labels: Sequence[str] = ()):
+        self.registry = registry
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount: float = 1):
+        if not self.registry.enabled:
+            return
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = list(self._values.items())
+        lines += [f"{self.name}{_format_labels(self.labels, k)} {_format_value(v)}" for k, v in items]
+        return lines
+
+
+class Histogram:
+    def __init__(self, registry: 'MetricsRegistry', name: str, help: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.registry = registry
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._values: Dict[tuple, list] = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels):
+        if not self.registry.enabled:
+            return
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                entry[index] += 1
+            entry[-2] += value
+            entry[-1] += 1
+
+    def time(self, *labels) -> '_Timer':
+        return _Timer(self, labels)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._values.items()]
+        for key, entry in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, entry):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {entry[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(entry[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {entry[-1]}")
+        return lines
+
+
+class _Timer:
+    __slots__ = ('histogram', 'labels', 'started')
+
+    def __init__(self, histogram: Histogram, labels: tuple):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started, *self.labels)
+        return False
+
+
+class _NoopSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+# A collector returns metric families read at scrape time:
+# (name, type, help, [(labels dict, value), ...])
+Family = Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.enabled = True
+        self.tracing = False
+        self._metrics = []
+        self._collectors: List[Callable[[], Iterable[Family]]] = []
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        metric = Counter(self, name, help, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        metric = Histogram(self, name, help, labels, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector: Callable[[], Iterable[Family]]):
+        self._collectors.append(collector)
+
+    def span(self, name: str):
+        """Time a stage into span_duration_seconds{span=name} (no-op unless tracing is on)"""
+        if not self.tracing:
+            return NOOP_SPAN
+        return SPAN_LATENCY.time(name)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines += metric.render()
+        for collector in self._collectors:
+            try:
+                families = list(collector())
+            except Exception as e:
+                print(f"Metrics collector failed: {e}")
+                continue
+            for name, kind, help, samples in families:
+                lines += [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+                for labels, value in samples:
+                    lines.append(f"{name}{_format_labels(list(labels), list(labels.values()))} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+    # --- Flask wiring ---
+
+    def init_app(self, app):
+        self.enabled = app.config.get('METRICS_ENABLED', True)
+        self.tracing = app.config.get('TRACING_ENABLED', False)
+        if not self.enabled:
+            return
+        app.before_request(_start_request)
+        app.after_request(_record_request)
+        app.add_url_rule('/metrics', 'metrics', lambda: Response(self.render(), mimetype='text/plain; version=0.0.4'))
+        register_service_collectors(self)
+
+
+metrics = MetricsRegistry()
+
+REQUEST_LATENCY = metrics.histogram('http_request_duration_seconds', 'HTTP request latency',
+                                    ('endpoint', 'method', 'status'))
+PROVIDER_CALLS = metrics.counter('market_data_provider_calls_total', 'Upstream market data calls',
+                                 ('provider', 'outcome'))
+PROVIDER_LATENCY = metrics.histogram('market_data_provider_duration_seconds', 'Upstream market data call latency',
+                                     ('provider', 'outcome'))
+CIRCUIT_TRANSITIONS = metrics.counter('market_data_circuit_transitions_total', 'Circuit breaker state changes',
+                                      ('provider', 'state'))
+LLM_LATENCY = metrics.histogram('llm_request_duration_seconds', 'LLM completion latency', ('model', 'outcome'))
+SPAN_LATENCY = metrics.histogram('span_duration_seconds', 'Traced stage latency', ('span',))
+
+
+def _start_request():
+    g._metrics_started = time.perf_counter()
+
+
+def _record_request(response):
+    started = g.pop('_metrics_started', None)
+    if started is not None:
+        endpoint = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        REQUEST_LATENCY.observe(time.perf_counter() - started, endpoint, request.method, str(response.status_code))
+    return response
+
+
+def _counters(name: str, help: str, stats: Dict[str, float], label: str, keys: Sequence[str], **fixed) -> Family:
+    return name, 'counter', help, [({**fixed, label: key}, stats.get(key, 0)) for key in keys]
+
+
+def register_service_collectors(registry: MetricsRegistry):
+    """Expose the stats the services already keep (read at scrape time)"""
+    from extensions import db
+    from services.calendar_service import calendar_service
+    from services.market_data_service import quote_cache
+    from services.provider_resilience import market_data
+    from services.quote_poller import quote_poller
+    from services.shared_cache import shared_cache
+    from services.tick_aggregator import tick_aggregator
+    from services.write_behind import write_behind
+    from utils.admission import admission
+    from utils.database import pool_stats
+    from utils.http_cache import http_cache
+
+    def caches():
+        samples, ratios = [], []
+        for cache, stats in (('quote', quote_cache.stats), ('calendar', calendar_service.stats),
+                             ('shared', shared_cache.stats)):
+            hits, misses = stats.get('hits', 0) + stats.get('shared_hits', 0), stats.get('misses', 0)
+            samples += [({'cache': cache, 'result': 'hit'}, hits), ({'cache': cache, 'result': 'miss'}, misses)]
+            ratios.append(({'cache': cache}, hits / (hits + misses) if hits + misses else 0.0))
+        yield 'cache_requests_total', 'counter', 'Cache lookups by result', samples
+        yield 'cache_hit_ratio', 'gauge', 'Cache hit ratio since start', ratios
+        yield _counters('shared_cache_events_total', 'Shared cache pub/sub messages and backend errors',
+                        shared_cache.stats, 'event', ('published', 'received', 'errors'))
+        yield 'quote_poller_leading_symbols', 'gauge', 'Symbols this worker polls for everyone', [
+            ({}, len(quote_poller.leading))
+        ]
+
+    def market():
+        yield _counters('market_data_results_total', 'Market data answers by how they were served',
+                        market_data.stats, 'outcome', ('live', 'cached', 'stale', 'fallback'))
+        yield _counters('market_data_hedges_total', 'Hedged requests and secondary wins',
+                        market_data.stats, 'event', ('hedged', 'secondary_wins'))
+        yield _counters('market_data_resampler_events_total', 'OHLCV served from resampled base series',
+                        market_data.resampler.stats, 'event',
+                        ('served', 'fetches', 'fetch_failures', 'finer_top_ups', 'bars_added', 'evicted'))
+        yield _counters('tick_bars_events_total', 'Live ticks aggregated, late or dropped, and 1m bars emitted',
+                        tick_aggregator.stats, 'event',
+                        ('ticks', 'late_ticks', 'dropped_late', 'dropped_future', 'bars', 'revisions', 'stored',
+                         'store_rejected'))
+        status = market_data.status()['providers']
+        yield 'market_data_circuit_open', 'gauge', '1 while a provider circuit is not closed', [
+            ({'provider': p['name']}, 0 if p['state'] == 'closed' else 1) for p in status
+        ]
+
+    def database():
+        pools = {key or 'primary': pool_stats(engine) for key, engine in db.engines.items()}
+        yield 'db_pool_events_total', 'counter', 'Connection pool checkouts, waits and timeouts', [
+            ({'engine': engine, 'event': key}, stats[key])
+            for engine, stats in pools.items() for key in ('checkouts', 'waits', 'timeouts')
+        ]
+        yield 'db_pool_max_wait_ms', 'gauge', 'Longest pool checkout wait', [
+            ({'engine': engine}, stats['max_wait_ms']) for engine, stats in pools.items()
+        ]
+        yield _counters('write_behind_events_total', 'Write-behind queue activity',
+                        write_behind.stats, 'event', ('submitted', 'flushed', 'batches', 'rejected', 'failed'))
+
+    def responses():
+        yield _counters('http_responses_total', 'Responses answered 304 or sent compressed',
+                        http_cache.stats, 'event', ('not_modified', 'compressed'))
+        yield _counters('http_compression_bytes_total', 'Response bytes before (in) and after (out) compression',
+                        http_cache.stats, 'direction', ('bytes_in', 'bytes_out'))
+
+    def admission_control():
+        yield _counters('admission_requests_total', 'Requests admitted, rate limited, queued or shed',
+                        admission.stats, 'outcome', ('admitted', 'rate_limited', 'queued', 'shed', 'timed_out'))
+        yield 'admission_in_flight', 'gauge', 'Requests holding an admission slot', [({}, admission.in_flight)]
+
+    for collector in (caches, market, database, responses, admission_control):
+        registry.register_collector(collector)
@@ -0,0 +1,254 @@
+"""
+Request Profiler
+Opt-in profiling of individual requests, for slow endpoints that only
+misbehave in production. A request is profiled when it carries
+`X-Profile: <PROFILER_TOKEN>` or is picked by PROFILER_SAMPLE_RATE.
+
+Modes (PROFILER_MODE, or per request with X-Profile-Mode):
+- sample: one background thread snapshots the stacks of profiled request
+  threads every PROFILER_INTERVAL_MS; samples are aggregated per endpoint
+  into collapsed stacks ("frame;frame;frame count"), ready for
+  flamegraph.pl / speedscope
+- cprofile: deterministic cProfile per request, merged per endpoint into
+  a function table (calls, own time, cumulative time)
+
+Memory is bounded (endpoints, distinct stacks per endpoint, stack depth).
+With PROFILER_MODE=off no hooks are installed at all.
+"""
+import cProfile
+import io
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import nullcontext
+from typing import Dict, List, Optional
+
+from flask import g, request
+
+MAX_ENDPOINTS = 100
+MAX_STACKS = 5000  # distinct collapsed stacks kept per endpoint
+MAX_DEPTH = 64
+OVERFLOW_STACK = '[other stacks]'
+MODES = ('sample', 'cprofile')
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def collapse(frame, max_depth: int = MAX_DEPTH) -> str:
+    """Root-first 'a;b;c' stack of a frame"""
+    labels = []
+    while frame is not None and len(labels) < max_depth:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ';'.join(reversed(labels))
+
+
+class EndpointProfile:
+    def __init__(self):
+        self.requests = 0
+        self.total_ms = 0.0
+        self.samples = 0
+        self.stacks: Counter = Counter()
+        self.stats: Optional[pstats.Stats] = None
+
+    def add_stack(self, stack: str):
+        self.samples += 1
+        if stack in self.stacks or len(self.stacks) < MAX_STACKS:
+            self.stacks[stack] += 1
+        else:
+            self.stacks[OVERFLOW_STACK] += 1
+
+    def add_profile(self, profile: cProfile.Profile):
+        if self.stats is None:
+            self.stats = pstats.Stats(profile, stream=io.StringIO())
+        else:
+            self.stats.add(profile)
+
+    def functions(self, limit: int) -> List[dict]:
+        if self.stats is None:
+            return []
+        rows = []
+        for (filename, line, name), (_, calls, own, cumulative, _) in self.stats.stats.items():
+            rows.append({
+                "function": f"{name} ({os.path.basename(filename)}:{line})",
+                "calls": calls,
+                "own_ms": round(own * 1000, 3),
+                "cumulative_ms": round(cumulative * 1000, 3),
+            })
+        return sorted(rows, key=lambda r: r["cumulative_ms"], reverse=True)[:limit]
+
+
+class RequestProfiler:
+    def __init__(self):
+        self.mode = 'off'
+        self.sample_rate = 0.0
+        self.token = None
+        self.interval = 0.005
+        self._profiles: Dict[str, EndpointProfile] = {}
+        self._active: Dict[int, str] = {}  # thread id -> endpoint being sampled
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+
+    def init_app(self, app):
+        self.mode = app.config.get('PROFILER_MODE', 'off')
+        self.sample_rate = app.config.get('PROFILER_SAMPLE_RATE', 0.0)
+        self.token = app.config.get('PROFILER_TOKEN')
+        self.interval = app.config.get('PROFILER_INTERVAL_MS', 5) / 1000
+        if self.mode not in MODES:
+            return
+        app.before_request(self._start)
+        app.teardown_request(self._stop)
+
+    # --- Request hooks ---
+
+    def _selected_mode(self) -> Optional[str]:
+        header = request.headers.get('X-Profile')
+        if header is not None and self.token and header == self.token:
+            mode = request.headers.get('X-Profile-Mode', self.mode)
+            return mode if mode in MODES else self.mode
+        if self.sample_rate and random.random() < self.sample_rate:
+            return self.mode
+        return None
+
+    def _start(self):
+        mode = self._selected_mode()
+        if mode is None:
+            return
+        endpoint = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        g._profile = (mode, endpoint, time.perf_counter(), None)
+        if mode == 'cprofile':
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                return  # Another profiler is active on this thread
+            g._profile = (mode, endpoint, time.perf_counter(), profile)
+        else:
+            with self._lock:
+                self._active[threading.get_ident()] = endpoint
+            self._ensure_sampler()
+
+    def _stop(self, exc=None):
+        state = g.pop('_profile', None)
+        if state is None:
+            return
+        mode, endpoint, started, profile = state
+        if profile is not None:
+            profile.disable()
+        elif mode == 'sample':
+            with self._lock:
+                self._active.pop(threading.get_ident(), None)
+        with self._lock:
+            entry = self._endpoint(endpoint)
+            if entry is None:
+                return
+            entry.requests += 1
+            entry.total_ms += (time.perf_counter() - started) * 1000
+            if profile is not None:
+                entry.add_profile(profile)
+
+    def _endpoint(self, endpoint: str) -> Optional[EndpointProfile]:
+        entry = self._profiles.get(endpoint)
+        if entry is None and len(self._profiles) < MAX_ENDPOINTS:
+            entry = self._profiles[endpoint] = EndpointProfile()
+        return entry
+
+    def active_endpoint(self) -> Optional[str]:
+        """Endpoint the current thread is being sampled for, if any"""
+        return self._active.get(threading.get_ident()) if self._active else None
+
+    def attach(self, endpoint: Optional[str]):
+        """Sample a worker thread on behalf of a profiled request (no-op for None)"""
+        return _Attached(self, endpoint) if endpoint else nullcontext()
+
+    # --- Sampler ---
+
+    def _ensure_sampler(self):
+        self._wake.set()
+        if self._sampler is None:
+            with self._lock:
+                if self._sampler is None:
+                    self._sampler = threading.Thread(target=self._sample_loop, name='request-profiler', daemon=True)
+                    self._sampler.start()
+
+    def _sample_loop(self):
+        own = threading.get_ident()
+        while True:
+            self._wake.clear()
+            if not self._active:
+                self._wake.wait()
+            time.sleep(self.interval)
+            with self._lock:
+                active = dict(self._active)
+            if not active:
+                continue
+            frames = sys._current_frames()
+            stacks = [(endpoint, collapse(frames[tid])) for tid, endpoint in active.items()
+                      if tid in frames and tid != own]
+            with self._lock:
+                for endpoint, stack in stacks:
+                    entry = self._endpoint(endpoint)
+                    if entry is not None:
+                        entry.add_stack(stack)
+
+    # --- Reports ---
+
+    def summary(self) -> dict:
+        with self._lock:
+            endpoints = {
+                endpoint: {
+                    "requests": p.requests,
+                    "avg_ms": round(p.total_ms / p.requests, 2) if p.requests else 0.0,
+                    "samples": p.samples,
+                    "distinct_stacks": len(p.stacks),
+                    "cprofile": p.stats is not None,
+                } for endpoint, p in self._profiles.items()
+            }
+        return {"mode": self.mode, "sample_rate": self.sample_rate, "endpoints": endpoints}
+
+    def collapsed(self, endpoint: str = None) -> str:
+        """Collapsed stacks; across endpoints each stack is rooted at its endpoint"""
+        with self._lock:
+            if endpoint is not None:
+                profile = self._profiles.get(endpoint)
+                lines = [f"{stack} {count}" for stack, count in profile.stacks.items()] if profile else []
+            else:
+                lines = [f"{name};{stack} {count}" for name, p in self._profiles.items()
+                         for stack, count in p.stacks.items()]
+        return '\n'.join(lines) + ('\n' if lines else '')
+
+    def functions(self, endpoint: str, limit: int = 30) -> List[dict]:
+        with self._lock:
+            profile = self._profiles.get(endpoint)
+            return profile.functions(limit) if profile else []
+
+    def reset(self):
+        with self._lock:
+            self._profiles.clear()
+
+
+class _Attached:
+    def __init__(self, profiler: RequestProfiler, endpoint: str):
+        self.profiler = profiler
+        self.endpoint = endpoint
+
+    def __enter__(self):
+        with self.profiler._lock:
+            self.profiler._active[threading.get_ident()] = self.endpoint
+        return self
+
+    def __exit__(self, *exc):
+        with self.profiler._lock:
+            self.profiler._active.pop(threading.get_ident(), None)
+        return False
+
+
+profiler = RequestProfiler()
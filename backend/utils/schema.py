@@ -0,0 +1,122 @@
+"""
+Schema Migrations
+db.create_all() only creates missing tables: it never adds indexes or
+constraints to tables that already exist. Each migration below is idempotent
+and is recorded in the `schema_migrations` table once applied, so running
+upgrade_schema() on every deploy is safe (SQLite and PostgreSQL).
+"""
+from datetime import datetime
+from sqlalchemy import Table, Column, Integer, String, DateTime, MetaData, UniqueConstraint, inspect, text
+from extensions import db
+
+_migration_meta = MetaData()
+schema_migrations = Table(
+    'schema_migrations', _migration_meta,
+    Column('version', Integer, primary_key=True),
+    Column('name', String(100), nullable=False),
+    Column('applied_at', DateTime, default=datetime.utcnow),
+)
+
+# Tables whose secondary indexes are managed by migrations
+INDEXED_TABLES = ['user_challenges', 'trades', 'price_data', 'news_events', 'leaderboard_snapshots']
+
+
+def create_missing_indexes(conn, table_name: str) -> list:
+    """Create every Index / UniqueConstraint declared on the model that the live table lacks"""
+    table = db.metadata.tables[table_name]
+    inspector = inspect(conn)
+    existing = {ix['name'] for ix in inspector.get_indexes(table_name)}
+    existing |= {uc['name'] for uc in inspector.get_unique_constraints(table_name)}
+
+    columns = {col['name'] for col in inspector.get_columns(table_name)}
+
+    created = []
+    for index in table.indexes:
+        # Indexes on columns a later migration adds are created by that migration
+        if index.name not in existing and all(col.name in columns for col in index.columns):
+            index.create(conn)
+            created.append(index.name)
+
+    # Existing tables cannot gain a constraint in SQLite; a unique index is equivalent
+    for constraint in table.constraints:
+        if isinstance(constraint, UniqueConstraint) and constraint.name and constraint.name not in existing:
+            columns = ', '.join(col.name for col in constraint.columns)
+            conn.execute(text(f"CREATE UNIQUE INDEX IF NOT EXISTS {constraint.name} ON {table_name} ({columns})"))
+            created.append(constraint.name)
+    return created
+
+
+def drop_secondary_indexes(conn, table_name: str):
+    """Drop the managed indexes of a table (used by benchmarks to measure the 'before' state)"""
+    table = db.metadata.tables[table_name]
+    names = [ix.name for ix in table.indexes]
+    names += [c.name for c in table.constraints if isinstance(c, UniqueConstraint) and c.name]
+    inspector = inspect(conn)
+    indexes = {ix['name'] for ix in inspector.get_indexes(table_name)}
+    constraints = {uc['name'] for uc in inspector.get_unique_constraints(table_name)}
+    for name in names:
+        if name in indexes:
+            conn.execute(text(f"DROP INDEX {name}"))
+        elif name in constraints and conn.dialect.name != 'sqlite':
+            # SQLite cannot drop inline table constraints
+            conn.execute(text(f"ALTER TABLE {table_name} DROP CONSTRAINT {name}"))
+
+
+def _dedupe(conn, table_name: str, key_columns: list, not_null: str = None, condition: str = None):
+    """Keep the oldest row for each key (among rows matching `condition`) so a unique index can be built"""
+    keys = ', '.join(key_columns)
+    condition = condition or (f"{not_null} IS NOT NULL" if not_null else None)
+    where = f"WHERE {condition}" if condition else ""
+    and_where = f"AND {condition}" if condition else ""
+    result = conn.execute(text(
+        f"DELETE FROM {table_name} WHERE id NOT IN "
+        f"(SELECT MIN(id) FROM {table_name} {where} GROUP BY {keys}) {and_where}"
+    ))
+    if result.rowcount:
+        print(f"Removed {result.rowcount} duplicate rows from {table_name}.")
+
+
+def _migration_001_query_indexes(conn):
+    # The mock calendar import used to insert the same external_id on every run
+    _dedupe(conn, 'news_events', ['tenant_id', 'external_id'], not_null='external_id')
+    _dedupe(conn, 'leaderboard_snapshots', ['tenant_id', 'period', 'user_id'])
+    for table_name in INDEXED_TABLES:
+        created = create_missing_indexes(conn, table_name)
+        if created:
+            print(f"Created indexes on {table_name}: {', '.join(created)}")
+
+
+def _migration_002_price_data_timeframe(conn):
+    # Bars of several timeframes share price_data; existing rows are daily bars
+    columns = {col['name'] for col in inspect(conn).get_columns('price_data')}
+    if 'timeframe' not in columns:
+        conn.execute(text("ALTER TABLE price_data ADD COLUMN timeframe VARCHAR(5) NOT NULL DEFAULT '1d'"))
+    _dedupe(conn, 'price_data', ['symbol', 'timeframe', 'timestamp'], condition='tenant_id IS NULL')
+    created = create_missing_indexes(conn, 'price_data')
+    if created:
+        print(f"Created indexes on price_data: {', '.join(created)}")
+
+
+MIGRATIONS = [
+    (1, 'query_indexes', _migration_001_query_indexes),
+    (2, 'price_data_timeframe', _migration_002_price_data_timeframe),
+]
+
+
+def upgrade_schema(engine=None) -> list:
+    """Apply pending migrations in order. Returns the versions applied."""
+    engine = engine or db.engine
+    applied = []
+    with engine.begin() as conn:
+        _migration_meta.create_all(conn, checkfirst=True)
+        done = {row[0] for row in conn.execute(schema_migrations.select().with_only_columns(schema_migrations.c.version))}
+
+    for version, name, migrate in MIGRATIONS:
+        if version in done:
+            continue
+        with engine.begin() as conn:
+            migrate(conn)
+            conn.execute(schema_migrations.insert().values(version=version, name=name, applied_at=datetime.utcnow()))
+        applied.append(version)
+        print(f"Applied schema migration {version:03d}_{name}.")
+    return applied